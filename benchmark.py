@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the scan hot paths.
+
+Runs against a throwaway SQLite database filled with synthetic OHLCV data,
+so no Postgres or network access is needed:
+
+    python benchmark.py load --symbols 200 --days 365
+    python benchmark.py kernels --symbols 500 --days 250
+    python benchmark.py timeframes --symbols 500 --days 250
+    python benchmark.py scoring --symbols 500 --days 250
+    python benchmark.py backtest --symbols 500 --days 1250
+    python benchmark.py sweep --symbols 500 --days 1250 --combos 64
+    python benchmark.py screen --symbols 500 --days 365
+    python benchmark.py dsl --symbols 500 --days 365
+    python benchmark.py scan-compute --symbols 500 --days 365 --workers 4
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+# Must be set before src.database.db creates the global engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+import pytz
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.db import Base
+from src.models.models import Symbol, OHLCV
+
+
+def build_database(n_symbols: int, n_days: int, seed: int = 7):
+    """Creates an in-memory database with random-walk OHLCV for n_symbols."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    rng = np.random.default_rng(seed)
+    end = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = [end - timedelta(days=n_days - 1 - i) for i in range(n_days)]
+
+    for s in range(n_symbols):
+        symbol = Symbol(ticker=f"SYM{s:04d}.NS", name=f"Synthetic {s}", is_active=True, market_cap_cr=200000)
+        session.add(symbol)
+        session.flush()
+
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_days)))
+        open_ = close * (1 + rng.normal(0, 0.005, n_days))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_days))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_days))
+        volume = rng.integers(10_000, 1_000_000, n_days).astype(float)
+
+        session.bulk_insert_mappings(OHLCV, [
+            {
+                "symbol_id": symbol.id, "timestamp": dates[i],
+                "open": open_[i], "high": high[i], "low": low[i],
+                "close": close[i], "volume": volume[i]
+            }
+            for i in range(n_days)
+        ])
+    session.commit()
+    return session
+
+
+def bench_load(args):
+    from src.services.indicators import IndicatorService
+
+    session = build_database(args.symbols, args.days)
+    service = IndicatorService(session)
+    tickers = [s.ticker for s in session.query(Symbol).all()]
+
+    print(f"load_data: {len(tickers)} symbols x {args.days} days")
+    for compact in (False, True):
+        start = time.perf_counter()
+        total_bytes = 0
+        for ticker in tickers:
+            df = service.load_data(ticker, lookback_days=args.days + 1, compact=compact)
+            total_bytes += int(df.memory_usage(deep=True).sum())
+        elapsed = time.perf_counter() - start
+
+        label = "compact" if compact else "default"
+        print(
+            f"  {label:12s} {elapsed * 1000 / len(tickers):7.2f} ms/symbol  "
+            f"{total_bytes / len(tickers) / 1024:7.1f} KiB/symbol"
+        )
+
+    symbol_ids = [s.id for s in session.query(Symbol).all()]
+    for compact in (False, True):
+        start = time.perf_counter()
+        frames = service.load_data_many(symbol_ids, lookback_days=args.days + 1, compact=compact)
+        elapsed = time.perf_counter() - start
+
+        label = "many+compact" if compact else "many"
+        print(f"  {label:12s} {elapsed * 1000 / len(frames):7.2f} ms/symbol  (single batched query)")
+
+
+def synthetic_frames(n_symbols: int, n_days: int, seed: int = 7):
+    """Random-walk OHLCV frames keyed by a fake symbol id (no database)."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=datetime.now().date(), periods=n_days, freq="B", name="timestamp")
+    frames = {}
+    for s in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_days)))
+        open_ = close * (1 + rng.normal(0, 0.005, n_days))
+        frames[s] = pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_days)),
+            "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_days)),
+            "close": close,
+            "volume": rng.integers(10_000, 1_000_000, n_days).astype(float),
+        }, index=index)
+    return frames
+
+
+def bench_kernels(args):
+    from src.services import indicator_kernels
+    from src.services.indicators import IndicatorService
+
+    frames = synthetic_frames(args.symbols, args.days)
+    service = IndicatorService(db=None)
+    print(f"indicators: {args.symbols} symbols x {args.days} bars (numba available: {indicator_kernels.NUMBA_AVAILABLE})")
+
+    engines = ["pandas", "numpy"] + (["numba"] if indicator_kernels.NUMBA_AVAILABLE else [])
+    for engine in engines:
+        if engine == "numba":
+            service.calculate_indicators(frames[0].copy(), engine=engine)  # JIT warm-up
+        start = time.perf_counter()
+        for df in frames.values():
+            service.calculate_indicators(df.copy(), engine=engine)
+        elapsed = time.perf_counter() - start
+        print(f"  per-symbol {engine:7s} {elapsed * 1000:9.1f} ms total  {elapsed * 1e6 / len(frames):8.1f} us/symbol")
+
+    _, panel, _ = indicator_kernels.stack_panel(frames)
+    arrays = [panel[c] for c in ("open", "high", "low", "close", "volume")]
+    panel_kernels = [("numpy", indicator_kernels.compute_numpy)]
+    if indicator_kernels.NUMBA_AVAILABLE:
+        panel_kernels.append(("numba", indicator_kernels.compute_jit))
+    for name, kernel in panel_kernels:
+        start = time.perf_counter()
+        kernel(*arrays)
+        elapsed = time.perf_counter() - start
+        print(f"  panel      {name:7s} {elapsed * 1000:9.1f} ms total  {elapsed * 1e6 / len(frames):8.1f} us/symbol")
+
+
+def bench_timeframes(args):
+    from src.services.indicator_cache import indicator_cache
+    from src.services.timeframes import TimeframeService
+
+    frames = synthetic_frames(args.symbols, args.days)
+    print(f"timeframes: {args.symbols} symbols x {args.days} daily bars")
+
+    from src.services.indicators import IndicatorService
+
+    indicator_service = IndicatorService(db=None)
+    indicator_service.calculate_indicators(frames[0].copy())  # JIT warm-up
+    start = time.perf_counter()
+    for df in frames.values():
+        indicator_service.calculate_indicators(df)
+    daily = time.perf_counter() - start
+    print(f"  daily indicators (scan path) {daily * 1000:8.1f} ms")
+
+    service = TimeframeService(db=None)
+    for timeframe in TimeframeService.TIMEFRAMES:
+        indicator_cache.clear()
+        start = time.perf_counter()
+        service.compute_many(frames, timeframe)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        service.compute_many(frames, timeframe)
+        warm = time.perf_counter() - start
+        print(f"  {timeframe:8s} cold {cold * 1000:8.1f} ms ({cold / daily:.0%} of daily)   cached {warm * 1000:6.1f} ms")
+
+
+def bench_scoring(args):
+    from src.services.indicators import IndicatorService
+    from src.services.scoring import ScoringService
+
+    service = IndicatorService(db=None)
+    frames = {s: service.calculate_indicators(df) for s, df in synthetic_frames(args.symbols, args.days).items()}
+    scoring = ScoringService()
+    print(f"scoring: latest candle of {args.symbols} symbols")
+
+    start = time.perf_counter()
+    for df in frames.values():
+        scoring.score_signal(df.iloc[-1], df)
+    per_symbol = time.perf_counter() - start
+    print(f"  score_signal loop  {per_symbol * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    _, matrix = scoring.latest_feature_matrix(frames)
+    scoring.score_batch(matrix)
+    batch = time.perf_counter() - start
+    print(f"  score_batch        {batch * 1000:8.1f} ms ({per_symbol / batch:.0f}x)")
+
+    from src.services.strategy import Strategy
+
+    strategies = [
+        Strategy(f"p{k}", rsi_oversold_threshold=25.0 + k, volume_average_period=10 + 5 * (k % 3))
+        for k in range(args.profiles)
+    ]
+    start = time.perf_counter()
+    scoring.score_strategies(frames, strategies)
+    multi = time.perf_counter() - start
+    print(f"  score_strategies   {multi * 1000:8.1f} ms for {len(strategies)} profiles ({multi / batch:.1f}x one profile)")
+
+
+def bench_backtest(args):
+    from src.services.backtest import BacktestEngine
+
+    frames = synthetic_frames(args.symbols, args.days)
+    print(f"backtest: {args.symbols} symbols x {args.days} bars (cpus: {os.cpu_count()})")
+
+    BacktestEngine(workers=1).run({0: frames[0]})  # JIT warm-up
+    for workers in sorted({1, args.workers or os.cpu_count() or 1}):
+        start = time.perf_counter()
+        result = BacktestEngine(workers=workers).run(frames)
+        elapsed = time.perf_counter() - start
+        print(f"  workers={workers:<3d} {elapsed:6.2f} s  {len(result.trades)} trades")
+
+
+def bench_sweep(args):
+    from src.services.optimizer import ParameterSpace, evaluate, prepare_features
+    from src.services.optimizer import _strategy
+
+    frames = synthetic_frames(args.symbols, args.days)
+    combos = ParameterSpace().sample(args.combos, seed=1)
+    strategies = [_strategy(params) for params in combos]
+    print(f"sweep: {args.symbols} symbols x {args.days} bars, {len(combos)} combinations")
+
+    start = time.perf_counter()
+    features = prepare_features(frames, strategies)
+    prepare = time.perf_counter() - start
+    print(f"  shared features   {prepare:6.2f} s (once per sweep)")
+
+    start = time.perf_counter()
+    for strategy in strategies:
+        evaluate(features, strategy)
+    per_combo = (time.perf_counter() - start) / len(strategies)
+    print(f"  per combination   {per_combo * 1000:6.1f} ms/core  (~{3600 / per_combo:,.0f} combinations/hour/core)")
+
+
+def bench_screen(args):
+    from src.config.settings import Config
+    from src.services.indicator_cache import indicator_cache
+    from src.services.stock_screener import StockScreener
+    from src.services.symbol_state import SymbolStateService
+
+    session = build_database(args.symbols, args.days)
+    screener = StockScreener(session)
+    print(f"screener: {args.symbols} large caps x {args.days} days (cpus: {os.cpu_count()})")
+
+    Config.SCREENER_SQL_PREFILTER = False
+    indicator_cache.clear()
+    start = time.perf_counter()
+    full = screener.screen_large_cap_stocks(min_market_cap_cr=100000)
+    print(f"  full load          {time.perf_counter() - start:6.2f} s  {len(full)} stocks")
+
+    indicator_cache.clear()
+    start = time.perf_counter()
+    SymbolStateService(session).refresh([s.id for s in screener.large_cap_symbols(100000)])
+    print(f"  state build        {time.perf_counter() - start:6.2f} s  (done by run_scan after ingestion)")
+
+    Config.SCREENER_SQL_PREFILTER = True
+    indicator_cache.clear()
+    start = time.perf_counter()
+    prefiltered = screener.screen_large_cap_stocks(min_market_cap_cr=100000)
+    print(f"  SQL pre-filter     {time.perf_counter() - start:6.2f} s  {len(prefiltered)} stocks")
+
+    for workers in sorted({1, args.workers or os.cpu_count() or 1}):
+        indicator_cache.clear()
+        start = time.perf_counter()
+        result = screener.screen_parallel(100000, workers=workers, deadline_seconds=0)
+        print(f"  panel workers={workers:<3d} {time.perf_counter() - start:6.2f} s  {len(result['stocks'])} stocks")
+
+
+def bench_dsl(args):
+    from src.services.screen_dsl import ScreenQueryService, compile_screen
+
+    session = build_database(args.symbols, args.days)
+    service = ScreenQueryService(session)
+    print(f"screen expressions: {args.symbols} symbols x {args.days} days")
+
+    start = time.perf_counter()
+    universe = service.universe()
+    print(f"  universe build     {time.perf_counter() - start:8.3f} s  (once per data version)")
+
+    expressions = [
+        "rsi14 between 20 and 35 and ha_green and close > sma200",
+        "(hammer or bullish_engulfing) and volume > 1.5 * vol_avg_20",
+        "not macd_bullish and change_pct < -2 or vol_z > 2",
+    ]
+    for expression in expressions:
+        compile_screen(expression)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = service.run(expression)
+        per_query = (time.perf_counter() - start) / args.repeat
+        print(f"  {per_query * 1000:8.3f} ms/query  {result['count']:4d} matches  {expression}")
+    assert len(universe.symbols) == args.symbols
+
+
+def bench_scan_compute(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.services.indicator_cache import indicator_cache
+    from src.services.scan_compute import ScanCompute
+    from src.services.scoring import ScoringService
+
+    frames = synthetic_frames(args.symbols, args.days)
+    ids = list(frames)
+    batches = [{s: frames[s] for s in ids[i:i + args.batch_size]} for i in range(0, len(ids), args.batch_size)]
+    scoring_service = ScoringService()
+    strategies = [scoring_service.strategy]
+    print(f"scan compute (indicators + scoring): {args.symbols} symbols x {args.days} days in "
+          f"{len(batches)} batches (cpus: {os.cpu_count()})")
+
+    def run_batch(compute, batch):
+        computed = compute.indicators(batch)
+        compute.score(computed)
+        return computed
+
+    max_workers = args.workers or os.cpu_count() or 1
+    counts = sorted({1, 2, max_workers} | {w for w in (4, 8, 16) if w < max_workers})
+    baseline = None
+    for workers in counts:
+        compute = ScanCompute(workers, scoring_service, strategies)
+        passes = []
+        # The first pass starts the worker processes and loads the kernels in each
+        for _ in range(2):
+            indicator_cache.clear()
+            start = time.perf_counter()
+            # One compute-stage thread per worker process, as in scan_symbols
+            with ThreadPoolExecutor(max_workers=workers) as threads:
+                computed = list(threads.map(lambda batch: run_batch(compute, batch), batches))
+            passes.append(time.perf_counter() - start)
+        startup, elapsed = passes
+        baseline = baseline or elapsed
+        print(f"  workers={workers:<3d} {elapsed:7.2f} s  {elapsed * 1e6 / len(ids):8.1f} us/symbol  "
+              f"speedup {baseline / elapsed:4.2f}x  (first pass {startup:5.2f} s)")
+
+        if args.charts:
+            sample = [df for batch in computed for df in batch.values()][:args.charts]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as threads:
+                list(threads.map(lambda df: compute.chart(df, "BENCH"), sample))
+            print(f"             {len(sample)} charts {time.perf_counter() - start:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load = sub.add_parser("load", help="IndicatorService.load_data time and memory")
+    load.add_argument("--symbols", type=int, default=200)
+    load.add_argument("--days", type=int, default=365)
+    load.set_defaults(func=bench_load)
+
+    kernels = sub.add_parser("kernels", help="pandas vs NumPy vs Numba indicator computation")
+    kernels.add_argument("--symbols", type=int, default=500)
+    kernels.add_argument("--days", type=int, default=250)
+    kernels.set_defaults(func=bench_kernels)
+
+    timeframes = sub.add_parser("timeframes", help="weekly/monthly resampling + indicators vs the daily pass")
+    timeframes.add_argument("--symbols", type=int, default=500)
+    timeframes.add_argument("--days", type=int, default=250)
+    timeframes.set_defaults(func=bench_timeframes)
+
+    scoring = sub.add_parser("scoring", help="per-symbol score_signal vs cross-sectional score_batch")
+    scoring.add_argument("--symbols", type=int, default=500)
+    scoring.add_argument("--days", type=int, default=250)
+    scoring.add_argument("--profiles", type=int, default=8)
+    scoring.set_defaults(func=bench_scoring)
+
+    backtest = sub.add_parser("backtest", help="vectorized backtest, inline vs process pool")
+    backtest.add_argument("--symbols", type=int, default=500)
+    backtest.add_argument("--days", type=int, default=1250)
+    backtest.add_argument("--workers", type=int, default=0)
+    backtest.set_defaults(func=bench_backtest)
+
+    sweep = sub.add_parser("sweep", help="parameter sweep: shared feature build and per-combination cost")
+    sweep.add_argument("--symbols", type=int, default=500)
+    sweep.add_argument("--days", type=int, default=1250)
+    sweep.add_argument("--combos", type=int, default=64)
+    sweep.set_defaults(func=bench_sweep)
+
+    screen = sub.add_parser("screen", help="sequential vs chunked panel large-cap screening")
+    screen.add_argument("--symbols", type=int, default=500)
+    screen.add_argument("--days", type=int, default=365)
+    screen.add_argument("--workers", type=int, default=0)
+    screen.set_defaults(func=bench_screen)
+
+    dsl = sub.add_parser("dsl", help="ad-hoc screen expressions over a cached universe")
+    dsl.add_argument("--symbols", type=int, default=500)
+    dsl.add_argument("--days", type=int, default=365)
+    dsl.add_argument("--repeat", type=int, default=100)
+    dsl.set_defaults(func=bench_dsl)
+
+    scan_compute = sub.add_parser("scan-compute", help="scan indicators + scoring (+ charts) by worker process count")
+    scan_compute.add_argument("--symbols", type=int, default=500)
+    scan_compute.add_argument("--days", type=int, default=365)
+    scan_compute.add_argument("--batch-size", type=int, default=25)
+    scan_compute.add_argument("--workers", type=int, default=0)
+    scan_compute.add_argument("--charts", type=int, default=0)
+    scan_compute.set_defaults(func=bench_scan_compute)
+
+    args = parser.parse_args()
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
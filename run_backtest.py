@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Backtest the scoring strategies over the OHLCV history stored in the database.
+
+    python run_backtest.py --years 5 --workers 4
+    python run_backtest.py --profiles aggressive --trades-csv trades.csv
+    python run_backtest.py --patterns hammer,bullish_engulfing
+
+Strategies are the default Config profile plus any STRATEGY_PROFILES (or the
+--profiles given); exits are the bot's SL/target presets with a time stop of
+BACKTEST_MAX_HOLD_DAYS.
+"""
+
+import argparse
+import logging
+import time
+from dotenv import load_dotenv
+from src.database.db import db_instance
+from src.models.models import Symbol
+from src.services.backtest import BacktestEngine
+from src.services.indicators import IndicatorService
+from src.services.strategy import Strategy
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, default=5, help="history to backtest (default 5)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default BACKTEST_WORKERS)")
+    parser.add_argument("--profiles", default=None, help="comma-separated strategy profiles (default STRATEGY_PROFILES)")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N active symbols")
+    parser.add_argument("--patterns", default=None,
+                        help="comma-separated candlestick patterns; only trades entered on those bars")
+    parser.add_argument("--trades-csv", default=None, help="write every simulated trade to this CSV file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_gen = db_instance.get_db()
+    db = next(db_gen)
+
+    try:
+        query = db.query(Symbol).filter(Symbol.is_active == True).order_by(Symbol.id)
+        if args.limit:
+            query = query.limit(args.limit)
+        symbols = query.all()
+        tickers = {symbol.id: symbol.ticker for symbol in symbols}
+
+        start = time.perf_counter()
+        frames = IndicatorService(db).load_data_many(list(tickers), lookback_days=int(args.years * 365))
+        logger.info(f"Loaded {len(frames)} symbols in {time.perf_counter() - start:.1f}s")
+
+        names = [p.strip().lower() for p in args.profiles.split(",")] if args.profiles else None
+        engine = BacktestEngine(strategies=Strategy.load_profiles(names), workers=args.workers)
+
+        start = time.perf_counter()
+        result = engine.run(frames)
+        logger.info(f"Backtest finished in {time.perf_counter() - start:.1f}s: {len(result.trades)} trades")
+
+        if args.patterns:
+            result = result.with_patterns([p.strip().lower() for p in args.patterns.split(",")])
+            logger.info(f"{len(result.trades)} trades entered on {args.patterns} candles")
+
+        print(result.stats.round(2).to_string())
+
+        if args.trades_csv:
+            trades = result.trades.assign(ticker=result.trades['symbol_id'].map(tickers))
+            trades.to_csv(args.trades_csv, index=False)
+            logger.info(f"Trades written to {args.trades_csv}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
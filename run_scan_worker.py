@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Sharded market scan across worker processes.
+
+    python run_scan_worker.py --coordinator --workers 4   # plan, run 4 local workers, summarize
+    python run_scan_worker.py                             # join the open sharded run as a worker
+    python run_scan_worker.py --run-id 12
+    python run_scan_worker.py --simulate-lambda --workers 4  # Lambda plan/shard/reduce events, in-process
+
+Workers lease symbol shards from the scan_shards table, so more workers can
+join from other machines sharing the database; shards of crashed workers
+are reclaimed once their lease expires.
+"""
+
+import argparse
+import json
+import logging
+from dotenv import load_dotenv
+from src.database.db import db_instance
+from src.main import run_scan_worker, run_sharded_scan
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coordinator", action="store_true", help="plan the run, start workers and summarize")
+    parser.add_argument("--workers", type=int, default=None, help="local worker processes (default SCAN_SHARD_WORKERS)")
+    parser.add_argument("--shard-size", type=int, default=None, help="symbols per shard (default SCAN_SHARD_SIZE)")
+    parser.add_argument("--simulate-lambda", action="store_true",
+                        help="run the Lambda fan-out (plan, shard events on threads, reduce) locally")
+    parser.add_argument("--run-id", type=int, default=None, help="scan run to work on (default: latest open run)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_instance.create_tables()
+
+    if args.simulate_lambda:
+        from src.lambda_function import simulate_fanout
+        result = simulate_fanout(workers=args.workers or 4, shard_size=args.shard_size)
+        print(json.dumps(result, indent=2, default=str))
+    elif args.coordinator:
+        result = run_sharded_scan(workers=args.workers, shard_size=args.shard_size)
+        if result:
+            print(json.dumps(result, indent=2, default=str))
+    else:
+        run_scan_worker(run_id=args.run_id)
+
+
+if __name__ == "__main__":
+    main()
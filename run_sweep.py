@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep of the scoring thresholds over stored OHLCV history.
+
+    python run_sweep.py --name nightly --mode random --samples 2000 --workers 8
+    python run_sweep.py --name rsi --grid '{"RSI_OVERSOLD_THRESHOLD": [25, 30, 35], "HA_CONSECUTIVE_CANDLES": ["NA", 2]}'
+    python run_sweep.py --name nightly --report
+
+Results are stored in the sweep_results table; rerunning a sweep with the
+same --name only evaluates combinations that are not stored yet.
+"""
+
+import argparse
+import logging
+import time
+from dotenv import load_dotenv
+from src.database.db import db_instance
+from src.models.models import Symbol
+from src.services.indicators import IndicatorService
+from src.services.optimizer import ParameterSpace, ParameterSweep
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", required=True, help="sweep name (results and resume key)")
+    parser.add_argument("--mode", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=1000, help="combinations to draw in random mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--grid", default=None, help="JSON {PARAMETER: [values]} (default: built-in grid)")
+    parser.add_argument("--years", type=float, default=5, help="history to evaluate (default 5)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default BACKTEST_WORKERS)")
+    parser.add_argument("--batch-size", type=int, default=16, help="combinations per task / commit")
+    parser.add_argument("--report", action="store_true", help="only print the stored results")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_instance.create_tables()
+    db_gen = db_instance.get_db()
+    db = next(db_gen)
+
+    try:
+        sweep = ParameterSweep(db, args.name, workers=args.workers, batch_size=args.batch_size)
+
+        if not args.report:
+            space = ParameterSpace.from_json(args.grid) if args.grid else ParameterSpace()
+            combos = space.grid() if args.mode == "grid" else space.sample(args.samples, seed=args.seed)
+
+            symbol_ids = [row[0] for row in db.query(Symbol.id).filter(Symbol.is_active == True).all()]
+            start = time.perf_counter()
+            frames = IndicatorService(db).load_data_many(symbol_ids, lookback_days=int(args.years * 365))
+            logger.info(f"Loaded {len(frames)} symbols in {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            evaluated = sweep.run(frames, combos)
+            elapsed = time.perf_counter() - start
+            if evaluated:
+                logger.info(f"Evaluated {evaluated} combinations in {elapsed:.1f}s ({evaluated / elapsed:.1f}/s)")
+
+        results = sweep.results()
+        if results.empty:
+            print("No results with enough signals yet.")
+        else:
+            print(results.head(args.top).round(2).to_string())
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,16 @@
 REST API for portfolio management and authentication
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime, timedelta
 import jwt
+import json
 import random
 import string
 import logging
@@ -20,6 +22,11 @@ from src.models.models import Subscriber, PaperTrade, Symbol, TradeSignal
 from src.services.portfolio import PortfolioService
 from src.services.alerting import AlertService
 from src.services.stock_screener import StockScreener
+from src.services.indicators import IndicatorService
+from src.services.data_version import current_version
+from src.services.screening_cache import screening_cache
+from src.services.screen_dsl import FIELDS as SCREEN_FIELDS, ScreenError, ScreenQueryService
+from src.services.signal_outcomes import SignalOutcomeService
 import os
 
 logger = logging.getLogger(__name__)
@@ -105,11 +112,17 @@ async def run_job(background_tasks: BackgroundTasks):
             
             from src.main import run_scan
             logger.info("Starting background market scan...")
-            run_scan()
+            result = run_scan() or {}
+            job_status["scan_run"] = result.get("run")
+            job_status["pipeline"] = result.get("pipeline")
             logger.info("Background market scan completed.")
             
-            job_status["status"] = "completed"
-            job_status["message"] = "Market scan completed successfully"
+            if (result.get("run") or {}).get("status") == "stopped":
+                job_status["status"] = "stopped"
+                job_status["message"] = "Market scan stopped at its time budget; the next run resumes it"
+            else:
+                job_status["status"] = "completed"
+                job_status["message"] = "Market scan completed successfully"
         except Exception as e:
             logger.error(f"Background scan failed: {e}")
             job_status["status"] = "failed"
@@ -173,20 +186,67 @@ async def get_signals(limit: int = 50, db: Session = Depends(get_db)):
         })
     return result
 
+@app.get("/signals/performance", summary="Get Signal Performance", description="Forward returns, MAE/MFE and SL/target hit rates of past trading signals")
+async def get_signal_performance(group_by: str = "confidence", days: Optional[int] = None, db: Session = Depends(get_db)):
+    """Aggregated outcomes of past signals, grouped by confidence, direction or symbol"""
+    if group_by not in SignalOutcomeService.GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(SignalOutcomeService.GROUP_BY)}")
+    return SignalOutcomeService(db).performance(group_by=group_by, days=days)
+
+def _stream_screening(min_market_cap: float, deadline: Optional[float]):
+    """NDJSON screening events, on a session of their own (the request's session is closed before streaming)."""
+    db = db_instance.SessionLocal()
+    try:
+        for event in StockScreener(db).iter_screen(min_market_cap, deadline_seconds=deadline):
+            yield json.dumps(event) + "\n"
+    finally:
+        db.close()
+
 @app.get("/screen-stocks", summary="Screen Large-Cap Stocks", description="Screen Indian large-cap stocks based on Claude prompt criteria")
-async def screen_large_cap_stocks(min_market_cap: float = None, db: Session = Depends(get_db)):
-    """Screen Indian large-cap stocks based on Claude prompt criteria"""
+def screen_large_cap_stocks(request: Request, min_market_cap: float = None, stream: bool = False,
+                            deadline: Optional[float] = None, db: Session = Depends(get_db)):
+    """
+    Screen Indian large-cap stocks based on Claude prompt criteria
+
+    Symbols are screened in parallel chunks within a time budget (deadline
+    seconds, default SCREENER_DEADLINE_SECONDS); 'complete' is false when the
+    budget ran out first. With stream=true, results are sent as NDJSON lines
+    as each chunk finishes, followed by a summary line.
+
+    Complete results are cached until new market data is ingested or the
+    screening rules change, and carry an ETag; concurrent identical requests
+    share one screening run. Streaming requests always screen afresh.
+    """
     try:
         if min_market_cap is None:
             min_market_cap = float(os.getenv('MIN_MARKET_CAP_CR', '100000'))
+        if stream:
+            return StreamingResponse(_stream_screening(min_market_cap, deadline), media_type="application/x-ndjson")
         screener = StockScreener(db)
-        results = screener.screen_large_cap_stocks(min_market_cap)
-        return {
-            "status": "success",
-            "count": len(results),
-            "stocks": results,
-            "formatted_message": screener.format_screening_results(results)
-        }
+
+        key = (float(min_market_cap), StockScreener.RULES_VERSION, IndicatorService.INDICATOR_VERSION,
+               current_version(db))
+        etag = screening_cache.etag(key)
+        if request.headers.get("if-none-match") == etag and key in screening_cache:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        def compute():
+            result = screener.screen_parallel(min_market_cap, deadline_seconds=deadline)
+            return {
+                "status": "success",
+                "count": len(result["stocks"]),
+                "stocks": result["stocks"],
+                "screened": result["screened"],
+                "total": result["total"],
+                "complete": result["complete"],
+                "formatted_message": screener.format_screening_results(result["stocks"])
+            }
+
+        payload, source = screening_cache.get_or_compute(key, compute, cacheable=lambda p: p["complete"])
+        headers = {"X-Cache": source.upper()}
+        if payload["complete"]:
+            headers["ETag"] = etag
+        return JSONResponse(payload, headers=headers)
     except Exception as e:
         logger.error(f"Stock screening error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -235,6 +295,11 @@ class PortfolioResponse(BaseModel):
     avg_pnl: float = Field(..., description="Average P&L per trade")
     open_positions: int = Field(..., description="Number of currently open trades")
 
+class ScreenQuery(BaseModel):
+    expression: str = Field(..., description="Screen expression",
+                            example="rsi14 between 20 and 35 and ha_green and close > sma200")
+    limit: int = Field(100, ge=1, le=1000, description="Maximum matches returned")
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -254,6 +319,28 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 def generate_otp():
     return ''.join(random.choices(string.digits, k=6))
 
+@app.get("/screens/fields", summary="Screen Fields", description="Fields available in screen expressions")
+async def get_screen_fields():
+    """List screenable fields with their type (number or bool)"""
+    return {name: {"type": kind, "description": description} for name, (kind, description) in SCREEN_FIELDS.items()}
+
+@app.post("/screens/query", summary="Run Ad-hoc Screen", description="Evaluate a screen expression over all active symbols")
+def run_screen_query(query: ScreenQuery, db: Session = Depends(get_db)):
+    """
+    Evaluate a screen expression, e.g. 'rsi14 between 20 and 35 and ha_green and close > sma200'
+
+    Latest-session fields for the universe are computed once per data version;
+    each query then only evaluates vectorized masks. Invalid expressions
+    return 400 with the parse or validation error.
+    """
+    try:
+        return ScreenQueryService(db).run(query.expression, limit=query.limit)
+    except ScreenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Screen query error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/auth/login", summary="Send OTP to Telegram", description="Send 6-digit OTP to user's telegram account for authentication")
 async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """Send OTP to user's telegram"""
@@ -50,5 +50,67 @@ class Config:
     PRIMARY_WINDOW_CANDLES = _get_optional_int.__func__("PRIMARY_WINDOW_CANDLES", "70")
     CONFIRMATION_WINDOW_CANDLES = _get_optional_int.__func__("CONFIRMATION_WINDOW_CANDLES", "30")
 
+    # Extra scoring profiles evaluated alongside the default (comma-separated names,
+    # parameters overridden via STRATEGY_<NAME>_<PARAMETER>)
+    STRATEGY_PROFILES = [p.strip().lower() for p in os.getenv("STRATEGY_PROFILES", "").split(",") if p.strip()]
+
+    # Backtesting: worker processes (0 = one per CPU) and time stop in trading days
+    BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "0"))
+    BACKTEST_MAX_HOLD_DAYS = int(os.getenv("BACKTEST_MAX_HOLD_DAYS", "20"))
+
+    # Parallel screening: worker processes (0 = one per CPU, 1 = in-process), symbols
+    # per chunk and the time budget in seconds (NA = no deadline)
+    SCREENER_WORKERS = int(os.getenv("SCREENER_WORKERS", "0"))
+    SCREENER_CHUNK_SIZE = int(os.getenv("SCREENER_CHUNK_SIZE", "50"))
+    SCREENER_DEADLINE_SECONDS = _get_optional_float.__func__("SCREENER_DEADLINE_SECONDS", "20")
+    # Select screener candidates from the symbol_states table before loading history
+    SCREENER_SQL_PREFILTER = os.getenv("SCREENER_SQL_PREFILTER", "true").lower() == "true"
+    # /screen-stocks results kept per (market cap, rules version, data version)
+    SCREENER_CACHE_ENTRIES = int(os.getenv("SCREENER_CACHE_ENTRIES", "32"))
+
+    # Scan pipeline (run_scan): bounded queue size between stages, symbols per
+    # compute batch and how long a batch waits to fill, per-stage worker counts
+    # and the progress log interval in seconds (0 = summary only)
+    SCAN_QUEUE_SIZE = int(os.getenv("SCAN_QUEUE_SIZE", "100"))
+    SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", "25"))
+    SCAN_BATCH_WAIT_SECONDS = float(os.getenv("SCAN_BATCH_WAIT_SECONDS", "0.5"))
+    SCAN_COMPUTE_WORKERS = int(os.getenv("SCAN_COMPUTE_WORKERS", "2"))
+    SCAN_ENRICH_WORKERS = int(os.getenv("SCAN_ENRICH_WORKERS", "4"))
+    SCAN_NOTIFY_WORKERS = int(os.getenv("SCAN_NOTIFY_WORKERS", "2"))
+    SCAN_REPORT_SECONDS = float(os.getenv("SCAN_REPORT_SECONDS", "30"))
+    # Scan CPU work (indicators, scoring, alert charts): worker processes fed NumPy arrays
+    # (1 = in the pipeline threads, 0 = one per CPU)
+    SCAN_PROCESS_WORKERS = int(os.getenv("SCAN_PROCESS_WORKERS", "1"))
+    # Scan ledger (scan_runs / scan_items): an unfinished scan started within this many
+    # hours is resumed instead of starting over (0 = always start over), and the scan time
+    # budget in seconds after which it stops cleanly and checkpoints (NA = no budget)
+    SCAN_RESUME_WINDOW_HOURS = float(os.getenv("SCAN_RESUME_WINDOW_HOURS", "3"))
+    SCAN_TIME_BUDGET_SECONDS = _get_optional_float.__func__("SCAN_TIME_BUDGET_SECONDS", "NA")
+    # Sharded scan (run_scan_worker.py): local worker processes (0 = one per CPU), symbols
+    # per shard, shard lease in seconds (renewed by heartbeats, reclaimed once expired)
+    # and attempts before a shard is given up
+    SCAN_SHARD_WORKERS = int(os.getenv("SCAN_SHARD_WORKERS", "0"))
+    SCAN_SHARD_SIZE = int(os.getenv("SCAN_SHARD_SIZE", "50"))
+    SCAN_LEASE_SECONDS = float(os.getenv("SCAN_LEASE_SECONDS", "120"))
+    SCAN_SHARD_MAX_ATTEMPTS = int(os.getenv("SCAN_SHARD_MAX_ATTEMPTS", "3"))
+
+    # Alert enrichment (news, calendar, holders, insiders): lookup threads shared
+    # across alerts and the per-alert deadline in seconds
+    ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "16"))
+    ENRICHMENT_TIMEOUT_SECONDS = float(os.getenv("ENRICHMENT_TIMEOUT_SECONDS", "8"))
+    # Enrichment cache (enrichment_cache table): TTL in hours per lookup group (0 = not
+    # cached) and the fraction of the TTL after which entries are refreshed in the background
+    ENRICHMENT_CACHE_ENABLED = os.getenv("ENRICHMENT_CACHE_ENABLED", "true").lower() == "true"
+    ENRICHMENT_TTL_HOLDERS_HOURS = float(os.getenv("ENRICHMENT_TTL_HOLDERS_HOURS", "168"))
+    ENRICHMENT_TTL_CALENDAR_HOURS = float(os.getenv("ENRICHMENT_TTL_CALENDAR_HOURS", "24"))
+    ENRICHMENT_TTL_INSIDERS_HOURS = float(os.getenv("ENRICHMENT_TTL_INSIDERS_HOURS", "24"))
+    ENRICHMENT_REFRESH_AHEAD = float(os.getenv("ENRICHMENT_REFRESH_AHEAD", "0.75"))
+
+    # Indicator implementation: auto (Numba if installed, else NumPy), numba, numpy, pandas
+    INDICATOR_ENGINE = os.getenv("INDICATOR_ENGINE", "auto").lower()
+
+    # Indicator cache memory budget in MB (0 disables caching)
+    INDICATOR_CACHE_MB = float(os.getenv("INDICATOR_CACHE_MB", "64"))
+
     # Market Cap Filter Parameters (Set to NA to skip filter)
     MIN_MARKET_CAP_CRORE = _get_optional_float.__func__("MIN_MARKET_CAP_CRORE", "10000")
@@ -1,29 +1,133 @@
+"""
+AWS Lambda entry point.
+
+The event's "action" picks what the invocation does:
+
+    {}                                              whole scan in one invocation (checkpointed, resumable)
+    {"action": "plan"}                              split the active symbols into shards; returns one
+                                                    shard event per shard and the reduce event
+    {"action": "shard", "run_id": 3, "shard": 0}    scan one shard and store its results (no alerts)
+    {"action": "reduce", "run_id": 3}               send the alerts and the summary once every shard is done
+
+A Step Functions Map state (or any fan-out) runs the shard events of a plan
+in parallel and the reduce event after them. simulate_fanout runs the same
+plan -> shards -> reduce flow in-process on a thread pool, without AWS.
+"""
+
 import json
 import logging
-from src.main import run_scan
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.main import plan_sharded_scan, reduce_sharded_scan, run_scan, run_scan_shard
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Seconds kept free before the Lambda timeout to checkpoint and return
+CHECKPOINT_MARGIN_SECONDS = 60
+
+
+def _time_budget(context):
+    """Seconds the invocation can work before it has to checkpoint (None without a Lambda context)."""
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        return max(1.0, context.get_remaining_time_in_millis() / 1000 - CHECKPOINT_MARGIN_SECONDS)
+    return None
+
+
+def _response(status_code, body):
+    return {'statusCode': status_code, 'body': json.dumps(body, default=str)}
+
+
+def _scan(event, context):
+    logger.info("Starting Market Scan from Lambda...")
+    # Stop and checkpoint before the hard timeout; the next invocation resumes the run
+    result = run_scan(time_budget=_time_budget(context)) or {}
+    run = result.get('run') or {}
+
+    if run.get('status') == 'stopped':
+        logger.info(f"Market Scan stopped at its time budget: {run}")
+        return _response(202, {'message': 'Market Scan checkpointed; invoke again to resume', 'run': run})
+
+    logger.info("Market Scan Completed Successfully.")
+    return _response(200, 'Market Scan Completed Successfully')
+
+
+def _plan(event, context):
+    plan = plan_sharded_scan(event.get('shard_size'))
+    if plan is None:
+        return _response(200, {'message': 'No symbols to scan', 'shards': []})
+
+    run_id = plan['run_id']
+    return _response(200, {
+        'run_id': run_id,
+        'symbols': plan['symbols'],
+        'shards': [{'action': 'shard', 'run_id': run_id, 'shard': shard.position, 'symbol_ids': shard.symbol_ids}
+                   for shard in plan['shards']],
+        'reduce': {'action': 'reduce', 'run_id': run_id},
+    })
+
+
+def _shard(event, context):
+    run_id, position = int(event['run_id']), int(event['shard'])
+    request_id = getattr(context, 'aws_request_id', None) or uuid.uuid4().hex
+    status = run_scan_shard(run_id, position, owner=f"lambda:{request_id}", time_budget=_time_budget(context))
+    # A failed shard was released: invoking the event again retries it
+    return _response(202 if status == 'failed' else 200, {'run_id': run_id, 'shard': position, 'status': status})
+
+
+def _reduce(event, context):
+    result = reduce_sharded_scan(int(event['run_id']))
+    status = result['run'].get('status')
+    return _response(200 if status == 'completed' else 202, result)
+
+
+ACTIONS = {'scan': _scan, 'plan': _plan, 'shard': _shard, 'reduce': _reduce}
+
+
 def lambda_handler(event, context):
     """
     AWS Lambda Handler
     """
     logger.info(f"Received event: {json.dumps(event)}")
+    event = event or {}
+    action = ACTIONS.get(event.get('action', 'scan'))
+    if action is None:
+        return _response(400, f"Unknown action: {event.get('action')}")
 
     try:
-        logger.info("Starting Market Scan from Lambda...")
-        run_scan()
-        logger.info("Market Scan Completed Successfully.")
-
-        return {
-            'statusCode': 200,
-            'body': json.dumps('Market Scan Completed Successfully')
-        }
+        return action(event, context)
     except Exception as e:
         logger.error(f"Error in Lambda execution: {e}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error: {str(e)}")
-        }
+        return _response(500, f"Error: {str(e)}")
+
+
+class LocalContext:
+    """Stand-in for the Lambda context object, with a timeout like the function's."""
+
+    def __init__(self, timeout_seconds: float = 900):
+        self.aws_request_id = uuid.uuid4().hex
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def simulate_fanout(workers: int = 4, shard_size: int = None, timeout_seconds: float = 900):
+    """
+    Runs a fanned-out scan locally: the plan event, its shard events on a
+    pool of `workers` threads (one invocation each, as a Map state would),
+    then the reduce event. Returns the parsed bodies of the three steps.
+    """
+    plan = lambda_handler({'action': 'plan', 'shard_size': shard_size}, LocalContext(timeout_seconds))
+    body = json.loads(plan['body'])
+    if plan['statusCode'] != 200 or not body.get('reduce'):
+        return {'plan': body, 'shards': [], 'reduce': None}
+
+    def invoke(event):
+        return json.loads(lambda_handler(event, LocalContext(timeout_seconds))['body'])
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        shards = list(pool.map(invoke, body['shards']))
+    return {'plan': body, 'shards': shards, 'reduce': invoke(body['reduce'])}
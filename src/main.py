@@ -3,6 +3,12 @@
 
 import logging
 import html
+import itertools
+import multiprocessing
+import socket
+import threading
+import time
+from typing import Callable
 from dotenv import load_dotenv
 import os
 
@@ -10,13 +16,24 @@ from src.database.db import db_instance
 from src.services.market_data import MarketDataService
 from src.services.indicators import IndicatorService
 from src.services.scoring import ScoringService
+from src.services.strategy import Strategy
 from src.services.alerting import AlertService
-from src.services.plotting import ChartService
 from src.services.symbol_service import SymbolService
 from src.services.optimized_symbol_service import OptimizedSymbolService
 from src.services.ultra_optimized_symbol_service import UltraOptimizedSymbolService
 from src.services.auto_sell import AutoSellService
-from src.models.models import Symbol, TradeSignal
+from src.services.signal_outcomes import SignalOutcomeService
+from src.services.candle_patterns import CandlePatternService
+from src.services.symbol_state import SymbolStateService
+from src.services.indicator_cache import indicator_cache
+from src.services.pipeline import Pipeline, Stage
+from src.services.enrichment import Enrichment, EnrichmentService
+from src.services.enrichment_cache import EnrichmentCache
+from src.services.scan_ledger import ALERTED, COMPLETED, INGESTED, STOPPED, ScanLedger
+from src.services.scan_shards import ShardQueue, merge_stage_reports
+from src.services.scan_compute import ScanCompute
+from src.config.settings import Config
+from src.models.models import ScanRun, Symbol, TradeSignal
 
 # Configure logging
 logging.basicConfig(
@@ -29,409 +46,877 @@ logger = logging.getLogger(__name__)
 logging.getLogger("yfinance").setLevel(logging.CRITICAL)
 
 
-def run_scan():
-    logger.info("Starting Market Scan...")
-    db_gen = db_instance.get_db()
-    db = next(db_gen)
+def format_signal_message(symbol, latest_row, score_result, company_type: str) -> str:
+    """Alert text for a qualified signal: price, Heikin Ashi candle, reasons and strategy explanation"""
+    company_name = symbol.name or "N/A"
+    ticker = symbol.ticker
+    score = score_result['score']
+    conf = score_result['confidence']
+    price = latest_row['close']
+    direction = score_result['direction']
+    # Escape reasons to avoid HTML parsing errors (e.g. < 30)
+    reasons_str = "\n".join([f"• {html.escape(r)}" for r in score_result['reasons']])
 
-    signals_found = 0  # Track number of signals found
+    # Emoji Map
+    icon = "🟢" if direction == "LONG" else "🔴"
 
-    try:
-        # Initialize Services
-        market_data_service = MarketDataService(db)
-        indicator_service = IndicatorService(db)
-        scoring_service = ScoringService()
-        scoring_service = ScoringService()
-        alert_service = AlertService()
-        chart_service = ChartService()
-        symbol_service = SymbolService(db)
+    # Format Volume (e.g. 1.5M, 500K)
+    vol = latest_row['volume']
+    if vol >= 1_000_000:
+        vol_str = f"{vol / 1_000_000:.2f}M"
+    elif vol >= 1_000:
+        vol_str = f"{vol / 1_000:.2f}K"
+    else:
+        vol_str = f"{vol:.0f}"
 
-        # Send job started notification
-        from datetime import datetime
-        start_time = datetime.now()
-        start_msg = (
-            f"🚀 <b>Market Scan Started</b>\n\n"
-            f"📅 <b>Date:</b> {start_time.strftime('%d-%b-%Y')}\n"
-            f"🕒 <b>Time:</b> {start_time.strftime('%H:%M:%S')}\n\n"
-            f"🔍 <b>Status:</b> Scanning active symbols for trading opportunities...\n\n"
-            f"<i>Generated by Market Analysis Bot</i>"
-        )
-        alert_service.send_telegram_message(start_msg, specific_chat_id=alert_service.buy_channel_id)
-
-        # Sync Nifty 500 High Cap Stocks - Skip on production to avoid timeout
-        # Run sync manually or via separate job
-        skip_sync = os.getenv('SKIP_SYMBOL_SYNC', 'false').lower() == 'true'
-        
-        if not skip_sync:
-            logger.info("Checking if stock sync is needed...")
-            optimized_service = OptimizedSymbolService(db)
-            if optimized_service.should_sync():
-                optimized_service.sync_high_cap_stocks_optimized(max_workers=20)
-            else:
-                logger.info("⏭️ Skipping sync - last sync was less than 24 hours ago")
+    # Build dynamic strategy explanation based on actual conditions met
+    strategy_parts = []
+
+    if direction == "LONG":
+        strategy_parts.append("<b>📈 RSI Oversold Mean-Reversion Setup</b>")
+
+        # Check what conditions were actually met from the reasons
+        reasons_text = " ".join(score_result['reasons'])
+
+        if "Oversold & Rising RSI" in reasons_text:
+            strategy_parts.append("• RSI(14) deeply oversold and turning upward")
+
+        if "Bullish Momentum Confirmed" in reasons_text:
+            strategy_parts.append("• Consecutive bullish Heikin Ashi candles indicate selling exhaustion")
+
+        if "Volume" in reasons_text:
+            strategy_parts.append("• Volume expansion confirms buyer participation")
+
+        if "Major Uptrend Support" in reasons_text:
+            strategy_parts.append("• Price above key moving averages — uptrend support")
         else:
-            logger.info("⏭️ Symbol sync disabled via SKIP_SYMBOL_SYNC env variable")
+            strategy_parts.append("• Counter-trend trade: quick relief rally expected")
 
-        # Run auto-sell checks for existing trades
-        auto_sell_service = AutoSellService()
-        auto_sell_service.check_and_execute_auto_sells()
+        strategy_logic = "\n".join(strategy_parts)
 
-        # Run large-cap stock screening based on Claude prompt criteria
-        from src.services.stock_screener import StockScreener
-        screener = StockScreener(db)
-        min_market_cap = float(os.getenv('MIN_MARKET_CAP_CR', '100000'))
-        screening_results = screener.screen_large_cap_stocks(min_market_cap_cr=min_market_cap)
-        
-        if screening_results:
-            screening_msg = screener.format_screening_results(screening_results)
-            alert_service.send_telegram_message(screening_msg, specific_chat_id=alert_service.buy_channel_id)
+    else:
+        strategy_parts.append("<b>📉 RSI Overbought Reversal Setup</b>")
+
+        reasons_text = " ".join(score_result['reasons'])
+
+        if "Overbought & Falling RSI" in reasons_text:
+            strategy_parts.append("• RSI(14) overbought and turning downward")
+
+        if "Bearish Momentum Confirmed" in reasons_text:
+            strategy_parts.append("• Consecutive bearish Heikin Ashi candles indicate buying exhaustion")
+
+        if "Volume" in reasons_text:
+            strategy_parts.append("• Volume expansion confirms seller participation")
+
+        strategy_logic = "\n".join(strategy_parts)
+
+    msg = (
+        f"🚨 <b>Trade Signal Detected For {ticker} - {latest_row.name.strftime('%d-%b-%Y')}</b>\n\n"
+        f"{icon} <b>Action:</b> {'BUY' if direction == 'LONG' else 'SELL'}\n"
+        f"🧭 <b>Direction:</b> {direction}\n"
+        f"🏢 <b>Company:</b> {company_name}\n"
+        f"📊 <b>Type:</b> {company_type}\n"
+        f"💎 <b>Symbol:</b> {ticker}\n"
+        f"📊 <b>Score:</b> {score}/100 ({conf})\n"
+        f"📉 <b>RSI:</b> {latest_row['RSI']:.2f}\n"
+        f"💰 <b>Price:</b> ₹{price:.2f}\n"
+        f"🕒 <b>Time:</b> {latest_row.name.strftime('%H:%M:%S')}\n\n"
+
+        f"🕯️ <b>Heikin Ashi Candles:</b>\n"
+        f"O: {latest_row['HA_Open']:.2f} | H: {latest_row['HA_High']:.2f}\n"
+        f"L: {latest_row['HA_Low']:.2f}  | C: {latest_row['HA_Close']:.2f}\n"
+        f"Vol: {vol_str}\n\n"
+
+        f"<b>Logic / Reasons:</b>\n"
+        f"{reasons_str}\n\n"
+
+        f"💡 <b>Strategy Explanation:</b>\n"
+        f"{strategy_logic}\n\n"
+    )
+    return msg
+
+
+def format_enrichment(enrichment: Enrichment) -> str:
+    """News, corporate actions, holders and insider activity sections"""
+    ticker = enrichment.ticker
+    msg = ""
 
+    # Add news if available
+    headline, link = enrichment.news
+    if headline:
+        msg += (
+            f"📰 <b>News:</b> <a href='{link}'>{headline}</a>\n\n"
+            if link else f"📰 <b>News:</b> {headline}\n\n"
+        )
+
+    # Add Corporate Actions
+    actions = enrichment.corporate_actions
+    if actions:
+        msg += f"🗓️ <b>Corporate Actions:</b>\n"
+        for event, date in actions.items():
+            # Format date if it's a date object
+            d_str = date.strftime('%d-%b-%Y') if hasattr(date, 'strftime') else str(date)
+            msg += f"• {event}: {d_str}\n"
+        msg += "\n"
+
+    # Add Institutional & Insider Data
+    shareholding = enrichment.shareholding
+
+    # 1. Institutional Holders (Top 10)
+    inst_holders = shareholding.get('institutional_holders')
+    if inst_holders is not None and not inst_holders.empty:
+        msg += f"🏦 <b>Top Inst. Holders:</b>\n"
+        try:
+            # Usually columns: Holder, Shares, Date Reported, % Out, Value
+            top_10 = inst_holders.head(10)
+            for index, row in top_10.iterrows():
+                name = row.get('Holder', 'N/A')
+                pct = row.get('% Out', 'N/A')
+                # format pct if it's a number
+                if isinstance(pct, (int, float)):
+                    pct_str = f"{pct*100:.2f}%" if pct < 1 else f"{pct:.2f}%"
+                else:
+                    pct_str = str(pct)
+                msg += f"• {name} ({pct_str})\n"
+        except Exception as e:
+            logger.error(f"Error formatting inst holders: {e}")
+        msg += "\n"
+    else:
+        # Fallback to Major Holders (Ownership Breakdown)
+        major_holders = shareholding.get('major_holders')
+        if major_holders is not None and not major_holders.empty:
+            msg += f"🏦 <b>Ownership Breakdown:</b>\n"
+            try:
+                # Convert to dict for easier access if it's a DF
+                # Structure: Breakdown (index) -> Value (col)
+                # Row indices: insidersPercentHeld, institutionsPercentHeld, etc.
+                if 'Value' in major_holders.columns:
+                    mh_dict = major_holders['Value'].to_dict()
+
+                    # Insiders
+                    insider_pct = mh_dict.get('insidersPercentHeld', 0)
+                    if insider_pct:
+                         msg += f"• Insiders: {float(insider_pct)*100:.2f}%\n"
+
+                    # Institutions
+                    inst_pct = mh_dict.get('institutionsPercentHeld', 0)
+                    inst_count = mh_dict.get('institutionsCount', 0)
+                    if inst_pct:
+                        msg += f"• Institutions: {float(inst_pct)*100:.2f}%"
+                        if inst_count:
+                            msg += f" (Count: {int(inst_count)})"
+                        msg += "\n"
+            except Exception as e:
+                logger.error(f"Error formatting major holders: {e}")
+
+            # Add direct link for detailed breakdown since names are missing
+            clean_ticker = ticker.replace(".NS", "").replace(".BO", "")
+            msg += f"🔗 <a href='https://www.screener.in/company/{clean_ticker}/#shareholding'>View Detailed Holders</a>\n"
+            msg += "\n"
+
+    # 2. Mutual Fund Holders (Top 5)
+    mf_holders = shareholding.get('mutualfund_holders')
+    if mf_holders is not None and not mf_holders.empty:
+        msg += f"💰 <b>Top MF Holders:</b>\n"
+        try:
+            top_5 = mf_holders.head(5)
+            for index, row in top_5.iterrows():
+                name = row.get('Holder', 'N/A')
+                pct = row.get('% Out', 'N/A')
+                if isinstance(pct, (int, float)):
+                    pct_str = f"{pct*100:.2f}%" if pct < 1 else f"{pct:.2f}%"
+                else:
+                    pct_str = str(pct)
+                msg += f"• {name} ({pct_str})\n"
+        except Exception as e:
+            logger.error(f"Error formatting MF holders: {e}")
+        msg += "\n"
+
+    # 3. Insider Transactions (Last 3)
+    insider_tx = enrichment.insider_transactions
+    if insider_tx is not None and not insider_tx.empty:
+        msg += f"🤝 <b>Recent Insider Activity:</b>\n"
+        try:
+            # Sort by Date desc just in case
+            if 'Start Date' in insider_tx.columns:
+                insider_tx = insider_tx.sort_values(by='Start Date', ascending=False)
+
+            last_3 = insider_tx.head(3)
+            for index, row in last_3.iterrows():
+                # Columns often vary. Common: Insider, Position, Transaction, Shares, Value, Start Date
+                name = row.get('Insider', 'Unknown')
+                url_col = row.get('Text', '') # Sometimes description is in Text
+                shares = row.get('Shares', 0)
+                shares_str = f"{int(shares):,}" if isinstance(shares, (int, float)) else str(shares)
+                date_val = row.get('Start Date', '')
+                date_str = date_val.strftime('%d-%b') if hasattr(date_val, 'strftime') else str(date_val)
+
+                msg += f"• {date_str}: {name} ({shares_str})\n"
+        except Exception as e:
+            logger.error(f"Error formatting insider tx: {e}")
+        msg += "\n"
+    return msg
+
+
+def signal_buttons(direction: str, signal_id: int, ticker: str, price: float):
+    """Inline Buy button deep-linking to the bot (LONG signals only)"""
+    if direction != "LONG":
+        return None
+    # For channels, use deep link that opens private chat with bot
+    bot_username = Config.TELEGRAM_BOT_USERNAME
+    if not bot_username:
+        logger.warning("TELEGRAM_BOT_USERNAME not set - buy button disabled")
+        return None
+    deep_link_param = f"buy_{signal_id}_{ticker}_{price:.2f}"
+    deep_link = f"https://t.me/{bot_username}?start={deep_link_param}"
+    return [[
+        {"text": f"🚀 Buy Now (₹{price:.2f})", "url": deep_link}
+    ]]
+
+
+def large_cap_threshold() -> float:
+    """Market cap (crore) above which symbols get the large-cap screening"""
+    return float(os.getenv('MIN_MARKET_CAP_CR', '100000'))
+
+
+def prepare_scan(db, alert_service: AlertService):
+    """
+    Start-of-scan steps: start notification, symbol sync and auto-sell checks.
+    Then resumes an unfinished scan run or starts a new one over the
+    pre-filtered symbols. Returns (ledger, symbols, large_caps), with
+    unfinished symbols first, or None if no symbol passed the pre-filter.
+    """
+    # Send job started notification
+    from datetime import datetime
+    start_time = datetime.now()
+    start_msg = (
+        f"🚀 <b>Market Scan Started</b>\n\n"
+        f"📅 <b>Date:</b> {start_time.strftime('%d-%b-%Y')}\n"
+        f"🕒 <b>Time:</b> {start_time.strftime('%H:%M:%S')}\n\n"
+        f"🔍 <b>Status:</b> Scanning active symbols for trading opportunities...\n\n"
+        f"<i>Generated by Market Analysis Bot</i>"
+    )
+    alert_service.send_telegram_message(start_msg, specific_chat_id=alert_service.buy_channel_id)
+
+    # Sync Nifty 500 High Cap Stocks - Skip on production to avoid timeout
+    # Run sync manually or via separate job
+    skip_sync = os.getenv('SKIP_SYMBOL_SYNC', 'false').lower() == 'true'
+
+    if not skip_sync:
+        logger.info("Checking if stock sync is needed...")
+        optimized_service = OptimizedSymbolService(db)
+        if optimized_service.should_sync():
+            optimized_service.sync_high_cap_stocks_optimized(max_workers=20)
+        else:
+            logger.info("⏭️ Skipping sync - last sync was less than 24 hours ago")
+    else:
+        logger.info("⏭️ Symbol sync disabled via SKIP_SYMBOL_SYNC env variable")
+
+    # Run auto-sell checks for existing trades
+    auto_sell_service = AutoSellService()
+    auto_sell_service.check_and_execute_auto_sells()
+
+    # Large-cap screening (Claude prompt criteria) shares this scan's
+    # ingest -> load -> indicators pass instead of loading on its own
+    from src.services.stock_screener import StockScreener
+    large_caps = StockScreener(db).large_cap_symbols(large_cap_threshold())
+
+    # Resume an unfinished scan run (killed or out of time) or start a new one
+    ledger = ScanLedger()
+    if ledger.resume():
+        symbols = db.query(Symbol).filter(Symbol.id.in_(ledger.symbol_ids)).all()
+        progress = ledger.summary()
+        logger.info(f"Resuming scan run {ledger.run_id}: "
+                    f"{progress['finished']}/{progress['items']} symbols already finished")
+    else:
         # Get active symbols with pre-filtering to reduce load
         from src.services.symbol_filter import SymbolFilterService
         filter_service = SymbolFilterService(db)
-        
+
         # Pre-filter: Only get symbols with sufficient data and recent activity
         symbols = filter_service.get_filtered_symbols(min_data_days=200)
-        
+
         if not symbols:
             logger.warning("No symbols passed pre-filtering. Check data availability.")
-            return
-
-        # Process symbols in parallel using ThreadPoolExecutor
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        max_workers = int(os.getenv('SCAN_WORKERS', '5'))  # Default 5 threads for free tier
-        
-        logger.info(f"Processing {len(symbols)} symbols with {max_workers} workers...")
-        
-        def process_symbol(symbol):
-            """Process a single symbol - thread-safe function"""
-            # Create new DB session for this thread
-            thread_db = db_instance.SessionLocal()
-            try:
-                # Initialize services for this thread
-                thread_market_data = MarketDataService(thread_db)
-                thread_indicator = IndicatorService(thread_db)
-                thread_scoring = ScoringService()
-                
-                # 1. Update Data
-                thread_market_data.fetch_and_store(symbol.ticker)
-
-                # 2. Analyze
-                df = thread_indicator.load_data(symbol.ticker)
-                if df.empty:
-                    return None
-                
-                if len(df) < 200:
-                    logger.warning(f"Insufficient data for {symbol.ticker}: {len(df)} days")
-                    return None
-
-                df = thread_indicator.calculate_indicators(df)
-
-                # 3. Score
+            return None
+
+        ledger.start([symbol.id for symbol in symbols])
+
+    symbols.sort(key=lambda symbol: ledger.state(symbol.id).finished)
+    return ledger, symbols, large_caps
+
+
+def scan_symbols(db, symbols, ledger: ScanLedger, within_budget: Callable[[], bool] = None,
+                 alerts: bool = True, process_workers: int = None):
+    """
+    Runs symbols through the scan stages and checkpoints them in the ledger.
+    Symbols the ledger has already finished only pass through compute (for
+    the screener and symbol states), as do symbols outside the ledger (large
+    caps the pre-filter left out). Once within_budget() returns False, no new
+    work is started. Without alerts the pipeline ends at score; qualified
+    symbols stay scored and are alerted by a later pass (the reduce step).
+    Indicators, scoring and charts run on `process_workers` processes
+    (default SCAN_PROCESS_WORKERS, see ScanCompute).
+    Returns the pipeline (stage stats) and the indicator frames by symbol id.
+    """
+    within_budget = within_budget or (lambda: True)
+    market_data_service = MarketDataService(db)
+    scoring_service = ScoringService()
+    alert_service = AlertService()
+    symbol_service = SymbolService(db)
+
+    # Scan stages connected by bounded queues, each with its own workers:
+    # ingest -> compute -> score -> enrich -> render -> notify.
+    # Alerts go out as soon as a symbol is scored; a slow Telegram upload
+    # only holds up the notify stage. Stage threads do the I/O and hand the
+    # CPU work of compute, score and render to the ScanCompute processes.
+    max_workers = int(os.getenv('SCAN_WORKERS', '5'))  # Default 5 threads for free tier
+    strategies = Strategy.load_profiles()
+    compute = ScanCompute(process_workers, scoring_service, strategies)
+    indicator_frames = {}
+    strategy_signals = {strategy.name: 0 for strategy in strategies}
+
+    def ingest_symbol(symbol):
+        """Fetch new candles for a single symbol - thread-safe function"""
+        if not within_budget():
+            return None
+        item = ledger.state(symbol.id)
+        if item is not None and item.reached(INGESTED):
+            return symbol  # fetched before the scan was resumed
+        thread_db = db_instance.SessionLocal()
+        try:
+            MarketDataService(thread_db).fetch_and_store(symbol.ticker)
+        except Exception as e:
+            logger.error(f"Error ingesting {symbol.ticker}: {e}")
+            thread_db.rollback()
+        finally:
+            thread_db.close()
+        return symbol
+
+    def compute_batch(batch):
+        """Load history for a batch of ingested symbols in one query; indicators are computed in a worker process"""
+        if not within_budget():
+            return None
+        ledger.mark([symbol.id for symbol in batch], INGESTED)
+        thread_db = db_instance.SessionLocal()
+        try:
+            frames = IndicatorService(thread_db).load_data_many([symbol.id for symbol in batch])
+        finally:
+            thread_db.close()
+
+        usable = {}
+        for symbol in batch:
+            df = frames.get(symbol.id)
+            if df is None or df.empty:
+                continue
+            if len(df) < 200:
+                logger.warning(f"Insufficient data for {symbol.ticker}: {len(df)} days")
+                continue
+            usable[symbol.id] = df
+        try:
+            computed = compute.indicators(usable)
+        except Exception as e:
+            logger.error(f"Error analyzing {len(usable)} symbols: {e}")
+            return None
+
+        # Saved per batch, so a scan stopped at its time budget keeps what it computed
+        thread_db = db_instance.SessionLocal()
+        try:
+            store_symbol_data(thread_db, computed)
+        finally:
+            thread_db.close()
+
+        analyzed = []
+        for symbol in batch:
+            df = computed.get(symbol.id)
+            if df is None:
+                continue
+            indicator_frames[symbol.id] = df
+            item = ledger.state(symbol.id)
+            if item is not None and not item.finished:
+                analyzed.append((symbol, df))
+        return analyzed or None
+
+    def score_batch(analyzed):
+        """Score the latest candles of a batch in one vectorized pass and save the signals"""
+        # Extra STRATEGY_PROFILES share the same arrays; the default profile drives alerts
+        frames = {symbol.id: df for symbol, df in analyzed}
+        symbols_by_id = {symbol.id: symbol for symbol, _ in analyzed}
+        scored_ids, strategy_scores = compute.score(frames)
+        scores = strategy_scores[scoring_service.strategy.name]
+        for name, result in strategy_scores.items():
+            strategy_signals[name] += int((result['confidence'] != 'No Trade').sum())
+
+        thread_db = db_instance.SessionLocal()
+        try:
+            qualified, saved = [], []
+            for row, symbol_id in enumerate(scored_ids):
+                symbol, df = symbols_by_id[symbol_id], frames[symbol_id]
                 latest_row = df.iloc[-1]
-                result = thread_scoring.score_signal(latest_row, df)
-
+                result = {
+                    'score': int(scores['score'][row]),
+                    'confidence': scores['confidence'][row],
+                    'direction': scores['direction'][row]
+                }
                 logger.info(f"Analysis for {symbol.ticker}: Score={result['score']} ({result['confidence']})")
 
-                # 4. Save Signal
-                signal = TradeSignal(
-                    symbol_id=symbol.id,
-                    rsi=float(latest_row['RSI']),
-                    atr=float(latest_row['ATR']),
-                    score=result['score'],
-                    confidence=result['confidence'],
-                    direction=result['direction']
-                )
-                thread_db.add(signal)
-                thread_db.commit()
-                
-                # Return data for alert if qualified
-                if result['confidence'] in ["High", "Medium", "Low"]:
-                    return (symbol, latest_row, result, df, signal)
-                return None
-                
-            except Exception as e:
-                logger.error(f"Error analyzing {symbol.ticker}: {e}")
-                thread_db.rollback()
-                return None
-            finally:
-                thread_db.close()
-        
-        # Execute in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(process_symbol, sym): sym for sym in symbols}
-            
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
-                    signals_found += 1
-                    symbol, latest_row, score_result, df, signal = result
-                    
-                    # 5. Send Alert (in main thread to avoid conflicts)
-                    # Get company info
-                    company_name = symbol.name or "N/A"
-                    company_type = symbol_service.get_company_type(symbol.sector or "", symbol.industry or "")
-
-                    # Construct formatted message
-                    ticker = symbol.ticker
-                    score = score_result['score']
-                    conf = score_result['confidence']
-                    price = latest_row['close']
-                    direction = score_result['direction']
-                    # Escape reasons to avoid HTML parsing errors (e.g. < 30)
-                    reasons_str = "\n".join([f"• {html.escape(r)}" for r in score_result['reasons']])
-
-                    # Emoji Map
-                    icon = "🟢" if direction == "LONG" else "🔴"
-
-                    # Format Volume (e.g. 1.5M, 500K)
-                    vol = latest_row['volume']
-                    if vol >= 1_000_000:
-                        vol_str = f"{vol / 1_000_000:.2f}M"
-                    elif vol >= 1_000:
-                        vol_str = f"{vol / 1_000:.2f}K"
-                    else:
-                        vol_str = f"{vol:.0f}"
-
-                    # Build dynamic strategy explanation based on actual conditions met
-                    strategy_parts = []
-                    
-                    if direction == "LONG":
-                        strategy_parts.append("<b>📈 RSI Oversold Mean-Reversion Setup</b>")
-                        
-                        # Check what conditions were actually met from the reasons
-                        reasons_text = " ".join(score_result['reasons'])
-                        
-                        if "Oversold & Rising RSI" in reasons_text:
-                            strategy_parts.append("• RSI(14) deeply oversold and turning upward")
-                        
-                        if "Bullish Momentum Confirmed" in reasons_text:
-                            strategy_parts.append("• Consecutive bullish Heikin Ashi candles indicate selling exhaustion")
-                        
-                        if "Volume" in reasons_text:
-                            strategy_parts.append("• Volume expansion confirms buyer participation")
-                        
-                        if "Major Uptrend Support" in reasons_text:
-                            strategy_parts.append("• Price above key moving averages — uptrend support")
-                        else:
-                            strategy_parts.append("• Counter-trend trade: quick relief rally expected")
-                            
-                        strategy_logic = "\n".join(strategy_parts)
-                        
-                    else:
-                        strategy_parts.append("<b>📉 RSI Overbought Reversal Setup</b>")
-                        
-                        reasons_text = " ".join(score_result['reasons'])
-                        
-                        if "Overbought & Falling RSI" in reasons_text:
-                            strategy_parts.append("• RSI(14) overbought and turning downward")
-                        
-                        if "Bearish Momentum Confirmed" in reasons_text:
-                            strategy_parts.append("• Consecutive bearish Heikin Ashi candles indicate buying exhaustion")
-                        
-                        if "Volume" in reasons_text:
-                            strategy_parts.append("• Volume expansion confirms seller participation")
-                            
-                        strategy_logic = "\n".join(strategy_parts)
-
-                    msg = (
-                        f"🚨 <b>Trade Signal Detected For {ticker} - {latest_row.name.strftime('%d-%b-%Y')}</b>\n\n"
-                        f"{icon} <b>Action:</b> {'BUY' if direction == 'LONG' else 'SELL'}\n"
-                        f"🧭 <b>Direction:</b> {direction}\n"
-                        f"🏢 <b>Company:</b> {company_name}\n"
-                        f"📊 <b>Type:</b> {company_type}\n"
-                        f"💎 <b>Symbol:</b> {ticker}\n"
-                        f"📊 <b>Score:</b> {score}/100 ({conf})\n"
-                        f"📉 <b>RSI:</b> {latest_row['RSI']:.2f}\n"
-                        f"💰 <b>Price:</b> ₹{price:.2f}\n"
-                        f"🕒 <b>Time:</b> {latest_row.name.strftime('%H:%M:%S')}\n\n"
-
-                        f"🕯️ <b>Heikin Ashi Candles:</b>\n"
-                        f"O: {latest_row['HA_Open']:.2f} | H: {latest_row['HA_High']:.2f}\n"
-                        f"L: {latest_row['HA_Low']:.2f}  | C: {latest_row['HA_Close']:.2f}\n"
-                        f"Vol: {vol_str}\n\n"
-
-                        f"<b>Logic / Reasons:</b>\n"
-                        f"{reasons_str}\n\n"
-
-                        f"💡 <b>Strategy Explanation:</b>\n"
-                        f"{strategy_logic}\n\n"
+                is_alert = result['confidence'] in ["High", "Medium", "Low"]
+                item = ledger.state(symbol.id)
+                signal = None
+                if item.signal_id is None:  # else saved before the scan was resumed
+                    signal = TradeSignal(
+                        symbol_id=symbol.id,
+                        rsi=float(latest_row['RSI']),
+                        atr=float(latest_row['ATR']),
+                        entry_price=float(latest_row['close']),  # price at alert time (intraday for today's candle)
+                        score=result['score'],
+                        confidence=result['confidence'],
+                        direction=result['direction']
                     )
+                    thread_db.add(signal)
+                    saved.append((symbol.id, signal, is_alert))
+
+                if is_alert:
+                    qualified.append((symbol, latest_row, result, df, signal, item))
+
+            thread_db.commit()
+            ledger.mark_scored([(symbol_id, signal.id, is_alert) for symbol_id, signal, is_alert in saved])
+            return [(symbol, latest_row, result, df, signal.id if signal is not None else item.signal_id)
+                    for symbol, latest_row, result, df, signal, item in qualified]
+        except Exception as e:
+            logger.error(f"Error saving signals: {e}")
+            thread_db.rollback()
+            return None
+        finally:
+            thread_db.close()
+
+    enrichment_cache = EnrichmentCache() if Config.ENRICHMENT_CACHE_ENABLED else None
+    enrichment_service = EnrichmentService(market_data_service.quote_fetcher, cache=enrichment_cache)
+
+    def enrich_alert(alert):
+        """Reasons and company data for one alert (lookups run concurrently, with a deadline)"""
+        if not within_budget():
+            return None  # stays scored; alerted when the scan is resumed
+        symbol, latest_row, score_result, df, signal_id = alert
+        # Reasons are only built for the symbols that are alerted
+        score_result['reasons'] = scoring_service.reasons_for(df, [len(df) - 1])[len(df) - 1]
+        company_type = symbol_service.get_company_type(symbol.sector or "", symbol.industry or "")
+
+        msg = format_signal_message(symbol, latest_row, score_result, company_type)
+        msg += format_enrichment(enrichment_service.fetch(symbol.ticker))
+        msg += f"<i>Generated by Market Analysis Bot</i>"
+        return alert + (msg,)
+
+    def render_chart(alert):
+        """Chart image for one alert (pyplot state is per process: one thread per worker process)"""
+        symbol, df = alert[0], alert[3]
+        return alert + (compute.chart(df, symbol.ticker),)
+
+    def send_alert(alert):
+        """Telegram alert with chart (text only if the chart failed)"""
+        symbol, latest_row, score_result, df, signal_id, msg, chart_buf = alert
+        direction = score_result['direction']
+        buttons = signal_buttons(direction, signal_id, symbol.ticker, latest_row['close'])
+
+        campaign_channel_id = None
+        if direction == "LONG":
+            campaign_channel_id = alert_service.buy_channel_id
+        elif direction == "SHORT":
+            campaign_channel_id = alert_service.sell_channel_id
+
+        if chart_buf:
+            logger.info(f"Sending Telegram Alert with Chart:\n{msg}")
+            alert_service.send_telegram_photo(msg, chart_buf, buttons=buttons, specific_chat_id=campaign_channel_id)
+        else:
+            logger.info(f"Chart generation failed. Sending text only:\n{msg}")
+            alert_service.send_telegram_message(msg, specific_chat_id=campaign_channel_id)
+        ledger.mark([symbol.id], ALERTED)
+        return symbol.ticker
+
+    queue_size = Config.SCAN_QUEUE_SIZE
+    stages = [
+        Stage("ingest", ingest_symbol, workers=max_workers, queue_size=queue_size),
+        Stage("compute", compute_batch, workers=max(Config.SCAN_COMPUTE_WORKERS, compute.workers),
+              queue_size=queue_size, batch_size=Config.SCAN_BATCH_SIZE, batch_wait=Config.SCAN_BATCH_WAIT_SECONDS),
+        Stage("score", score_batch, workers=1, queue_size=queue_size, many=True),
+    ]
+    if alerts:
+        stages += [
+            Stage("enrich", enrich_alert, workers=Config.SCAN_ENRICH_WORKERS, queue_size=queue_size),
+            Stage("render", render_chart, workers=compute.workers, queue_size=queue_size),
+            Stage("notify", send_alert, workers=Config.SCAN_NOTIFY_WORKERS, queue_size=queue_size),
+        ]
+    pipeline = Pipeline(stages, report_interval=Config.SCAN_REPORT_SECONDS)
+
+    logger.info(f"Processing {len(symbols)} symbols through the scan pipeline ({max_workers} ingest workers)...")
+    pipeline.run(itertools.takewhile(lambda symbol: within_budget(), symbols))
+    logger.info("Scan pipeline stages:\n" + pipeline.format_report())
+    if len(strategies) > 1:
+        summary = ", ".join(f"{name}={count}" for name, count in strategy_signals.items())
+        logger.info(f"Signals per strategy profile: {summary}")
+    return pipeline, indicator_frames
+
+
+def store_symbol_data(db, indicator_frames):
+    """Per-symbol results of a compute batch: symbol states and candlestick patterns"""
+    # Last-session state for the screener's SQL pre-filter (/screen-stocks)
+    try:
+        SymbolStateService(db).update(indicator_frames)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Symbol state update failed: {e}")
 
-                    # Fetch and add news if available
-                    headline, link = market_data_service.fetch_latest_news(ticker)
-                    if headline:
-                        msg += (
-                            f"📰 <b>News:</b> <a href='{link}'>{headline}</a>\n\n"
-                            if link else f"📰 <b>News:</b> {headline}\n\n"
-                        )
-
-                    # Fetch and add Corporate Actions
-                    actions = market_data_service.fetch_corporate_actions(ticker)
-                    if actions:
-                        msg += f"🗓️ <b>Corporate Actions:</b>\n"
-                        for event, date in actions.items():
-                            # Format date if it's a date object
-                            d_str = date.strftime('%d-%b-%Y') if hasattr(date, 'strftime') else str(date)
-                            msg += f"• {event}: {d_str}\n"
-                        msg += "\n"
+    # Persist candlestick pattern bitsets for the new candles
+    try:
+        CandlePatternService(db).refresh(indicator_frames)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Candlestick pattern update failed: {e}")
+
+
+def finish_scan(db, ledger: ScanLedger, indicator_frames, large_caps, scanned: int, alert_service: AlertService):
+    """
+    End-of-scan steps once every symbol is done: large-cap screening, signal
+    outcomes and the summary message. Closes the run in the ledger.
+    """
+    from src.services.stock_screener import StockScreener
+    screener = StockScreener(db)
+    logger.info(f"Screening {len(large_caps)} large-cap stocks (market cap > ₹{large_cap_threshold():,.0f} Cr)")
+    screening_results = screener.screen_frames(large_caps, indicator_frames)
+    if screening_results:
+        screening_msg = screener.format_screening_results(screening_results)
+        alert_service.send_telegram_message(screening_msg, specific_chat_id=alert_service.buy_channel_id)
+
+    # Track forward returns of earlier signals now that today's candles are in
+    try:
+        SignalOutcomeService(db).update()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Signal outcome update failed: {e}")
 
-                    # Fetch and add Institutional & Insider Data
-                    shareholding = market_data_service.fetch_shareholding_data(ticker)
-
-                    # 1. Institutional Holders (Top 10)
-                    inst_holders = shareholding.get('institutional_holders')
-                    if inst_holders is not None and not inst_holders.empty:
-                        msg += f"🏦 <b>Top Inst. Holders:</b>\n"
-                        try:
-                            # Usually columns: Holder, Shares, Date Reported, % Out, Value
-                            top_10 = inst_holders.head(10)
-                            for index, row in top_10.iterrows():
-                                name = row.get('Holder', 'N/A')
-                                pct = row.get('% Out', 'N/A')
-                                # format pct if it's a number
-                                if isinstance(pct, (int, float)):
-                                    pct_str = f"{pct*100:.2f}%" if pct < 1 else f"{pct:.2f}%"
-                                else:
-                                    pct_str = str(pct)
-                                msg += f"• {name} ({pct_str})\n"
-                        except Exception as e:
-                            logger.error(f"Error formatting inst holders: {e}")
-                        msg += "\n"
-                    else:
-                        # Fallback to Major Holders (Ownership Breakdown)
-                        major_holders = shareholding.get('major_holders')
-                        if major_holders is not None and not major_holders.empty:
-                            msg += f"🏦 <b>Ownership Breakdown:</b>\n"
-                            try:
-                                # Convert to dict for easier access if it's a DF
-                                # Structure: Breakdown (index) -> Value (col)
-                                # Row indices: insidersPercentHeld, institutionsPercentHeld, etc.
-                                if 'Value' in major_holders.columns:
-                                    mh_dict = major_holders['Value'].to_dict()
-
-                                    # Insiders
-                                    insider_pct = mh_dict.get('insidersPercentHeld', 0)
-                                    if insider_pct:
-                                         msg += f"• Insiders: {float(insider_pct)*100:.2f}%\n"
-
-                                    # Institutions
-                                    inst_pct = mh_dict.get('institutionsPercentHeld', 0)
-                                    inst_count = mh_dict.get('institutionsCount', 0)
-                                    if inst_pct:
-                                        msg += f"• Institutions: {float(inst_pct)*100:.2f}%"
-                                        if inst_count:
-                                            msg += f" (Count: {int(inst_count)})"
-                                        msg += "\n"
-                            except Exception as e:
-                                logger.error(f"Error formatting major holders: {e}")
-
-                            # Add direct link for detailed breakdown since names are missing
-                            clean_ticker = ticker.replace(".NS", "").replace(".BO", "")
-                            msg += f"🔗 <a href='https://www.screener.in/company/{clean_ticker}/#shareholding'>View Detailed Holders</a>\n"
-                            msg += "\n"
-
-                    # 2. Mutual Fund Holders (Top 5)
-                    mf_holders = shareholding.get('mutualfund_holders')
-                    if mf_holders is not None and not mf_holders.empty:
-                        msg += f"💰 <b>Top MF Holders:</b>\n"
-                        try:
-                            top_5 = mf_holders.head(5)
-                            for index, row in top_5.iterrows():
-                                name = row.get('Holder', 'N/A')
-                                pct = row.get('% Out', 'N/A')
-                                if isinstance(pct, (int, float)):
-                                    pct_str = f"{pct*100:.2f}%" if pct < 1 else f"{pct:.2f}%"
-                                else:
-                                    pct_str = str(pct)
-                                msg += f"• {name} ({pct_str})\n"
-                        except Exception as e:
-                            logger.error(f"Error formatting MF holders: {e}")
-                        msg += "\n"
+    # Send summary message if no signals found
+    signals_found = ledger.summary()['signals']
+    if signals_found == 0:
+        from datetime import datetime
+        current_time = datetime.now()
+
+        no_signal_msg = (
+            f"📊 <b>Market Scan Complete</b>\n\n"
+            f"🔍 <b>Status:</b> No Trade Signals Detected\n"
+            f"📅 <b>Date:</b> {current_time.strftime('%d-%b-%Y')}\n"
+            f"🕒 <b>Time:</b> {current_time.strftime('%H:%M:%S')}\n\n"
+            f"✅ <b>Scanned:</b> {scanned} active symbols\n"
+            f"📈 <b>Market Condition:</b> No high-confidence setups found\n\n"
+            f"💡 <b>Note:</b> System is running normally. Will alert when opportunities arise.\n\n"
+            f"<i>Generated by Tranforge Solutions LLP</i>"
+        )
 
-                    # 3. Insider Transactions (Last 3)
-                    insider_tx = market_data_service.fetch_insider_trading(ticker)
-                    if insider_tx is not None and not insider_tx.empty:
-                        msg += f"🤝 <b>Recent Insider Activity:</b>\n"
-                        try:
-                            # Sort by Date desc just in case
-                            if 'Start Date' in insider_tx.columns:
-                                insider_tx = insider_tx.sort_values(by='Start Date', ascending=False)
-
-                            last_3 = insider_tx.head(3)
-                            for index, row in last_3.iterrows():
-                                # Columns often vary. Common: Insider, Position, Transaction, Shares, Value, Start Date
-                                name = row.get('Insider', 'Unknown')
-                                url_col = row.get('Text', '') # Sometimes description is in Text
-                                shares = row.get('Shares', 0)
-                                shares_str = f"{int(shares):,}" if isinstance(shares, (int, float)) else str(shares)
-                                date_val = row.get('Start Date', '')
-                                date_str = date_val.strftime('%d-%b') if hasattr(date_val, 'strftime') else str(date_val)
-
-                                msg += f"• {date_str}: {name} ({shares_str})\n"
-                        except Exception as e:
-                            logger.error(f"Error formatting insider tx: {e}")
-                        msg += "\n"
+        logger.info("No signals found. Sending summary message.")
+        alert_service.send_telegram_message(no_signal_msg, specific_chat_id=alert_service.buy_channel_id)
+    else:
+        logger.info(f"Scan completed. Found {signals_found} signals.")
 
-                    msg += f"<i>Generated by Market Analysis Bot</i>"
-
-                    # Generate Chart
-                    chart_buf = chart_service.generate_chart(df, ticker)
-
-                    # Create Inline Keyboard (Buy Button) with deep link
-                    buttons = None
-                    if direction == "LONG":
-                        # For channels, use deep link that opens private chat with bot
-                        from src.config.settings import Config
-                        bot_username = Config.TELEGRAM_BOT_USERNAME
-                        if bot_username:
-                            deep_link_param = f"buy_{signal.id}_{ticker}_{price:.2f}"
-                            deep_link = f"https://t.me/{bot_username}?start={deep_link_param}"
-                            buttons = [[
-                                {"text": f"🚀 Buy Now (₹{price:.2f})", "url": deep_link}
-                            ]]
-                        else:
-                            logger.warning("TELEGRAM_BOT_USERNAME not set - buy button disabled")
-
-                    campaign_channel_id = None
-                    if direction == "LONG":
-                        campaign_channel_id = alert_service.buy_channel_id
-                    elif direction == "SHORT":
-                        campaign_channel_id = alert_service.sell_channel_id
-
-                    if chart_buf:
-                        logger.info(f"Sending Telegram Alert with Chart:\n{msg}")
-                        alert_service.send_telegram_photo(msg, chart_buf, buttons=buttons, specific_chat_id=campaign_channel_id)
-                    else:
-                        logger.info(f"Chart generation failed. Sending text only:\n{msg}")
-                        alert_service.send_telegram_message(msg, specific_chat_id=campaign_channel_id)
-
-        # Send summary message if no signals found
-        if signals_found == 0:
-            from datetime import datetime
-            current_time = datetime.now()
-
-            no_signal_msg = (
-                f"📊 <b>Market Scan Complete</b>\n\n"
-                f"🔍 <b>Status:</b> No Trade Signals Detected\n"
-                f"📅 <b>Date:</b> {current_time.strftime('%d-%b-%Y')}\n"
-                f"🕒 <b>Time:</b> {current_time.strftime('%H:%M:%S')}\n\n"
-                f"✅ <b>Scanned:</b> {len(symbols)} active symbols\n"
-                f"📈 <b>Market Condition:</b> No high-confidence setups found\n\n"
-                f"💡 <b>Note:</b> System is running normally. Will alert when opportunities arise.\n\n"
-                f"<i>Generated by Tranforge Solutions LLP</i>"
-            )
-
-            logger.info("No signals found. Sending summary message.")
-            alert_service.send_telegram_message(no_signal_msg, specific_chat_id=alert_service.buy_channel_id)
-        else:
-            logger.info(f"Scan completed. Found {signals_found} signals.")
+    ledger.finish(COMPLETED)
+
+
+def run_scan(time_budget: float = None):
+    """
+    Scans the active symbols and sends alerts. Progress is checkpointed in the
+    scan ledger: an unfinished run (killed, or stopped at its time budget in
+    seconds, default SCAN_TIME_BUDGET_SECONDS) is resumed by the next scan.
+    Returns the run summary and per-stage pipeline stats.
+    """
+    logger.info("Starting Market Scan...")
+    scan_started = time.monotonic()
+    time_budget = Config.SCAN_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    deadline = scan_started + time_budget if time_budget and time_budget > 0 else None
+    out_of_time = threading.Event()
+
+    def within_budget() -> bool:
+        if deadline is not None and time.monotonic() >= deadline:
+            out_of_time.set()
+        return not out_of_time.is_set()
+
+    db_gen = db_instance.get_db()
+    db = next(db_gen)
+
+    cache_stats_start = indicator_cache.stats()
+    result = None
+
+    try:
+        alert_service = AlertService()
+        prepared = prepare_scan(db, alert_service)
+        if prepared is None:
+            return None
+        ledger, symbols, large_caps = prepared
+
+        # Scored symbols plus large caps the pre-filter left out
+        symbols = symbols + [symbol for symbol in large_caps if ledger.state(symbol.id) is None]
+        pipeline, indicator_frames = scan_symbols(db, symbols, ledger, within_budget)
+        result = {"run": ledger.summary(), "pipeline": pipeline.report()}
+
+        if out_of_time.is_set():
+            # Checkpointed: the next scan resumes this run; universe-wide steps wait for it
+            ledger.finish(STOPPED)
+            result["run"]["status"] = STOPPED
+            logger.warning(f"Scan time budget of {time_budget:g}s used up. Stopped run {ledger.run_id} with "
+                           f"{result['run']['finished']}/{result['run']['items']} symbols finished; "
+                           f"the next scan resumes it.")
+            return result
+
+        logger.info(f"Indicator cache: {indicator_cache.format_stats(since=cache_stats_start)}")
+        finish_scan(db, ledger, indicator_frames, large_caps, len(symbols), alert_service)
+        result["run"]["status"] = COMPLETED
 
     except Exception as e:
         logger.error(f"Error during scan: {e}")
     finally:
         db.close()
         logger.info("Market Scan Completed.")
+    return result
+
+def _scan_shard(db, queue: ShardQueue, shard, owner: str, alerts: bool = True, time_budget: float = None,
+                process_workers: int = None) -> bool:
+    """
+    Scans one leased shard while a heartbeat thread keeps the lease; True once
+    completed. A shard cut short by the time budget is released for another try.
+    """
+    lost = threading.Event()
+    stop = threading.Event()
+    deadline = time.monotonic() + time_budget if time_budget and time_budget > 0 else None
+
+    def heartbeat():
+        while not stop.wait(queue.lease_seconds / 3):
+            if not queue.heartbeat(shard.id, owner):
+                lost.set()
+                return
+
+    def within_budget() -> bool:
+        return not lost.is_set() and (deadline is None or time.monotonic() < deadline)
+
+    beat = threading.Thread(target=heartbeat, name=f"shard-{shard.position}-heartbeat", daemon=True)
+    beat.start()
+    started = time.perf_counter()
+    try:
+        ledger = ScanLedger()
+        ledger.load(shard.run_id, shard.symbol_ids)
+        symbols = db.query(Symbol).filter(Symbol.id.in_(shard.symbol_ids)).all()
+        # Unfinished symbols first; finished ones and extra large caps are only computed
+        symbols.sort(key=lambda symbol: ledger.state(symbol.id) is None or ledger.state(symbol.id).finished)
+        logger.info(f"Worker {owner}: shard {shard.position} of run {shard.run_id} "
+                    f"({len(symbols)} symbols, attempt {shard.attempts})")
+
+        pipeline, _ = scan_symbols(db, symbols, ledger, within_budget, alerts=alerts,
+                                   process_workers=process_workers)
+        if lost.is_set():
+            logger.warning(f"Worker {owner}: lost the lease on shard {shard.position}; leaving it to its new owner")
+            return False
+        if not within_budget():
+            logger.warning(f"Worker {owner}: out of time on shard {shard.position}; released for another try")
+            queue.release(shard.id, owner, shard.attempts)
+            return False
+
+        summary = ledger.summary()
+        result = {key: summary[key] for key in ('items', 'finished', 'signals', 'alerted')}
+        result.update(seconds=round(time.perf_counter() - started, 3), pipeline=pipeline.report())
+        return queue.complete(shard.id, owner, result)
+    except Exception as e:
+        logger.error(f"Worker {owner}: shard {shard.position} failed: {e}")
+        db.rollback()
+        queue.release(shard.id, owner, shard.attempts)
+        return False
+    finally:
+        stop.set()
+        beat.join()
+
+
+def _worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def plan_sharded_scan(shard_size: int = None):
+    """
+    Plan step of a sharded scan: prepares the run as run_scan does and splits
+    its symbols (plus large caps the pre-filter left out) into shards in
+    scan_shards. Returns the run id, symbol count and the shards still to
+    scan, or None if no symbol passed the pre-filter.
+    """
+    db_gen = db_instance.get_db()
+    db = next(db_gen)
+    try:
+        prepared = prepare_scan(db, AlertService())
+        if prepared is None:
+            return None
+        ledger, symbols, large_caps = prepared
+
+        symbol_ids = [symbol.id for symbol in symbols]
+        symbol_ids += [symbol.id for symbol in large_caps if ledger.state(symbol.id) is None]
+        queue = ShardQueue()
+        queue.plan(ledger.run_id, symbol_ids, shard_size)
+        shards = queue.pending_shards(ledger.run_id)
+        logger.info(f"Scan run {ledger.run_id}: {len(symbol_ids)} symbols, {len(shards)} shards to scan")
+        return {"run_id": ledger.run_id, "symbols": len(symbol_ids), "shards": shards}
+    finally:
+        db.close()
+
+
+def run_scan_shard(run_id: int, position: int, owner: str = None, alerts: bool = False,
+                   time_budget: float = None) -> str:
+    """
+    Shard step: leases the given shard of a run and scans it. Returns 'done',
+    'skipped' (completed or leased by someone else) or 'failed' (released).
+    """
+    owner = owner or _worker_name()
+    queue = ShardQueue()
+    shard = queue.claim(run_id, owner, position=position)
+    if shard is None:
+        logger.info(f"Shard {position} of run {run_id} is not claimable (done or leased); skipping")
+        return "skipped"
+    db = db_instance.SessionLocal()
+    try:
+        return "done" if _scan_shard(db, queue, shard, owner, alerts=alerts, time_budget=time_budget) else "failed"
+    finally:
+        db.close()
+
+
+def run_scan_worker(run_id: int = None, owner: str = None, process_workers: int = None) -> int:
+    """
+    Sharded scan worker: claims shards of a scan run (default: the latest run
+    with shards left) until none is left and scans each through the same
+    pipeline as run_scan. Returns the number of shards it completed.
+    """
+    owner = owner or _worker_name()
+    queue = ShardQueue()
+    run_id = run_id or queue.open_run()
+    if run_id is None:
+        logger.info(f"Worker {owner}: no sharded scan run has work left")
+        return 0
+
+    db = db_instance.SessionLocal()
+    completed = 0
+    try:
+        while True:
+            shard = queue.claim(run_id, owner)
+            if shard is None:
+                break
+            completed += _scan_shard(db, queue, shard, owner, process_workers=process_workers)
+    finally:
+        db.close()
+    logger.info(f"Worker {owner}: completed {completed} shards of run {run_id}")
+    return completed
+
+
+def reduce_sharded_scan(run_id: int):
+    """
+    Reduce step, once every shard is done or failed: sends the alerts the
+    shards left scored, merges the shard results, screens the large caps and
+    sends the summary. Returns the run summary with per-shard and merged
+    pipeline stats; status 'waiting' while shards are still open. A run that
+    is already completed (a retried or duplicate reduce) returns its stored
+    summary without sending anything again.
+    """
+    queue = ShardQueue()
+    progress = queue.progress(run_id)
+    if progress['open']:
+        return {"run": {"run_id": run_id, "status": "waiting"}, "progress": progress}
+
+    db_gen = db_instance.get_db()
+    db = next(db_gen)
+    try:
+        alert_service = AlertService()
+        ledger = ScanLedger()
+        ledger.load(run_id)
+        status = db.query(ScanRun.status).filter(ScanRun.id == run_id).scalar()
+
+        # Qualified symbols the shards scored without alerting
+        unsent = [symbol_id for symbol_id, item in ledger.items.items() if item.qualified and not item.finished]
+        alerts = []
+        if status == COMPLETED:
+            logger.info(f"Run {run_id} was already reduced; nothing is sent again")
+        elif unsent:
+            logger.info(f"Run {run_id}: sending {len(unsent)} alerts")
+            symbols = db.query(Symbol).filter(Symbol.id.in_(unsent)).all()
+            alerts = scan_symbols(db, symbols, ledger)[0].report()
+
+        shard_results = queue.results(run_id)
+        result = {"run": ledger.summary(),
+                  "shards": [{key: value for key, value in row.items() if key != 'pipeline'} for row in shard_results],
+                  "pipeline": merge_stage_reports(row.get('pipeline') for row in shard_results),
+                  "alerts": alerts}
+        if status == COMPLETED:
+            result["run"]["status"] = COMPLETED
+            return result
+
+        if not ledger.complete:
+            ledger.finish(STOPPED)
+            result["run"]["status"] = STOPPED
+            logger.warning(f"Run {run_id} stopped with {result['run']['finished']}/{result['run']['items']} "
+                           f"symbols finished (failed shards); the next scan resumes it.")
+            return result
+
+        # Large-cap screening needs their indicator frames, which stayed in the workers
+        from src.services.stock_screener import StockScreener
+        large_caps = StockScreener(db).large_cap_symbols(large_cap_threshold())
+        frames = IndicatorService(db).load_data_many([symbol.id for symbol in large_caps])
+        indicator_frames = ScanCompute().indicators({symbol_id: df for symbol_id, df in frames.items()
+                                                     if len(df) >= 200})
+        finish_scan(db, ledger, indicator_frames, large_caps, len(ledger.items), alert_service)
+        result["run"]["status"] = COMPLETED
+        return result
+    finally:
+        db.close()
+
+
+def run_sharded_scan(workers: int = None, shard_size: int = None):
+    """
+    Sharded market scan on worker processes: plan, then `workers` local
+    worker processes (default SCAN_SHARD_WORKERS, 0 = one per CPU) scan the
+    shards; workers on other machines can join with run_scan_worker.py.
+    Once no local worker is left the coordinator (this process) takes over
+    pending shards and shards whose lease expired (crashed workers), then
+    runs the reduce step. Returns the reduce result.
+    """
+    logger.info("Starting Sharded Market Scan...")
+    workers = Config.SCAN_SHARD_WORKERS if workers is None else workers
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    owner = f"{_worker_name()}:coordinator"
+    result = None
+
+    try:
+        plan = plan_sharded_scan(shard_size)
+        if plan is None:
+            return None
+        run_id = plan["run_id"]
+
+        # Spawned (not forked) so no worker inherits this process's connections. The
+        # workers already use the CPUs, so each computes in-process (no nested pools)
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=run_scan_worker, args=(run_id, None, 1), name=f"scan-worker-{k}")
+                     for k in range(min(workers, len(plan["shards"])))]
+        logger.info(f"Scan run {run_id}: {len(processes)} local worker processes")
+        for process in processes:
+            process.start()
+
+        queue = ShardQueue()
+        poll = max(1.0, queue.lease_seconds / 4)
+        while queue.progress(run_id)['open']:
+            alive = [process for process in processes if process.is_alive()]
+            if alive:
+                alive[0].join(poll)
+            elif not run_scan_worker(run_id, owner, process_workers=1):
+                time.sleep(poll)  # the remaining shards are leased by live workers elsewhere
+        for process in processes:
+            process.join()
+            if process.exitcode:
+                logger.warning(f"{process.name} exited with code {process.exitcode}")
+
+        result = reduce_sharded_scan(run_id)
+    except Exception as e:
+        logger.error(f"Error during sharded scan: {e}")
+    finally:
+        logger.info("Sharded Market Scan Completed.")
+    return result
+
 
 def main():
     load_dotenv()
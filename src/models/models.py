@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database.db import Base
@@ -115,3 +115,155 @@ class PaperTrade(Base):
     subscriber = relationship("Subscriber", back_populates="trades")
     signal = relationship("TradeSignal")
     symbol = relationship("Symbol")
+
+class SweepResult(Base):
+    __tablename__ = 'sweep_results'
+    __table_args__ = (UniqueConstraint('sweep_name', 'strategy_version', name='uq_sweep_strategy'),)
+
+    id = Column(Integer, primary_key=True)
+    sweep_name = Column(String, nullable=False, index=True)
+    strategy_version = Column(String, nullable=False)  # Strategy.version of the combination
+    params = Column(String, nullable=False)  # JSON: Config key -> value (null = filter skipped)
+
+    # Signal counts over the evaluated history
+    signals = Column(Integer)
+    long_signals = Column(Integer)
+    short_signals = Column(Integer)
+
+    # Direction-adjusted forward returns (%) and hit rates (%) after N trading days
+    avg_return_1d = Column(Float)
+    avg_return_5d = Column(Float)
+    avg_return_10d = Column(Float)
+    avg_return_20d = Column(Float)
+    win_rate_1d = Column(Float)
+    win_rate_5d = Column(Float)
+    win_rate_10d = Column(Float)
+    win_rate_20d = Column(Float)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SignalOutcome(Base):
+    __tablename__ = 'signal_outcomes'
+
+    id = Column(Integer, primary_key=True)
+    signal_id = Column(Integer, ForeignKey('trade_signals.id'), nullable=False, unique=True)
+    symbol_id = Column(Integer, ForeignKey('symbols.id'), nullable=False, index=True)
+    direction = Column(String)  # LONG / SHORT (copied from the signal)
+
+    # Reference bar: last daily candle at or before the signal
+    entry_time = Column(DateTime(timezone=True))
+    entry_price = Column(Float)
+    stop_loss = Column(Float)
+    target = Column(Float)
+
+    # Direction-adjusted close-to-close returns (%), null until the horizon has matured
+    return_1d = Column(Float)
+    return_5d = Column(Float)
+    return_10d = Column(Float)
+    return_20d = Column(Float)
+
+    # Excursions (%) and level touches over the bars tracked so far (max 20)
+    mae_pct = Column(Float)
+    mfe_pct = Column(Float)
+    sl_hit = Column(Boolean, default=False)
+    target_hit = Column(Boolean, default=False)
+    first_hit = Column(String)  # STOPLOSS / TARGET / None
+
+    bars_tracked = Column(Integer, default=0)
+    completed = Column(Boolean, default=False, index=True)  # all horizons matured
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    signal = relationship("TradeSignal")
+    symbol = relationship("Symbol")
+
+class CandlePattern(Base):
+    __tablename__ = 'candle_patterns'
+    __table_args__ = (UniqueConstraint('symbol_id', 'timestamp', name='uq_candle_pattern_bar'),)
+
+    id = Column(Integer, primary_key=True)
+    symbol_id = Column(Integer, ForeignKey('symbols.id'), nullable=False, index=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+    bits = Column(Integer, nullable=False, default=0)  # bitset, bit k = candle_patterns.PATTERNS[k]
+
+class SymbolState(Base):  # latest-session indicator values (screener pre-filter)
+    __tablename__ = 'symbol_states'
+    __table_args__ = (Index('ix_symbol_states_screen', 'ha_green', 'rsi'),)
+
+    symbol_id = Column(Integer, ForeignKey('symbols.id'), primary_key=True)
+    as_of = Column(DateTime(timezone=True), nullable=False)  # timestamp of the latest bar
+    history_bars = Column(Integer, nullable=False)  # bars in the indicator lookback window
+
+    # Latest bar the state was computed from (stale_ids compares it with the stored candle)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Float)
+
+    rsi = Column(Float)
+    ha_green = Column(Boolean)
+    sma200 = Column(Float)
+    above_sma200 = Column(Boolean)
+    volume_ratio = Column(Float)  # latest volume / 20-day average
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+
+    name = Column(String, primary_key=True)  # e.g. 'ohlcv'
+    version = Column(Integer, nullable=False, default=0)  # bumped by every write to that data
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class EnrichmentCacheEntry(Base):  # slow-changing alert enrichment per ticker (holders, calendar, insiders)
+    __tablename__ = 'enrichment_cache'
+    __table_args__ = (UniqueConstraint('ticker', 'kind', name='uq_enrichment_cache_entry'),)
+
+    id = Column(Integer, primary_key=True)
+    ticker = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # enrichment lookup name, e.g. 'major_holders'
+    payload = Column(LargeBinary, nullable=False)  # pickled value (DataFrame or dict)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class ScanRun(Base):  # one market scan; unfinished runs are resumed from their scan_items
+    __tablename__ = 'scan_runs'
+
+    id = Column(Integer, primary_key=True)
+    status = Column(String, nullable=False, default='running', index=True)  # running / stopped / completed
+    total_items = Column(Integer, nullable=False, default=0)
+    resumes = Column(Integer, nullable=False, default=0)  # times a later process picked the run up
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())  # last checkpoint
+    finished_at = Column(DateTime(timezone=True))
+
+    items = relationship("ScanItem", back_populates="run")
+
+class ScanItem(Base):  # per-symbol progress within a scan run
+    __tablename__ = 'scan_items'
+    __table_args__ = (UniqueConstraint('run_id', 'symbol_id', name='uq_scan_item'),)
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('scan_runs.id'), nullable=False, index=True)
+    symbol_id = Column(Integer, ForeignKey('symbols.id'), nullable=False)
+    state = Column(String, nullable=False, default='pending')  # pending / ingested / scored / alerted
+    qualified = Column(Boolean, nullable=False, default=False)  # scored as an alert
+    signal_id = Column(Integer, ForeignKey('trade_signals.id'))  # signal saved when scored
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    run = relationship("ScanRun", back_populates="items")
+
+class ScanShard(Base):  # batch of a scan run's symbols, leased to one worker at a time (sharded scans)
+    __tablename__ = 'scan_shards'
+    __table_args__ = (UniqueConstraint('run_id', 'position', name='uq_scan_shard'),)
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('scan_runs.id'), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    symbol_ids = Column(String, nullable=False)  # comma-separated symbol ids
+    status = Column(String, nullable=False, default='pending', index=True)  # pending / leased / done / failed
+    owner = Column(String)  # worker holding the lease (host:pid)
+    lease_expires_at = Column(DateTime(timezone=True))  # extended by the worker's heartbeats
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(String)  # JSON summary from the worker that completed it
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,346 @@
+"""
+Vectorized backtests of the scoring strategies over stored daily OHLCV.
+
+Entries come from the vectorized scorer applied to every historical bar
+(point-in-time: a bar only sees the candles up to itself). Each entry is
+filled at the signal bar's close, like the live alert price, and exited by
+whichever comes first in the following bars:
+
+- STOPLOSS: low (LONG) / high (SHORT) touches the stop
+- TARGET:   high (LONG) / low (SHORT) touches the target
+- TIME:     still open after max_hold_days bars, exit at that close
+- END:      history ran out before any exit, marked at the last close
+
+First touches are found with array comparisons over an (entries x hold)
+window; if a bar touches both levels the stop is assumed to come first.
+Gaps through a level fill at the open. Only one position per symbol is open
+at a time for a given strategy and exit rule.
+
+Symbols are sharded across a process pool. The concatenated OHLCV arrays
+are placed in shared memory once and each worker reads its shard from there,
+so only small descriptors and the resulting trades cross process boundaries.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Sequence
+import numpy as np
+import pandas as pd
+from src.config.settings import Config
+from src.services import candle_patterns, indicator_kernels
+from src.services.scoring import ScoringService
+from src.services.strategy import Strategy
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Exit reason codes used inside the simulation
+STOPLOSS, TARGET, TIME, END = 0, 1, 2, 3
+EXIT_REASONS = np.array(['STOPLOSS', 'TARGET', 'TIME', 'END'], dtype=object)
+
+
+class ExitRule:
+    """Stop / target percentages and a time stop, applied symmetrically to LONG and SHORT."""
+
+    def __init__(self, name: str, stop_pct: float, target_pct: float, max_hold_days: int = None):
+        self.name = name
+        self.stop_pct = stop_pct
+        self.target_pct = target_pct
+        self.max_hold_days = max_hold_days or Config.BACKTEST_MAX_HOLD_DAYS
+
+    @classmethod
+    def defaults(cls) -> List["ExitRule"]:
+        """The exits offered by the Telegram bot: 5%/10% quick trade and 15/20/25% targets."""
+        rules = [cls("sl5_t10", 5, 10)]
+        for target_pct in (15, 20, 25):
+            stop_pct = max(3, target_pct * 0.4)  # same rule as TelegramBotHandler
+            rules.append(cls(f"sl{stop_pct:g}_t{target_pct}", stop_pct, target_pct))
+        return rules
+
+    def __repr__(self):
+        return f"ExitRule({self.name!r}, stop={self.stop_pct}%, target={self.target_pct}%, hold={self.max_hold_days})"
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """Column index of the first True per row, or the row width if none."""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def _non_overlapping(rows: np.ndarray, entry_cols: np.ndarray, exit_cols: np.ndarray) -> np.ndarray:
+    """Keeps entries (sorted by row, then column) taken while no earlier trade on the row is open."""
+    keep = np.zeros(len(rows), dtype=bool)
+    current_row, busy_until = -1, -1
+    for k in range(len(rows)):
+        if rows[k] != current_row:
+            current_row, busy_until = rows[k], -1
+        if entry_cols[k] > busy_until:
+            keep[k] = True
+            busy_until = exit_cols[k]
+    return keep
+
+
+def simulate_exits(window: Dict[str, np.ndarray], entry_price: np.ndarray, direction: np.ndarray,
+                   bars_after: np.ndarray, rule: ExitRule):
+    """
+    First-touch exits for a batch of entries.
+
+    `window` holds (entries x hold) open/high/low/close arrays of the bars
+    after each entry (NaN past the end of history), `bars_after` how many of
+    them exist. Returns (exit_step, reason, exit_price, mae, mfe) where
+    exit_step is the 0-based bar of the exit within the window and the
+    excursions are fractions in the trade's direction.
+    """
+    n_hold = rule.max_hold_days
+    wo, wh, wl, wc = (window[name][:, :n_hold] for name in ('open', 'high', 'low', 'close'))
+    is_long = (direction > 0)[:, None]
+    stop = entry_price * (1 - direction * rule.stop_pct / 100)
+    target = entry_price * (1 + direction * rule.target_pct / 100)
+
+    with np.errstate(invalid='ignore'):
+        stop_hit = np.where(is_long, wl <= stop[:, None], wh >= stop[:, None])
+        target_hit = np.where(is_long, wh >= target[:, None], wl <= target[:, None])
+    first_stop = _first_true(stop_hit)
+    first_target = _first_true(target_hit)
+    last_held = np.minimum(n_hold, bars_after) - 1
+    exit_step = np.minimum(np.minimum(first_stop, first_target), last_held)
+
+    reason = np.where(
+        first_stop == exit_step, STOPLOSS,
+        np.where(first_target == exit_step, TARGET, np.where(bars_after >= n_hold, TIME, END))
+    )
+    k = np.arange(len(entry_price))
+    exit_open, exit_close = wo[k, exit_step], wc[k, exit_step]
+    exit_price = np.select(
+        [reason == STOPLOSS, reason == TARGET],
+        [np.where(direction > 0, np.minimum(exit_open, stop), np.maximum(exit_open, stop)),
+         np.where(direction > 0, np.maximum(exit_open, target), np.minimum(exit_open, target))],
+        default=exit_close
+    )
+
+    # Excursions over the bars actually held, in the trade's direction
+    held = np.arange(n_hold)[None, :] <= exit_step[:, None]
+    favourable = np.where(is_long, wh, wl)
+    adverse = np.where(is_long, wl, wh)
+    with np.errstate(invalid='ignore'):
+        mfe = np.nanmax(np.where(held, direction[:, None] * (favourable / entry_price[:, None] - 1), np.nan), axis=1)
+        mae = np.nanmin(np.where(held, direction[:, None] * (adverse / entry_price[:, None] - 1), np.nan), axis=1)
+    return exit_step, reason, exit_price, mae, mfe
+
+
+def simulate_panel(panel: Dict[str, np.ndarray], lengths: np.ndarray, strategies: Sequence[Strategy],
+                   exit_rules: Sequence[ExitRule], min_bars: int = 200) -> Dict[str, np.ndarray]:
+    """
+    Backtests a left-padded (symbols x bars) OHLCV panel.
+
+    Returns flat trade arrays: row, strategy and exit rule indexes, direction
+    (+1/-1), entry/exit bar positions within each symbol's history, prices,
+    return/MAE/MFE percentages, bars held, exit reason code and entry score.
+    """
+    o, h, l, c, v = (panel[name] for name in OHLCV_COLUMNS)
+    rows, width = c.shape
+    indicators = indicator_kernels.compute(o, h, l, c, v, engine=Config.INDICATOR_ENGINE)
+
+    valid = np.arange(width)[None, :] >= (width - lengths)[:, None]
+    columns = {
+        'RSI': indicators['RSI'], 'close': c, 'SMA_200': indicators['SMA_200'], 'Vol_Z': indicators['Vol_Z'],
+        'volume': v, 'HA_Close': indicators['HA_Close'], 'HA_Green': indicators['HA_Green'],
+    }
+    features = ScoringService.history_features(columns, valid, strategies)
+    position = features['position']
+    scorer = ScoringService(strategies[0])
+    patterns = candle_patterns.compute(o, h, l, c)
+
+    hold = max(rule.max_hold_days for rule in exit_rules)
+    pad = np.full((rows, hold), np.nan)
+    padded = {name: np.concatenate([panel[name], pad], axis=1) for name in ('open', 'high', 'low', 'close')}
+    steps = np.arange(1, hold + 1)
+
+    trades = []
+    for si, strategy in enumerate(strategies):
+        result = scorer.score_sides(features, strategy)
+        side = result['side'].astype(np.int64)
+        # Entries need at least one later bar to be simulated
+        r, t = np.nonzero((side != 0) & (position >= min_bars - 1) & (np.arange(width) < width - 1)[None, :])
+        if not len(r):
+            continue
+
+        direction = side[r, t]
+        entry_price = c[r, t]
+        cols = t[:, None] + steps[None, :]
+        window = {name: values[r[:, None], cols] for name, values in padded.items()}
+        bars_after = width - 1 - t
+
+        for ei, rule in enumerate(exit_rules):
+            exit_step, reason, exit_price, mae, mfe = simulate_exits(window, entry_price, direction, bars_after, rule)
+
+            exit_col = t + 1 + exit_step
+            keep = _non_overlapping(r, t, exit_col)
+            trades.append({
+                'row': r[keep],
+                'strategy': np.full(keep.sum(), si),
+                'exit_rule': np.full(keep.sum(), ei),
+                'direction': direction[keep],
+                'entry_pos': position[r, t][keep],
+                'exit_pos': position[r, exit_col][keep],
+                'entry_price': entry_price[keep],
+                'exit_price': exit_price[keep],
+                'return_pct': (direction * (exit_price / entry_price - 1) * 100)[keep],
+                'mae_pct': (mae * 100)[keep],
+                'mfe_pct': (mfe * 100)[keep],
+                'bars_held': (exit_step + 1)[keep],
+                'reason': reason[keep],
+                'score': result['score'][r, t][keep],
+                'patterns': patterns[r, t][keep],
+            })
+
+    if not trades:
+        return {}
+    return {name: np.concatenate([chunk[name] for chunk in trades]) for name in trades[0]}
+
+
+def _panel_from_flat(prices: np.ndarray, offsets: np.ndarray, lo: int, hi: int):
+    """Left-padded panel for symbol rows lo..hi-1 of the concatenated price arrays."""
+    lengths = np.diff(offsets[lo:hi + 1])
+    width = int(lengths.max())
+    bar_row = np.repeat(np.arange(hi - lo), lengths)
+    bar_col = np.arange(offsets[hi] - offsets[lo]) - (offsets[lo:hi] - offsets[lo])[bar_row] \
+        + (width - lengths[bar_row])
+    panel = {}
+    for k, name in enumerate(OHLCV_COLUMNS):
+        values = np.full((hi - lo, width), np.nan)
+        values[bar_row, bar_col] = prices[k, offsets[lo]:offsets[hi]]
+        panel[name] = values
+    return panel, lengths
+
+
+def _simulate_shard(shm_name: str, total: int, offsets: np.ndarray, lo: int, hi: int,
+                    strategies, exit_rules, min_bars: int) -> Dict[str, np.ndarray]:
+    """Process-pool entry point: reads one shard from shared memory and simulates it."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        prices = np.ndarray((len(OHLCV_COLUMNS), total), dtype=np.float64, buffer=shm.buf)
+        panel, lengths = _panel_from_flat(prices, offsets, lo, hi)  # copies out of the shared block
+    finally:
+        shm.close()
+    trades = simulate_panel(panel, lengths, strategies, exit_rules, min_bars)
+    if trades:
+        trades['row'] = trades['row'] + lo
+    return trades
+
+
+class BacktestResult:
+    """Trades plus per-strategy / exit-rule statistics of one backtest run."""
+
+    def __init__(self, trades: pd.DataFrame):
+        self.trades = trades
+        self.stats = self.summarize(trades)
+
+    def with_patterns(self, names) -> "BacktestResult":
+        """Only the trades entered on a bar showing any of the named candlestick patterns."""
+        if self.trades.empty:
+            return self
+        return BacktestResult(self.trades[candle_patterns.has_any(self.trades['entry_patterns'], names)])
+
+    @staticmethod
+    def summarize(trades: pd.DataFrame) -> pd.DataFrame:
+        columns = ['trades', 'win_rate', 'avg_return_pct', 'median_return_pct', 'total_return_pct',
+                   'profit_factor', 'max_drawdown_pct', 'avg_bars_held', 'avg_mae_pct', 'avg_mfe_pct',
+                   'stoploss', 'target', 'time', 'end']
+        if trades.empty:
+            return pd.DataFrame(columns=columns)
+
+        rows = {}
+        for key, group in trades.sort_values('exit_time').groupby(['strategy', 'exit_rule'], sort=False):
+            returns = group['return_pct']
+            gains, losses = returns[returns > 0].sum(), -returns[returns < 0].sum()
+            equity = returns.cumsum()  # additive, equal-sized positions
+            reasons = group['exit_reason'].value_counts()
+            rows[key] = [
+                len(group), (returns > 0).mean() * 100, returns.mean(), returns.median(), returns.sum(),
+                gains / losses if losses > 0 else np.inf, (equity.cummax().clip(lower=0) - equity).max(),
+                group['bars_held'].mean(), group['mae_pct'].mean(), group['mfe_pct'].mean(),
+                reasons.get('STOPLOSS', 0), reasons.get('TARGET', 0), reasons.get('TIME', 0), reasons.get('END', 0),
+            ]
+        stats = pd.DataFrame.from_dict(rows, orient='index', columns=columns)
+        stats.index = pd.MultiIndex.from_tuples(stats.index, names=['strategy', 'exit_rule'])
+        return stats.sort_index()
+
+
+class BacktestEngine:
+    def __init__(self, strategies: Sequence[Strategy] = None, exit_rules: Sequence[ExitRule] = None,
+                 workers: int = None, shard_size: int = 64, min_bars: int = 200):
+        self.strategies = list(strategies or Strategy.load_profiles())
+        self.exit_rules = list(exit_rules or ExitRule.defaults())
+        self.workers = Config.BACKTEST_WORKERS if workers is None else workers
+        self.shard_size = shard_size
+        self.min_bars = min_bars
+
+    def run(self, frames: Dict[int, pd.DataFrame]) -> BacktestResult:
+        """Backtests every strategy x exit rule over the given daily OHLCV frames."""
+        symbol_ids = [symbol_id for symbol_id, df in frames.items() if len(df) >= self.min_bars]
+        if not symbol_ids:
+            return BacktestResult(self._trade_frame({}, [], None))
+
+        lengths = np.array([len(frames[s]) for s in symbol_ids], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        total = int(offsets[-1])
+        shards = [(lo, min(lo + self.shard_size, len(symbol_ids))) for lo in range(0, len(symbol_ids), self.shard_size)]
+        workers = min(self.workers or os.cpu_count() or 1, len(shards))
+        logger.info(
+            f"Backtesting {len(symbol_ids)} symbols ({total} bars), {len(self.strategies)} strategies x "
+            f"{len(self.exit_rules)} exit rules, {len(shards)} shards on {workers} workers"
+        )
+
+        shm = shared_memory.SharedMemory(create=True, size=max(len(OHLCV_COLUMNS) * total * 8, 1))
+        try:
+            prices = np.ndarray((len(OHLCV_COLUMNS), total), dtype=np.float64, buffer=shm.buf)
+            for k, name in enumerate(OHLCV_COLUMNS):
+                prices[k] = np.concatenate([frames[s][name].to_numpy(dtype=np.float64) for s in symbol_ids])
+
+            args = (shm.name, total, offsets)
+            tail = (self.strategies, self.exit_rules, self.min_bars)
+            if workers <= 1:
+                results = [_simulate_shard(*args, lo, hi, *tail) for lo, hi in shards]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_simulate_shard, *args, lo, hi, *tail) for lo, hi in shards]
+                    results = [future.result() for future in futures]
+            del prices
+        finally:
+            shm.close()
+            shm.unlink()
+
+        results = [r for r in results if r]
+        trades = {name: np.concatenate([r[name] for r in results]) for name in results[0]} if results else {}
+        index = frames[symbol_ids[0]].index.append([frames[s].index for s in symbol_ids[1:]])
+        return BacktestResult(self._trade_frame(trades, symbol_ids, (index, offsets)))
+
+    def _trade_frame(self, trades: Dict[str, np.ndarray], symbol_ids: List[int], timeline) -> pd.DataFrame:
+        columns = ['symbol_id', 'strategy', 'exit_rule', 'direction', 'entry_time', 'exit_time', 'entry_price',
+                   'exit_price', 'return_pct', 'mae_pct', 'mfe_pct', 'bars_held', 'exit_reason', 'score',
+                   'entry_patterns']
+        if not trades:
+            return pd.DataFrame(columns=columns)
+
+        index, offsets = timeline
+        rows = trades['row']
+        return pd.DataFrame({
+            'symbol_id': np.asarray(symbol_ids)[rows],
+            'strategy': np.array([s.name for s in self.strategies], dtype=object)[trades['strategy']],
+            'exit_rule': np.array([e.name for e in self.exit_rules], dtype=object)[trades['exit_rule']],
+            'direction': np.where(trades['direction'] > 0, "LONG", "SHORT").astype(object),
+            'entry_time': index.take(offsets[rows] + trades['entry_pos']),
+            'exit_time': index.take(offsets[rows] + trades['exit_pos']),
+            'entry_price': trades['entry_price'],
+            'exit_price': trades['exit_price'],
+            'return_pct': trades['return_pct'],
+            'mae_pct': trades['mae_pct'],
+            'mfe_pct': trades['mfe_pct'],
+            'bars_held': trades['bars_held'],
+            'exit_reason': EXIT_REASONS[trades['reason']],
+            'score': trades['score'],
+            'entry_patterns': trades['patterns'],
+        }, columns=columns)
@@ -0,0 +1,192 @@
+"""
+Candlestick pattern detection over whole OHLC panels.
+
+Every pattern is a boolean mask computed with array comparisons on the
+(symbols x time) panel (or a single series), using the previous one or two
+bars through column shifts, so the whole universe and its full history are
+classified in one pass. The masks are packed into a bitset per bar (one bit
+per pattern, see PATTERNS) which IndicatorService adds to the indicator
+frames as the 'Patterns' column and CandlePatternService persists in the
+candle_patterns table, so the screener, scoring and backtests can filter on
+patterns without recomputing them.
+
+Bit positions are stored in the database: only ever append to PATTERNS.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.models import CandlePattern
+
+logger = logging.getLogger(__name__)
+
+# Bit order of the pattern bitset (append only)
+PATTERNS = (
+    'hammer', 'bullish_engulfing', 'morning_star',
+    'shooting_star', 'bearish_engulfing', 'evening_star',
+    'doji', 'inside_bar',
+)
+BULLISH = ('hammer', 'bullish_engulfing', 'morning_star')
+BEARISH = ('shooting_star', 'bearish_engulfing', 'evening_star')
+
+DOJI_BODY_RATIO = 0.1       # body at most 10% of the bar's range
+STAR_BODY_RATIO = 0.3       # middle star body at most 30% of the first body
+STAR_FIRST_BODY_RATIO = 0.5  # first candle of a star: body at least half its range
+
+
+def _previous(values: np.ndarray, k: int) -> np.ndarray:
+    """values shifted k bars to the right along time (NaN for the first k bars)."""
+    out = np.full_like(values, np.nan)
+    if k < values.shape[1]:
+        out[:, k:] = values[:, :-k]
+    return out
+
+
+def detect(open_, high, low, close) -> Dict[str, np.ndarray]:
+    """Boolean mask per pattern, same shape as the inputs (1-D series or 2-D panel)."""
+    was_1d = np.ndim(close) == 1
+    o, h, l, c = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (open_, high, low, close))
+
+    body = np.abs(c - o)
+    span = h - l
+    upper = h - np.maximum(o, c)
+    lower = np.minimum(o, c) - l
+    bullish, bearish = c > o, c < o
+
+    o1, h1, l1, c1 = (_previous(a, 1) for a in (o, h, l, c))
+    o2, h2, l2, c2 = (_previous(a, 2) for a in (o, h, l, c))
+    body1, body2, span2 = np.abs(c1 - o1), np.abs(c2 - o2), h2 - l2
+    star = (body1 <= STAR_BODY_RATIO * body2) & (body2 >= STAR_FIRST_BODY_RATIO * span2) & (span2 > 0)
+    midpoint2 = (o2 + c2) / 2
+
+    masks = {
+        'hammer': (lower > 2 * body) & (upper < body),
+        'bullish_engulfing': (c1 < o1) & bullish & (c > o1) & (o < c1),
+        'morning_star': (c2 < o2) & star & bullish & (c > midpoint2),
+        'shooting_star': (upper > 2 * body) & (lower < body),
+        'bearish_engulfing': (c1 > o1) & bearish & (c < o1) & (o > c1),
+        'evening_star': (c2 > o2) & star & bearish & (c < midpoint2),
+        'doji': (span > 0) & (body <= DOJI_BODY_RATIO * span),
+        'inside_bar': (h < h1) & (l > l1),
+    }
+    if was_1d:
+        return {name: mask[0] for name, mask in masks.items()}
+    return masks
+
+
+def encode(masks: Dict[str, np.ndarray]) -> np.ndarray:
+    """Packs pattern masks into an int32 bitset (bit k = PATTERNS[k])."""
+    bits = None
+    for k, name in enumerate(PATTERNS):
+        layer = masks[name].astype(np.int32) << k
+        bits = layer if bits is None else bits | layer
+    return bits
+
+
+def compute(open_, high, low, close) -> np.ndarray:
+    """Pattern bitset per bar."""
+    return encode(detect(open_, high, low, close))
+
+
+def mask_of(names: Iterable[str]) -> int:
+    """Bit mask selecting the given pattern names."""
+    mask = 0
+    for name in names:
+        if name not in PATTERNS:
+            raise ValueError(f"Unknown candlestick pattern: {name}")
+        mask |= 1 << PATTERNS.index(name)
+    return mask
+
+
+def has_any(bits, names: Iterable[str]):
+    """True where any of the named patterns is set (works on scalars and arrays)."""
+    return (np.asarray(bits).astype(np.int64) & mask_of(names)) != 0
+
+
+def names_of(bits: int) -> List[str]:
+    """Pattern names set in one bitset value."""
+    bits = int(bits)
+    return [name for k, name in enumerate(PATTERNS) if bits >> k & 1]
+
+
+class CandlePatternService:
+    """Persists pattern bitsets per symbol/day and queries them."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, frames: Dict[int, pd.DataFrame]) -> int:
+        """
+        Stores bitsets for bars at or after each symbol's latest stored row.
+
+        The latest stored bar is updated in place when its bitset changed (the
+        same-day candle is rewritten until the session closes); newer bars are
+        inserted. Frames may carry a 'Patterns' column (indicator frames);
+        otherwise it is computed from their OHLC columns. Returns the number
+        of rows added or updated.
+        """
+        frames = {symbol_id: df for symbol_id, df in frames.items() if not df.empty}
+        if not frames:
+            return 0
+
+        newest = (
+            self.db.query(CandlePattern.symbol_id, func.max(CandlePattern.timestamp).label('timestamp'))
+            .filter(CandlePattern.symbol_id.in_(list(frames)))
+            .group_by(CandlePattern.symbol_id)
+            .subquery()
+        )
+        latest = {
+            row.symbol_id: row
+            for row in self.db.query(CandlePattern.id, CandlePattern.symbol_id, CandlePattern.timestamp,
+                                     CandlePattern.bits)
+            .join(newest, (CandlePattern.symbol_id == newest.c.symbol_id)
+                  & (CandlePattern.timestamp == newest.c.timestamp))
+        }
+
+        rows, updates = [], []
+        for symbol_id, df in frames.items():
+            index = df.index
+            times = pd.to_datetime(index, unit='s', utc=True) if index.dtype == np.int64 else pd.to_datetime(index, utc=True)
+            if 'Patterns' in df:
+                bits = df['Patterns'].to_numpy()
+            else:
+                bits = compute(df['open'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+
+            new = np.ones(len(df), dtype=bool)
+            stored = latest.get(symbol_id)
+            if stored is not None:
+                stored_time = pd.Timestamp(stored.timestamp)
+                stored_time = stored_time.tz_localize('UTC') if stored_time.tzinfo is None else stored_time
+                new = times > stored_time
+                same = np.flatnonzero(times == stored_time)
+                if len(same) and int(bits[same[-1]]) != stored.bits:
+                    updates.append({'id': stored.id, 'bits': int(bits[same[-1]])})
+            for timestamp, value in zip(times[new], bits[new]):
+                rows.append({'symbol_id': symbol_id, 'timestamp': timestamp.to_pydatetime(), 'bits': int(value)})
+
+        if rows:
+            self.db.bulk_insert_mappings(CandlePattern, rows)
+        if updates:
+            self.db.bulk_update_mappings(CandlePattern, updates)
+        if rows or updates:
+            self.db.commit()
+        logger.info(f"Candlestick patterns: stored {len(rows)} new and {len(updates)} updated bars "
+                    f"for {len(frames)} symbols")
+        return len(rows) + len(updates)
+
+    def symbols_with(self, names: Iterable[str], since: Optional[datetime] = None) -> Dict[int, List[datetime]]:
+        """Bars (by symbol) on which any of the named patterns occurred."""
+        query = self.db.query(CandlePattern.symbol_id, CandlePattern.timestamp).filter(
+            CandlePattern.bits.op('&')(mask_of(names)) != 0
+        )
+        if since is not None:
+            query = query.filter(CandlePattern.timestamp >= since)
+
+        hits: Dict[int, List[datetime]] = {}
+        for symbol_id, timestamp in query.order_by(CandlePattern.symbol_id, CandlePattern.timestamp).all():
+            hits.setdefault(symbol_id, []).append(timestamp)
+        return hits
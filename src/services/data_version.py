@@ -0,0 +1,32 @@
+"""
+Monotonic version counters for stored data.
+
+Writers bump a named counter in the same transaction as their rows (market
+data ingestion bumps 'ohlcv'), so any process can tell whether results derived
+from that data are still current with one primary-key lookup.
+"""
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from src.models.models import DataVersion
+
+OHLCV_DATA = "ohlcv"
+
+
+def current_version(db: Session, name: str = OHLCV_DATA) -> int:
+    """Current counter value (0 if never bumped)."""
+    row = db.query(DataVersion.version).filter(DataVersion.name == name).first()
+    return row[0] if row else 0
+
+
+def bump_version(db: Session, name: str = OHLCV_DATA):
+    """Increments the counter; takes effect when the caller's transaction commits."""
+    values = {DataVersion.version: DataVersion.version + 1, DataVersion.updated_at: func.now()}
+    if db.query(DataVersion).filter(DataVersion.name == name).update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():  # first bump; another writer may insert concurrently
+            db.add(DataVersion(name=name, version=1))
+    except IntegrityError:
+        db.query(DataVersion).filter(DataVersion.name == name).update(values, synchronize_session=False)
@@ -0,0 +1,169 @@
+"""
+Concurrent alert enrichment.
+
+An alert carries news, corporate actions, holders and insider activity for
+its ticker. EnrichmentService fetches them as three quote-summary parts
+(news, calendar, holders; see quote_summary) from one Ticker per symbol,
+running the parts concurrently on a shared thread pool (also across
+tickers) and waiting at most ENRICHMENT_TIMEOUT_SECONDS. Fields of parts
+that fail or are still running at the deadline are left empty and listed in
+`missing`; alert latency is bounded by the slowest request rather than their
+sum.
+
+With an EnrichmentCache, slow-changing fields (holders, calendar, insiders)
+are served from the enrichment_cache table while fresh; only parts with
+missing or expired fields go to the network, and entries near expiry are
+refreshed in the background (refresh-ahead) without delaying the alert.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+import pytz
+from src.config.settings import Config
+from src.services.enrichment_cache import EnrichmentCache
+from src.services.quote_summary import HOLDER_KINDS, PART_OF, QuoteSummary, QuoteSummaryFetcher
+
+logger = logging.getLogger(__name__)
+
+# Enrichment fields, in message order (each is cached separately)
+LOOKUPS = ('news', 'corporate_actions') + HOLDER_KINDS + ('insider_transactions',)
+ENRICHMENT_PARTS = ('news', 'calendar', 'holders')
+
+
+class Enrichment(QuoteSummary):
+    """Quote summary gathered for one alert, with what was missing or served from cache."""
+
+    def __init__(self, ticker: str):
+        super().__init__(ticker)
+        self.missing: List[str] = []  # fields whose request failed or timed out
+        self.cached: List[str] = []  # fields served from the enrichment cache
+        self.elapsed_seconds = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+
+# Lookup threads shared by all enrichment calls in this process
+_executor = None
+_executor_lock = threading.Lock()
+
+# (ticker, part) pairs with a background refresh in flight
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.ENRICHMENT_WORKERS, thread_name_prefix="enrichment")
+        return _executor
+
+
+class EnrichmentService:
+    def __init__(self, fetcher: QuoteSummaryFetcher = None, timeout: float = None,
+                 cache: EnrichmentCache = None):
+        self.fetcher = fetcher or QuoteSummaryFetcher()
+        self.timeout = Config.ENRICHMENT_TIMEOUT_SECONDS if timeout is None else timeout
+        self.cache = cache
+
+    def _fetch(self, ticker: str, t, part: str) -> Dict[str, Any]:
+        """One part over the network; written to the cache even if the caller stopped waiting."""
+        values = self.fetcher.fetch_part(t, part)
+        if self.cache is not None:
+            for field, value in values.items():
+                self.cache.put(ticker, field, value)
+        return values
+
+    def _refresh(self, ticker: str, t, part: str):
+        try:
+            self._fetch(ticker, t, part)
+        except Exception as e:
+            logger.warning(f"Background refresh of {part} for {ticker} failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard((ticker, part))
+
+    def _refresh_ahead(self, executor: ThreadPoolExecutor, ticker: str, t, part: str):
+        with _refreshing_lock:
+            if (ticker, part) in _refreshing:
+                return
+            _refreshing.add((ticker, part))
+        executor.submit(self._refresh, ticker, t, part)
+
+    def fetch(self, ticker: str) -> Enrichment:
+        """All parts for one ticker, concurrently, within the timeout."""
+        return self.fetch_many([ticker])[ticker]
+
+    def fetch_many(self, tickers: Iterable[str]) -> Dict[str, Enrichment]:
+        """All parts for several tickers at once; one shared deadline."""
+        start = time.perf_counter()
+        executor = _get_executor()
+        results = {ticker: Enrichment(ticker) for ticker in tickers}
+
+        cached = {}
+        if self.cache is not None:
+            try:
+                cached = self.cache.get_many(results, LOOKUPS)
+            except Exception as e:
+                logger.error(f"Enrichment cache read failed: {e}")
+
+        now = datetime.now(pytz.UTC)
+        futures = {}
+        for ticker, enrichment in results.items():
+            needed, refresh = set(), set()
+            for field in LOOKUPS:
+                entry = cached.get((ticker, field))
+                if entry is not None and not entry.expired(now):
+                    enrichment.set(field, entry.value)
+                    enrichment.cached.append(field)
+                    if entry.refresh_due(now):
+                        refresh.add(PART_OF[field])
+                else:
+                    needed.add(PART_OF[field])
+            if not needed and not refresh:
+                continue
+
+            t = self.fetcher.ticker(ticker)  # shared by this ticker's parts
+            for part in ENRICHMENT_PARTS:
+                if part in needed:
+                    futures[executor.submit(self._fetch, ticker, t, part)] = (ticker, part)
+                elif part in refresh:
+                    self._refresh_ahead(executor, ticker, t, part)
+        done, pending = wait(futures, timeout=self.timeout) if futures else (set(), set())
+
+        failed = []
+        for future in done:
+            ticker, part = futures[future]
+            enrichment = results[ticker]
+            try:
+                values = future.result()
+            except Exception as e:
+                logger.error(f"Enrichment request '{part}' failed for {ticker}: {e}")
+                failed.append((ticker, part))
+                continue
+            for field, value in values.items():
+                if value is not None or field not in enrichment.cached:
+                    enrichment.set(field, value)
+        for future in pending:
+            future.cancel()  # queued requests are dropped; running ones finish in the background
+            failed.append(futures[future])
+        for ticker, part in failed:
+            enrichment = results[ticker]
+            enrichment.missing.extend(
+                field for field in LOOKUPS if PART_OF[field] == part and field not in enrichment.cached
+            )
+
+        elapsed = time.perf_counter() - start
+        for enrichment in results.values():
+            enrichment.elapsed_seconds = elapsed
+            if enrichment.missing:
+                enrichment.missing.sort(key=LOOKUPS.index)
+                logger.warning(f"Partial enrichment for {enrichment.ticker} after {elapsed:.1f}s, "
+                               f"missing: {', '.join(enrichment.missing)}")
+        return results
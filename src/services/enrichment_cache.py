@@ -0,0 +1,114 @@
+"""
+Persistent TTL cache for slow-changing alert enrichment.
+
+Shareholding tables change quarterly and corporate calendars / insider
+filings at most daily, so EnrichmentService reads them from the
+enrichment_cache table (one row per ticker and lookup kind, value pickled)
+and only goes to Yahoo when an entry is missing or expired. Once an entry is
+older than ENRICHMENT_REFRESH_AHEAD of its TTL it is still served, and a
+background refresh replaces it before it expires. News is never cached.
+
+Each call opens its own session, so the cache can be used from the
+enrichment lookup threads.
+"""
+
+import logging
+import pickle
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import pytz
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.config.settings import Config
+from src.models.models import EnrichmentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Time to live per lookup kind (kinds not listed are not cached)
+TTL = {
+    'major_holders': timedelta(hours=Config.ENRICHMENT_TTL_HOLDERS_HOURS),
+    'institutional_holders': timedelta(hours=Config.ENRICHMENT_TTL_HOLDERS_HOURS),
+    'mutualfund_holders': timedelta(hours=Config.ENRICHMENT_TTL_HOLDERS_HOURS),
+    'corporate_actions': timedelta(hours=Config.ENRICHMENT_TTL_CALENDAR_HOURS),
+    'insider_transactions': timedelta(hours=Config.ENRICHMENT_TTL_INSIDERS_HOURS),
+}
+
+
+def _utc(value: datetime) -> datetime:
+    return pytz.UTC.localize(value) if value.tzinfo is None else value.astimezone(pytz.UTC)
+
+
+class CachedValue:
+    def __init__(self, value, fetched_at: datetime, expires_at: datetime):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+    def expired(self, now: datetime) -> bool:
+        return now >= self.expires_at
+
+    def refresh_due(self, now: datetime) -> bool:
+        """Past the refresh-ahead point of its TTL (but possibly not expired yet)."""
+        return now >= self.fetched_at + (self.expires_at - self.fetched_at) * Config.ENRICHMENT_REFRESH_AHEAD
+
+
+class EnrichmentCache:
+    def __init__(self, session_factory: Callable[[], Session] = None, ttl: Dict[str, timedelta] = None):
+        if session_factory is None:
+            from src.database.db import db_instance
+            session_factory = db_instance.SessionLocal
+        self.session_factory = session_factory
+        self.ttl = {kind: value for kind, value in (TTL if ttl is None else ttl).items() if value > timedelta(0)}
+
+    def cacheable(self, kind: str) -> bool:
+        return kind in self.ttl
+
+    def get_many(self, tickers: Iterable[str], kinds: Iterable[str]) -> Dict[Tuple[str, str], CachedValue]:
+        """Cached entries (expired ones included) for the given tickers and kinds, in one query."""
+        tickers, kinds = list(tickers), [kind for kind in kinds if self.cacheable(kind)]
+        if not tickers or not kinds:
+            return {}
+        db = self.session_factory()
+        try:
+            rows = db.query(EnrichmentCacheEntry).filter(
+                EnrichmentCacheEntry.ticker.in_(tickers),
+                EnrichmentCacheEntry.kind.in_(kinds)
+            ).all()
+            entries = {}
+            for row in rows:
+                try:
+                    value = pickle.loads(row.payload)
+                except Exception as e:
+                    logger.warning(f"Dropping unreadable enrichment cache entry {row.ticker}/{row.kind}: {e}")
+                    continue
+                entries[(row.ticker, row.kind)] = CachedValue(value, _utc(row.fetched_at), _utc(row.expires_at))
+            return entries
+        finally:
+            db.close()
+
+    def get(self, ticker: str, kind: str) -> Optional[CachedValue]:
+        return self.get_many([ticker], [kind]).get((ticker, kind))
+
+    def put(self, ticker: str, kind: str, value: Any, now: datetime = None):
+        """Stores a freshly fetched value (None, i.e. a failed fetch, is not stored)."""
+        if value is None or not self.cacheable(kind):
+            return
+        now = now or datetime.now(pytz.UTC)
+        fields = {'payload': pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                  'fetched_at': now, 'expires_at': now + self.ttl[kind]}
+        db = self.session_factory()
+        try:
+            for attempt in range(2):  # a concurrent insert of the same key turns into an update
+                try:
+                    query = db.query(EnrichmentCacheEntry).filter_by(ticker=ticker, kind=kind)
+                    if not query.update(fields, synchronize_session=False):
+                        db.add(EnrichmentCacheEntry(ticker=ticker, kind=kind, **fields))
+                    db.commit()
+                    return
+                except IntegrityError:
+                    db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error caching {kind} for {ticker}: {e}")
+        finally:
+            db.close()
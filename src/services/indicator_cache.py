@@ -0,0 +1,119 @@
+"""
+Process-level LRU cache of computed indicator frames.
+
+Entries are keyed by (symbol id, last stored candle, row count, last candle's
+OHLCV values, config hash), so a new candle, a same-day candle rewritten in
+place or a changed indicator-relevant setting produces a new key and the stale
+entry simply ages out. The cache is bounded by a memory budget
+(INDICATOR_CACHE_MB) rather than an entry count.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorCache:
+    # Config attributes that change the computed indicator frame
+    CONFIG_KEYS = ('DATA_LOOKBACK_DAYS', 'INDICATOR_ENGINE')
+    # Values of the last candle that are part of the key (today's candle is rewritten in place)
+    BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def config_hash(cls, version: str = "") -> str:
+        """Short hash of the indicator-relevant Config values (plus a code version)."""
+        parts = [version] + [f"{key}={getattr(Config, key, None)!r}" for key in cls.CONFIG_KEYS]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+    @classmethod
+    def make_key(cls, symbol_id: int, df: pd.DataFrame, config_hash: str) -> Tuple:
+        """Builds the cache key for a freshly loaded (raw OHLCV) frame."""
+        # As bytes, so a NaN value still compares equal to itself
+        last_bar = np.array([df[name].iat[-1] for name in cls.BAR_COLUMNS if name in df.columns], dtype=float)
+        return (symbol_id, df.index[-1], len(df), last_bar.tobytes(), config_hash)
+
+    @staticmethod
+    def frame_size(df: pd.DataFrame) -> int:
+        """
+        Upper-bound bytes for a numeric frame (8 bytes per cell plus the index).
+
+        Much cheaper than DataFrame.memory_usage, which builds a Series per column.
+        """
+        return int(len(df) * (df.index.dtype.itemsize + 8 * df.shape[1]))
+
+    def get(self, key: Tuple) -> Optional[pd.DataFrame]:
+        """Returns the cached frame (treat as read-only) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, df: pd.DataFrame):
+        """Stores a frame, evicting least recently used entries over the budget."""
+        size = self.frame_size(df)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes
+            }
+
+    def format_stats(self, since: Dict[str, int] = None) -> str:
+        """One-line summary; counters are relative to `since` when given."""
+        stats = self.stats()
+        if since:
+            for counter in ("hits", "misses", "evictions"):
+                stats[counter] -= since.get(counter, 0)
+        return (
+            f"hits={stats['hits']} misses={stats['misses']} evictions={stats['evictions']} "
+            f"entries={stats['entries']} size={stats['bytes'] / 1024 / 1024:.1f}/"
+            f"{self.max_bytes / 1024 / 1024:.0f} MB"
+        )
+
+
+# Global cache instance shared by the scan, the screener and the API
+indicator_cache = IndicatorCache(max_bytes=int(Config.INDICATOR_CACHE_MB * 1024 * 1024))
@@ -0,0 +1,314 @@
+"""
+Array kernels for the daily indicator set.
+
+Computes the same columns as IndicatorService.calculate_indicators (SMA 20/50/200,
+RSI 14, ATR 14, Heikin Ashi, 30-day volume z-score) directly on NumPy arrays,
+either for one series or for a symbol x time panel.
+
+Panels are left-padded with NaN: each row starts at its first non-NaN close and
+all rows end on their latest bar. A NaN inside a row (a missing candle) only
+blanks the rolling windows that contain it, as with pandas rolling. Two
+implementations are provided:
+
+- compute_numpy: vectorized NumPy (cumulative-sum rolling windows)
+- compute_jit:   one fused Numba loop per row, used when numba is importable
+
+compute() picks the JIT path automatically and falls back to NumPy.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:  # optional dependency
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# Output columns, in the order calculate_indicators adds them
+INDICATOR_COLUMNS = (
+    'SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'ATR',
+    'HA_Close', 'HA_Open', 'HA_High', 'HA_Low', 'HA_Green',
+    'Vol_Mean', 'Vol_Std', 'Vol_Z'
+)
+
+SMA_WINDOWS = (20, 50, 200)
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+VOLUME_WINDOW = 30
+
+
+def _as_panel(*arrays) -> Tuple[bool, List[np.ndarray]]:
+    """Returns (was_1d, float64 2-D views) for the given input arrays."""
+    was_1d = np.ndim(arrays[0]) == 1
+    panels = [np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in arrays]
+    return was_1d, panels
+
+
+def _restore_shape(result: Dict[str, np.ndarray], was_1d: bool) -> Dict[str, np.ndarray]:
+    if was_1d:
+        return {name: values[0] for name, values in result.items()}
+    return result
+
+
+def _first_valid(close: np.ndarray) -> np.ndarray:
+    """Index of the first non-NaN close per row (row length if none)."""
+    valid = ~np.isnan(close)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), close.shape[1])
+
+
+def _rolling_mean(values: np.ndarray, valid: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over full windows of valid values, NaN elsewhere (pandas min_periods=window).
+
+    NaN values count as invalid, so a gap only blanks the windows containing it.
+    """
+    rows, cols = values.shape
+    valid = valid & ~np.isnan(values)
+    out = np.full((rows, cols), np.nan)
+    if cols < window:
+        return out
+
+    zeros = np.zeros((rows, 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+    window_sum = sums[:, window:] - sums[:, :-window]
+    window_count = counts[:, window:] - counts[:, :-window]
+    out[:, window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+    return out
+
+
+def _rolling_std(values: np.ndarray, valid: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sample standard deviation (ddof=1) over full windows of valid values."""
+    # Centre each row first so the sum-of-squares form does not lose precision
+    centred = values - np.nanmean(np.where(valid, values, np.nan), axis=1, keepdims=True)
+    mean = _rolling_mean(centred, valid, window)
+    mean_sq = _rolling_mean(centred * centred, valid, window)
+    variance = np.maximum(mean_sq - mean * mean, 0.0) * window / (window - 1)
+    return np.sqrt(variance)
+
+
+def compute_numpy(open_, high, low, close, volume) -> Dict[str, np.ndarray]:
+    """Vectorized NumPy implementation. Accepts 1-D series or 2-D (symbols x time) panels."""
+    was_1d, (o, h, lo, c, v) = _as_panel(open_, high, low, close, volume)
+    rows, cols = c.shape
+    start = _first_valid(c)
+    position = np.arange(cols)[None, :]
+    valid = position >= start[:, None]
+    result = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for window in SMA_WINDOWS:
+            result[f'SMA_{window}'] = _rolling_mean(c, valid, window)
+
+        # RSI: the first bar of each row has no delta and counts as zero gain/loss
+        prev_close = np.concatenate([np.full((rows, 1), np.nan), c[:, :-1]], axis=1)
+        delta = np.where(position > start[:, None], c - prev_close, 0.0)
+        gain = _rolling_mean(np.where(delta > 0, delta, 0.0), valid, RSI_WINDOW)
+        loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), valid, RSI_WINDOW)
+        result['RSI'] = 100 - (100 / (1 + gain / loss))
+
+        # ATR: true range falls back to high - low on the first bar
+        true_range = np.fmax(h - lo, np.fmax(np.abs(h - prev_close), np.abs(lo - prev_close)))
+        result['ATR'] = _rolling_mean(true_range, valid, ATR_WINDOW)
+
+        # Heikin Ashi: the open recurrence runs along time, vectorized across symbols
+        ha_close = (o + h + lo + c) / 4
+        ha_open = np.full((rows, cols), np.nan)
+        first_open = o[np.arange(rows), np.minimum(start, cols - 1)] if cols else np.empty(0)
+        for t in range(cols):
+            carried = (ha_open[:, t - 1] + ha_close[:, t - 1]) / 2 if t else np.nan
+            ha_open[:, t] = np.where(start == t, first_open, carried)
+        result['HA_Close'] = ha_close
+        result['HA_Open'] = ha_open
+        result['HA_High'] = np.fmax(h, np.fmax(ha_open, ha_close))
+        result['HA_Low'] = np.fmin(lo, np.fmin(ha_open, ha_close))
+        result['HA_Green'] = ha_close > ha_open
+
+        vol_mean = _rolling_mean(v, valid, VOLUME_WINDOW)
+        vol_std = _rolling_std(v, valid, VOLUME_WINDOW)
+        result['Vol_Mean'] = vol_mean
+        result['Vol_Std'] = vol_std
+        result['Vol_Z'] = (v - vol_mean) / vol_std
+
+    return _restore_shape({name: result[name] for name in INDICATOR_COLUMNS}, was_1d)
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _slide(total, missing, value, sign):
+        """Adds (sign 1) or removes (sign -1) a value from a running window sum and its NaN count."""
+        if np.isnan(value):
+            return total, missing + sign
+        return total + sign * value, missing
+
+    @numba.njit(cache=True)
+    def _nanmax(a, b):
+        if np.isnan(a):
+            return b
+        if np.isnan(b):
+            return a
+        return max(a, b)
+
+    @numba.njit(cache=True)
+    def _nanmin(a, b):
+        if np.isnan(a):
+            return b
+        if np.isnan(b):
+            return a
+        return min(a, b)
+
+    @numba.njit(cache=True)
+    def _true_range(high, low, prev_close):
+        """Largest of the three ranges that are not NaN (high - low on the first bar)."""
+        return _nanmax(high - low, _nanmax(abs(high - prev_close), abs(low - prev_close)))
+
+    @numba.njit(cache=True)
+    def _fused_kernel(o, h, lo, c, v, out):
+        """
+        Single pass per row computing every indicator with running window sums.
+
+        Each window also counts the NaN values it holds and only produces a
+        value when there are none, so a missing candle blanks the windows that
+        contain it (as pandas rolling does) instead of the rest of the row.
+        """
+        rows, cols = c.shape
+        for r in range(rows):
+            s = 0
+            while s < cols and np.isnan(c[r, s]):
+                s += 1
+
+            sum20, nan20 = 0.0, 0
+            sum50, nan50 = 0.0, 0
+            sum200, nan200 = 0.0, 0
+            gain_sum = 0.0
+            loss_sum = 0.0
+            tr_sum, tr_nan = 0.0, 0
+            vol_sum, vol_nan = 0.0, 0
+            vol_sq = 0.0
+            ha_open = 0.0
+            for t in range(s, cols):
+                k = t - s
+
+                sum20, nan20 = _slide(sum20, nan20, c[r, t], 1)
+                sum50, nan50 = _slide(sum50, nan50, c[r, t], 1)
+                sum200, nan200 = _slide(sum200, nan200, c[r, t], 1)
+                if k >= 20:
+                    sum20, nan20 = _slide(sum20, nan20, c[r, t - 20], -1)
+                if k >= 50:
+                    sum50, nan50 = _slide(sum50, nan50, c[r, t - 50], -1)
+                if k >= 200:
+                    sum200, nan200 = _slide(sum200, nan200, c[r, t - 200], -1)
+                if k >= 19 and nan20 == 0:
+                    out[0, r, t] = sum20 / 20
+                if k >= 49 and nan50 == 0:
+                    out[1, r, t] = sum50 / 50
+                if k >= 199 and nan200 == 0:
+                    out[2, r, t] = sum200 / 200
+
+                # RSI / ATR windows (the bar leaving the window is recomputed from prices).
+                # A NaN delta counts as neither gain nor loss, like delta.where(delta > 0, 0).
+                prev_close = c[r, t - 1] if k else np.nan
+                delta = c[r, t] - prev_close
+                if delta > 0:
+                    gain_sum += delta
+                elif delta < 0:
+                    loss_sum -= delta
+                tr_sum, tr_nan = _slide(tr_sum, tr_nan, _true_range(h[r, t], lo[r, t], prev_close), 1)
+                if k >= 14:
+                    j = t - 14
+                    prev_close = c[r, j - 1] if j > s else np.nan
+                    old_delta = c[r, j] - prev_close
+                    if old_delta > 0:
+                        gain_sum -= old_delta
+                    elif old_delta < 0:
+                        loss_sum += old_delta
+                    tr_sum, tr_nan = _slide(tr_sum, tr_nan, _true_range(h[r, j], lo[r, j], prev_close), -1)
+                if k >= 13:
+                    avg_gain = gain_sum / 14
+                    avg_loss = loss_sum / 14
+                    if avg_loss == 0:
+                        out[3, r, t] = 100.0 if avg_gain > 0 else np.nan
+                    else:
+                        out[3, r, t] = 100 - 100 / (1 + avg_gain / avg_loss)
+                    if tr_nan == 0:
+                        out[4, r, t] = tr_sum / 14
+
+                # Heikin Ashi
+                ha_close = (o[r, t] + h[r, t] + lo[r, t] + c[r, t]) / 4
+                if k == 0:
+                    ha_open = o[r, t]
+                else:
+                    ha_open = (ha_open + out[5, r, t - 1]) / 2
+                out[5, r, t] = ha_close
+                out[6, r, t] = ha_open
+                out[7, r, t] = _nanmax(h[r, t], _nanmax(ha_open, ha_close))
+                out[8, r, t] = _nanmin(lo[r, t], _nanmin(ha_open, ha_close))
+                out[9, r, t] = 1.0 if ha_close > ha_open else 0.0
+
+                # Volume z-score
+                vol_sum, vol_nan = _slide(vol_sum, vol_nan, v[r, t], 1)
+                vol_sq = _slide(vol_sq, 0, v[r, t] * v[r, t], 1)[0]
+                if k >= 30:
+                    vol_sum, vol_nan = _slide(vol_sum, vol_nan, v[r, t - 30], -1)
+                    vol_sq = _slide(vol_sq, 0, v[r, t - 30] * v[r, t - 30], -1)[0]
+                if k >= 29 and vol_nan == 0:
+                    mean = vol_sum / 30
+                    variance = max((vol_sq - vol_sum * mean) / 29, 0.0)
+                    std = np.sqrt(variance)
+                    out[10, r, t] = mean
+                    out[11, r, t] = std
+                    if std > 0:
+                        out[12, r, t] = (v[r, t] - mean) / std
+                    elif v[r, t] != mean:
+                        out[12, r, t] = np.inf if v[r, t] > mean else -np.inf
+
+
+def compute_jit(open_, high, low, close, volume) -> Dict[str, np.ndarray]:
+    """Fused Numba implementation (requires numba). Same inputs/outputs as compute_numpy."""
+    if not NUMBA_AVAILABLE:
+        raise RuntimeError("numba is not installed")
+
+    was_1d, (o, h, lo, c, v) = _as_panel(open_, high, low, close, volume)
+    out = np.full((len(INDICATOR_COLUMNS),) + c.shape, np.nan)
+    _fused_kernel(o, h, lo, c, v, out)
+
+    result = dict(zip(INDICATOR_COLUMNS, out))
+    result['HA_Green'] = result['HA_Green'] == 1.0
+    return _restore_shape(result, was_1d)
+
+
+def compute(open_, high, low, close, volume, engine: str = "auto") -> Dict[str, np.ndarray]:
+    """Dispatches to the JIT kernel when available ('auto'/'numba'), else NumPy."""
+    if engine in ("auto", "numba") and NUMBA_AVAILABLE:
+        return compute_jit(open_, high, low, close, volume)
+    if engine == "numba":
+        logger.warning("INDICATOR_ENGINE=numba but numba is not installed; using NumPy kernels")
+    return compute_numpy(open_, high, low, close, volume)
+
+
+def stack_panel(frames: Dict[int, pd.DataFrame], columns=('open', 'high', 'low', 'close', 'volume')):
+    """
+    Stacks per-symbol OHLCV frames into left-padded (symbols x time) arrays.
+
+    Returns (symbol_ids, {column: 2-D float64 array}, lengths); each row ends on
+    that symbol's latest bar.
+    """
+    symbol_ids = list(frames)
+    lengths = np.array([len(frames[s]) for s in symbol_ids], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+
+    panel = {}
+    for column in columns:
+        values = np.full((len(symbol_ids), width), np.nan)
+        for row, symbol_id in enumerate(symbol_ids):
+            n = lengths[row]
+            if n:
+                values[row, width - n:] = frames[symbol_id][column].to_numpy(dtype=np.float64)
+        panel[column] = values
+    return symbol_ids, panel, lengths
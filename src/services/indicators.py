@@ -1,13 +1,32 @@
+import numpy as np
 import pandas as pd
+from typing import Dict, Iterable
 from sqlalchemy.orm import Session
 from src.models.models import OHLCV, Symbol
 
 class IndicatorService:
+    # Columns selected by the loaders, in frame order
+    OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    # load_data_many: ids per IN (...) query and rows per streamed batch
+    LOAD_MANY_CHUNK_SIZE = 500
+    STREAM_BATCH_ROWS = 5000
+
+    # Bump when the indicator formulas change so cached frames are not reused
+    INDICATOR_VERSION = "2"
+
     def __init__(self, db: Session):
         self.db = db
 
-    def load_data(self, ticker: str, lookback_days: int = None) -> pd.DataFrame:
-        """Loads OHLCV data from DB into a Pandas DataFrame."""
+    def load_data(self, ticker: str, lookback_days: int = None, compact: bool = False) -> pd.DataFrame:
+        """
+        Loads OHLCV data from DB into a Pandas DataFrame.
+
+        Only the timestamp and price/volume columns are selected (as plain tuples,
+        no ORM objects). With compact=True the frame is built from contiguous
+        float32 arrays with an int64 epoch-seconds index, roughly halving the
+        per-row footprint of the price columns.
+        """
         from src.config.settings import Config
         from datetime import datetime, timedelta
         import pytz
@@ -22,39 +41,217 @@ class IndicatorService:
         # Calculate cutoff date with UTC timezone to match DB timestamps
         cutoff_date = datetime.now(pytz.UTC) - timedelta(days=lookback_days)
 
-        # Query data with lookback limit
-        data = self.db.query(OHLCV).filter(
+        # Query data with lookback limit (column tuples only)
+        rows = self.db.query(
+            OHLCV.timestamp, OHLCV.open, OHLCV.high, OHLCV.low, OHLCV.close, OHLCV.volume
+        ).filter(
             OHLCV.symbol_id == symbol.id,
             OHLCV.timestamp >= cutoff_date
         ).order_by(OHLCV.timestamp.asc()).all()
 
-        if not data:
+        if not rows:
             return pd.DataFrame()
 
-        records = [{
-            'timestamp': d.timestamp,
-            'open': d.open,
-            'high': d.high,
-            'low': d.low,
-            'close': d.close,
-            'volume': d.volume
-        } for d in data]
-
-        df = pd.DataFrame(records)
-        df.set_index('timestamp', inplace=True)
-        
+        timestamps, *values = zip(*rows)
+        df = self._frame_from_columns(timestamps, values, compact=compact)
+
         # Debug: Log dataframe size
         import logging
         logger = logging.getLogger(__name__)
         logger.info(f"Loaded {len(df)} days for {ticker} from database")
-        
+
         if len(df) < 200:
             logger.warning(f"⚠️ Insufficient data for {ticker}: {len(df)} days (need 200+)")
-        
+
         return df
 
-    def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    def load_data_many(self, symbol_ids: Iterable[int], lookback_days: int = None, last_n: int = None,
+                       compact: bool = False, chunk_size: int = None) -> Dict[int, pd.DataFrame]:
+        """
+        Loads OHLCV data for many symbols with one query per chunk of ids.
+
+        Rows are streamed ordered by (symbol_id, timestamp) and split into
+        per-symbol frames on the symbol boundaries. With last_n set, each
+        symbol is limited to its latest N rows via a ROW_NUMBER() window
+        instead of a calendar cutoff (lookback_days then only applies if
+        given explicitly). Symbols without data are absent from the result.
+        """
+        from src.config.settings import Config
+        from datetime import datetime, timedelta
+        from sqlalchemy import func, select
+        import pytz
+        import logging
+        logger = logging.getLogger(__name__)
+
+        if lookback_days is None and last_n is None:
+            lookback_days = Config.DATA_LOOKBACK_DAYS
+        if chunk_size is None:
+            chunk_size = self.LOAD_MANY_CHUNK_SIZE
+
+        ids = sorted(set(symbol_ids))
+        cutoff_date = None
+        if lookback_days is not None:
+            cutoff_date = datetime.now(pytz.UTC) - timedelta(days=lookback_days)
+
+        frames = {}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            columns = [OHLCV.symbol_id, OHLCV.timestamp, OHLCV.open, OHLCV.high,
+                       OHLCV.low, OHLCV.close, OHLCV.volume]
+            filters = [OHLCV.symbol_id.in_(chunk)]
+            if cutoff_date is not None:
+                filters.append(OHLCV.timestamp >= cutoff_date)
+
+            if last_n is not None:
+                row_number = func.row_number().over(
+                    partition_by=OHLCV.symbol_id,
+                    order_by=OHLCV.timestamp.desc()
+                ).label('rn')
+                ranked = select(*columns, row_number).where(*filters).subquery()
+                stmt = select(
+                    ranked.c.symbol_id, ranked.c.timestamp, ranked.c.open, ranked.c.high,
+                    ranked.c.low, ranked.c.close, ranked.c.volume
+                ).where(ranked.c.rn <= last_n).order_by(ranked.c.symbol_id, ranked.c.timestamp)
+            else:
+                stmt = select(*columns).where(*filters).order_by(OHLCV.symbol_id, OHLCV.timestamp)
+
+            # Server-side cursor: rows arrive in batches instead of one big buffer
+            result = self.db.execute(stmt.execution_options(stream_results=True, yield_per=self.STREAM_BATCH_ROWS))
+            id_parts, ts_parts, value_parts = [], [], []
+            for batch in result.partitions():
+                batch_ids, batch_ts, *batch_values = zip(*batch)
+                id_parts.append(np.asarray(batch_ids, dtype=np.int64))
+                ts_parts.append(np.asarray(batch_ts, dtype=object))
+                value_parts.append(np.asarray(batch_values, dtype=np.float32 if compact else np.float64))
+
+            if not id_parts:
+                continue
+
+            symbol_col = np.concatenate(id_parts)
+            timestamps = np.concatenate(ts_parts)
+            values = np.concatenate(value_parts, axis=1)
+            if compact:
+                timestamps = self._to_epoch_seconds(timestamps)
+
+            # Rows are grouped by symbol, so boundaries are where the id changes
+            boundaries = np.flatnonzero(np.diff(symbol_col)) + 1
+            starts = np.concatenate(([0], boundaries))
+            for symbol_id, ts_part, value_part in zip(
+                symbol_col[starts],
+                np.split(timestamps, boundaries),
+                np.split(values, boundaries, axis=1)
+            ):
+                frames[int(symbol_id)] = self._frame_from_columns(ts_part, value_part, compact=compact)
+
+        logger.info(f"Loaded OHLCV for {len(frames)}/{len(ids)} symbols in {-(-len(ids) // chunk_size)} queries")
+        return frames
+
+    @classmethod
+    def _frame_from_columns(cls, timestamps, values, compact: bool = False) -> pd.DataFrame:
+        """Wraps column sequences into an OHLCV frame without per-row dicts."""
+        dtype = np.float32 if compact else np.float64
+        data = {
+            name: np.ascontiguousarray(column, dtype=dtype)
+            for name, column in zip(cls.OHLCV_COLUMNS, values)
+        }
+
+        if compact:
+            if not isinstance(timestamps, np.ndarray) or timestamps.dtype != np.int64:
+                timestamps = cls._to_epoch_seconds(timestamps)
+            index = pd.Index(timestamps, name='timestamp')
+        else:
+            index = pd.DatetimeIndex(list(timestamps), name='timestamp')
+
+        return pd.DataFrame(data, index=index, copy=False)
+
+    @staticmethod
+    def _to_epoch_seconds(timestamps) -> np.ndarray:
+        """Converts DB timestamps (naive values are treated as UTC) to int64 epoch seconds."""
+        index = pd.to_datetime(list(timestamps), utc=True)
+        return index.as_unit('s').asi8.astype(np.int64, copy=False)
+
+    def calculate_indicators_cached(self, symbol_id: int, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        calculate_indicators() memoized in the process-level indicator cache.
+
+        Keyed by symbol, last candle, row count and the indicator config hash,
+        so repeated scans/screens without a new candle skip the recompute.
+        The returned frame may be shared - do not modify it in place.
+        """
+        from src.services.indicator_cache import indicator_cache
+
+        if df.empty:
+            return df
+
+        key = indicator_cache.make_key(symbol_id, df, indicator_cache.config_hash(self.INDICATOR_VERSION))
+        cached = indicator_cache.get(key)
+        if cached is not None:
+            return cached
+
+        df = self.calculate_indicators(df)
+        indicator_cache.put(key, df)
+        return df
+
+    def calculate_indicators(self, df: pd.DataFrame, engine: str = None) -> pd.DataFrame:
+        """
+        Applies TA indicators to the DataFrame.
+
+        engine: 'auto' (Numba kernels if installed, else NumPy), 'numba', 'numpy'
+        or 'pandas' (the original rolling-window implementation). Defaults to
+        Config.INDICATOR_ENGINE. Use the returned frame - the kernel engines
+        build a new one instead of modifying df.
+        """
+        from src.config.settings import Config
+        import logging
+        logger = logging.getLogger(__name__)
+
+        if df.empty:
+            return df
+
+        if engine is None:
+            engine = Config.INDICATOR_ENGINE
+        if engine == "pandas":
+            return self._calculate_indicators_pandas(df)
+
+        logger.info(f"Calculating indicators for {len(df)} rows")
+        return self.with_indicator_columns(df, self.indicator_columns(
+            *(df[name].to_numpy() for name in self.OHLCV_COLUMNS), engine=engine
+        ))
+
+    @staticmethod
+    def indicator_columns(open_, high, low, close, volume, engine: str = "auto") -> Dict[str, np.ndarray]:
+        """
+        Indicator and candlestick-pattern columns for 1-D OHLCV arrays.
+
+        Arrays in, arrays out (no frames or sessions), so it can run in a
+        worker process. Float columns keep the dtype of `close`. The 'pandas'
+        engine runs the reference implementation on a frame of the arrays.
+        """
+        from src.services import candle_patterns, indicator_kernels
+
+        if engine == "pandas":
+            df = pd.DataFrame(dict(zip(IndicatorService.OHLCV_COLUMNS, (open_, high, low, close, volume))))
+            df = IndicatorService(None)._calculate_indicators_pandas(df)
+            return {name: df[name].to_numpy() for name in df.columns if name not in IndicatorService.OHLCV_COLUMNS}
+
+        result = indicator_kernels.compute(open_, high, low, close, volume, engine=engine)
+        columns = {}
+        for name in indicator_kernels.INDICATOR_COLUMNS:
+            values = result[name]
+            columns[name] = values if values.dtype == bool else values.astype(close.dtype, copy=False)
+        columns['Patterns'] = candle_patterns.compute(open_, high, low, close)
+        return columns
+
+    @staticmethod
+    def with_indicator_columns(df: pd.DataFrame, indicators: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """OHLCV frame plus computed indicator columns, built in one go (per-column inserts are slow)."""
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        columns.update(indicators)
+        return pd.DataFrame(columns, index=df.index, copy=False)
+
+    def _calculate_indicators_pandas(self, df: pd.DataFrame) -> pd.DataFrame:
         """Applies TA indicators to the DataFrame using standard Pandas."""
+        from src.services import candle_patterns
         import logging
         logger = logging.getLogger(__name__)
         
@@ -126,6 +323,9 @@ class IndicatorService:
         df['Vol_Std'] = roll.std()
         df['Vol_Z'] = (df['volume'] - df['Vol_Mean']) / df['Vol_Std']
 
+        # Candlestick pattern bitset (see candle_patterns.PATTERNS)
+        df['Patterns'] = candle_patterns.compute(df['open'], df['high'], df['low'], df['close'])
+
         # Fill NaN for initial periods if needed, or leave as is (Scoring handles NaNs implicitly by false conditions)
         
         final_len = len(df)
@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from src.models.models import OHLCV, Symbol
+from src.services.data_version import bump_version
+from src.services.quote_summary import PARTS, QuoteSummary, QuoteSummaryFetcher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +12,7 @@ logger = logging.getLogger(__name__)
 class MarketDataService:
     def __init__(self, db: Session):
         self.db = db
+        self.quote_fetcher = QuoteSummaryFetcher()
 
     def fetch_and_store(self, ticker: str, period: str = "1y", interval: str = "1d"):
         """
@@ -110,6 +113,8 @@ class MarketDataService:
                     logger.error(f"Error storing record for {ticker} at {ts}: {e}")
                     continue
 
+            if new_records > 0:
+                bump_version(self.db)  # invalidates cached screening results
             self.db.commit()
             if new_records > 0:
                 logger.info(f"Stored {new_records} new records for {ticker}")
@@ -120,106 +125,37 @@ class MarketDataService:
             logger.error(f"Error fetching data for {ticker}: {e}")
             self.db.rollback()
 
+    def fetch_quote_summary(self, ticker: str, parts=PARTS) -> QuoteSummary:
+        """
+        Fetches profile, news, calendar and holders for the ticker from one
+        yf.Ticker (one request per part). Failed parts are left empty.
+        """
+        return self.quote_fetcher.fetch(ticker, parts)
+
     def fetch_latest_news(self, ticker: str):
         """
         Fetches the latest news headline and link for the ticker.
         Returns a tuple (headline, url) or (None, None).
         """
-        try:
-            t = yf.Ticker(ticker)
-            news = t.news
-            if news:
-                # Based on the structure observed: news[0]['content']['title']
-                latest = news[0]
-                content = latest.get('content', {})
-                headline = content.get('title')
-
-                # Try to get URL from clickThroughUrl or canonicalUrl
-                url_obj = content.get('clickThroughUrl') or content.get('canonicalUrl')
-                link = url_obj.get('url') if url_obj else None
-
-                return headline, link
-        except Exception as e:
-            logger.error(f"Error fetching news for {ticker}: {e}")
-
-        except Exception as e:
-            logger.error(f"Error fetching news for {ticker}: {e}")
-
-        return None, None
+        return self.fetch_quote_summary(ticker, ('news',)).news
 
     def fetch_corporate_actions(self, ticker: str):
         """
         Fetches upcoming corporate actions (Dividends, Earnings) from calendar.
         Returns a dictionary of actions.
         """
-        actions = {}
-        try:
-            t = yf.Ticker(ticker)
-            cal = t.calendar
-            if cal:
-                # Calendar returns a dict where keys are event names and values are dates/lists
-                # Example: {'Ex-Dividend Date': datetime.date(2025, 8, 14), 'Earnings Date': [datetime.date(...)]}
-
-                ex_div = cal.get('Ex-Dividend Date')
-                if ex_div:
-                    actions['Ex-Dividend'] = ex_div
-
-                earnings = cal.get('Earnings Date')
-                if earnings:
-                    # Earnings Date is often a list
-                    if isinstance(earnings, list):
-                        actions['Earnings'] = earnings[0]
-                    else:
-                        actions['Earnings'] = earnings
-
-        except Exception as e:
-            logger.error(f"Error fetching corporate actions for {ticker}: {e}")
+        return self.fetch_quote_summary(ticker, ('calendar',)).corporate_actions
 
     def fetch_shareholding_data(self, ticker: str):
         """
         Fetches shareholding data: Major Holders, Institutional Holders, Mutual Fund Holders.
         Returns a dictionary with dataframes or None.
         """
-        data = {
-            "major_holders": None,
-            "institutional_holders": None,
-            "mutual_fund_holders": None
-        }
-        try:
-            t = yf.Ticker(ticker)
-
-            # 1. Major Holders
-            try:
-                # yfinance returns a DataFrame
-                data["major_holders"] = t.major_holders
-            except Exception:
-                pass
-
-            # 2. Institutional Holders
-            try:
-                data["institutional_holders"] = t.institutional_holders
-            except Exception:
-                pass
-
-            # 3. Mutual Fund Holders
-            try:
-                data["mutualfund_holders"] = t.mutualfund_holders
-            except Exception:
-                pass
-
-        except Exception as e:
-            logger.error(f"Error fetching shareholding for {ticker}: {e}")
-
-        return data
+        return self.fetch_quote_summary(ticker, ('holders',)).shareholding
 
     def fetch_insider_trading(self, ticker: str):
         """
         Fetches recent insider transactions.
         Returns a DataFrame or None.
         """
-        try:
-            t = yf.Ticker(ticker)
-            return t.insider_transactions
-        except Exception as e:
-            logger.error(f"Error fetching insider transactions for {ticker}: {e}")
-            return None
+        return self.fetch_quote_summary(ticker, ('holders',)).insider_transactions
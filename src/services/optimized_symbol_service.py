@@ -1,10 +1,10 @@
 import pandas as pd
-import yfinance as yf
 import requests
 import io
 import logging
 from sqlalchemy.orm import Session
 from src.models.models import Symbol
+from src.services.quote_summary import QuoteSummaryFetcher
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 from datetime import datetime, timedelta
@@ -16,6 +16,7 @@ class OptimizedSymbolService:
     def __init__(self, db: Session):
         self.db = db
         self.db_lock = Lock()  # Thread-safe database access
+        self.quote_fetcher = QuoteSummaryFetcher()
         self.NIFTY_500_URL = "https://raw.githubusercontent.com/kprohith/nse-stock-analysis/master/ind_nifty500list.csv"
 
     def should_sync(self) -> bool:
@@ -40,19 +41,17 @@ class OptimizedSymbolService:
                     return None  # Already tracked
             
             # Fetch data (no lock needed - external API call)
-            t = yf.Ticker(ticker)
-            info = t.info
-            mcap = info.get('marketCap', 0) or 0
-            mcap_crore = mcap / 10_000_000
+            profile = self.quote_fetcher.profile(ticker)
+            mcap_crore = profile.market_cap_cr
             
             # Skip market cap check if filter is disabled
             if not skip_mcap_filter and mcap_crore <= min_mcap_crore:
                 return None
             
             # Get company info
-            company_name = info.get('longName') or info.get('shortName', '')
-            sector = info.get('sector', '')
-            industry = info.get('industry', '')
+            company_name = profile.name
+            sector = profile.sector
+            industry = profile.industry
             
             return {
                 'ticker': ticker,
@@ -0,0 +1,253 @@
+"""
+Parameter sweeps over the scoring strategy's thresholds.
+
+Indicators and the strategy-independent rule inputs (run lengths, volume
+averages for every period in the sweep, forward returns) are computed once
+for the whole universe as a symbol x time panel. With more than one worker
+the panel is copied into a shared-memory block that each pool process maps
+at start-up, so a task is just a batch of parameter dicts and the reply a
+handful of metrics.
+
+Each combination is scored on every bar point-in-time and summarised by the
+direction-adjusted forward returns of its signals after 1/5/10/20 trading
+days. Results go to the sweep_results table keyed by (sweep name, strategy
+version); a rerun of the same sweep skips combinations already stored, so
+an interrupted overnight sweep resumes where it stopped.
+"""
+
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Sequence
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from src.config.settings import Config
+from src.models.models import SweepResult
+from src.services import indicator_kernels
+from src.services.scoring import ScoringService
+from src.services.strategy import Strategy
+
+logger = logging.getLogger(__name__)
+
+FORWARD_HORIZONS = (1, 5, 10, 20)
+
+# Features stored as booleans (kept as 0/1 floats in shared memory)
+_BOOL_FEATURES = ('ha_green', 'ha_close_up', 'ha_close_down')
+
+
+class ParameterSpace:
+    """Candidate values per Strategy parameter (Config key -> list, None = filter skipped)."""
+
+    DEFAULT_GRID = {
+        'RSI_OVERSOLD_THRESHOLD': [25, 30, 35, 40],
+        'RSI_OVERBOUGHT_THRESHOLD': [60, 65, 70, 75],
+        'RSI_RISING_CANDLES': [1, 2, 3],
+        'HA_CONSECUTIVE_CANDLES': [None, 1, 2, 3],
+        'MAX_DISTANCE_BELOW_SMA200_PERCENT': [None, 10, 18, 25],
+        'VOLUME_MULTIPLIER': [None, 1.2, 1.5, 2.0],
+        'VOLUME_AVERAGE_PERIOD': [10, 20],
+        'CONFIRMATION_WINDOW_CANDLES': [20, 30],
+    }
+
+    def __init__(self, grid: Dict[str, List[Any]] = None):
+        grid = self.DEFAULT_GRID if grid is None else grid
+        unknown = set(grid) - set(Strategy.PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+        self.keys = list(grid)
+        self.values = [list(grid[key]) for key in self.keys]
+
+    @classmethod
+    def from_json(cls, text: str) -> "ParameterSpace":
+        """Parses {"KEY": [values...]} where "NA" (or null) disables the filter."""
+        grid = {}
+        for key, values in json.loads(text).items():
+            grid[key] = [None if v is None or str(v).upper() == "NA" else Strategy.PARAMETERS[key](v) for v in values]
+        return cls(grid)
+
+    def __len__(self):
+        return int(np.prod([len(v) for v in self.values])) if self.values else 1
+
+    def grid(self) -> List[Dict[str, Any]]:
+        """Every combination, in a stable order."""
+        return [dict(zip(self.keys, combo)) for combo in itertools.product(*self.values)]
+
+    def sample(self, n: int, seed: int = 0) -> List[Dict[str, Any]]:
+        """n distinct combinations drawn uniformly from the grid (without building it)."""
+        total = len(self)
+        picks = np.random.default_rng(seed).choice(total, size=min(n, total), replace=False)
+        radices = [len(v) for v in self.values]
+        combos = []
+        for pick in picks:
+            digits = np.unravel_index(int(pick), radices)
+            combos.append({key: self.values[k][d] for k, (key, d) in enumerate(zip(self.keys, digits))})
+        return combos
+
+
+def prepare_features(frames: Dict[int, pd.DataFrame], strategies: Sequence[Strategy]) -> Dict[str, np.ndarray]:
+    """
+    Shared inputs for the whole universe as (symbols x time) arrays.
+
+    Includes ScoringService.history_features (with every volume average the
+    given strategies read) and 'fwd_<h>' forward close-to-close returns.
+    """
+    frames = {symbol_id: df for symbol_id, df in frames.items() if not df.empty}
+    _, panel, lengths = indicator_kernels.stack_panel(frames)
+    o, h, l, c, v = (panel[name] for name in ('open', 'high', 'low', 'close', 'volume'))
+    indicators = indicator_kernels.compute(o, h, l, c, v, engine=Config.INDICATOR_ENGINE)
+
+    width = c.shape[1]
+    valid = np.arange(width)[None, :] >= (width - lengths)[:, None]
+    columns = {
+        'RSI': indicators['RSI'], 'close': c, 'SMA_200': indicators['SMA_200'], 'Vol_Z': indicators['Vol_Z'],
+        'volume': v, 'HA_Close': indicators['HA_Close'], 'HA_Green': indicators['HA_Green'],
+    }
+    features = ScoringService.history_features(columns, valid, strategies)
+    for horizon in FORWARD_HORIZONS:
+        forward = np.full_like(c, np.nan)
+        if horizon < width:
+            forward[:, :-horizon] = c[:, horizon:] / c[:, :-horizon] - 1
+        features[f'fwd_{horizon}'] = forward
+    return features
+
+
+def evaluate(features: Dict[str, np.ndarray], strategy: Strategy, min_bars: int = 200) -> Dict[str, Any]:
+    """Signal counts and forward-return metrics of one strategy over the prepared panel."""
+    side = ScoringService(strategy).score_sides(features)['side']
+    signal = (side != 0) & (features['position'] >= min_bars - 1)
+
+    metrics = {
+        'signals': int(signal.sum()),
+        'long_signals': int((signal & (side > 0)).sum()),
+        'short_signals': int((signal & (side < 0)).sum()),
+    }
+    for horizon in FORWARD_HORIZONS:
+        returns = features[f'fwd_{horizon}'][signal] * side[signal]
+        returns = returns[~np.isnan(returns)]
+        metrics[f'avg_return_{horizon}d'] = float(returns.mean() * 100) if len(returns) else None
+        metrics[f'win_rate_{horizon}d'] = float((returns > 0).mean() * 100) if len(returns) else None
+    return metrics
+
+
+# Per-process view of the shared panel (set by _attach_shared in pool workers)
+_worker_state: Dict[str, Any] = {}
+
+
+def _attach_shared(shm_name: str, names: Sequence[str], shape, min_bars: int):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(names),) + tuple(shape), dtype=np.float64, buffer=shm.buf)
+    features = {name: block[k] for k, name in enumerate(names)}
+    for name in _BOOL_FEATURES:
+        features[name] = features[name] != 0
+    _worker_state.update(shm=shm, features=features, min_bars=min_bars)
+
+
+def _evaluate_batch(combos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    features, min_bars = _worker_state['features'], _worker_state['min_bars']
+    return [evaluate(features, _strategy(params), min_bars) for params in combos]
+
+
+def _strategy(params: Dict[str, Any]) -> Strategy:
+    return Strategy("sweep", **{key.lower(): value for key, value in params.items()})
+
+
+class ParameterSweep:
+    def __init__(self, db: Session, name: str, workers: int = None, batch_size: int = 16, min_bars: int = 200):
+        self.db = db
+        self.name = name
+        self.workers = Config.BACKTEST_WORKERS if workers is None else workers
+        self.batch_size = batch_size
+        self.min_bars = min_bars
+
+    def completed_versions(self) -> set:
+        rows = self.db.query(SweepResult.strategy_version).filter(SweepResult.sweep_name == self.name).all()
+        return {row[0] for row in rows}
+
+    def run(self, frames: Dict[int, pd.DataFrame], combos: List[Dict[str, Any]]) -> int:
+        """
+        Evaluates the combinations not yet stored for this sweep.
+
+        Results are committed batch by batch. Returns the number evaluated.
+        """
+        done = self.completed_versions()
+        pending, seen = [], set(done)
+        for params in combos:
+            version = _strategy(params).version
+            if version not in seen:
+                seen.add(version)
+                pending.append(params)
+        logger.info(f"Sweep '{self.name}': {len(combos)} combinations, {len(combos) - len(pending)} already done")
+        if not pending:
+            return 0
+
+        features = prepare_features(frames, [_strategy(params) for params in pending])
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        workers = min(self.workers or os.cpu_count() or 1, len(batches))
+
+        evaluated = 0
+        if workers <= 1:
+            _worker_state.update(features=features, min_bars=self.min_bars)
+            try:
+                for batch in batches:
+                    evaluated += self._store(batch, _evaluate_batch(batch))
+                    self._log_progress(evaluated, len(pending))
+            finally:
+                _worker_state.clear()
+            return evaluated
+
+        names = list(features)
+        shape = features['rsi'].shape
+        shm = shared_memory.SharedMemory(create=True, size=len(names) * int(np.prod(shape)) * 8)
+        try:
+            block = np.ndarray((len(names),) + shape, dtype=np.float64, buffer=shm.buf)
+            for k, name in enumerate(names):
+                block[k] = features[name]
+            del features, block
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                     initargs=(shm.name, names, shape, self.min_bars)) as executor:
+                futures = {executor.submit(_evaluate_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    evaluated += self._store(futures[future], future.result())
+                    self._log_progress(evaluated, len(pending))
+        finally:
+            shm.close()
+            shm.unlink()
+        return evaluated
+
+    def _store(self, combos: List[Dict[str, Any]], metrics: List[Dict[str, Any]]) -> int:
+        for params, values in zip(combos, metrics):
+            self.db.add(SweepResult(
+                sweep_name=self.name,
+                strategy_version=_strategy(params).version,
+                params=json.dumps(params, sort_keys=True),
+                **values
+            ))
+        self.db.commit()
+        return len(combos)
+
+    def _log_progress(self, evaluated: int, total: int):
+        if evaluated == total or evaluated % (self.batch_size * 10) == 0:
+            logger.info(f"Sweep '{self.name}': {evaluated}/{total} combinations evaluated")
+
+    def results(self, sort_by: str = 'avg_return_10d', min_signals: int = 30) -> pd.DataFrame:
+        """Stored results for this sweep, best first, with parameters as columns."""
+        rows = self.db.query(SweepResult).filter(
+            SweepResult.sweep_name == self.name,
+            SweepResult.signals >= min_signals
+        ).all()
+        records = []
+        for row in rows:
+            record = json.loads(row.params)
+            record['signals'] = row.signals
+            for horizon in FORWARD_HORIZONS:
+                record[f'avg_return_{horizon}d'] = getattr(row, f'avg_return_{horizon}d')
+                record[f'win_rate_{horizon}d'] = getattr(row, f'win_rate_{horizon}d')
+            records.append(record)
+        if not records:
+            return pd.DataFrame()
+        return pd.DataFrame(records).sort_values(sort_by, ascending=False, na_position='last').reset_index(drop=True)
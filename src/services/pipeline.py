@@ -0,0 +1,227 @@
+"""
+Staged streaming pipeline with bounded queues.
+
+Each Stage runs its function on its own pool of worker threads and hands
+results to the next stage through a bounded queue, so a slow stage applies
+backpressure upstream instead of buffering the whole universe, and items
+flow through to the last stage while earlier ones are still working (the
+first alert of a scan goes out before the last symbol is computed).
+
+A stage function takes one item (or a list of up to batch_size items for
+batching stages) and returns its output, or None to drop the item; stages
+created with many=True return an iterable of outputs instead. Exceptions
+are logged and counted per stage; they never stop the pipeline. Stage
+threads suit I/O (network calls and database queries release the GIL);
+CPU-bound stage functions hold it. The scan's compute, score and chart
+stages run them through ScanCompute, which with SCAN_PROCESS_WORKERS > 1
+hands the work to a process pool and only waits on it from the thread
+(with the default of one worker they run in the stage thread).
+
+Per-stage counters (items in/out, errors, busy time, throughput, queue depth)
+are kept in StageStats and logged periodically while the pipeline runs.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # end-of-stream marker, one per downstream worker
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.first_output: Optional[float] = None  # seconds after the pipeline started
+        self._lock = threading.Lock()
+
+    def record_depth(self, depth: int):
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Items completed per second of stage wall time."""
+        return self.items_in / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_total / self.depth_samples if self.depth_samples else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput_per_sec": round(self.throughput, 2),
+            "max_queue_depth": self.max_depth,
+            "mean_queue_depth": round(self.mean_depth, 2),
+            "first_output_seconds": None if self.first_output is None else round(self.first_output, 3),
+        }
+
+    def format(self) -> str:
+        return (f"{self.name}: {self.items_in} in / {self.items_out} out, {self.errors} errors, "
+                f"{self.throughput:.1f}/s, queue max {self.max_depth}/{self.queue_size} "
+                f"(mean {self.mean_depth:.1f}), busy {self.busy_seconds:.1f}s x{self.workers}")
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, queue_size: int = 100,
+                 batch_size: int = 1, batch_wait: float = 0.05, many: bool = False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait  # seconds to wait for a batch to fill before running it
+        self.many = many  # func returns an iterable of outputs rather than one output
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], report_interval: float = 0):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.report_interval = report_interval
+        self.stats = {stage.name: StageStats(stage.name, stage.workers, stage.queue_size) for stage in stages}
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self._remaining = [stage.workers for stage in stages]
+        self._remaining_lock = threading.Lock()
+        self._results: List[Any] = []
+        self._results_lock = threading.Lock()
+        self._started = 0.0
+
+    def _put(self, index: int, item):
+        """Hands an item to stage `index` (or collects it after the last stage)."""
+        if index == len(self.stages):
+            with self._results_lock:
+                self._results.append(item)
+            return
+        self._queues[index].put(item)
+        self.stats[self.stages[index].name].record_depth(self._queues[index].qsize())
+
+    def _next_batch(self, index: int):
+        """Up to batch_size items for stage `index`; second value is True once the stream ended."""
+        stage, inbox = self.stages[index], self._queues[index]
+        item = inbox.get()
+        if item is _DONE:
+            return [], True
+        batch = [item]
+        deadline = time.perf_counter() + stage.batch_wait
+        while len(batch) < stage.batch_size:
+            try:
+                item = inbox.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        done = False
+        while not done:
+            batch, done = self._next_batch(index)
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            if stats.started is None:
+                stats.started = start
+            try:
+                result = stage.func(batch if stage.batch_size > 1 else batch[0])
+                if result is None:
+                    outputs = []
+                else:
+                    outputs = list(result) if stage.many else [result]
+            except Exception as e:
+                logger.error(f"Pipeline stage '{stage.name}' failed on {len(batch)} item(s): {e}")
+                with stats._lock:
+                    stats.errors += len(batch)
+                outputs = []
+            with stats._lock:
+                stats.items_in += len(batch)
+                stats.items_out += len(outputs)
+                stats.busy_seconds += time.perf_counter() - start
+                if outputs and stats.first_output is None:
+                    stats.first_output = time.perf_counter() - self._started
+
+            for output in outputs:
+                self._put(index + 1, output)
+
+        with self._remaining_lock:
+            self._remaining[index] -= 1
+            last = self._remaining[index] == 0
+        if last:
+            stats.finished = time.perf_counter()
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    self._queues[index + 1].put(_DONE)
+
+    def _report(self, stop: threading.Event):
+        while not stop.wait(self.report_interval):
+            logger.info("Pipeline progress: " + "; ".join(stats.format() for stats in self.stats.values()))
+
+    def run(self, items: Iterable) -> List[Any]:
+        """Feeds items through all stages and returns the outputs of the last stage."""
+        self._started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(index,), name=f"pipeline-{stage.name}-{k}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for k in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        stop = threading.Event()
+        reporter = None
+        if self.report_interval > 0:
+            reporter = threading.Thread(target=self._report, args=(stop,), name="pipeline-report", daemon=True)
+            reporter.start()
+
+        try:
+            for item in items:
+                self._put(0, item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+            stop.set()
+            if reporter is not None:
+                reporter.join()
+        return self._results
+
+    def report(self) -> List[Dict[str, Any]]:
+        return [stats.to_dict() for stats in self.stats.values()]
+
+    def format_report(self) -> str:
+        return "\n".join(stats.format() for stats in self.stats.values())
@@ -0,0 +1,71 @@
+"""
+Process pool shared by the callers of one process.
+
+SharedProcessPool keeps one ProcessPoolExecutor, created on first use with
+the spawn start method (the API and the scan process have threads and open
+database connections that must not be forked into workers). A caller asking
+for another worker count or another worker setup gets a new pool; the old
+one is not cancelled. Callers that borrowed it keep submitting to it and
+their futures complete, and it is shut down when the last of them returns it.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SharedProcessPool:
+    def __init__(self, name: str):
+        self.name = name
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._config: Optional[Tuple] = None
+        self._borrowers: Dict[ProcessPoolExecutor, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, workers: int, initializer: Callable = None, initargs: Tuple = (),
+               key: Hashable = None) -> Iterator[ProcessPoolExecutor]:
+        """
+        The shared pool for `workers` processes, each set up once with
+        initializer(*initargs). The pool is reused while `key` (default:
+        initargs) compares equal; pass a key when the initargs are objects
+        without value equality, or every new object starts a new pool.
+        """
+        config = (workers, initializer, initargs if key is None else key)
+        with self._lock:
+            if self._pool is None or self._config != config:
+                if self._pool is not None:
+                    logger.info(f"Replacing the {self.name} process pool ({self._config[0]} -> {workers} workers)")
+                    self._retire(self._pool)
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=initializer, initargs=initargs)
+                self._config = config
+                self._borrowers[self._pool] = 0
+            pool = self._pool
+            self._borrowers[pool] += 1
+        try:
+            yield pool
+        finally:
+            with self._lock:
+                self._borrowers[pool] -= 1
+                if pool is not self._pool:
+                    self._retire(pool)
+
+    def discard(self, pool: ProcessPoolExecutor):
+        """Stops handing out `pool` (e.g. broken); the next borrow starts a fresh one."""
+        with self._lock:
+            if pool is self._pool:
+                self._pool = None
+                self._config = None
+                self._retire(pool)
+
+    def _retire(self, pool: ProcessPoolExecutor):
+        # Called with the lock held: shuts an old pool down once nobody holds it
+        if self._borrowers.get(pool, 0) == 0:
+            self._borrowers.pop(pool, None)
+            pool.shutdown(wait=False)
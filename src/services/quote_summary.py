@@ -0,0 +1,166 @@
+"""
+Consolidated Yahoo quote-summary fetch per ticker.
+
+Every yfinance accessor on a fresh yf.Ticker issues its own request, and the
+alert path used to build a new Ticker for each of news, calendar, the three
+holders tables and insider transactions. QuoteSummaryFetcher reads all of
+them from one Ticker object instead. yfinance loads every ownership module
+(major/institutional/fund holders and insider transactions) in a single
+quoteSummary request cached on that object, so a full fetch costs one request
+per part: profile (info), news, calendar and holders.
+
+Results are parsed into a QuoteSummary record shared by the alert
+enrichment, MarketDataService, the symbol sync services and
+update_symbol_info.py.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+HOLDER_KINDS = ('major_holders', 'institutional_holders', 'mutualfund_holders')
+
+# Request groups: each part is one HTTP request on a shared Ticker
+PARTS = ('profile', 'news', 'calendar', 'holders')
+
+# Part that provides each enrichment field
+PART_OF = {
+    'news': 'news',
+    'corporate_actions': 'calendar',
+    **{kind: 'holders' for kind in HOLDER_KINDS},
+    'insider_transactions': 'holders',
+}
+
+
+class QuoteSummary:
+    """Company profile and alert enrichment for one ticker; parts not fetched keep empty defaults."""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        # profile
+        self.name = ''
+        self.sector = ''
+        self.industry = ''
+        self.market_cap = 0.0  # in rupees
+        # alert enrichment
+        self.news: Tuple[Optional[str], Optional[str]] = (None, None)  # (headline, link)
+        self.corporate_actions: Dict[str, Any] = {}
+        self.shareholding: Dict[str, Any] = {kind: None for kind in HOLDER_KINDS}
+        self.insider_transactions = None
+        self.errors: Dict[str, str] = {}  # part -> error message
+
+    @property
+    def market_cap_cr(self) -> float:
+        return self.market_cap / 10_000_000
+
+    def set(self, field: str, value):
+        """Sets one enrichment field (see PART_OF) from a fetched or cached value."""
+        if field == 'news':
+            self.news = value or (None, None)
+        elif field == 'corporate_actions':
+            self.corporate_actions = value or {}
+        elif field in HOLDER_KINDS:
+            self.shareholding[field] = value
+        elif field == 'insider_transactions':
+            self.insider_transactions = value
+        else:
+            raise ValueError(f"Unknown quote summary field: {field}")
+
+
+def parse_news(news) -> Tuple[Optional[str], Optional[str]]:
+    """Latest headline and link from Ticker.news"""
+    if not news:
+        return None, None
+    # Based on the structure observed: news[0]['content']['title']
+    content = news[0].get('content', {})
+    headline = content.get('title')
+
+    # Try to get URL from clickThroughUrl or canonicalUrl
+    url_obj = content.get('clickThroughUrl') or content.get('canonicalUrl')
+    link = url_obj.get('url') if url_obj else None
+    return headline, link
+
+
+def parse_calendar(cal) -> Dict[str, Any]:
+    """Upcoming Ex-Dividend and Earnings dates from Ticker.calendar"""
+    actions = {}
+    if not cal:
+        return actions
+    # Calendar returns a dict where keys are event names and values are dates/lists
+    # Example: {'Ex-Dividend Date': datetime.date(2025, 8, 14), 'Earnings Date': [datetime.date(...)]}
+    ex_div = cal.get('Ex-Dividend Date')
+    if ex_div:
+        actions['Ex-Dividend'] = ex_div
+
+    earnings = cal.get('Earnings Date')
+    if earnings:
+        # Earnings Date is often a list
+        actions['Earnings'] = earnings[0] if isinstance(earnings, list) else earnings
+    return actions
+
+
+class QuoteSummaryFetcher:
+    def __init__(self, session=None):
+        self.session = session  # optional HTTP session shared by every Ticker this fetcher creates
+
+    def ticker(self, symbol: str) -> yf.Ticker:
+        """One Ticker per fetch; its accessors share yfinance's per-object response cache."""
+        return yf.Ticker(symbol, session=self.session) if self.session is not None else yf.Ticker(symbol)
+
+    def fetch_part(self, t: yf.Ticker, part: str) -> Dict[str, Any]:
+        """
+        Fields of one part from a Ticker: {'name', 'sector', 'industry',
+        'market_cap'} for profile, else enrichment fields (see PART_OF).
+        Raises on request errors; a single missing holders table is None.
+        """
+        if part == 'profile':
+            info = t.info
+            return {
+                'name': info.get('longName') or info.get('shortName', ''),
+                'sector': info.get('sector', ''),
+                'industry': info.get('industry', ''),
+                'market_cap': float(info.get('marketCap', 0) or 0),
+            }
+        if part == 'news':
+            return {'news': parse_news(t.news)}
+        if part == 'calendar':
+            return {'corporate_actions': parse_calendar(t.calendar)}
+        if part == 'holders':
+            values = {}
+            for field in HOLDER_KINDS + ('insider_transactions',):
+                try:
+                    values[field] = getattr(t, field)
+                except Exception as e:
+                    logger.debug(f"No {field} for {t.ticker}: {e}")
+                    values[field] = None
+            return values
+        raise ValueError(f"Unknown quote summary part: {part}")
+
+    def fetch(self, symbol: str, parts: Iterable[str] = PARTS, raise_errors: bool = False) -> QuoteSummary:
+        """
+        Fetches the given parts from one Ticker. Failed parts are logged and
+        recorded in `errors` unless raise_errors is set.
+        """
+        record = QuoteSummary(symbol)
+        t = self.ticker(symbol)
+        for part in parts:
+            try:
+                values = self.fetch_part(t, part)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.error(f"Error fetching {part} for {symbol}: {e}")
+                record.errors[part] = str(e)
+                continue
+            for field, value in values.items():
+                if part == 'profile':
+                    setattr(record, field, value)
+                else:
+                    record.set(field, value)
+        return record
+
+    def profile(self, symbol: str) -> QuoteSummary:
+        """Name, sector, industry and market cap (one request); raises on errors."""
+        return self.fetch(symbol, ('profile',), raise_errors=True)
@@ -0,0 +1,189 @@
+"""
+CPU-bound steps of the scan pipeline in a process pool.
+
+Indicator kernels, scoring and chart rendering hold the GIL, so on the
+pipeline threads they run one at a time while ingest threads wait on the
+network and the database. ScanCompute can run them in worker processes
+instead (SCAN_PROCESS_WORKERS, 0 = one per CPU). Workers are fed compact
+NumPy arrays (OHLCV or indicator columns and epoch timestamps), never ORM
+objects or sessions, and send back arrays or PNG bytes; loading history,
+saving signals and sending alerts stay on the pipeline threads. Every
+INDICATOR_ENGINE runs in the workers, the pandas reference on a frame
+rebuilt from the OHLCV arrays.
+
+With one worker, the default (single-CPU hosts such as Lambda or a free-tier
+instance gain nothing from processes), the same functions run in the calling
+thread, so the results do not depend on the worker count. Indicator frames
+are still looked up in and stored to the process-level indicator cache of
+the scan process. The scorer and the strategy profiles are sent to each
+worker once, when the pool starts, rather than with every batch.
+"""
+
+import io
+import logging
+import os
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from src.config.settings import Config
+from src.services.indicators import IndicatorService
+from src.services.process_pool import SharedProcessPool
+from src.services.scoring import ScoringService
+from src.services.strategy import Strategy
+
+logger = logging.getLogger(__name__)
+
+# Indicator columns read by the scorer and by the alert chart
+SCORE_COLUMNS = ('RSI', 'close', 'SMA_200', 'Vol_Z', 'volume', 'HA_Close', 'HA_Green')
+CHART_COLUMNS = ('HA_Open', 'HA_High', 'HA_Low', 'HA_Close', 'SMA_200', 'RSI')
+CHART_CANDLES = 50
+
+Columns = Dict[str, np.ndarray]
+
+
+def _columns(df: pd.DataFrame, names: Sequence[str]) -> Columns:
+    return {name: df[name].to_numpy() for name in names if name in df.columns}
+
+
+def _chart_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, Columns]:
+    """Wall-clock epoch-nanosecond timestamps and chart columns of the last CHART_CANDLES candles."""
+    df = df.iloc[-CHART_CANDLES:]
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    # asi8 counts in the index's own unit, which need not be nanoseconds
+    return index.as_unit('ns').asi8, _columns(df, CHART_COLUMNS)
+
+
+def compute_indicator_columns(batch: List[Tuple[int, np.ndarray]],
+                              engine: str) -> List[Tuple[int, Optional[Columns], str]]:
+    """
+    Process-pool entry point: indicator columns for (symbol_id, 5 x n OHLCV
+    values) pairs. Returns (symbol_id, columns, "") or (symbol_id, None, error).
+    """
+    results = []
+    for symbol_id, values in batch:
+        try:
+            results.append((symbol_id, IndicatorService.indicator_columns(*values, engine=engine), ""))
+        except Exception as e:
+            results.append((symbol_id, None, str(e)))
+    return results
+
+
+# Scorer of a worker process, set once by the pool initializer
+_scoring_service: Optional[ScoringService] = None
+_strategies: Tuple[Strategy, ...] = ()
+
+
+def _init_worker(scoring_service: Optional[ScoringService], strategies: Tuple[Strategy, ...]):
+    global _scoring_service, _strategies
+    _scoring_service, _strategies = scoring_service, strategies
+
+
+def score_columns(batch: Dict[int, Columns]):
+    """Process-pool entry point: the worker's ScoringService.score_strategies over the scored indicator columns."""
+    frames = {symbol_id: pd.DataFrame(columns, copy=False) for symbol_id, columns in batch.items()}
+    return _scoring_service.score_strategies(frames, _strategies)
+
+
+def render_chart_png(ticker: str, index: np.ndarray, columns: Columns) -> Optional[bytes]:
+    """Process-pool entry point: alert chart of the packed candles as PNG bytes (None on failure)."""
+    from src.services.plotting import ChartService
+
+    df = pd.DataFrame(columns, index=pd.DatetimeIndex(index), copy=False)
+    buf = ChartService().generate_chart(df, ticker)
+    return buf.getvalue() if buf is not None else None
+
+
+# Process pool reused across scans (created on first use)
+_pool = SharedProcessPool("scan compute")
+
+
+class ScanCompute:
+    def __init__(self, workers: int = None, scoring_service: ScoringService = None,
+                 strategies: Sequence[Strategy] = ()):
+        workers = Config.SCAN_PROCESS_WORKERS if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        self.scoring_service = scoring_service
+        self.strategies = tuple(strategies)
+
+    def _pool_key(self) -> Tuple:
+        """Identifies the worker setup by strategy parameters: each scan builds new scorer and strategy objects."""
+        scorer = self.scoring_service.strategy if self.scoring_service is not None else None
+        return tuple(None if strategy is None else (strategy.name, strategy.version)
+                     for strategy in (scorer, *self.strategies))
+
+    def _run(self, fn, *args, local: Callable = None):
+        """
+        Calls fn(*args) in a worker process. With a single worker, or if the
+        pool broke, local() (default: the same call) runs in this thread.
+        """
+        local = local or (lambda: fn(*args))
+        if self.workers <= 1:
+            return local()
+        with _pool.borrow(self.workers, _init_worker, (self.scoring_service, self.strategies),
+                          key=self._pool_key()) as pool:
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory): start a fresh pool next time
+                logger.error(f"Scan process pool broke ({e}); running {fn.__name__} in-process")
+                _pool.discard(pool)
+        return local()
+
+    def indicators(self, frames: Dict[int, pd.DataFrame]) -> Dict[int, pd.DataFrame]:
+        """
+        calculate_indicators_cached for a batch of raw OHLCV frames: cache misses
+        are computed in one worker call. Symbols whose computation failed are
+        left out (and logged).
+        """
+        from src.services.indicator_cache import indicator_cache
+
+        engine = Config.INDICATOR_ENGINE
+        config_hash = indicator_cache.config_hash(IndicatorService.INDICATOR_VERSION)
+        results, missing = {}, {}
+        for symbol_id, df in frames.items():
+            if df.empty:
+                continue
+            key = indicator_cache.make_key(symbol_id, df, config_hash)
+            cached = indicator_cache.get(key)
+            if cached is not None:
+                results[symbol_id] = cached
+            else:
+                missing[symbol_id] = key
+
+        if missing:
+            ohlcv = list(IndicatorService.OHLCV_COLUMNS)
+            batch = [(symbol_id, np.ascontiguousarray(frames[symbol_id][ohlcv].to_numpy().T)) for symbol_id in missing]
+            for symbol_id, columns, error in self._run(compute_indicator_columns, batch, engine):
+                if columns is None:
+                    logger.error(f"Error calculating indicators for symbol {symbol_id}: {error}")
+                    continue
+                df = IndicatorService.with_indicator_columns(frames[symbol_id], columns)
+                indicator_cache.put(missing[symbol_id], df)
+                results[symbol_id] = df
+        return results
+
+    def score(self, frames: Dict[int, pd.DataFrame]):
+        """scoring_service.score_strategies over the strategies, with only the scored columns sent to the worker."""
+        def local():
+            return self.scoring_service.score_strategies(frames, self.strategies)
+
+        if self.workers <= 1:
+            return local()
+        batch = {symbol_id: _columns(df, SCORE_COLUMNS) for symbol_id, df in frames.items()}
+        return self._run(score_columns, batch, local=local)
+
+    def chart(self, df: pd.DataFrame, ticker: str) -> Optional[io.BytesIO]:
+        """Alert chart (last CHART_CANDLES candles) as a PNG buffer, or None if rendering failed."""
+        if self.workers <= 1:
+            from src.services.plotting import ChartService
+            return ChartService().generate_chart(df, ticker)
+        try:
+            png = self._run(render_chart_png, ticker, *_chart_arrays(df))
+        except Exception as e:
+            # Same as a failed in-process chart: the alert goes out as text only
+            logger.error(f"Error generating chart for {ticker}: {e}")
+            return None
+        return io.BytesIO(png) if png is not None else None
@@ -0,0 +1,197 @@
+"""
+Scan ledger: resumable, checkpointed market scans.
+
+Every run_scan is recorded in scan_runs, with one scan_items row per scored
+symbol tracking how far it got: pending -> ingested -> scored -> alerted.
+States are checkpointed per pipeline batch (and per alert), so when a scan is
+killed (Lambda timeout, free-tier instance recycled) or stops at its time
+budget, the next scan started within SCAN_RESUME_WINDOW_HOURS picks the same
+run up and only does the unfinished work: ingested symbols are not fetched
+again, scored symbols keep their saved signal, and alerted symbols are never
+alerted twice.
+
+An item is finished once it is alerted, or scored without qualifying for an
+alert. Each call opens its own session, so the ledger can be used from the
+pipeline worker threads.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import pytz
+from sqlalchemy.orm import Session
+from src.config.settings import Config
+from src.models.models import ScanItem, ScanRun
+
+logger = logging.getLogger(__name__)
+
+PENDING, INGESTED, SCORED, ALERTED = 'pending', 'ingested', 'scored', 'alerted'
+STATES = (PENDING, INGESTED, SCORED, ALERTED)
+
+RUNNING, STOPPED, COMPLETED = 'running', 'stopped', 'completed'
+
+
+class ItemState:
+    def __init__(self, state: str = PENDING, qualified: bool = False, signal_id: Optional[int] = None):
+        self.state = state
+        self.qualified = qualified
+        self.signal_id = signal_id
+
+    def reached(self, state: str) -> bool:
+        return STATES.index(self.state) >= STATES.index(state)
+
+    @property
+    def finished(self) -> bool:
+        return self.state == ALERTED or (self.state == SCORED and not self.qualified)
+
+
+class ScanLedger:
+    def __init__(self, session_factory: Callable[[], Session] = None):
+        if session_factory is None:
+            from src.database.db import db_instance
+            session_factory = db_instance.SessionLocal
+        self.session_factory = session_factory
+        self.run_id: Optional[int] = None
+        self.resumed = False
+        self.items: Dict[int, ItemState] = {}  # symbol_id -> state
+        self._lock = threading.Lock()
+
+    def resume(self, window_hours: float = None) -> bool:
+        """Picks up the latest unfinished run started within the window; False if there is none."""
+        window_hours = Config.SCAN_RESUME_WINDOW_HOURS if window_hours is None else window_hours
+        if window_hours <= 0:
+            return False
+        since = datetime.now(pytz.UTC) - timedelta(hours=window_hours)
+        db = self.session_factory()
+        try:
+            run = db.query(ScanRun).filter(
+                ScanRun.status.in_([RUNNING, STOPPED]),
+                ScanRun.started_at >= since
+            ).order_by(ScanRun.started_at.desc()).first()
+            if run is None:
+                return False
+            run.status = RUNNING
+            run.resumes += 1
+            rows = db.query(ScanItem.symbol_id, ScanItem.state, ScanItem.qualified, ScanItem.signal_id) \
+                .filter(ScanItem.run_id == run.id).all()
+            db.commit()
+            self.run_id = run.id
+            self.resumed = True
+            self.items = {symbol_id: ItemState(state, qualified, signal_id)
+                          for symbol_id, state, qualified, signal_id in rows}
+            return True
+        finally:
+            db.close()
+
+    def load(self, run_id: int, symbol_ids: Iterable[int] = None):
+        """Loads the items of a run (or just the given symbols) without taking it over, e.g. in a shard worker."""
+        db = self.session_factory()
+        try:
+            query = db.query(ScanItem.symbol_id, ScanItem.state, ScanItem.qualified, ScanItem.signal_id) \
+                .filter(ScanItem.run_id == run_id)
+            if symbol_ids is not None:
+                query = query.filter(ScanItem.symbol_id.in_(list(symbol_ids)))
+            self.run_id = run_id
+            self.items = {symbol_id: ItemState(state, qualified, signal_id)
+                          for symbol_id, state, qualified, signal_id in query.all()}
+        finally:
+            db.close()
+
+    def start(self, symbol_ids: Iterable[int]):
+        """Opens a new run with every symbol pending."""
+        symbol_ids = list(dict.fromkeys(symbol_ids))
+        db = self.session_factory()
+        try:
+            run = ScanRun(status=RUNNING, total_items=len(symbol_ids), started_at=datetime.now(pytz.UTC))
+            db.add(run)
+            db.flush()
+            db.bulk_insert_mappings(ScanItem, [
+                {'run_id': run.id, 'symbol_id': symbol_id, 'state': PENDING, 'qualified': False}
+                for symbol_id in symbol_ids
+            ])
+            db.commit()
+            self.run_id = run.id
+            self.resumed = False
+            self.items = {symbol_id: ItemState() for symbol_id in symbol_ids}
+        finally:
+            db.close()
+
+    @property
+    def symbol_ids(self) -> List[int]:
+        return list(self.items)
+
+    def state(self, symbol_id: int) -> Optional[ItemState]:
+        """Progress of a symbol in this run (None if it is not part of the run)."""
+        return self.items.get(symbol_id)
+
+    def _write(self, updates: List[Tuple[List[int], Dict]]):
+        """Checkpoints (symbol_ids, fields) updates and the run heartbeat in one transaction."""
+        db = self.session_factory()
+        try:
+            for symbol_ids, fields in updates:
+                db.query(ScanItem).filter(ScanItem.run_id == self.run_id, ScanItem.symbol_id.in_(symbol_ids)) \
+                    .update(fields, synchronize_session=False)
+            db.query(ScanRun).filter(ScanRun.id == self.run_id) \
+                .update({'updated_at': datetime.now(pytz.UTC)}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Scan ledger checkpoint failed for run {self.run_id}: {e}")
+        finally:
+            db.close()
+
+    def mark(self, symbol_ids: Iterable[int], state: str):
+        """Moves items forward to `state` (items already past it are left alone)."""
+        with self._lock:
+            ids = [symbol_id for symbol_id in symbol_ids
+                   if symbol_id in self.items and not self.items[symbol_id].reached(state)]
+            for symbol_id in ids:
+                self.items[symbol_id].state = state
+        if ids:
+            self._write([(ids, {'state': state})])
+
+    def mark_scored(self, scored: Iterable[Tuple[int, Optional[int], bool]]):
+        """Records (symbol_id, signal_id, qualified) for freshly scored items."""
+        updates = []
+        with self._lock:
+            for symbol_id, signal_id, qualified in scored:
+                item = self.items.get(symbol_id)
+                if item is None or item.reached(SCORED):
+                    continue
+                item.state, item.signal_id, item.qualified = SCORED, signal_id, qualified
+                updates.append(([symbol_id], {'state': SCORED, 'signal_id': signal_id, 'qualified': qualified}))
+        if updates:
+            self._write(updates)
+
+    def finish(self, status: str):
+        """Closes the run as completed, or as stopped (resumable) when it ran out of time."""
+        db = self.session_factory()
+        try:
+            fields = {'status': status}
+            if status == COMPLETED:
+                fields['finished_at'] = datetime.now(pytz.UTC)
+            db.query(ScanRun).filter(ScanRun.id == self.run_id).update(fields, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not close scan run {self.run_id}: {e}")
+        finally:
+            db.close()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self.items.values())
+        return {
+            'run_id': self.run_id,
+            'resumed': self.resumed,
+            'items': len(items),
+            'finished': sum(item.finished for item in items),
+            'signals': sum(item.qualified for item in items),
+            'alerted': sum(item.state == ALERTED for item in items),
+        }
+
+    @property
+    def complete(self) -> bool:
+        with self._lock:
+            return all(item.finished for item in self.items.values())
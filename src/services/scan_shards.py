@@ -0,0 +1,227 @@
+"""
+Work queue for sharded scans.
+
+A sharded scan splits its run's symbols into shards (rows of scan_shards).
+Worker processes, on one machine or several, lease shards one at a time:
+the claim selects the next pending shard with SELECT ... FOR UPDATE SKIP
+LOCKED, so concurrent workers pass over rows another worker is claiming,
+and a guarded UPDATE records the lease (which also keeps claims safe on
+SQLite, where FOR UPDATE is a no-op). The worker renews its lease with
+heartbeats while it scans the shard; a worker that crashes stops renewing,
+and once the lease expires the shard is claimed again by another worker.
+Shards that failed SCAN_SHARD_MAX_ATTEMPTS times are marked failed and
+retried when the run is resumed.
+
+Item progress is kept in the scan ledger, so a reclaimed shard only redoes
+the symbols its previous owner did not finish.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import pytz
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from src.config.settings import Config
+from src.models.models import ScanShard
+
+logger = logging.getLogger(__name__)
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+# Pipeline counters that add up across shards
+_STAGE_TOTALS = ('items_in', 'items_out', 'errors', 'busy_seconds')
+
+
+class Shard:
+    def __init__(self, id: int, run_id: int, position: int, symbol_ids: List[int], attempts: int):
+        self.id = id
+        self.run_id = run_id
+        self.position = position
+        self.symbol_ids = symbol_ids
+        self.attempts = attempts
+
+
+def merge_stage_reports(reports: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Sums per-stage pipeline counters of several shards (stage order kept)."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for report in reports:
+        for row in report or []:
+            stage = merged.setdefault(row['stage'], {'stage': row['stage'], 'shards': 0,
+                                                     **{key: 0 for key in _STAGE_TOTALS}})
+            stage['shards'] += 1
+            for key in _STAGE_TOTALS:
+                stage[key] += row.get(key, 0)
+    for stage in merged.values():
+        stage['busy_seconds'] = round(stage['busy_seconds'], 3)
+    return list(merged.values())
+
+
+class ShardQueue:
+    def __init__(self, session_factory: Callable[[], Session] = None, lease_seconds: float = None,
+                 max_attempts: int = None):
+        if session_factory is None:
+            from src.database.db import db_instance
+            session_factory = db_instance.SessionLocal
+        self.session_factory = session_factory
+        self.lease_seconds = Config.SCAN_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.max_attempts = Config.SCAN_SHARD_MAX_ATTEMPTS if max_attempts is None else max_attempts
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(ScanShard.status == PENDING,
+                   and_(ScanShard.status == LEASED, ScanShard.lease_expires_at < now))
+
+    def plan(self, run_id: int, symbol_ids: Iterable[int], shard_size: int = None) -> int:
+        """
+        Splits the run's symbols into shards, in order. A resumed run keeps its
+        shards (failed ones are retried). Returns the number of shards.
+        """
+        shard_size = max(1, shard_size or Config.SCAN_SHARD_SIZE)
+        db = self.session_factory()
+        try:
+            existing = db.query(func.count(ScanShard.id)).filter(ScanShard.run_id == run_id).scalar()
+            if existing:
+                db.query(ScanShard).filter(ScanShard.run_id == run_id, ScanShard.status == FAILED) \
+                    .update({'status': PENDING, 'attempts': 0, 'owner': None}, synchronize_session=False)
+                db.commit()
+                return existing
+
+            symbol_ids = list(symbol_ids)
+            db.bulk_insert_mappings(ScanShard, [
+                {'run_id': run_id, 'position': position, 'status': PENDING, 'attempts': 0,
+                 'symbol_ids': ",".join(str(symbol_id) for symbol_id in symbol_ids[start:start + shard_size])}
+                for position, start in enumerate(range(0, len(symbol_ids), shard_size))
+            ])
+            db.commit()
+            return -(-len(symbol_ids) // shard_size)
+        finally:
+            db.close()
+
+    def claim(self, run_id: int, owner: str, position: int = None) -> Optional[Shard]:
+        """
+        Leases the next pending shard of the run, or one whose lease expired
+        (only the shard at `position` if given); None when there is none.
+        """
+        db = self.session_factory()
+        try:
+            while True:
+                now = datetime.now(pytz.UTC)
+                # Expired leases that used up their attempts are given up rather than reclaimed
+                db.query(ScanShard).filter(
+                    ScanShard.run_id == run_id, ScanShard.status == LEASED,
+                    ScanShard.lease_expires_at < now, ScanShard.attempts >= self.max_attempts
+                ).update({'status': FAILED}, synchronize_session=False)
+
+                query = db.query(ScanShard).filter(ScanShard.run_id == run_id, self._claimable(now))
+                if position is not None:
+                    query = query.filter(ScanShard.position == position)
+                row = query.order_by(ScanShard.position) \
+                    .with_for_update(skip_locked=True) \
+                    .first()
+                if row is None:
+                    db.commit()
+                    return None
+
+                previous_owner = row.owner if row.status == LEASED else None
+                shard = Shard(row.id, run_id, row.position,
+                              [int(symbol_id) for symbol_id in row.symbol_ids.split(',') if symbol_id],
+                              row.attempts + 1)
+                claimed = db.query(ScanShard).filter(ScanShard.id == row.id, self._claimable(now)).update({
+                    'status': LEASED,
+                    'owner': owner,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'attempts': ScanShard.attempts + 1,
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    if previous_owner:
+                        logger.warning(f"Reclaimed shard {shard.position} of run {run_id} from {previous_owner} "
+                                       f"(lease expired, attempt {shard.attempts})")
+                    return shard
+                # Another worker claimed it between our SELECT and UPDATE: try the next one
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _update_lease(self, shard_id: int, owner: str, fields: Dict[str, Any]) -> bool:
+        """Applies fields if `owner` still holds the lease."""
+        db = self.session_factory()
+        try:
+            updated = db.query(ScanShard).filter(
+                ScanShard.id == shard_id, ScanShard.owner == owner, ScanShard.status == LEASED
+            ).update(fields, synchronize_session=False)
+            db.commit()
+            return bool(updated)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Lease update of shard {shard_id} failed: {e}")
+            return False
+        finally:
+            db.close()
+
+    def heartbeat(self, shard_id: int, owner: str) -> bool:
+        """Extends the lease; False once it was lost to another worker."""
+        expires = datetime.now(pytz.UTC) + timedelta(seconds=self.lease_seconds)
+        return self._update_lease(shard_id, owner, {'lease_expires_at': expires})
+
+    def complete(self, shard_id: int, owner: str, result: Dict[str, Any]) -> bool:
+        done = self._update_lease(shard_id, owner, {
+            'status': DONE, 'lease_expires_at': None, 'result': json.dumps(result, default=str)
+        })
+        if not done:
+            logger.warning(f"Shard {shard_id} finished by {owner} after its lease was lost; result dropped")
+        return done
+
+    def release(self, shard_id: int, owner: str, attempts: int):
+        """Gives a shard back after an error (failed once it used up its attempts)."""
+        status = FAILED if attempts >= self.max_attempts else PENDING
+        self._update_lease(shard_id, owner, {'status': status, 'lease_expires_at': None})
+
+    def progress(self, run_id: int) -> Dict[str, int]:
+        """Shard counts per status, plus 'open' (pending or leased)."""
+        db = self.session_factory()
+        try:
+            counts = dict(db.query(ScanShard.status, func.count(ScanShard.id))
+                          .filter(ScanShard.run_id == run_id).group_by(ScanShard.status).all())
+        finally:
+            db.close()
+        progress = {status: counts.get(status, 0) for status in (PENDING, LEASED, DONE, FAILED)}
+        progress['open'] = progress[PENDING] + progress[LEASED]
+        return progress
+
+    def results(self, run_id: int) -> List[Dict[str, Any]]:
+        """Per-shard summaries written by the workers, in shard order."""
+        db = self.session_factory()
+        try:
+            rows = db.query(ScanShard).filter(ScanShard.run_id == run_id).order_by(ScanShard.position).all()
+            return [{'shard': row.position, 'status': row.status, 'owner': row.owner, 'attempts': row.attempts,
+                     **(json.loads(row.result) if row.result else {})} for row in rows]
+        finally:
+            db.close()
+
+    def pending_shards(self, run_id: int) -> List[Shard]:
+        """Shards of the run not completed yet, in order (one shard event each)."""
+        db = self.session_factory()
+        try:
+            rows = db.query(ScanShard).filter(ScanShard.run_id == run_id, ScanShard.status != DONE) \
+                .order_by(ScanShard.position).all()
+            return [Shard(row.id, run_id, row.position,
+                          [int(symbol_id) for symbol_id in row.symbol_ids.split(',') if symbol_id], row.attempts)
+                    for row in rows]
+        finally:
+            db.close()
+
+    def open_run(self) -> Optional[int]:
+        """Latest run with shards left to claim (for workers started without a run id)."""
+        now = datetime.now(pytz.UTC)
+        db = self.session_factory()
+        try:
+            row = db.query(ScanShard.run_id).filter(self._claimable(now)) \
+                .order_by(ScanShard.run_id.desc()).first()
+            return row[0] if row else None
+        finally:
+            db.close()
@@ -1,6 +1,37 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
-from src.config.settings import Config
+from typing import Dict, Any, Iterable, List, Sequence, Tuple
+from src.services.strategy import Strategy
+
+
+def _run_length(mask: np.ndarray) -> np.ndarray:
+    """Length of the run of True values ending at each position (along the last axis)."""
+    mask = np.asarray(mask, dtype=bool)
+    counts = np.cumsum(mask, axis=-1)
+    last_reset = np.maximum.accumulate(np.where(mask, 0, counts), axis=-1)
+    return counts - last_reset
+
+
+def _previous_window_mean(values: np.ndarray, valid: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the `window` values before each position along the last axis.
+
+    NaN until a full window of valid values exists (matches the
+    volume[i - window:i].mean() check in score_signal).
+    """
+    values = np.atleast_2d(values)
+    valid = np.atleast_2d(valid)
+    rows, cols = values.shape
+    out = np.full((rows, cols), np.nan)
+    if 0 < window < cols:
+        zeros = np.zeros((rows, 1))
+        sums = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=1)], axis=1)
+        counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+        window_sum = sums[:, window:-1] - sums[:, :-window - 1]
+        window_count = counts[:, window:-1] - counts[:, :-window - 1]
+        out[:, window:] = np.where(window_count == window, window_sum / window, np.nan)
+    return out
+
 
 class ScoringService:
     """
@@ -24,6 +55,340 @@ class ScoringService:
     CONFIDENCE_MED = 50
     CONFIDENCE_LOW = 30
 
+    # Column order of the (symbols x features) matrix used by score_batch
+    FEATURE_COLUMNS = (
+        'position', 'length', 'rsi', 'close', 'sma200', 'vol_z', 'volume', 'vol_avg',
+        'rsi_up_run', 'rsi_down_run', 'ha_green', 'ha_green_run', 'ha_red_run',
+        'ha_close_up', 'ha_close_down'
+    )
+
+    def __init__(self, strategy: Strategy = None):
+        # Parameters are compiled once; defaults to the current Config values
+        self.strategy = strategy or Strategy.from_config()
+
+    @staticmethod
+    def _window_features(columns: Dict[str, np.ndarray], valid: np.ndarray,
+                         volume_periods: Iterable[int] = ()) -> Dict[str, np.ndarray]:
+        """
+        Rule inputs computed along the last (time) axis of 1-D or 2-D arrays.
+
+        The tail-window checks of score_signal (rising RSI, consecutive HA
+        candles) are expressed as run lengths ending at each position, so any
+        window size can be tested with a single comparison. `valid` marks real
+        candles (False for left padding). A 'vol_avg_<period>' entry is added
+        for each requested volume-average period.
+        """
+        rsi = columns['RSI']
+        ha_close = columns['HA_Close']
+        ha_green = columns['HA_Green'] & valid
+
+        def rising(values):
+            return np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=bool),
+                                   values[..., 1:] > values[..., :-1]], axis=-1)
+
+        def falling(values):
+            return np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=bool),
+                                   values[..., 1:] < values[..., :-1]], axis=-1)
+
+        with np.errstate(invalid='ignore'):
+            features = {
+                'rsi': rsi,
+                'close': columns['close'],
+                'sma200': columns['SMA_200'],
+                'vol_z': columns['Vol_Z'],
+                'volume': columns['volume'],
+                'rsi_up_run': _run_length(rising(rsi)),
+                'rsi_down_run': _run_length(falling(rsi)),
+                'ha_green': ha_green,
+                'ha_green_run': _run_length(ha_green),
+                'ha_red_run': _run_length(~ha_green & valid),
+                'ha_close_up': rising(ha_close),
+                'ha_close_down': falling(ha_close),
+            }
+        for period in set(volume_periods):
+            vol_avg = _previous_window_mean(columns['volume'], valid, period)
+            features[f'vol_avg_{period}'] = vol_avg.reshape(np.shape(rsi))
+        return features
+
+    # Defaults used by score_signal (row.get) when a column is missing
+    _COLUMN_DEFAULTS = {'RSI': 50.0, 'close': np.nan, 'SMA_200': 0.0, 'Vol_Z': 0.0, 'volume': 0.0, 'HA_Close': np.nan}
+
+    @classmethod
+    def frame_features(cls, df: pd.DataFrame, volume_periods: Iterable[int] = ()) -> Dict[str, np.ndarray]:
+        """Per-row inputs for the vectorized rules (one entry per row of df)."""
+        n = len(df)
+        columns = {}
+        for name, default in cls._COLUMN_DEFAULTS.items():
+            if name in df.columns:
+                columns[name] = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                columns[name] = np.full(n, default)
+        if 'HA_Green' in df.columns:
+            columns['HA_Green'] = df['HA_Green'].to_numpy(dtype=bool, na_value=False)
+        else:
+            columns['HA_Green'] = np.zeros(n, dtype=bool)
+
+        features = cls._window_features(columns, np.ones(n, dtype=bool), volume_periods)
+        features['position'] = np.arange(n)
+        features['length'] = np.full(n, n)
+        return features
+
+    @classmethod
+    def history_features(cls, columns: Dict[str, np.ndarray], valid: np.ndarray,
+                         strategies: Sequence[Strategy]) -> Dict[str, np.ndarray]:
+        """
+        Rule inputs for every bar of a left-padded (symbols x time) indicator panel.
+
+        Each bar is scored point-in-time: its 'length' is the number of candles
+        up to and including it, as a live scan on that day would have seen.
+        """
+        features = cls._window_features(columns, valid, cls._volume_periods(strategies))
+        position = np.cumsum(valid, axis=-1) - 1
+        features['position'] = np.where(valid, position, -1)
+        features['length'] = np.where(valid, position + 1, 0)
+        return features
+
+    @staticmethod
+    def _volume_periods(strategies: Iterable[Strategy]) -> List[int]:
+        return sorted({s.volume_average_period for s in strategies if s.volume_average})
+
+    def tail_length(self) -> int:
+        """Candles needed at the end of each frame to evaluate the latest row."""
+        return self.strategy.tail_length
+
+    def latest_features(self, frames: Dict[int, pd.DataFrame],
+                        strategies: Sequence[Strategy] = None) -> Tuple[List[int], Dict[str, np.ndarray]]:
+        """
+        Latest-row rule inputs for every symbol, shared by all `strategies`.
+
+        Only the last candles each strategy needs (the longest tail wins) are
+        read; they are stacked into a left-padded panel so run lengths and the
+        volume averages are computed for every symbol at once. Returns
+        (symbol_ids, {feature: 1-D array aligned with symbol_ids}).
+        """
+        strategies = strategies or [self.strategy]
+        symbol_ids = [symbol_id for symbol_id, df in frames.items() if not df.empty]
+        width = max(s.tail_length for s in strategies)
+        rows = len(symbol_ids)
+
+        columns = {name: np.full((rows, width), default) for name, default in self._COLUMN_DEFAULTS.items()}
+        columns['HA_Green'] = np.zeros((rows, width), dtype=bool)
+        valid = np.zeros((rows, width), dtype=bool)
+        lengths = np.zeros(rows, dtype=np.int64)
+
+        for row, symbol_id in enumerate(symbol_ids):
+            df = frames[symbol_id]
+            k = min(len(df), width)
+            lengths[row] = len(df)
+            valid[row, width - k:] = True
+            # Slice the column arrays directly; df.iloc[-width:] is much slower per symbol
+            for name in self._COLUMN_DEFAULTS:
+                if name in df.columns:
+                    columns[name][row, width - k:] = df[name].to_numpy()[-k:]
+            if 'HA_Green' in df.columns:
+                columns['HA_Green'][row, width - k:] = df['HA_Green'].to_numpy()[-k:]
+            # Padding stays NaN so it never extends a rising/falling run
+            for name in ('RSI', 'HA_Close', 'volume'):
+                columns[name][row, :width - k] = np.nan
+
+        features = self._window_features(columns, valid, self._volume_periods(strategies))
+        latest = {name: values[:, -1] if rows else np.empty(0, dtype=values.dtype) for name, values in features.items()}
+        latest['position'] = lengths - 1
+        latest['length'] = lengths
+        return symbol_ids, latest
+
+    def latest_feature_matrix(self, frames: Dict[int, pd.DataFrame]):
+        """
+        Builds the (symbols x FEATURE_COLUMNS) matrix of latest-row inputs.
+
+        See latest_features; 'vol_avg' holds this service's strategy's volume
+        average. Returns (symbol_ids, matrix).
+        """
+        symbol_ids, latest = self.latest_features(frames)
+        key = self.strategy.volume_average_key
+        latest['vol_avg'] = latest[key] if key else np.full(len(symbol_ids), np.nan)
+        matrix = np.column_stack([np.asarray(latest[name], dtype=np.float64) for name in self.FEATURE_COLUMNS]) \
+            if symbol_ids else np.empty((0, len(self.FEATURE_COLUMNS)))
+        return symbol_ids, matrix
+
+    def score_batch(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Scores the latest candle of every symbol in one vectorized pass.
+
+        `matrix` comes from latest_feature_matrix; returns score, direction and
+        confidence arrays aligned with its rows.
+        """
+        features = {name: matrix[:, col] for col, name in enumerate(self.FEATURE_COLUMNS)}
+        for name in ('position', 'length', 'rsi_up_run', 'rsi_down_run', 'ha_green_run', 'ha_red_run'):
+            features[name] = features[name].astype(np.int64)
+        for name in ('ha_green', 'ha_close_up', 'ha_close_down'):
+            features[name] = features[name] != 0
+        if self.strategy.volume_average_key:
+            features[self.strategy.volume_average_key] = features['vol_avg']
+        return self.score_features(features)
+
+    def score_strategies(self, frames: Dict[int, pd.DataFrame], strategies: Sequence[Strategy]):
+        """
+        Scores the latest candle of every symbol under several strategies.
+
+        The panel and its run lengths / volume averages are built once and
+        shared; each extra strategy only costs its own threshold comparisons.
+        Returns (symbol_ids, {strategy name: score/direction/confidence arrays}).
+        """
+        symbol_ids, features = self.latest_features(frames, strategies)
+        return symbol_ids, {s.name: self.score_features(features, s) for s in strategies}
+
+    def score_features(self, f: Dict[str, np.ndarray], strategy: Strategy = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized equivalent of score_signal's rules.
+
+        `f` holds equally shaped arrays (see frame_features): 'position' is the
+        row's index within its frame and 'length' the frame length, which
+        selects between the dual-window and fallback confirmation logic
+        exactly as score_signal does. Uses this service's strategy unless
+        another is given. Returns score/direction/confidence arrays.
+        """
+        result = self.score_sides(f, strategy)
+        score, side = result['score'], result['side']
+        direction = np.where(side > 0, "LONG", np.where(side < 0, "SHORT", "NEUTRAL")).astype(object)
+        confidence = np.select(
+            [score >= self.CONFIDENCE_HIGH, score >= self.CONFIDENCE_MED, score >= self.CONFIDENCE_LOW],
+            ["High", "Medium", "Low"],
+            default="No Trade"
+        ).astype(object)
+        return {"score": score, "direction": direction, "confidence": confidence}
+
+    def score_sides(self, f: Dict[str, np.ndarray], strategy: Strategy = None) -> Dict[str, np.ndarray]:
+        """
+        Numeric core of score_features: score plus side (+1 LONG, -1 SHORT, 0).
+
+        Cheaper for bulk consumers (backtests, sweeps) that never need the
+        direction / confidence strings.
+        """
+        s = strategy or self.strategy
+        i = f['position']
+        n = f['length']
+        shape = np.shape(i)
+        no = np.zeros(shape, dtype=bool)
+
+        rrc = s.rsi_rising_candles
+        hcc = s.ha_consecutive_candles
+        conf = s.confirmation_window_candles
+
+        # Dual window branch (enough candles for the primary window)
+        rising_a = falling_a = bull_a = bear_a = no
+        if s.dual_window:
+            conf_len = np.minimum(conf, i + 1)
+            if rrc is not None:
+                ok = conf_len >= rrc
+                need = np.minimum(rrc, conf_len - 1)
+                rising_a = ok & (f['rsi_up_run'] >= need)
+                falling_a = ok & (f['rsi_down_run'] >= need)
+            if hcc is not None and hcc >= 2:
+                ok = conf_len >= hcc
+                bull_a = ok & (f['ha_green_run'] >= hcc) & f['ha_close_up']
+                bear_a = ok & (f['ha_red_run'] >= hcc) & f['ha_close_down']
+
+        # Fallback branch (short history)
+        rising_b = falling_b = bull_b = bear_b = no
+        if rrc is not None and hcc is not None:
+            enough = n >= max(rrc, hcc)
+            ok = enough & (i >= rrc)
+            rising_b = ok & (f['rsi_up_run'] >= rrc)
+            falling_b = ok & (f['rsi_down_run'] >= rrc)
+            ok = enough & (i >= hcc)
+            if hcc >= 2:
+                bull_b = ok & (f['ha_green_run'] >= hcc) & f['ha_close_up']
+                bear_b = ok & (f['ha_red_run'] >= hcc) & f['ha_close_down']
+            else:
+                bull_b = ok & f['ha_green']
+                bear_b = ok & ~f['ha_green']
+
+        if s.primary_window_candles is not None:
+            dual = n >= s.primary_window_candles
+        else:
+            dual = no
+        rsi_rising = np.where(dual, rising_a, rising_b)
+        rsi_falling = np.where(dual, falling_a, falling_b)
+        ha_bullish = np.where(dual, bull_a, bull_b)
+        ha_bearish = np.where(dual, bear_a, bear_b)
+
+        rsi, close, sma200, vol_z = f['rsi'], f['close'], f['sma200'], f['vol_z']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            volume_above_avg = no
+            if s.volume_average:
+                avg = f[s.volume_average_key]
+                volume_above_avg = (i >= s.volume_average_period) & (avg > 0) & (f['volume'] > s.volume_multiplier * avg)
+
+            if not s.volume_filter:
+                volume_points = np.full(shape, self.SCORE_VOL_MED)
+                volume_points_basic = volume_points
+            else:
+                volume_points_basic = np.where(volume_above_avg, self.SCORE_VOL_HIGH, 0)
+                volume_points = np.where(volume_above_avg, self.SCORE_VOL_HIGH, np.where(vol_z > 1.0, self.SCORE_VOL_MED, 0))
+
+            # LONG
+            if not s.long_rsi_filter:
+                long_setup = ~no
+            else:
+                long_setup = rsi < s.rsi_oversold_threshold
+            if rrc is not None:
+                long_setup = long_setup & rsi_rising
+
+            # Trend damage check only applies when SMA200 is known (> 0)
+            if s.trend_damage_filter:
+                sma_check = sma200 > 0
+                damaged = sma_check & (((sma200 - close) / sma200) * 100 > s.max_distance_below_sma200_percent)
+            else:
+                sma_check = damaged = no
+            ha_long = (hcc is None) | ha_bullish
+            long_score = np.where(
+                long_setup & ~damaged,
+                self.SCORE_RSI_EXTREME + np.where(ha_long, self.SCORE_TREND_CONFIRM, 0) + np.where(
+                    sma_check,
+                    volume_points + np.where(close > sma200, self.SCORE_SMA_FILTER, 0),
+                    volume_points_basic
+                ),
+                0
+            )
+
+            # SHORT
+            if not s.short_rsi_filter:
+                short_setup = ~no
+            else:
+                short_setup = rsi > s.rsi_overbought_threshold
+            if s.rsi_falling_candles is not None:
+                short_setup = short_setup & rsi_falling
+            ha_short = (hcc is None) | ha_bearish
+            short_score = np.where(
+                short_setup,
+                self.SCORE_RSI_EXTREME + np.where(ha_short, self.SCORE_TREND_CONFIRM, 0) + volume_points
+                + np.where((sma200 > 0) & (close < sma200), self.SCORE_SMA_FILTER, 0),
+                0
+            )
+
+        # Final decision
+        is_long = (long_score >= self.CONFIDENCE_LOW) & (long_score > short_score)
+        is_short = (short_score >= self.CONFIDENCE_LOW) & (short_score > long_score)
+        score = np.where(is_long, long_score, np.where(is_short, short_score, 0)).astype(np.int64)
+        side = is_long.astype(np.int8) - is_short.astype(np.int8)
+        return {"score": score, "side": side}
+
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Scores every row of an indicator frame at once.
+
+        Equivalent to calling score_signal(df.iloc[i], df) for each row, but
+        as array operations. Reasons are not built here; use reasons_for()
+        for the rows that are actually alerted.
+        """
+        result = self.score_features(self.frame_features(df, self._volume_periods([self.strategy])))
+        return pd.DataFrame(result, index=df.index)
+
+    def reasons_for(self, df: pd.DataFrame, positions: Iterable[int]) -> Dict[int, List[str]]:
+        """Builds reason strings for selected row positions (lazily, via score_signal)."""
+        return {int(p): self.score_signal(df.iloc[int(p)], df)['reasons'] for p in positions}
+
     def score_signal(self, row: pd.Series, df: pd.DataFrame = None) -> Dict[str, Any]:
         """
         Evaluates a single candle (row) against scoring rules using dual window approach.
@@ -31,6 +396,7 @@ class ScoringService:
         Confirmation: last 20-30 candles
         Returns a dictionary with score, confidence, direction, and reasoning.
         """
+        s = self.strategy
         long_score = 0
         short_score = 0
         long_reasons = []
@@ -45,25 +411,25 @@ class ScoringService:
 
         # Calculate volume average if df is provided
         volume_above_avg = False
-        if Config.VOLUME_MULTIPLIER is not None and Config.VOLUME_AVERAGE_PERIOD is not None:
-            if df is not None and len(df) >= Config.VOLUME_AVERAGE_PERIOD:
+        if s.volume_multiplier is not None and s.volume_average_period is not None:
+            if df is not None and len(df) >= s.volume_average_period:
                 current_idx = df.index.get_loc(row.name)
-                if current_idx >= Config.VOLUME_AVERAGE_PERIOD:
-                    avg_volume = df['volume'].iloc[current_idx - Config.VOLUME_AVERAGE_PERIOD:current_idx].mean()
+                if current_idx >= s.volume_average_period:
+                    avg_volume = df['volume'].iloc[current_idx - s.volume_average_period:current_idx].mean()
                     if avg_volume > 0:
-                        volume_above_avg = current_volume > (Config.VOLUME_MULTIPLIER * avg_volume)
+                        volume_above_avg = current_volume > (s.volume_multiplier * avg_volume)
 
         # Use dual window approach
-        if Config.PRIMARY_WINDOW_CANDLES is not None and df is not None and len(df) >= Config.PRIMARY_WINDOW_CANDLES:
+        if s.primary_window_candles is not None and df is not None and len(df) >= s.primary_window_candles:
             # Get primary window (last 70 candles) and confirmation window (last 30 candles)
             current_idx = df.index.get_loc(row.name)
 
             # Primary window for trend analysis
-            primary_start = max(0, current_idx - Config.PRIMARY_WINDOW_CANDLES + 1)
+            primary_start = max(0, current_idx - s.primary_window_candles + 1)
             primary_df = df.iloc[primary_start:current_idx + 1]
 
             # Confirmation window for recent momentum
-            confirmation_start = max(0, current_idx - Config.CONFIRMATION_WINDOW_CANDLES + 1)
+            confirmation_start = max(0, current_idx - s.confirmation_window_candles + 1)
             confirmation_df = df.iloc[confirmation_start:current_idx + 1]
 
         # Check RSI rising/falling trend using confirmation window
@@ -74,36 +440,36 @@ class ScoringService:
         ha_bullish_confirmed = False
         ha_bearish_confirmed = False
 
-        if Config.PRIMARY_WINDOW_CANDLES is not None and df is not None and len(df) >= Config.PRIMARY_WINDOW_CANDLES:
+        if s.primary_window_candles is not None and df is not None and len(df) >= s.primary_window_candles:
             # Get primary window (last 70 candles) and confirmation window (last 30 candles)
             current_idx = df.index.get_loc(row.name)
 
             # Primary window for trend analysis
-            primary_start = max(0, current_idx - Config.PRIMARY_WINDOW_CANDLES + 1)
+            primary_start = max(0, current_idx - s.primary_window_candles + 1)
             primary_df = df.iloc[primary_start:current_idx + 1]
 
             # Confirmation window for recent momentum
-            confirmation_start = max(0, current_idx - Config.CONFIRMATION_WINDOW_CANDLES + 1)
+            confirmation_start = max(0, current_idx - s.confirmation_window_candles + 1)
             confirmation_df = df.iloc[confirmation_start:current_idx + 1]
 
             # Check RSI trend in confirmation window
-            if Config.RSI_RISING_CANDLES is not None and Config.CONFIRMATION_WINDOW_CANDLES is not None and len(confirmation_df) >= Config.RSI_RISING_CANDLES:
-                rsi_values = confirmation_df['RSI'].tail(Config.RSI_RISING_CANDLES + 1).values
+            if s.rsi_rising_candles is not None and s.confirmation_window_candles is not None and len(confirmation_df) >= s.rsi_rising_candles:
+                rsi_values = confirmation_df['RSI'].tail(s.rsi_rising_candles + 1).values
                 rsi_rising = all(rsi_values[i] < rsi_values[i+1] for i in range(len(rsi_values)-1))
                 rsi_falling = all(rsi_values[i] > rsi_values[i+1] for i in range(len(rsi_values)-1))
 
             # Check HA consecutive candles in confirmation window
-            if Config.HA_CONSECUTIVE_CANDLES is not None and Config.CONFIRMATION_WINDOW_CANDLES is not None and len(confirmation_df) >= Config.HA_CONSECUTIVE_CANDLES:
-                ha_green_values = confirmation_df['HA_Green'].tail(Config.HA_CONSECUTIVE_CANDLES).values
-                ha_close_values = confirmation_df['HA_Close'].tail(Config.HA_CONSECUTIVE_CANDLES).values
+            if s.ha_consecutive_candles is not None and s.confirmation_window_candles is not None and len(confirmation_df) >= s.ha_consecutive_candles:
+                ha_green_values = confirmation_df['HA_Green'].tail(s.ha_consecutive_candles).values
+                ha_close_values = confirmation_df['HA_Close'].tail(s.ha_consecutive_candles).values
 
-                if len(ha_green_values) >= Config.HA_CONSECUTIVE_CANDLES and len(ha_close_values) >= Config.HA_CONSECUTIVE_CANDLES and Config.HA_CONSECUTIVE_CANDLES >= 2:
+                if len(ha_green_values) >= s.ha_consecutive_candles and len(ha_close_values) >= s.ha_consecutive_candles and s.ha_consecutive_candles >= 2:
                     ha_bullish_confirmed = all(ha_green_values) and ha_close_values[-1] > ha_close_values[-2]
                     ha_bearish_confirmed = all(~ha_green_values) and ha_close_values[-1] < ha_close_values[-2]
         else:
             # Fallback to old logic if not enough data
-            if Config.RSI_RISING_CANDLES is not None and Config.HA_CONSECUTIVE_CANDLES is not None:
-                if df is not None and len(df) >= max(Config.RSI_RISING_CANDLES, Config.HA_CONSECUTIVE_CANDLES):
+            if s.rsi_rising_candles is not None and s.ha_consecutive_candles is not None:
+                if df is not None and len(df) >= max(s.rsi_rising_candles, s.ha_consecutive_candles):
                     try:
                         current_idx = df.index.get_loc(row.name)
                         # Handle case where get_loc returns a slice
@@ -113,9 +479,9 @@ class ScoringService:
                         current_idx = len(df) - 1
 
                     # Check if we have enough previous candles
-                    if current_idx >= Config.RSI_RISING_CANDLES:
+                    if current_idx >= s.rsi_rising_candles:
                         # Get RSI values for last N candles including current
-                        rsi_values = df['RSI'].iloc[current_idx - Config.RSI_RISING_CANDLES:current_idx + 1].values
+                        rsi_values = df['RSI'].iloc[current_idx - s.rsi_rising_candles:current_idx + 1].values
 
                         # Check if RSI is consistently rising
                         rsi_rising = all(rsi_values[i] < rsi_values[i+1] for i in range(len(rsi_values)-1))
@@ -124,14 +490,14 @@ class ScoringService:
                         rsi_falling = all(rsi_values[i] > rsi_values[i+1] for i in range(len(rsi_values)-1))
 
                     # Check HA consecutive candles
-                    if current_idx >= Config.HA_CONSECUTIVE_CANDLES:
+                    if current_idx >= s.ha_consecutive_candles:
                         # Get last N HA candles including current
-                        ha_green_values = df['HA_Green'].iloc[current_idx - Config.HA_CONSECUTIVE_CANDLES + 1:current_idx + 1].values
-                        ha_close_values = df['HA_Close'].iloc[current_idx - Config.HA_CONSECUTIVE_CANDLES + 1:current_idx + 1].values
+                        ha_green_values = df['HA_Green'].iloc[current_idx - s.ha_consecutive_candles + 1:current_idx + 1].values
+                        ha_close_values = df['HA_Close'].iloc[current_idx - s.ha_consecutive_candles + 1:current_idx + 1].values
 
                         # Check for consecutive green/red candles
-                        if len(ha_green_values) >= Config.HA_CONSECUTIVE_CANDLES and len(ha_close_values) >= Config.HA_CONSECUTIVE_CANDLES:
-                            if Config.HA_CONSECUTIVE_CANDLES >= 2:
+                        if len(ha_green_values) >= s.ha_consecutive_candles and len(ha_close_values) >= s.ha_consecutive_candles:
+                            if s.ha_consecutive_candles >= 2:
                                 ha_bullish_confirmed = all(ha_green_values) and ha_close_values[-1] > ha_close_values[-2]
                                 ha_bearish_confirmed = all(~ha_green_values) and ha_close_values[-1] < ha_close_values[-2]
                             else:
@@ -143,39 +509,39 @@ class ScoringService:
         # LONG Logic (Buying the Dip)
         # ---------------------------
         # Check RSI oversold condition (skip if RSI_OVERSOLD_THRESHOLD is NA)
-        rsi_oversold_check = Config.RSI_OVERSOLD_THRESHOLD is None or rsi < Config.RSI_OVERSOLD_THRESHOLD
-        rsi_rising_check = Config.RSI_RISING_CANDLES is None or rsi_rising
+        rsi_oversold_check = s.rsi_oversold_threshold is None or rsi < s.rsi_oversold_threshold
+        rsi_rising_check = s.rsi_rising_candles is None or rsi_rising
         
         if rsi_oversold_check and rsi_rising_check:
             # Trend Damage Check (skip if MAX_DISTANCE_BELOW_SMA200_PERCENT is NA)
-            if Config.MAX_DISTANCE_BELOW_SMA200_PERCENT is not None and sma200 > 0:
+            if s.max_distance_below_sma200_percent is not None and sma200 > 0:
                 distance_below_pct = ((sma200 - close) / sma200) * 100
-                if distance_below_pct > Config.MAX_DISTANCE_BELOW_SMA200_PERCENT:
-                    long_reasons.append(f"⚠️ Trend Damaged: Price {distance_below_pct:.1f}% below 200 SMA (Max: {Config.MAX_DISTANCE_BELOW_SMA200_PERCENT}%)")
+                if distance_below_pct > s.max_distance_below_sma200_percent:
+                    long_reasons.append(f"⚠️ Trend Damaged: Price {distance_below_pct:.1f}% below 200 SMA (Max: {s.max_distance_below_sma200_percent}%)")
                     # Skip this signal - trend is too damaged
                     pass
                 else:
                     long_score += self.SCORE_RSI_EXTREME
-                    if Config.RSI_OVERSOLD_THRESHOLD is not None:
-                        long_reasons.append(f"Oversold & Rising RSI (RSI: {rsi:.1f}, Rising for {Config.RSI_RISING_CANDLES or 'any'} candles)")
+                    if s.rsi_oversold_threshold is not None:
+                        long_reasons.append(f"Oversold & Rising RSI (RSI: {rsi:.1f}, Rising for {s.rsi_rising_candles or 'any'} candles)")
                     else:
                         long_reasons.append(f"Rising RSI Momentum (RSI: {rsi:.1f})")
 
                     # Heikin Ashi Confirmation (skip if HA_CONSECUTIVE_CANDLES is NA)
-                    if Config.HA_CONSECUTIVE_CANDLES is None or ha_bullish_confirmed:
+                    if s.ha_consecutive_candles is None or ha_bullish_confirmed:
                         long_score += self.SCORE_TREND_CONFIRM
-                        if Config.HA_CONSECUTIVE_CANDLES is not None:
-                            long_reasons.append(f"Bullish Momentum Confirmed ({Config.HA_CONSECUTIVE_CANDLES} Green HA Candles, Close Rising)")
+                        if s.ha_consecutive_candles is not None:
+                            long_reasons.append(f"Bullish Momentum Confirmed ({s.ha_consecutive_candles} Green HA Candles, Close Rising)")
                         else:
                             long_reasons.append("Bullish Momentum (HA filter skipped)")
 
                     # Volume Check (skip if VOLUME_MULTIPLIER is NA)
-                    if Config.VOLUME_MULTIPLIER is None:
+                    if s.volume_multiplier is None:
                         long_score += self.SCORE_VOL_MED
                         long_reasons.append("Volume filter skipped")
                     elif volume_above_avg:
                         long_score += self.SCORE_VOL_HIGH
-                        long_reasons.append(f"High Volume Conviction (>{Config.VOLUME_MULTIPLIER}x {Config.VOLUME_AVERAGE_PERIOD}-day avg)")
+                        long_reasons.append(f"High Volume Conviction (>{s.volume_multiplier}x {s.volume_average_period}-day avg)")
                     elif vol_z > 1.0:
                         long_score += self.SCORE_VOL_MED
                         long_reasons.append(f"Moderate Volume (Z-Score: {vol_z:.1f})")
@@ -187,56 +553,56 @@ class ScoringService:
             else:
                 # No SMA200 data or filter skipped, proceed
                 long_score += self.SCORE_RSI_EXTREME
-                if Config.RSI_OVERSOLD_THRESHOLD is not None:
-                    long_reasons.append(f"Oversold & Rising RSI (RSI: {rsi:.1f}, Rising for {Config.RSI_RISING_CANDLES or 'any'} candles)")
+                if s.rsi_oversold_threshold is not None:
+                    long_reasons.append(f"Oversold & Rising RSI (RSI: {rsi:.1f}, Rising for {s.rsi_rising_candles or 'any'} candles)")
                 else:
                     long_reasons.append(f"Rising RSI Momentum (RSI: {rsi:.1f})")
 
                 # Heikin Ashi Confirmation (skip if HA_CONSECUTIVE_CANDLES is NA)
-                if Config.HA_CONSECUTIVE_CANDLES is None or ha_bullish_confirmed:
+                if s.ha_consecutive_candles is None or ha_bullish_confirmed:
                     long_score += self.SCORE_TREND_CONFIRM
-                    if Config.HA_CONSECUTIVE_CANDLES is not None:
-                        long_reasons.append(f"Bullish Momentum Confirmed ({Config.HA_CONSECUTIVE_CANDLES} Green HA Candles, Close Rising)")
+                    if s.ha_consecutive_candles is not None:
+                        long_reasons.append(f"Bullish Momentum Confirmed ({s.ha_consecutive_candles} Green HA Candles, Close Rising)")
                     else:
                         long_reasons.append("Bullish Momentum (HA filter skipped)")
 
                 # Volume Check (skip if VOLUME_MULTIPLIER is NA)
-                if Config.VOLUME_MULTIPLIER is None:
+                if s.volume_multiplier is None:
                     long_score += self.SCORE_VOL_MED
                     long_reasons.append("Volume filter skipped")
                 elif volume_above_avg:
                     long_score += self.SCORE_VOL_HIGH
-                    long_reasons.append(f"High Volume Conviction (>{Config.VOLUME_MULTIPLIER}x {Config.VOLUME_AVERAGE_PERIOD}-day avg)")
+                    long_reasons.append(f"High Volume Conviction (>{s.volume_multiplier}x {s.volume_average_period}-day avg)")
 
         # ---------------------------
         # SHORT Logic (Selling the Top)
         # ---------------------------
         # Check RSI overbought condition (skip if RSI_OVERBOUGHT_THRESHOLD is NA)
-        rsi_overbought_check = Config.RSI_OVERBOUGHT_THRESHOLD is None or rsi > Config.RSI_OVERBOUGHT_THRESHOLD
-        rsi_falling_check = Config.RSI_FALLING_CANDLES is None or rsi_falling
+        rsi_overbought_check = s.rsi_overbought_threshold is None or rsi > s.rsi_overbought_threshold
+        rsi_falling_check = s.rsi_falling_candles is None or rsi_falling
         
         if rsi_overbought_check and rsi_falling_check:
             short_score += self.SCORE_RSI_EXTREME
-            if Config.RSI_OVERBOUGHT_THRESHOLD is not None:
-                short_reasons.append(f"Overbought & Falling RSI (RSI: {rsi:.1f}, Falling for {Config.RSI_FALLING_CANDLES or 'any'} candles)")
+            if s.rsi_overbought_threshold is not None:
+                short_reasons.append(f"Overbought & Falling RSI (RSI: {rsi:.1f}, Falling for {s.rsi_falling_candles or 'any'} candles)")
             else:
                 short_reasons.append(f"Falling RSI Momentum (RSI: {rsi:.1f})")
 
             # Heikin Ashi Confirmation (skip if HA_CONSECUTIVE_CANDLES is NA)
-            if Config.HA_CONSECUTIVE_CANDLES is None or ha_bearish_confirmed:
+            if s.ha_consecutive_candles is None or ha_bearish_confirmed:
                 short_score += self.SCORE_TREND_CONFIRM
-                if Config.HA_CONSECUTIVE_CANDLES is not None:
-                    short_reasons.append(f"Bearish Momentum Confirmed ({Config.HA_CONSECUTIVE_CANDLES} Red HA Candles, Close Falling)")
+                if s.ha_consecutive_candles is not None:
+                    short_reasons.append(f"Bearish Momentum Confirmed ({s.ha_consecutive_candles} Red HA Candles, Close Falling)")
                 else:
                     short_reasons.append("Bearish Momentum (HA filter skipped)")
 
             # Volume Check (skip if VOLUME_MULTIPLIER is NA)
-            if Config.VOLUME_MULTIPLIER is None:
+            if s.volume_multiplier is None:
                 short_score += self.SCORE_VOL_MED
                 short_reasons.append("Volume filter skipped")
             elif volume_above_avg:
                 short_score += self.SCORE_VOL_HIGH
-                short_reasons.append(f"High Volume Conviction (>{Config.VOLUME_MULTIPLIER}x {Config.VOLUME_AVERAGE_PERIOD}-day avg)")
+                short_reasons.append(f"High Volume Conviction (>{s.volume_multiplier}x {s.volume_average_period}-day avg)")
             elif vol_z > 1.0:
                 short_score += self.SCORE_VOL_MED
                 short_reasons.append(f"Moderate Volume (Z-Score: {vol_z:.1f})")
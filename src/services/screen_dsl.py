@@ -0,0 +1,414 @@
+"""
+Declarative screening expressions compiled to NumPy masks.
+
+A screen is a boolean expression over latest-session fields, e.g.
+
+    rsi14 between 20 and 35 and ha_green and close > sma200
+    (hammer or bullish_engulfing) and volume > 1.5 * vol_avg_20
+
+Grammar (keywords are case-insensitive):
+
+    expr       := and_expr ('or' and_expr)*
+    and_expr   := not_expr ('and' not_expr)*
+    not_expr   := 'not' not_expr | comparison
+    comparison := sum [('<' | '<=' | '>' | '>=' | '==' | '!=') sum | 'between' sum 'and' sum]
+    sum        := term (('+' | '-') term)*
+    term       := unary (('*' | '/') unary)*
+    unary      := '-' unary | NUMBER | FIELD | '(' expr ')'
+
+Expressions are parsed once, type-checked against FIELDS (numeric fields
+must be compared, boolean fields can be combined directly) and compiled into
+a function of {field: array} that returns one boolean per symbol. Comparisons
+involving a missing value (NaN, e.g. sma200 with too little history) are
+false.
+
+panel_fields computes every field for a left-padded OHLCV panel in one
+vectorized pass, and ScreenQueryService keeps those arrays for the active
+universe per stored-data version, so ad-hoc screens only run mask operations.
+"""
+
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Set, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from src.config.settings import Config
+from src.models.models import Symbol
+from src.services import candle_patterns, indicator_kernels
+from src.services.data_version import current_version
+from src.services.indicators import IndicatorService
+from src.services.stock_screener import BULLISH_PATTERNS, MIN_HISTORY, RSI_MAX, RSI_MIN, _macd_bullish
+
+logger = logging.getLogger(__name__)
+
+NUMBER, BOOL = 'number', 'bool'
+
+# Screenable fields: name -> (type, description)
+FIELDS = {
+    'open': (NUMBER, 'Latest open'),
+    'high': (NUMBER, 'Latest high'),
+    'low': (NUMBER, 'Latest low'),
+    'close': (NUMBER, 'Latest close'),
+    'volume': (NUMBER, 'Latest volume'),
+    'prev_close': (NUMBER, 'Previous session close'),
+    'change_pct': (NUMBER, 'Close change vs previous session, %'),
+    'bars': (NUMBER, 'Bars of history loaded'),
+    'market_cap_cr': (NUMBER, 'Market cap in crores'),
+    'sma20': (NUMBER, '20-day simple moving average'),
+    'sma50': (NUMBER, '50-day simple moving average'),
+    'sma200': (NUMBER, '200-day simple moving average'),
+    'rsi14': (NUMBER, '14-day RSI'),
+    'atr14': (NUMBER, '14-day average true range'),
+    'ha_open': (NUMBER, 'Heikin Ashi open'),
+    'ha_close': (NUMBER, 'Heikin Ashi close'),
+    'vol_avg_20': (NUMBER, '20-day average volume'),
+    'vol_z': (NUMBER, 'Volume z-score vs 30 days'),
+    'ha_green': (BOOL, 'Heikin Ashi candle is green'),
+    'macd_bullish': (BOOL, 'MACD crossed above signal, or both above zero'),
+    'bullish_pattern': (BOOL, 'Hammer or bullish engulfing (the /screen-stocks pattern condition)'),
+    'bearish_pattern': (BOOL, 'Any bearish candlestick pattern'),
+}
+FIELDS.update({name: (BOOL, f"{name.replace('_', ' ').capitalize()} pattern") for name in candle_patterns.PATTERNS})
+
+ALIASES = {'rsi': 'rsi14', 'atr': 'atr14'}
+
+# The screener's core conditions as a screen
+CORE_SCREEN = f"bars >= {MIN_HISTORY} and rsi14 between {RSI_MIN} and {RSI_MAX} and ha_green"
+
+_TOKEN = re.compile(r"\s*(?:((?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|[<>()+\-*/]))")
+_KEYWORDS = {'and', 'or', 'not', 'between'}
+_COMPARISONS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater,
+    '>=': np.greater_equal, '==': np.equal, '!=': np.not_equal,
+}
+_ARITHMETIC = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}
+
+
+class ScreenError(ValueError):
+    """Invalid screen expression (syntax, unknown field or type mismatch)."""
+
+
+def _tokenize(text: str) -> List[Tuple[str, Any, int]]:
+    """(kind, value, position) tokens; kind is 'num', 'name', 'kw' or 'op'."""
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match:
+            raise ScreenError(f"Unexpected character {text[position:].lstrip()[:1]!r} at position {position}")
+        number, name, op = match.groups()
+        start = match.start(match.lastindex)
+        if number is not None:
+            tokens.append(('num', float(number), start))
+        elif name is not None:
+            lowered = name.lower()
+            tokens.append(('kw', lowered, start) if lowered in _KEYWORDS else ('name', lowered, start))
+        else:
+            tokens.append(('op', op, start))
+        position = match.end()
+    tokens.append(('end', None, len(text)))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing typed nodes: (type, kind, ...)."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def _peek(self, kind: str, value=None) -> bool:
+        token = self.tokens[self.index]
+        return token[0] == kind and (value is None or token[1] == value)
+
+    def _take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def _expect(self, kind: str, value=None):
+        if not self._peek(kind, value):
+            self._fail(f"expected {value or kind}")
+        return self._take()
+
+    def _fail(self, message: str):
+        kind, value, position = self.tokens[self.index]
+        found = 'end of expression' if kind == 'end' else repr(value)
+        raise ScreenError(f"{message[0].upper()}{message[1:]}, found {found} at position {position}")
+
+    @staticmethod
+    def _require(node, expected: str, context: str):
+        if node[0] != expected:
+            what = 'a condition' if expected == BOOL else 'a number'
+            raise ScreenError(f"{context} needs {what}, got {_describe(node)}")
+
+    def parse(self):
+        node = self._or()
+        if not self._peek('end'):
+            self._fail("expected 'and', 'or' or end of expression")
+        self._require(node, BOOL, "A screen")
+        return node
+
+    def _or(self):
+        node = self._and()
+        while self._peek('kw', 'or'):
+            self._take()
+            right = self._and()
+            self._require(node, BOOL, "'or'")
+            self._require(right, BOOL, "'or'")
+            node = (BOOL, 'or', node, right)
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._peek('kw', 'and'):
+            self._take()
+            right = self._not()
+            self._require(node, BOOL, "'and'")
+            self._require(right, BOOL, "'and'")
+            node = (BOOL, 'and', node, right)
+        return node
+
+    def _not(self):
+        if self._peek('kw', 'not'):
+            self._take()
+            operand = self._not()
+            self._require(operand, BOOL, "'not'")
+            return (BOOL, 'not', operand)
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._sum()
+        if self._peek('kw', 'between'):
+            self._take()
+            low = self._sum()
+            self._expect('kw', 'and')
+            high = self._sum()
+            for node in (left, low, high):
+                self._require(node, NUMBER, "'between'")
+            return (BOOL, 'between', left, low, high)
+        if self._peek('op') and self.tokens[self.index][1] in _COMPARISONS:
+            op = self._take()[1]
+            right = self._sum()
+            self._require(left, NUMBER, f"'{op}'")
+            self._require(right, NUMBER, f"'{op}'")
+            return (BOOL, 'compare', op, left, right)
+        return left
+
+    def _sum(self):
+        node = self._term()
+        while self._peek('op', '+') or self._peek('op', '-'):
+            op = self._take()[1]
+            right = self._term()
+            self._require(node, NUMBER, f"'{op}'")
+            self._require(right, NUMBER, f"'{op}'")
+            node = (NUMBER, 'arith', op, node, right)
+        return node
+
+    def _term(self):
+        node = self._unary()
+        while self._peek('op', '*') or self._peek('op', '/'):
+            op = self._take()[1]
+            right = self._unary()
+            self._require(node, NUMBER, f"'{op}'")
+            self._require(right, NUMBER, f"'{op}'")
+            node = (NUMBER, 'arith', op, node, right)
+        return node
+
+    def _unary(self):
+        if self._peek('op', '-'):
+            self._take()
+            operand = self._unary()
+            self._require(operand, NUMBER, "'-'")
+            return (NUMBER, 'neg', operand)
+        if self._peek('num'):
+            return (NUMBER, 'const', self._take()[1])
+        if self._peek('name'):
+            name = self._take()[1]
+            name = ALIASES.get(name, name)
+            if name not in FIELDS:
+                raise ScreenError(f"Unknown field {name!r}; available: {', '.join(sorted(FIELDS))}")
+            return (FIELDS[name][0], 'field', name)
+        if self._peek('op', '('):
+            self._take()
+            node = self._or()
+            self._expect('op', ')')
+            return node
+        self._fail("expected a field, number or '('")
+
+
+def _describe(node) -> str:
+    if node[1] == 'field':
+        return f"{FIELDS[node[2]][0]} field {node[2]!r}"
+    if node[1] == 'const':
+        return f"number {node[2]:g}"
+    return 'a condition' if node[0] == BOOL else 'a number'
+
+
+def _fields_of(node) -> Set[str]:
+    if node[1] == 'field':
+        return {node[2]}
+    return set().union(*(_fields_of(child) for child in node[2:] if isinstance(child, tuple)))
+
+
+def _build(node) -> Callable[[Dict[str, np.ndarray]], Any]:
+    kind = node[1]
+    if kind == 'const':
+        value = node[2]
+        return lambda fields: value
+    if kind == 'field':
+        name = node[2]
+        return lambda fields: fields[name]
+    if kind == 'neg':
+        operand = _build(node[2])
+        return lambda fields: np.negative(operand(fields))
+    if kind == 'arith':
+        op, left, right = _ARITHMETIC[node[2]], _build(node[3]), _build(node[4])
+        return lambda fields: op(left(fields), right(fields))
+    if kind == 'compare':
+        op, left, right = _COMPARISONS[node[2]], _build(node[3]), _build(node[4])
+        return lambda fields: op(left(fields), right(fields))
+    if kind == 'between':
+        value, low, high = (_build(child) for child in node[2:])
+        return lambda fields: np.logical_and(value(fields) >= low(fields), value(fields) <= high(fields))
+    if kind == 'not':
+        operand = _build(node[2])
+        return lambda fields: np.logical_not(operand(fields))
+    combine = np.logical_and if kind == 'and' else np.logical_or
+    left, right = _build(node[2]), _build(node[3])
+    return lambda fields: combine(left(fields), right(fields))
+
+
+class Screen:
+    """A compiled screen expression."""
+
+    def __init__(self, text: str):
+        self.text = text
+        tree = _Parser(text).parse()
+        self.fields = sorted(_fields_of(tree))
+        self._evaluate = _build(tree)
+
+    def evaluate(self, fields: Dict[str, np.ndarray]) -> np.ndarray:
+        """Boolean mask over the rows of the given field arrays."""
+        size = len(next(iter(fields.values()))) if fields else 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.broadcast_to(np.asarray(self._evaluate(fields), dtype=bool), (size,))
+
+    def __repr__(self):
+        return f"Screen({self.text!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_screen(text: str) -> Screen:
+    """Parses and validates a screen expression (compiled screens are cached by text)."""
+    if not text or not text.strip():
+        raise ScreenError("Empty screen expression")
+    return Screen(text)
+
+
+def panel_fields(panel: Dict[str, np.ndarray], lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """Latest-session value of every numeric/boolean field for each row of a left-padded OHLCV panel."""
+    o, h, l, c, v = (panel[name] for name in ('open', 'high', 'low', 'close', 'volume'))
+    indicators = indicator_kernels.compute(o, h, l, c, v, engine=Config.INDICATOR_ENGINE)
+    rows, width = c.shape
+    prev_close = c[:, -2] if width > 1 else np.full(rows, np.nan)
+    bits = candle_patterns.compute(o[:, -3:], h[:, -3:], l[:, -3:], c[:, -3:])[:, -1] if width else np.zeros(rows)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fields = {
+            'open': o[:, -1], 'high': h[:, -1], 'low': l[:, -1], 'close': c[:, -1], 'volume': v[:, -1],
+            'prev_close': prev_close,
+            'change_pct': (c[:, -1] / prev_close - 1) * 100,
+            'bars': np.asarray(lengths, dtype=np.float64),
+            'sma20': indicators['SMA_20'][:, -1],
+            'sma50': indicators['SMA_50'][:, -1],
+            'sma200': indicators['SMA_200'][:, -1],
+            'rsi14': indicators['RSI'][:, -1],
+            'atr14': indicators['ATR'][:, -1],
+            'ha_open': indicators['HA_Open'][:, -1],
+            'ha_close': indicators['HA_Close'][:, -1],
+            'vol_avg_20': v[:, -20:].mean(axis=1),
+            'vol_z': indicators['Vol_Z'][:, -1],
+            'ha_green': indicators['HA_Close'][:, -1] > indicators['HA_Open'][:, -1],
+            'macd_bullish': _macd_bullish(pd.DataFrame(c.T)) if width > 1 else np.zeros(rows, dtype=bool),
+            'bullish_pattern': candle_patterns.has_any(bits, BULLISH_PATTERNS),
+            'bearish_pattern': candle_patterns.has_any(bits, candle_patterns.BEARISH),
+        }
+    for name in candle_patterns.PATTERNS:
+        fields[name] = candle_patterns.has_any(bits, (name,))
+    return fields
+
+
+class _Universe:
+    """Field arrays for the active symbols at one data version."""
+
+    def __init__(self, key: Tuple, symbols: List[Symbol], fields: Dict[str, np.ndarray]):
+        self.key = key
+        self.symbols = symbols
+        self.fields = fields
+        self.built_at = time.time()
+
+
+# Latest universe snapshot, shared by API requests in this process
+_universe = None
+_universe_lock = threading.Lock()
+
+
+class ScreenQueryService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.indicator_service = IndicatorService(db)
+
+    def universe(self) -> _Universe:
+        """Field arrays for all active symbols, rebuilt when stored data changes."""
+        global _universe
+        key = (current_version(self.db), IndicatorService.INDICATOR_VERSION)
+        with _universe_lock:
+            if _universe is None or _universe.key != key:
+                _universe = self._build(key)
+            return _universe
+
+    def _build(self, key: Tuple) -> _Universe:
+        start = time.perf_counter()
+        symbols = {symbol.id: symbol for symbol in self.db.query(Symbol).filter(Symbol.is_active.is_(True)).all()}
+        frames = self.indicator_service.load_data_many(list(symbols))
+        symbol_ids, panel, lengths = indicator_kernels.stack_panel({s: df for s, df in frames.items() if not df.empty})
+        ordered = [symbols[symbol_id] for symbol_id in symbol_ids]
+
+        fields = panel_fields(panel, lengths) if ordered else {name: np.empty(0) for name in FIELDS}
+        fields['market_cap_cr'] = np.array(
+            [np.nan if symbol.market_cap_cr is None else symbol.market_cap_cr for symbol in ordered], dtype=np.float64
+        )
+        logger.info(f"Built screening universe of {len(ordered)} symbols in {time.perf_counter() - start:.2f}s")
+        return _Universe(key, ordered, fields)
+
+    def run(self, expression: str, limit: int = 100) -> Dict[str, Any]:
+        """Evaluates a screen over the universe; raises ScreenError for invalid expressions."""
+        screen = compile_screen(expression)
+        universe = self.universe()
+
+        start = time.perf_counter()
+        rows = np.flatnonzero(screen.evaluate(universe.fields))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        matches = []
+        for row in rows[:limit]:
+            symbol = universe.symbols[row]
+            values = {}
+            for name in screen.fields:
+                value = universe.fields[name][row]
+                values[name] = bool(value) if FIELDS[name][0] == BOOL else (None if np.isnan(value) else float(value))
+            matches.append({'ticker': symbol.ticker, 'name': symbol.name, 'sector': symbol.sector, **values})
+
+        return {
+            'expression': screen.text,
+            'fields': screen.fields,
+            'universe': len(universe.symbols),
+            'count': len(rows),
+            'matches': matches,
+            'elapsed_ms': round(elapsed_ms, 3),
+        }
@@ -0,0 +1,103 @@
+"""
+Process-level cache of screening results with single-flight computation.
+
+Entries are keyed by the request parameters plus the screening rules version
+and the stored-data version (see data_version), so ingesting new candles or
+changing the rules produces a new key and the old entry simply ages out.
+
+When several requests miss on the same key at once, only the first computes;
+the others wait for its result instead of rerunning the screen. The ETag of
+an entry is derived from its key, so a client revalidating an unchanged
+screen can be answered with 304 without touching the cached payload.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ScreeningCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # requests that waited on another request's computation
+
+    @staticmethod
+    def etag(key: Tuple) -> str:
+        return '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def __contains__(self, key: Tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Dict[str, Any]],
+                       cacheable: Callable[[Dict[str, Any]], bool] = None) -> Tuple[Dict[str, Any], str]:
+        """
+        Returns (payload, source) where source is 'hit', 'computed' or 'shared'.
+
+        Results rejected by `cacheable` (e.g. partial screens) are handed to
+        the requests waiting on this computation but not stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, "hit"
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result(), "shared"
+
+        try:
+            payload = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable is None or cacheable(payload):
+                self._entries[key] = payload
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(payload)
+        return payload, "computed"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "entries": len(self._entries)}
+
+
+# Shared by the API workers of this process
+screening_cache = ScreeningCache(Config.SCREENER_CACHE_ENTRIES)
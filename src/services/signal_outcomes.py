@@ -0,0 +1,233 @@
+"""
+Outcome tracking for stored trade signals.
+
+Each LONG/SHORT TradeSignal is anchored to the last daily candle at or before
+the time it was generated. Returns are measured from the signal's own
+entry_price (the price when it was alerted, which for an intraday signal is
+not that day's final close); signals stored without one fall back to the
+anchor candle's close. The candles after the anchor give direction-adjusted
+1/5/10/20-day forward returns, the maximum adverse / favourable excursion and
+whether the signal's stop loss or target (the bot's 5%/10% quick-trade levels
+when the signal has none) would have been touched within 20 bars.
+
+All pending signals are processed together on flat arrays: one searchsorted
+locates every anchor bar, each horizon is a single gather, and the 20-bar
+excursion window is one (signals x 20) array. Updates are incremental: only
+signals whose outcome is not complete are loaded, and rows are written only
+when new bars have arrived since the last run.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from src.models.models import SignalOutcome, Symbol, TradeSignal
+from src.services.backtest import ExitRule
+from src.services.indicators import IndicatorService
+from src.services.optimizer import FORWARD_HORIZONS
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    """UTC epoch seconds for timestamps (naive values are taken as UTC)."""
+    return pd.to_datetime(pd.Series(values), utc=True).dt.as_unit('s').astype('int64').to_numpy()
+
+
+class SignalOutcomeService:
+    TRACKED_BARS = max(FORWARD_HORIZONS)
+    GROUP_BY = ('confidence', 'direction', 'symbol')
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.indicator_service = IndicatorService(db)
+        self.default_exit = ExitRule.defaults()[0]  # 5% SL / 10% target
+
+    def _pending(self):
+        """LONG/SHORT signals without a completed outcome, with their outcome row if any."""
+        return (
+            self.db.query(TradeSignal, SignalOutcome)
+            .outerjoin(SignalOutcome, SignalOutcome.signal_id == TradeSignal.id)
+            .filter(TradeSignal.direction.in_(("LONG", "SHORT")))
+            .filter(or_(SignalOutcome.id.is_(None), SignalOutcome.completed.is_(False)))
+            .order_by(TradeSignal.id)
+            .all()
+        )
+
+    def update(self) -> int:
+        """Computes outcomes for pending signals; returns the number of rows written."""
+        pending = self._pending()
+        if not pending:
+            return 0
+
+        signals = [signal for signal, _ in pending]
+        generated = _epoch_seconds([s.generated_at for s in signals])
+        earliest = datetime.fromtimestamp(int(generated.min()), tz=timezone.utc)
+        lookback_days = (datetime.now(timezone.utc) - earliest).days + 10
+        frames = self.indicator_service.load_data_many({s.symbol_id for s in signals}, lookback_days=lookback_days)
+        frames = {symbol_id: df for symbol_id, df in frames.items() if not df.empty}
+        if not frames:
+            return 0
+
+        # Flat arrays over all symbols; a (row, time) key keeps them globally sorted
+        symbol_ids = list(frames)
+        lengths = np.array([len(frames[s]) for s in symbol_ids])
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        times = np.concatenate([_epoch_seconds(frames[s].index) for s in symbol_ids])
+        high, low, close = (
+            np.concatenate([frames[s][name].to_numpy(dtype=np.float64) for s in symbol_ids])
+            for name in ('high', 'low', 'close')
+        )
+        key_scale = np.int64(10 ** 11)
+        bar_rows = np.repeat(np.arange(len(symbol_ids)), lengths)
+        keys = bar_rows * key_scale + times
+
+        row_of = {symbol_id: row for row, symbol_id in enumerate(symbol_ids)}
+        rows = np.array([row_of.get(s.symbol_id, -1) for s in signals])
+        known = rows >= 0
+        rows = np.where(known, rows, 0)
+        entry = np.searchsorted(keys, rows * key_scale + generated, side='right') - 1
+        known &= entry >= offsets[rows]
+        entry = np.where(known, entry, 0)
+        bars_after = np.where(known, offsets[rows + 1] - 1 - entry, 0)
+
+        side = np.array([1 if s.direction == "LONG" else -1 for s in signals])
+        # The alert-time price when stored, else the anchor candle's close
+        stored_entry = np.array([s.entry_price if s.entry_price else np.nan for s in signals], dtype=np.float64)
+        entry_price = np.where(np.isnan(stored_entry), close[entry], stored_entry)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = {}
+            for horizon in FORWARD_HORIZONS:
+                index = np.minimum(entry + horizon, len(close) - 1)
+                matured = known & (bars_after >= horizon)
+                returns[horizon] = np.where(matured, side * (close[index] / entry_price - 1) * 100, np.nan)
+
+            steps = np.arange(1, self.TRACKED_BARS + 1)
+            inside = known[:, None] & (steps[None, :] <= bars_after[:, None])
+            cols = np.minimum(entry[:, None] + steps[None, :], len(close) - 1)
+            window_high = np.where(inside, high[cols], np.nan)
+            window_low = np.where(inside, low[cols], np.nan)
+
+            stop = np.array([
+                s.stop_loss if s.stop_loss else p * (1 - d * self.default_exit.stop_pct / 100)
+                for s, p, d in zip(signals, entry_price, side)
+            ])
+            target = np.array([
+                s.target_1 if s.target_1 else p * (1 + d * self.default_exit.target_pct / 100)
+                for s, p, d in zip(signals, entry_price, side)
+            ])
+            is_long = (side > 0)[:, None]
+            stop_touch = np.where(is_long, window_low <= stop[:, None], window_high >= stop[:, None])
+            target_touch = np.where(is_long, window_high >= target[:, None], window_low <= target[:, None])
+
+            # Excursions in percent, signed so that favourable moves are positive
+            favourable = side[:, None] * (np.where(is_long, window_high, window_low) / entry_price[:, None] - 1) * 100
+            adverse = side[:, None] * (np.where(is_long, window_low, window_high) / entry_price[:, None] - 1) * 100
+            any_bar = inside.any(axis=1)
+            mfe = np.where(any_bar, np.where(inside, favourable, -np.inf).max(axis=1), np.nan)
+            mae = np.where(any_bar, np.where(inside, adverse, np.inf).min(axis=1), np.nan)
+
+        sl_hit = stop_touch.any(axis=1)
+        target_hit = target_touch.any(axis=1)
+        first_stop = np.where(sl_hit, stop_touch.argmax(axis=1), self.TRACKED_BARS)
+        first_target = np.where(target_hit, target_touch.argmax(axis=1), self.TRACKED_BARS)
+        tracked = np.minimum(bars_after, self.TRACKED_BARS)
+
+        written = 0
+        for k, (signal, outcome) in enumerate(pending):
+            if not known[k]:
+                continue
+            if outcome is not None and outcome.bars_tracked == int(tracked[k]):
+                continue  # nothing new since the last run
+            if outcome is None:
+                outcome = SignalOutcome(signal_id=signal.id, symbol_id=signal.symbol_id)
+                self.db.add(outcome)
+
+            outcome.direction = signal.direction
+            outcome.entry_time = frames[symbol_ids[rows[k]]].index[entry[k] - offsets[rows[k]]]
+            outcome.entry_price = float(entry_price[k])
+            outcome.stop_loss = float(stop[k])
+            outcome.target = float(target[k])
+            for horizon in FORWARD_HORIZONS:
+                value = returns[horizon][k]
+                setattr(outcome, f'return_{horizon}d', None if np.isnan(value) else float(value))
+            outcome.mae_pct = None if np.isnan(mae[k]) else float(mae[k])
+            outcome.mfe_pct = None if np.isnan(mfe[k]) else float(mfe[k])
+            outcome.sl_hit = bool(sl_hit[k])
+            outcome.target_hit = bool(target_hit[k])
+            if sl_hit[k] and first_stop[k] <= first_target[k]:
+                outcome.first_hit = "STOPLOSS"  # a bar touching both counts as a stop
+            elif target_hit[k]:
+                outcome.first_hit = "TARGET"
+            else:
+                outcome.first_hit = None
+            outcome.bars_tracked = int(tracked[k])
+            outcome.completed = bool(bars_after[k] >= self.TRACKED_BARS)
+            written += 1
+
+        self.db.commit()
+        logger.info(f"Signal outcomes: {len(pending)} pending, {written} updated")
+        return written
+
+    def performance(self, group_by: str = 'confidence', days: Optional[int] = None) -> Dict[str, Any]:
+        """Aggregated outcome statistics, overall and per group."""
+        if group_by not in self.GROUP_BY:
+            raise ValueError(f"group_by must be one of {self.GROUP_BY}")
+
+        query = (
+            self.db.query(SignalOutcome, TradeSignal.confidence, Symbol.ticker)
+            .join(TradeSignal, SignalOutcome.signal_id == TradeSignal.id)
+            .join(Symbol, SignalOutcome.symbol_id == Symbol.id)
+        )
+        if days is not None:
+            since = datetime.now(timezone.utc) - pd.Timedelta(days=days)
+            query = query.filter(TradeSignal.generated_at >= since)
+
+        records = []
+        for outcome, confidence, ticker in query.all():
+            record = {
+                'confidence': confidence, 'direction': outcome.direction, 'symbol': ticker,
+                'mae_pct': outcome.mae_pct, 'mfe_pct': outcome.mfe_pct,
+                'sl_hit': outcome.sl_hit, 'target_hit': outcome.target_hit,
+            }
+            for horizon in FORWARD_HORIZONS:
+                record[f'return_{horizon}d'] = getattr(outcome, f'return_{horizon}d')
+            records.append(record)
+
+        df = pd.DataFrame(records)
+        groups: List[Dict[str, Any]] = []
+        if not df.empty:
+            for value, group in df.groupby(group_by, dropna=False):
+                groups.append({group_by: value, **self._summarize(group)})
+            groups.sort(key=lambda g: g['signals'], reverse=True)
+        return {
+            "group_by": group_by,
+            "days": days,
+            "overall": self._summarize(df),
+            "groups": groups,
+        }
+
+    @staticmethod
+    def _summarize(df: pd.DataFrame) -> Dict[str, Any]:
+        def number(value):
+            return None if value is None or pd.isna(value) else round(float(value), 3)
+
+        if df.empty:
+            return {"signals": 0}
+        summary = {
+            "signals": int(len(df)),
+            "sl_hit_rate": number(df['sl_hit'].astype(float).mean() * 100),
+            "target_hit_rate": number(df['target_hit'].astype(float).mean() * 100),
+            "avg_mae_pct": number(df['mae_pct'].astype(float).mean()),
+            "avg_mfe_pct": number(df['mfe_pct'].astype(float).mean()),
+        }
+        for horizon in FORWARD_HORIZONS:
+            returns = df[f'return_{horizon}d'].dropna().astype(float)
+            summary[f"matured_{horizon}d"] = int(len(returns))
+            summary[f"avg_return_{horizon}d"] = number(returns.mean()) if len(returns) else None
+            summary[f"win_rate_{horizon}d"] = number((returns > 0).mean() * 100) if len(returns) else None
+        return summary
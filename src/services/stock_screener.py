@@ -1,25 +1,136 @@
 """
 Indian Large-Cap Stock Screener
 Implements screening logic based on RSI oversold + Heikin Ashi reversal strategy
+
+Three entry points share the same rules:
+
+- screen_frames: indicator frames already computed by the caller (run_scan)
+- screen_large_cap_stocks: loads and computes each symbol itself
+- iter_screen / screen_parallel: symbols in chunks, each chunk evaluated as one
+  NumPy panel (in a process pool when SCREENER_WORKERS allows), results
+  streamed per chunk and cut off at a deadline
+
+The last two first push the core conditions (RSI band, green HA candle) down
+to SQL on the symbol_states table (SCREENER_SQL_PREFILTER), so only symbols
+that can qualify have their history loaded.
 """
 
 import logging
-from typing import List, Dict, Any
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from typing import List, Dict, Any, Iterator, Optional
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
-from src.models.models import Symbol, TradeSignal
-from src.services.market_data import MarketDataService
+from src.config.settings import Config
+from src.models.models import Symbol, SymbolState, TradeSignal
 from src.services.indicators import IndicatorService
+from src.services.process_pool import SharedProcessPool
+from src.services.symbol_state import SymbolStateService
+from src.services import candle_patterns, indicator_kernels
 
 logger = logging.getLogger(__name__)
 
+# Core conditions: RSI band and minimum history (SMA200)
+RSI_MIN, RSI_MAX = 20, 35
+MIN_HISTORY = 200
+# Patterns that meet the bullish-pattern condition (the screener's original two)
+BULLISH_PATTERNS = ('hammer', 'bullish_engulfing')
+
+
+def _macd_bullish(close: pd.DataFrame) -> np.ndarray:
+    """MACD rule for each column of a (time x symbols) close frame"""
+    ema12 = close.ewm(span=12).mean()
+    ema26 = close.ewm(span=26).mean()
+    macd_line = ema12 - ema26
+    signal_line = macd_line.ewm(span=9).mean()
+    macd, signal = macd_line.to_numpy(), signal_line.to_numpy()
+
+    # MACD crossed above signal OR both above zero
+    bullish_cross = (macd[-1] > signal[-1]) & (macd[-2] <= signal[-2])
+    both_positive = (macd[-1] > 0) & (signal[-1] > 0)
+    return bullish_cross | both_positive
+
+
+def screen_panel(panel: Dict[str, np.ndarray], lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Latest-bar screening values for every row of a left-padded OHLCV panel.
+
+    'core' marks rows passing the core conditions; MACD is only evaluated
+    for those rows (False elsewhere).
+    """
+    o, h, l, c, v = (panel[name] for name in ('open', 'high', 'low', 'close', 'volume'))
+    indicators = indicator_kernels.compute(o, h, l, c, v, engine=Config.INDICATOR_ENGINE)
+
+    rsi = indicators['RSI'][:, -1]
+    ha_green = indicators['HA_Close'][:, -1] > indicators['HA_Open'][:, -1]
+    core = (np.asarray(lengths) >= MIN_HISTORY) & (rsi >= RSI_MIN) & (rsi <= RSI_MAX) & ha_green
+
+    macd = np.zeros(len(c), dtype=bool)
+    rows = np.flatnonzero(core)
+    if len(rows):
+        macd[rows] = _macd_bullish(pd.DataFrame(c[rows].T))
+
+    return {
+        'core': core,
+        'rsi': rsi,
+        'ha_green': ha_green,
+        'close': c[:, -1],
+        'sma200': indicators['SMA_200'][:, -1],
+        'volume': v[:, -1],
+        'vol_avg_20': v[:, -20:].mean(axis=1),
+        'macd_bullish': macd,
+        'patterns': candle_patterns.compute(o[:, -3:], h[:, -3:], l[:, -3:], c[:, -3:])[:, -1],
+    }
+
+
+# Process pool reused across screening requests (created on first use)
+_pool = SharedProcessPool("screener")
+
 
 class StockScreener:
+    # Bump when the screening rules or the result fields change (cached results are keyed on it)
+    RULES_VERSION = "1"
+
     def __init__(self, db: Session):
+        # Imported here: spawned screening workers import this module for screen_panel only
+        from src.services.market_data import MarketDataService
+
         self.db = db
         self.market_data_service = MarketDataService(db)
         self.indicator_service = IndicatorService(db)
+        self.state_service = SymbolStateService(db)
     
+    def large_cap_symbols(self, min_market_cap_cr: float = 100000) -> List[Symbol]:
+        """Active symbols with market cap above the threshold (in crores)"""
+        return self.db.query(Symbol).filter(
+            Symbol.is_active.is_(True),
+            Symbol.market_cap_cr >= min_market_cap_cr
+        ).order_by(Symbol.id).all()
+
+    def candidate_symbols(self, min_market_cap_cr: float = 100000) -> List[Symbol]:
+        """
+        Large caps whose latest session passes the core conditions, selected
+        in SQL from symbol_states (stale or missing states are refreshed first)
+        """
+        if not Config.SCREENER_SQL_PREFILTER:
+            return self.large_cap_symbols(min_market_cap_cr)
+
+        large_cap_ids = [symbol.id for symbol in self.large_cap_symbols(min_market_cap_cr)]
+        self.state_service.refresh(self.state_service.stale_ids(large_cap_ids))
+
+        candidates = self.db.query(Symbol).join(SymbolState, SymbolState.symbol_id == Symbol.id).filter(
+            Symbol.is_active.is_(True),
+            Symbol.market_cap_cr >= min_market_cap_cr,
+            SymbolState.ha_green.is_(True),
+            SymbolState.rsi.between(RSI_MIN, RSI_MAX),
+            SymbolState.history_bars >= MIN_HISTORY
+        ).order_by(Symbol.id).all()
+        logger.info(f"SQL pre-filter: {len(candidates)}/{len(large_cap_ids)} large caps pass RSI {RSI_MIN}-{RSI_MAX} + green HA")
+        return candidates
+
     def screen_large_cap_stocks(self, min_market_cap_cr: float = 100000) -> List[Dict[str, Any]]:
         """
         Screen Indian large-cap stocks based on Claude prompt criteria
@@ -34,80 +145,66 @@ class StockScreener:
         5. Volume above 20-day average
         6. Bullish candlestick pattern
         """
-        qualifying_stocks = []
-        
-        # Get large-cap symbols (market cap > specified threshold)
-        symbols = self.db.query(Symbol).filter(
-            Symbol.is_active.is_(True),
-            Symbol.market_cap_cr >= min_market_cap_cr
-        ).all()
+        # Get large-cap symbols (market cap > specified threshold) passing the core conditions
+        symbols = self.candidate_symbols(min_market_cap_cr)
         
         logger.info(f"Screening {len(symbols)} large-cap stocks (market cap > ₹{min_market_cap_cr:,.0f} Cr)")
         
+        # Load history for all candidates with one query instead of one per symbol
+        frames = self.indicator_service.load_data_many([symbol.id for symbol in symbols])
+
+        indicator_frames = {}
         for symbol in symbols:
+            df = frames.get(symbol.id)
+            if df is None or len(df) < MIN_HISTORY:  # Need 200 days for SMA200
+                continue
             try:
-                # Load data with indicators
-                df = self.indicator_service.load_data(symbol.ticker)
-                if df.empty or len(df) < 200:  # Need 200 days for SMA200
+                indicator_frames[symbol.id] = self.indicator_service.calculate_indicators_cached(symbol.id, df)
+            except Exception as e:
+                logger.error(f"Error screening {symbol.ticker}: {e}")
+
+        return self.screen_frames(symbols, indicator_frames)
+
+    def screen_frames(self, symbols: List[Symbol], indicator_frames: Dict[int, pd.DataFrame]) -> List[Dict[str, Any]]:
+        """
+        Applies the screening rules to indicator frames computed elsewhere
+        (run_scan passes the frames it already built for scoring).
+
+        Symbols without a frame of at least 200 rows are skipped.
+        """
+        qualifying_stocks = []
+
+        for symbol in symbols:
+            try:
+                df = indicator_frames.get(symbol.id)
+                if df is None or len(df) < MIN_HISTORY:  # Need 200 days for SMA200
                     continue
                 
-                df = self.indicator_service.calculate_indicators(df)
                 latest = df.iloc[-1]
                 
                 # Core Condition 1: RSI between 20-35
                 rsi = latest['RSI']
-                if not (20 <= rsi <= 35):
+                if not (RSI_MIN <= rsi <= RSI_MAX):
                     continue
                 
                 # Core Condition 2: Green Heikin-Ashi candle
                 ha_bullish = latest['HA_Close'] > latest['HA_Open']
                 if not ha_bullish:
                     continue
-                
-                # Additional Filter 1: Price above 200-day SMA
-                sma200 = df['close'].rolling(200).mean().iloc[-1]
-                price_above_sma200 = latest['close'] > sma200
-                
-                # Additional Filter 2: MACD bullish momentum
-                macd_bullish = self._check_macd_bullish(df)
-                
-                # Additional Filter 3: Volume above 20-day average
-                vol_avg_20 = df['volume'].rolling(20).mean().iloc[-1]
-                high_volume = latest['volume'] > vol_avg_20
-                
-                # Additional Filter 4: Bullish candlestick pattern
-                bullish_pattern = self._check_bullish_pattern(df)
-                
-                # Calculate score based on conditions met
-                conditions_met = {
-                    'rsi_oversold': True,  # Already filtered
-                    'ha_green': True,      # Already filtered
-                    'above_sma200': price_above_sma200,
-                    'macd_bullish': macd_bullish,
-                    'high_volume': high_volume,
-                    'bullish_pattern': bullish_pattern
-                }
-                
-                # Only include stocks that meet core conditions
-                score = sum(conditions_met.values()) * 100 // len(conditions_met)
-                
-                stock_data = {
-                    'ticker': symbol.ticker,
-                    'name': symbol.name,
-                    'sector': symbol.sector,
-                    'market_cap_cr': symbol.market_cap_cr,
-                    'price': latest['close'],
+
+                values = {
                     'rsi': rsi,
-                    'score': score,
-                    'conditions_met': conditions_met,
-                    'sma200': sma200,
-                    'volume_ratio': latest['volume'] / vol_avg_20,
-                    'ha_color': 'Green' if ha_bullish else 'Red',
-                    'analysis_date': latest.name.strftime('%Y-%m-%d')
+                    'close': latest['close'],
+                    'sma200': latest['SMA_200'],  # already in the indicator frame
+                    'volume': latest['volume'],
+                    'vol_avg_20': df['volume'].iloc[-20:].mean(),
+                    'macd_bullish': self._check_macd_bullish(df),
+                    'patterns': latest['Patterns'] if 'Patterns' in df else None,
+                    'bullish_pattern': self._check_bullish_pattern(df),
                 }
-                
+                stock_data = self._stock_data(symbol, values, latest.name)
                 qualifying_stocks.append(stock_data)
-                logger.info(f"✅ {symbol.ticker}: RSI={rsi:.1f}, Score={score}")
+                logger.info(f"✅ {symbol.ticker}: RSI={rsi:.1f}, Score={stock_data['score']}")
                 
             except Exception as e:
                 logger.error(f"Error screening {symbol.ticker}: {e}")
@@ -118,52 +215,149 @@ class StockScreener:
         
         logger.info(f"Found {len(qualifying_stocks)} qualifying large-cap stocks")
         return qualifying_stocks
+
+    def _stock_data(self, symbol: Symbol, values: Dict[str, Any], analysis_date) -> Dict[str, Any]:
+        """Result entry for a symbol that passed the core conditions"""
+        sma200, vol_avg_20 = float(values['sma200']), float(values['vol_avg_20'])
+        conditions_met = {
+            'rsi_oversold': True,  # Already filtered
+            'ha_green': True,      # Already filtered
+            'above_sma200': bool(values['close'] > sma200),
+            'macd_bullish': bool(values['macd_bullish']),
+            'high_volume': bool(values['volume'] > vol_avg_20),
+            'bullish_pattern': bool(values['bullish_pattern'])
+        }
+        
+        # Only include stocks that meet core conditions
+        score = sum(conditions_met.values()) * 100 // len(conditions_met)
+
+        return {
+            'ticker': symbol.ticker,
+            'name': symbol.name,
+            'sector': symbol.sector,
+            'market_cap_cr': symbol.market_cap_cr,
+            'price': float(values['close']),
+            'rsi': float(values['rsi']),
+            'score': score,
+            'conditions_met': conditions_met,
+            'sma200': sma200,
+            'volume_ratio': float(values['volume'] / vol_avg_20),
+            'ha_color': 'Green',
+            'patterns': candle_patterns.names_of(values['patterns']) if values['patterns'] is not None else [],
+            'analysis_date': analysis_date.strftime('%Y-%m-%d')
+        }
+
+    def iter_screen(self, min_market_cap_cr: float = 100000, workers: int = None, chunk_size: int = None,
+                    deadline_seconds: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Screens large caps chunk by chunk, yielding results as chunks finish.
+
+        Yields {"type": "chunk", "stocks": [...], "screened": n, "total": N}
+        per completed chunk and finally {"type": "summary", ...} with
+        'complete' False if the deadline cut the run short. Chunks are loaded
+        with one query each and evaluated as a panel by screen_panel, in the
+        shared process pool when more than one worker is configured.
+        """
+        workers = Config.SCREENER_WORKERS if workers is None else workers
+        workers = workers or os.cpu_count() or 1
+        chunk_size = chunk_size or Config.SCREENER_CHUNK_SIZE
+        deadline_seconds = Config.SCREENER_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        start = time.monotonic()
+
+        def remaining() -> Optional[float]:
+            if not deadline_seconds or deadline_seconds <= 0:
+                return None
+            return deadline_seconds - (time.monotonic() - start)
+
+        symbols = self.candidate_symbols(min_market_cap_cr)
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+        logger.info(f"Screening {len(symbols)} large-cap stocks in {len(chunks)} chunks on {workers} workers")
+        screened = 0
+        pending = {}
+
+        def finish(chunk, values) -> Dict[str, Any]:
+            nonlocal screened
+            screened += chunk[2]
+            stocks = self._chunk_results(chunk, values) if values is not None else []
+            return {"type": "chunk", "stocks": stocks, "screened": screened, "total": len(symbols)}
+
+        # A borrowed pool outlives a concurrent request switching the worker count
+        borrowed = _pool.borrow(workers) if workers > 1 and len(chunks) > 1 else nullcontext()
+        with borrowed as pool:
+            for chunk_symbols in chunks:
+                left = remaining()
+                if left is not None and left <= 0:
+                    break
+                frames = self.indicator_service.load_data_many([symbol.id for symbol in chunk_symbols])
+                usable = [symbol for symbol in chunk_symbols if len(frames.get(symbol.id, ())) >= MIN_HISTORY]
+                if not usable:  # Need 200 days for SMA200
+                    yield finish(([], [], len(chunk_symbols)), None)
+                    continue
+                frames = {symbol.id: frames[symbol.id] for symbol in usable}
+                _, panel, lengths = indicator_kernels.stack_panel(frames)
+                chunk = (usable, [frames[symbol.id].index[-1] for symbol in usable], len(chunk_symbols))
+
+                if pool is None:
+                    yield finish(chunk, screen_panel(panel, lengths))
+                    continue
+                pending[pool.submit(screen_panel, panel, lengths)] = chunk
+                for future in [f for f in pending if f.done()]:
+                    yield finish(pending.pop(future), future.result())
+
+            while pending:
+                done, _ = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    break  # deadline
+                for future in done:
+                    yield finish(pending.pop(future), future.result())
+            for future in pending:
+                future.cancel()
+
+        elapsed = time.monotonic() - start
+        complete = screened == len(symbols)
+        if not complete:
+            logger.warning(f"Screening deadline of {deadline_seconds}s reached after {screened}/{len(symbols)} symbols")
+        yield {"type": "summary", "screened": screened, "total": len(symbols), "complete": complete,
+               "elapsed_seconds": round(elapsed, 3)}
+
+    def _chunk_results(self, chunk, values: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        symbols, dates, _ = chunk
+        results = []
+        for row in np.flatnonzero(values['core']):
+            row_values = {name: column[row] for name, column in values.items()}
+            row_values['bullish_pattern'] = candle_patterns.has_any(row_values['patterns'], BULLISH_PATTERNS)
+            results.append(self._stock_data(symbols[row], row_values, dates[row]))
+        return results
+
+    def screen_parallel(self, min_market_cap_cr: float = 100000, **options) -> Dict[str, Any]:
+        """Runs iter_screen to completion (or its deadline) and returns all results, best first."""
+        stocks, summary = [], {}
+        for event in self.iter_screen(min_market_cap_cr, **options):
+            if event["type"] == "chunk":
+                stocks.extend(event["stocks"])
+            else:
+                summary = event
+        stocks.sort(key=lambda x: x['score'], reverse=True)
+        logger.info(f"Found {len(stocks)} qualifying large-cap stocks ({summary['screened']}/{summary['total']} screened)")
+        return {"stocks": stocks, **{k: v for k, v in summary.items() if k != "type"}}
     
     def _check_macd_bullish(self, df: pd.DataFrame) -> bool:
         """Check if MACD shows bullish momentum"""
         if len(df) < 26:  # Need enough data for MACD
             return False
-        
-        # Calculate MACD
-        ema12 = df['close'].ewm(span=12).mean()
-        ema26 = df['close'].ewm(span=26).mean()
-        macd_line = ema12 - ema26
-        signal_line = macd_line.ewm(span=9).mean()
-        
-        latest_macd = macd_line.iloc[-1]
-        latest_signal = signal_line.iloc[-1]
-        prev_macd = macd_line.iloc[-2]
-        prev_signal = signal_line.iloc[-2]
-        
-        # MACD crossed above signal OR both above zero
-        bullish_cross = (latest_macd > latest_signal) and (prev_macd <= prev_signal)
-        both_positive = (latest_macd > 0) and (latest_signal > 0)
-        
-        return bullish_cross or both_positive
+        return bool(_macd_bullish(df[['close']])[0])
     
     def _check_bullish_pattern(self, df: pd.DataFrame) -> bool:
-        """Check for bullish candlestick patterns"""
+        """Check for bullish candlestick patterns on the latest candle"""
         if len(df) < 2:
             return False
-        
-        latest = df.iloc[-1]
-        prev = df.iloc[-2]
-        
-        # Hammer pattern
-        body = abs(latest['close'] - latest['open'])
-        lower_shadow = latest['open'] - latest['low'] if latest['close'] > latest['open'] else latest['close'] - latest['low']
-        upper_shadow = latest['high'] - max(latest['open'], latest['close'])
-        
-        hammer = (lower_shadow > 2 * body) and (upper_shadow < body)
-        
-        # Bullish engulfing
-        prev_bearish = prev['close'] < prev['open']
-        curr_bullish = latest['close'] > latest['open']
-        engulfing = (prev_bearish and curr_bullish and 
-                    latest['close'] > prev['open'] and 
-                    latest['open'] < prev['close'])
-        
-        return hammer or engulfing
+
+        if 'Patterns' in df:
+            bits = df['Patterns'].iloc[-1]
+        else:
+            tail = df.iloc[-3:]
+            bits = candle_patterns.compute(tail['open'], tail['high'], tail['low'], tail['close'])[-1]
+        return bool(candle_patterns.has_any(bits, BULLISH_PATTERNS))
     
     def format_screening_results(self, results: List[Dict[str, Any]]) -> str:
         """Format screening results for display"""
@@ -189,7 +383,8 @@ class StockScreener:
             if conditions['high_volume']:
                 met_conditions.append(f"Volume: {stock['volume_ratio']:.1f}x avg")
             if conditions['bullish_pattern']:
-                met_conditions.append("Bullish Pattern")
+                bullish = [name for name in stock.get('patterns', []) if name in BULLISH_PATTERNS]
+                met_conditions.append(f"Pattern: {', '.join(bullish).replace('_', ' ').title()}" if bullish else "Bullish Pattern")
             
             msg += (
                 f"{i}. <b>{stock['ticker']}</b> - {stock['name']}\n"
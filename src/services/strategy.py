@@ -0,0 +1,119 @@
+"""
+Scoring strategies compiled from config profiles.
+
+A Strategy freezes one parameter set (the RSI / Heikin Ashi / SMA200 / volume
+settings that ScoringService used to read from Config on every call) and
+derives its rule plan once: which filters are active, how many trailing
+candles the latest-row rules need, and which volume-average window to
+precompute. Several strategies can then be scored together over the same
+indicator arrays (see ScoringService.score_strategies).
+
+Profiles come from the environment. The default profile is the plain Config
+values; extra profiles are listed in STRATEGY_PROFILES and override any
+parameter with STRATEGY_<PROFILE>_<PARAMETER>, e.g.
+
+    STRATEGY_PROFILES=aggressive
+    STRATEGY_AGGRESSIVE_RSI_OVERSOLD_THRESHOLD=35
+    STRATEGY_AGGRESSIVE_HA_CONSECUTIVE_CANDLES=NA
+"""
+
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, Mapping, Optional
+from src.config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+
+class Strategy:
+    DEFAULT_NAME = "default"
+
+    # Config attribute -> parse function ('NA' disables the filter)
+    PARAMETERS = {
+        'RSI_OVERSOLD_THRESHOLD': float,
+        'RSI_OVERBOUGHT_THRESHOLD': float,
+        'RSI_RISING_CANDLES': int,
+        'RSI_FALLING_CANDLES': int,
+        'HA_CONSECUTIVE_CANDLES': int,
+        'MAX_DISTANCE_BELOW_SMA200_PERCENT': float,
+        'VOLUME_MULTIPLIER': float,
+        'VOLUME_AVERAGE_PERIOD': int,
+        'PRIMARY_WINDOW_CANDLES': int,
+        'CONFIRMATION_WINDOW_CANDLES': int,
+    }
+
+    def __init__(self, name: str = DEFAULT_NAME, **params):
+        unknown = set(params) - {key.lower() for key in self.PARAMETERS}
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+
+        self.name = name
+        for key, cast in self.PARAMETERS.items():
+            value = params.get(key.lower(), getattr(Config, key))
+            setattr(self, key.lower(), None if value is None else cast(value))
+        self._compile()
+
+    def _compile(self):
+        """Derives the rule plan from the parameters (done once per strategy)."""
+        # Active filters
+        self.long_rsi_filter = self.rsi_oversold_threshold is not None
+        self.short_rsi_filter = self.rsi_overbought_threshold is not None
+        self.trend_damage_filter = self.max_distance_below_sma200_percent is not None
+        self.ha_filter = self.ha_consecutive_candles is not None
+        self.volume_filter = self.volume_multiplier is not None
+        self.volume_average = self.volume_filter and self.volume_average_period is not None
+        self.dual_window = self.primary_window_candles is not None and self.confirmation_window_candles is not None
+
+        # Feature key of the previous-window volume mean this strategy reads
+        self.volume_average_key = f"vol_avg_{self.volume_average_period}" if self.volume_average else None
+
+        # Trailing candles needed to evaluate the latest row
+        windows = [self.rsi_rising_candles, self.ha_consecutive_candles]
+        tail = max([w for w in windows if w is not None] or [0]) + 2
+        if self.volume_average_period is not None:
+            tail = max(tail, self.volume_average_period + 1)
+        self.tail_length = tail
+
+        self.version = hashlib.sha1(repr(sorted(self.params().items())).encode()).hexdigest()[:12]
+
+    def params(self) -> Dict[str, Any]:
+        """Parameter values keyed by Config attribute name."""
+        return {key: getattr(self, key.lower()) for key in self.PARAMETERS}
+
+    @classmethod
+    def _parse(cls, key: str, value: str):
+        if value.strip().upper() == "NA":
+            return None
+        return cls.PARAMETERS[key](value)
+
+    @classmethod
+    def from_config(cls) -> "Strategy":
+        """The default profile: current Config values."""
+        return cls(cls.DEFAULT_NAME)
+
+    @classmethod
+    def from_profile(cls, name: str, environ: Mapping[str, str] = None) -> "Strategy":
+        """Config values overridden by STRATEGY_<NAME>_<PARAMETER> variables."""
+        environ = os.environ if environ is None else environ
+        prefix = f"STRATEGY_{name.upper()}_"
+        params = {}
+        for key in cls.PARAMETERS:
+            value = environ.get(prefix + key)
+            if value is not None:
+                params[key.lower()] = cls._parse(key, value)
+        return cls(name, **params)
+
+    @classmethod
+    def load_profiles(cls, names: Optional[List[str]] = None, environ: Mapping[str, str] = None) -> List["Strategy"]:
+        """The default strategy followed by each configured profile (duplicates dropped)."""
+        names = Config.STRATEGY_PROFILES if names is None else names
+        strategies = [cls.from_config()]
+        for name in names:
+            if name and name != cls.DEFAULT_NAME and name not in {s.name for s in strategies}:
+                strategies.append(cls.from_profile(name, environ))
+        return strategies
+
+    def __repr__(self):
+        active = ", ".join(f"{k.lower()}={v}" for k, v in self.params().items() if v is not None)
+        return f"Strategy({self.name!r}, {active})"
@@ -1,10 +1,10 @@
 import pandas as pd
-import yfinance as yf
 import requests
 import io
 import logging
 from sqlalchemy.orm import Session
 from src.models.models import Symbol
+from src.services.quote_summary import QuoteSummaryFetcher
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,7 @@ logger = logging.getLogger(__name__)
 class SymbolService:
     def __init__(self, db: Session):
         self.db = db
+        self.quote_fetcher = QuoteSummaryFetcher()
         # URL for Nifty 500 list
         self.NIFTY_500_URL = "https://raw.githubusercontent.com/kprohith/nse-stock-analysis/master/ind_nifty500list.csv"
 
@@ -66,22 +67,15 @@ class SymbolService:
                     continue
 
                 try:
-                    t = yf.Ticker(ticker)
-                    # Use fast_info if available for speed, else info
-                    info = t.info
-                    mcap = info.get('marketCap', 0)
-
-                    if mcap is None:
-                        mcap = 0
-
-                    mcap_crore = mcap / 10_000_000
+                    profile = self.quote_fetcher.profile(ticker)
+                    mcap_crore = profile.market_cap_cr
 
                     # Skip market cap check if filter is disabled (NA)
                     if skip_mcap_filter or mcap_crore > min_mcap_crore:
                         # Get company info
-                        company_name = info.get('longName') or info.get('shortName', '')
-                        sector = info.get('sector', '')
-                        industry = info.get('industry', '')
+                        company_name = profile.name
+                        sector = profile.sector
+                        industry = profile.industry
 
                         # Add or Update
                         if not existing:
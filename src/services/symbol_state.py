@@ -0,0 +1,117 @@
+"""
+Latest-session indicator state per symbol.
+
+One symbol_states row per symbol holds the values of its most recent bar that
+the screener's core conditions read (RSI, Heikin Ashi colour, close vs SMA200,
+volume ratio). The scan's compute stage writes them per batch from the
+indicator frames it has just computed, so StockScreener can push its core
+conditions down as an indexed SQL filter and load full history only for the
+candidates.
+
+A state also keeps the OHLCV values of the bar it was computed from. It is
+stale when a newer bar exists or that bar has been rewritten in place since
+(data ingested outside a scan, or today's candle re-fetched during the
+session); stale_ids finds those with one query and refresh recomputes them
+from the same lookback window the screener uses.
+"""
+
+import logging
+from typing import Dict, Iterable, List
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.models import OHLCV, SymbolState
+from src.services.indicators import IndicatorService
+
+logger = logging.getLogger(__name__)
+
+# OHLCV values of the latest bar kept on the state
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _utc(value) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+
+class SymbolStateService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.indicator_service = IndicatorService(db)
+
+    def update(self, indicator_frames: Dict[int, pd.DataFrame]) -> int:
+        """Upserts the state of each symbol from the last row of its indicator frame."""
+        frames = {symbol_id: df for symbol_id, df in indicator_frames.items() if not df.empty}
+        if not frames:
+            return 0
+
+        existing = {
+            state.symbol_id: state
+            for state in self.db.query(SymbolState).filter(SymbolState.symbol_id.in_(list(frames))).all()
+        }
+        for symbol_id, df in frames.items():
+            state = existing.get(symbol_id)
+            if state is None:
+                state = SymbolState(symbol_id=symbol_id)
+                self.db.add(state)
+
+            latest = df.iloc[-1]
+            vol_avg_20 = float(df['volume'].iloc[-20:].mean())
+            state.as_of = _utc(df.index[-1]).to_pydatetime()
+            state.history_bars = len(df)
+            for name in BAR_COLUMNS:
+                setattr(state, name, float(latest[name]))
+            state.rsi = None if pd.isna(latest['RSI']) else float(latest['RSI'])
+            state.ha_green = bool(latest['HA_Close'] > latest['HA_Open'])
+            state.sma200 = None if pd.isna(latest['SMA_200']) else float(latest['SMA_200'])
+            state.above_sma200 = state.sma200 is not None and state.close > state.sma200
+            state.volume_ratio = float(latest['volume']) / vol_avg_20 if vol_avg_20 else None
+
+        self.db.commit()
+        return len(frames)
+
+    def stale_ids(self, symbol_ids: Iterable[int]) -> List[int]:
+        """Symbols whose latest stored bar is newer than, or differs from, their state's (or no state yet)."""
+        ids = list(symbol_ids)
+        if not ids:
+            return []
+        newest = (
+            self.db.query(OHLCV.symbol_id, func.max(OHLCV.timestamp).label('timestamp'))
+            .filter(OHLCV.symbol_id.in_(ids))
+            .group_by(OHLCV.symbol_id)
+            .subquery()
+        )
+        bar_columns = [getattr(OHLCV, name) for name in BAR_COLUMNS]
+        last_bar = {
+            row.symbol_id: row
+            for row in self.db.query(OHLCV.symbol_id, OHLCV.timestamp, *bar_columns)
+            .join(newest, (OHLCV.symbol_id == newest.c.symbol_id) & (OHLCV.timestamp == newest.c.timestamp))
+        }
+        states = {
+            row.symbol_id: row
+            for row in self.db.query(SymbolState.symbol_id, SymbolState.as_of,
+                                     *(getattr(SymbolState, name) for name in BAR_COLUMNS))
+            .filter(SymbolState.symbol_id.in_(ids))
+        }
+
+        def stale(symbol_id) -> bool:
+            bar, state = last_bar[symbol_id], states.get(symbol_id)
+            if state is None or _utc(state.as_of) < _utc(bar.timestamp):
+                return True
+            return any(getattr(state, name) != getattr(bar, name) for name in BAR_COLUMNS)
+
+        return [symbol_id for symbol_id in ids if symbol_id in last_bar and stale(symbol_id)]
+
+    def refresh(self, symbol_ids: Iterable[int]) -> int:
+        """Recomputes the state of the given symbols from stored OHLCV."""
+        ids = list(symbol_ids)
+        if not ids:
+            return 0
+        frames = self.indicator_service.load_data_many(ids)
+        indicator_frames = {
+            symbol_id: self.indicator_service.calculate_indicators_cached(symbol_id, df)
+            for symbol_id, df in frames.items()
+        }
+        updated = self.update(indicator_frames)
+        logger.info(f"Refreshed last-session state for {updated} symbols")
+        return updated
@@ -0,0 +1,173 @@
+"""
+Weekly and monthly bars derived from stored daily OHLCV.
+
+Higher timeframes are aggregated from the daily bars already in the database
+(no extra yfinance downloads). Periods follow the trading calendar: a week or
+month is whatever daily bars exist inside it, stamped with its last trading
+day, so the current period is a partial bar that updates as days are added.
+"""
+
+import logging
+from typing import Dict, Iterable
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from src.config.settings import Config
+from src.services import indicator_kernels
+from src.services.indicator_cache import indicator_cache
+from src.services.indicators import IndicatorService
+
+logger = logging.getLogger(__name__)
+
+# Periods are grouped on the trading date at the exchange (NSE daily bars are stamped at local midnight)
+EXCHANGE_TZ = 'Asia/Kolkata'
+
+
+class TimeframeService:
+    TIMEFRAMES = ('weekly', 'monthly')
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.indicator_service = IndicatorService(db)
+
+    @staticmethod
+    def _period_keys(index: pd.Index, timeframe: str) -> np.ndarray:
+        """Integer period id per daily bar (Monday-based weeks or calendar months)."""
+        if not isinstance(index, pd.DatetimeIndex):
+            # Compact frames: int64 epoch seconds (UTC)
+            index = pd.to_datetime(np.asarray(index, dtype=np.int64), unit='s', utc=True)
+        if index.tz is not None:
+            index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)  # exchange-local wall-clock time
+        days = index.values.astype('datetime64[D]')
+
+        if timeframe == 'weekly':
+            # 1970-01-01 was a Thursday; shift so weeks start on Monday
+            return (days.astype(np.int64) + 3) // 7
+        if timeframe == 'monthly':
+            return days.astype('datetime64[M]').astype(np.int64)
+        raise ValueError(f"Unknown timeframe '{timeframe}' (expected one of {TimeframeService.TIMEFRAMES})")
+
+    @classmethod
+    def _resample_arrays(cls, frames: Dict[int, pd.DataFrame], timeframe: str):
+        """
+        Aggregates daily bars for many symbols in one vectorized pass.
+
+        All bars are concatenated and reduced with ufunc.reduceat over the
+        (symbol, period) boundaries: open=first, high=max, low=min,
+        close=last, volume=sum. Returns (symbol_ids, bounds, bars, bar_index)
+        where bars[column][bounds[i]:bounds[i + 1]] belong to symbol_ids[i].
+        """
+        symbol_ids = list(frames)
+        lengths = np.array([len(frames[s]) for s in symbol_ids])
+        symbol_row = np.repeat(np.arange(len(symbol_ids)), lengths)
+        period = np.concatenate([cls._period_keys(frames[s].index, timeframe) for s in symbol_ids])
+        index = np.concatenate([np.asarray(frames[s].index) for s in symbol_ids])
+        columns = {
+            name: np.concatenate([frames[s][name].to_numpy() for s in symbol_ids])
+            for name in IndicatorService.OHLCV_COLUMNS
+        }
+
+        # A new bar starts whenever the symbol or the period changes
+        change = np.flatnonzero((np.diff(symbol_row) != 0) | (np.diff(period) != 0)) + 1
+        starts = np.concatenate(([0], change))
+        ends = np.concatenate((change, [len(period)])) - 1
+
+        bars = {
+            'open': columns['open'][starts],
+            'high': np.maximum.reduceat(columns['high'], starts),
+            'low': np.minimum.reduceat(columns['low'], starts),
+            'close': columns['close'][ends],
+            'volume': np.add.reduceat(columns['volume'], starts),
+        }
+        bounds = np.searchsorted(symbol_row[starts], np.arange(len(symbol_ids) + 1))
+        return symbol_ids, bounds, bars, index[ends]
+
+    @staticmethod
+    def _bar_index(source_index: pd.Index, values: np.ndarray) -> pd.Index:
+        """Index for aggregated bars, matching the daily frame's index type/timezone."""
+        if isinstance(source_index, pd.DatetimeIndex):
+            idx = pd.DatetimeIndex(values, name=source_index.name)
+            if source_index.tz is not None:
+                # Tz-aware bar timestamps come through as Timestamp objects, naive ones as UTC datetime64
+                idx = (idx if idx.tz is not None else idx.tz_localize('UTC')).tz_convert(source_index.tz)
+            return idx
+        return pd.Index(values, name=source_index.name)
+
+    @classmethod
+    def resample_many(cls, frames: Dict[int, pd.DataFrame], timeframe: str) -> Dict[int, pd.DataFrame]:
+        """Aggregates daily OHLCV frames for many symbols into timeframe bars."""
+        frames = {symbol_id: df for symbol_id, df in frames.items() if not df.empty}
+        if not frames:
+            return {}
+
+        symbol_ids, bounds, bars, bar_index = cls._resample_arrays(frames, timeframe)
+        result = {}
+        for row, symbol_id in enumerate(symbol_ids):
+            lo, hi = bounds[row], bounds[row + 1]
+            result[symbol_id] = pd.DataFrame(
+                {name: values[lo:hi] for name, values in bars.items()},
+                index=cls._bar_index(frames[symbol_id].index, bar_index[lo:hi])
+            )
+        return result
+
+    @classmethod
+    def resample(cls, df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """Single-symbol convenience wrapper around resample_many."""
+        return cls.resample_many({0: df}, timeframe).get(0, pd.DataFrame())
+
+    def compute_many(self, daily_frames: Dict[int, pd.DataFrame], timeframe: str) -> Dict[int, pd.DataFrame]:
+        """
+        Higher-timeframe bars with the daily indicator set for the whole universe.
+
+        Symbols whose daily data has not changed are served from the indicator
+        cache; the rest are resampled together and their indicators computed
+        as one symbol x time panel.
+        """
+        config_hash = indicator_cache.config_hash(f"{timeframe}:{IndicatorService.INDICATOR_VERSION}")
+        result, pending, keys = {}, {}, {}
+        for symbol_id, df in daily_frames.items():
+            if df.empty:
+                continue
+            key = indicator_cache.make_key(symbol_id, df, config_hash)
+            cached = indicator_cache.get(key)
+            if cached is not None:
+                result[symbol_id] = cached
+            else:
+                pending[symbol_id] = df
+                keys[symbol_id] = key
+
+        if pending:
+            symbol_ids, bounds, bars, bar_index = self._resample_arrays(pending, timeframe)
+
+            # Scatter the bars into a left-padded (symbols x periods) panel
+            lengths = np.diff(bounds)
+            width = int(lengths.max())
+            bar_row = np.repeat(np.arange(len(symbol_ids)), lengths)
+            bar_col = np.arange(bounds[-1]) - bounds[bar_row] + (width - lengths[bar_row])
+            panel = {}
+            for name in IndicatorService.OHLCV_COLUMNS:
+                panel[name] = np.full((len(symbol_ids), width), np.nan)
+                panel[name][bar_row, bar_col] = bars[name]
+
+            indicators = indicator_kernels.compute(
+                *(panel[c] for c in IndicatorService.OHLCV_COLUMNS), engine=Config.INDICATOR_ENGINE
+            )
+
+            for row, symbol_id in enumerate(symbol_ids):
+                lo, hi = bounds[row], bounds[row + 1]
+                columns = {name: values[lo:hi] for name, values in bars.items()}
+                for name in indicator_kernels.INDICATOR_COLUMNS:
+                    columns[name] = indicators[name][row, width - (hi - lo):]
+                frame = pd.DataFrame(
+                    columns, index=self._bar_index(pending[symbol_id].index, bar_index[lo:hi]), copy=False
+                )
+                indicator_cache.put(keys[symbol_id], frame)
+                result[symbol_id] = frame
+
+        logger.info(f"{timeframe.capitalize()} indicators: {len(result)} symbols ({len(pending)} recomputed)")
+        return result
+
+    def load_many(self, symbol_ids: Iterable[int], timeframe: str, lookback_days: int = None) -> Dict[int, pd.DataFrame]:
+        """Loads daily bars in one batched query and derives the timeframe's indicators."""
+        daily = self.indicator_service.load_data_many(symbol_ids, lookback_days=lookback_days)
+        return self.compute_many(daily, timeframe)
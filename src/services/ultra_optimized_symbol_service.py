@@ -5,6 +5,7 @@ import io
 import logging
 from sqlalchemy.orm import Session
 from src.models.models import Symbol
+from src.services.quote_summary import QuoteSummaryFetcher
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -13,6 +14,7 @@ logger = logging.getLogger(__name__)
 class UltraOptimizedSymbolService:
     def __init__(self, db: Session):
         self.db = db
+        self.quote_fetcher = QuoteSummaryFetcher()
         self.NIFTY_500_URL = "https://raw.githubusercontent.com/kprohith/nse-stock-analysis/master/ind_nifty500list.csv"
 
     def should_sync(self) -> bool:
@@ -88,10 +90,8 @@ class UltraOptimizedSymbolService:
                         continue
 
                     # Get ticker info (still need individual call for market cap)
-                    t = yf.Ticker(ticker)
-                    info = t.info
-                    mcap = info.get('marketCap', 0) or 0
-                    mcap_crore = mcap / 10_000_000
+                    profile = self.quote_fetcher.profile(ticker)
+                    mcap_crore = profile.market_cap_cr
 
                     # Skip market cap check if filter is disabled
                     if not skip_mcap_filter and mcap_crore <= min_mcap_crore:
@@ -99,9 +99,9 @@ class UltraOptimizedSymbolService:
                         continue
 
                     # Get company info
-                    company_name = info.get('longName') or info.get('shortName', '')
-                    sector = info.get('sector', '')
-                    industry = info.get('industry', '')
+                    company_name = profile.name
+                    sector = profile.sector
+                    industry = profile.industry
 
                     # Add or Update
                     if not existing:
@@ -19,3 +19,15 @@ def db_session():
         yield db
     finally:
         db.close()
+
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    """
+    Session factory on a file database, for code that opens sessions from
+    several threads or invocations (an in-memory database is per connection).
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}",
+                           connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
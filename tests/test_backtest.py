@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.services import candle_patterns
+from src.services.backtest import BacktestEngine, ExitRule, simulate_exits, STOPLOSS, TARGET, TIME, END
+from src.services.indicators import IndicatorService
+from src.services.scoring import ScoringService
+
+
+def _window(rows):
+    """(entries x hold) OHLC window from per-entry lists of (open, high, low, close) bars."""
+    hold = max(len(bars) for bars in rows)
+    window = {name: np.full((len(rows), hold), np.nan) for name in ('open', 'high', 'low', 'close')}
+    for i, bars in enumerate(rows):
+        for j, bar in enumerate(bars):
+            for name, value in zip(('open', 'high', 'low', 'close'), bar):
+                window[name][i, j] = value
+    return window
+
+
+def test_simulate_exits_first_touch():
+    rule = ExitRule("t", stop_pct=5, target_pct=10, max_hold_days=3)
+    window = _window([
+        [(100, 103, 98, 101), (101, 111, 100, 110), (110, 112, 90, 95)],  # target on bar 2
+        [(100, 101, 94, 95), (95, 120, 94, 119), (119, 121, 118, 120)],   # stop on bar 1
+        [(100, 106, 94, 100), (100, 101, 99, 100), (100, 101, 99, 100)],  # both on bar 1: stop first
+        [(100, 102, 98, 101), (101, 102, 99, 100), (100, 103, 99, 102)],  # time stop
+        [(90, 91, 88, 89), (89, 90, 88, 89)],                              # gap through the stop
+        [(100, 102, 98, 101)],                                             # history ends
+        [(100, 101, 89, 90), (90, 91, 80, 81), (81, 82, 80, 81)],          # SHORT: target on bar 1
+    ])
+    entry = np.full(7, 100.0)
+    direction = np.array([1, 1, 1, 1, 1, 1, -1])
+    bars_after = np.array([10, 10, 10, 10, 10, 1, 10])
+
+    step, reason, price, mae, mfe = simulate_exits(window, entry, direction, bars_after, rule)
+
+    assert step.tolist() == [1, 0, 0, 2, 0, 0, 0]
+    assert reason.tolist() == [TARGET, STOPLOSS, STOPLOSS, TIME, STOPLOSS, END, TARGET]
+    np.testing.assert_allclose(price, [110, 95, 95, 102, 90, 101, 90])
+    assert mfe[0] == pytest.approx(0.11) and mae[0] == pytest.approx(-0.02)
+    assert mfe[6] == pytest.approx(0.11) and mae[6] == pytest.approx(-0.01)
+
+
+def _synthetic_frames(n_symbols, n_days, seed=3):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n_days, freq='B', name='timestamp')
+    frames = {}
+    for s in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        open_ = close * (1 + rng.normal(0, 0.005, n_days))
+        frames[s + 1] = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_days)),
+            'low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_days)),
+            'close': close,
+            'volume': rng.integers(1_000, 100_000, n_days).astype(float),
+        }, index=index)
+    return frames
+
+
+def test_backtest_entries_are_point_in_time_signals():
+    frames = _synthetic_frames(4, 450)
+    result = BacktestEngine(workers=1, shard_size=3).run(frames)
+    trades = result.trades
+
+    assert not trades.empty
+    assert set(trades['exit_reason']) <= {'STOPLOSS', 'TARGET', 'TIME', 'END'}
+    assert (trades['exit_time'] > trades['entry_time']).all()
+
+    # Each entry is what a live scan would have signalled using only the bars up to it
+    indicators, scoring = IndicatorService(db=None), ScoringService()
+    for trade in trades.head(15).itertuples():
+        df = frames[trade.symbol_id]
+        history = indicators.calculate_indicators(df.loc[:trade.entry_time].copy())
+        expected = scoring.score_signal(history.iloc[-1], history)
+        assert expected['direction'] == trade.direction
+        assert expected['score'] == trade.score
+        assert history['Patterns'].iloc[-1] == trade.entry_patterns
+
+    # No overlapping positions per symbol / strategy / exit rule
+    for _, group in trades.groupby(['symbol_id', 'strategy', 'exit_rule']):
+        group = group.sort_values('entry_time')
+        assert (group['entry_time'].values[1:] > group['exit_time'].values[:-1]).all()
+
+    stats = result.stats
+    assert stats['trades'].sum() == len(trades)
+    doji = result.with_patterns(['doji'])
+    assert len(doji.trades) == (trades['entry_patterns'] & candle_patterns.mask_of(['doji']) != 0).sum()
+    assert set(stats.index.get_level_values('exit_rule')) <= {rule.name for rule in ExitRule.defaults()}
+
+
+def test_backtest_process_pool_matches_inline():
+    frames = _synthetic_frames(5, 300)
+    inline = BacktestEngine(workers=1, shard_size=2).run(frames).trades
+    pooled = BacktestEngine(workers=2, shard_size=2).run(frames).trades
+
+    pd.testing.assert_frame_equal(inline.reset_index(drop=True), pooled.reset_index(drop=True))
+
+
+def test_backtest_skips_short_histories():
+    result = BacktestEngine(workers=1).run(_synthetic_frames(2, 150))
+    assert result.trades.empty and result.stats.empty
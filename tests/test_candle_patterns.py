@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from src.models.models import CandlePattern, Symbol
+from src.services import candle_patterns
+from src.services.candle_patterns import CandlePatternService
+from src.services.indicators import IndicatorService
+
+
+def _candles(rows):
+    """(open, high, low, close) tuples -> OHLC arrays."""
+    return tuple(np.array(column, dtype=float) for column in zip(*rows))
+
+
+def test_detects_each_pattern_on_its_bar():
+    o, h, l, c = _candles([
+        (100, 101, 99, 100.5),    # 0 filler
+        (100, 100.2, 94, 99.5),   # 1 hammer (long lower shadow)
+        (102, 103, 98, 99),       # 2 bearish
+        (98.5, 104, 98, 103.5),   # 3 bullish engulfing of 2
+        (103, 103.5, 101, 102),   # 4 inside bar of 3
+        (110, 111, 100, 101),     # 5 big bearish
+        (100.5, 101.5, 99.5, 100.8),  # 6 small star
+        (101, 108, 100.8, 107),   # 7 morning star (closes above 5's midpoint)
+        (107, 107.2, 106.8, 107.02),  # 8 doji
+        (106, 112, 105.8, 106.3), # 9 shooting star
+    ])
+    masks = candle_patterns.detect(o, h, l, c)
+
+    def bars(name):
+        return list(np.flatnonzero(masks[name]))
+
+    assert 1 in bars('hammer')
+    assert bars('bullish_engulfing') == [3]
+    assert 4 in bars('inside_bar')
+    assert bars('morning_star') == [7]
+    assert 8 in bars('doji')
+    assert 9 in bars('shooting_star')
+    assert bars('bearish_engulfing') == [] and bars('evening_star') == []
+
+    bits = candle_patterns.encode(masks)
+    assert bits.dtype == np.int32
+    assert 'bullish_engulfing' in candle_patterns.names_of(bits[3])
+    assert candle_patterns.has_any(bits, candle_patterns.BULLISH)[[1, 3, 7]].all()
+    with pytest.raises(ValueError):
+        candle_patterns.mask_of(['three_white_soldiers'])
+
+
+def test_panel_matches_per_series_and_legacy_rules():
+    rng = np.random.default_rng(3)
+    rows, width = 4, 300
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (rows, width)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.01, (rows, width)))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, (rows, width)))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, (rows, width)))
+    open_[1, :50] = high[1, :50] = low[1, :50] = close[1, :50] = np.nan  # left padding
+
+    panel = candle_patterns.compute(open_, high, low, close)
+    for r in range(rows):
+        np.testing.assert_array_equal(panel[r], candle_patterns.compute(open_[r], high[r], low[r], close[r]))
+    assert (panel[1, :50] == 0).all()
+
+    # Hammer and bullish engulfing keep the screener's original scalar definitions
+    masks = candle_patterns.detect(open_[0], high[0], low[0], close[0])
+    for t in range(1, width):
+        body = abs(close[0, t] - open_[0, t])
+        lower = min(open_[0, t], close[0, t]) - low[0, t]
+        upper = high[0, t] - max(open_[0, t], close[0, t])
+        engulfing = (close[0, t - 1] < open_[0, t - 1] and close[0, t] > open_[0, t]
+                     and close[0, t] > open_[0, t - 1] and open_[0, t] < close[0, t - 1])
+        assert masks['hammer'][t] == ((lower > 2 * body) and (upper < body))
+        assert masks['bullish_engulfing'][t] == engulfing
+
+
+def test_indicator_frames_carry_patterns_and_store_upserts_latest_bar(db_session):
+    symbol = Symbol(ticker="PAT.NS")
+    db_session.add(symbol)
+    db_session.flush()
+    rng = np.random.default_rng(0)
+    index = pd.date_range(datetime(2024, 1, 1, tzinfo=pytz.UTC), periods=60, freq='D', name='timestamp')
+    close = 100 + np.cumsum(rng.normal(0, 1, 60))
+    open_ = close + rng.normal(0, 1, 60)
+    df = pd.DataFrame({
+        'open': open_, 'high': np.maximum(open_, close) + 1, 'low': np.minimum(open_, close) - 1,
+        'close': close, 'volume': 1000.0,
+    }, index=index)
+
+    frame = IndicatorService(db_session).calculate_indicators(df)
+    pandas_frame = IndicatorService(db_session).calculate_indicators(df.copy(), engine="pandas")
+    np.testing.assert_array_equal(frame['Patterns'], pandas_frame['Patterns'])
+
+    service = CandlePatternService(db_session)
+    assert service.refresh({symbol.id: frame.iloc[:50]}) == 50
+    assert service.refresh({symbol.id: frame}) == 10
+    assert service.refresh({symbol.id: frame}) == 0
+    assert db_session.query(CandlePattern).count() == 60
+
+    # Today's candle rewritten in place (same timestamp): its stored bitset is corrected
+    rewritten = df[['open', 'high', 'low', 'close', 'volume']].copy()
+    last = rewritten.index[-1]
+    rewritten.loc[last, ['open', 'high', 'low', 'close']] = [100.0, 100.2, 94.0, 99.5]  # hammer
+    rewritten_bits = candle_patterns.compute(*(rewritten[c].to_numpy() for c in ('open', 'high', 'low', 'close')))
+    assert rewritten_bits[-1] != frame['Patterns'].iloc[-1]
+    assert service.refresh({symbol.id: rewritten}) == 1
+    stored = db_session.query(CandlePattern).order_by(CandlePattern.timestamp.desc()).first()
+    assert stored.bits == rewritten_bits[-1]
+    assert db_session.query(CandlePattern).count() == 60
+    assert service.refresh({symbol.id: rewritten}) == 0
+
+    hits = service.symbols_with(['inside_bar'])
+    expected = frame.index[candle_patterns.has_any(frame['Patterns'], ['inside_bar'])]
+    assert len(hits.get(symbol.id, [])) == len(expected) > 0
+
+    since = datetime(2024, 1, 1) + timedelta(days=40)
+    recent = service.symbols_with(['inside_bar'], since=since).get(symbol.id, [])
+    assert len(recent) == (expected >= pd.Timestamp(since, tz='UTC')).sum()
@@ -0,0 +1,142 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock yfinance before it is imported by the application code
+sys.modules.setdefault("yfinance", MagicMock())
+
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+from src.services.enrichment import LOOKUPS, EnrichmentService
+from src.services.enrichment_cache import EnrichmentCache
+from src.services.quote_summary import HOLDER_KINDS
+
+
+class FakeFetcher:
+    """Each part sleeps; per-ticker overrides make parts slow or fail."""
+
+    def __init__(self, delay=0.1, slow=(), failing=()):
+        self.delay = delay
+        self.slow = set(slow)
+        self.failing = set(failing)
+        self.tickers = []
+
+    def ticker(self, symbol):
+        self.tickers.append(symbol)
+        return symbol
+
+    def _wait(self, ticker, part):
+        if (ticker, part) in self.failing:
+            raise ConnectionError("reset by peer")
+        time.sleep(5 if (ticker, part) in self.slow else self.delay)
+
+    def fetch_part(self, t, part):
+        self._wait(t, part)
+        if part == 'news':
+            return {'news': (f"{t} headline", "https://example.com")}
+        if part == 'calendar':
+            return {'corporate_actions': {'Earnings': '2026-11-01'}}
+        values = {kind: pd.DataFrame({'Holder': [kind], '% Out': [0.05]}) for kind in HOLDER_KINDS}
+        values['insider_transactions'] = pd.DataFrame({'Insider': ['CEO'], 'Shares': [100]})
+        return values
+
+
+def test_parts_run_concurrently_within_and_across_tickers():
+    fetcher = FakeFetcher(delay=0.2)
+    service = EnrichmentService(fetcher, timeout=5)
+
+    start = time.perf_counter()
+    results = service.fetch_many(["A.NS", "B.NS", "C.NS"])
+    elapsed = time.perf_counter() - start
+
+    # 9 requests of 0.2s each: bounded by the slowest, not their sum; one Ticker per symbol
+    assert elapsed < 1.0
+    assert sorted(fetcher.tickers) == ["A.NS", "B.NS", "C.NS"]
+    for ticker, enrichment in results.items():
+        assert enrichment.complete
+        assert enrichment.news == (f"{ticker} headline", "https://example.com")
+        assert enrichment.corporate_actions == {'Earnings': '2026-11-01'}
+        assert list(enrichment.shareholding) == ['major_holders', 'institutional_holders', 'mutualfund_holders']
+        assert enrichment.insider_transactions['Insider'].tolist() == ['CEO']
+
+
+def test_slow_and_failing_parts_give_partial_results():
+    fetcher = FakeFetcher(delay=0.01, slow={("A.NS", "holders")}, failing={("A.NS", "news")})
+    service = EnrichmentService(fetcher, timeout=0.5)
+
+    start = time.perf_counter()
+    enrichment = service.fetch("A.NS")
+
+    assert time.perf_counter() - start < 1.5
+    assert enrichment.missing == ['news', 'major_holders', 'institutional_holders',
+                                  'mutualfund_holders', 'insider_transactions']
+    assert not enrichment.complete
+    assert enrichment.news == (None, None) and enrichment.insider_transactions is None
+    assert enrichment.shareholding['major_holders'] is None
+    assert set(LOOKUPS) - set(enrichment.missing) == {'corporate_actions'}
+    assert enrichment.corporate_actions == {'Earnings': '2026-11-01'}
+
+
+class CountingFetcher(FakeFetcher):
+    def __init__(self):
+        super().__init__(delay=0)
+        self.calls = []
+
+    def _wait(self, ticker, part):
+        self.calls.append(part)
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_cached_lookups_skip_the_network_until_expiry(session_factory):
+    fetcher = CountingFetcher()
+    cache = EnrichmentCache(session_factory)
+    service = EnrichmentService(fetcher, timeout=5, cache=cache)
+
+    first = service.fetch("A.NS")
+    assert sorted(fetcher.calls) == ['calendar', 'holders', 'news'] and first.cached == []
+
+    # Second alert: only news goes to the network, cached frames round-trip intact
+    fetcher.calls.clear()
+    second = service.fetch("A.NS")
+    assert fetcher.calls == ['news']
+    assert sorted(second.cached) == sorted(set(LOOKUPS) - {'news'})
+    pd.testing.assert_frame_equal(second.shareholding['major_holders'], first.shareholding['major_holders'])
+    assert second.corporate_actions == first.corporate_actions
+
+    # Expired entry is fetched again synchronously, with the rest of its part
+    cache.put("A.NS", "insider_transactions", pd.DataFrame({'Insider': ['old']}),
+              now=datetime.now(pytz.UTC) - timedelta(days=30))
+    fetcher.calls.clear()
+    third = service.fetch("A.NS")
+    assert sorted(fetcher.calls) == ['holders', 'news']
+    assert third.insider_transactions['Insider'].tolist() == ['CEO']
+
+
+def test_entries_near_expiry_are_served_and_refreshed_in_background(session_factory):
+    fetcher = CountingFetcher()
+    cache = EnrichmentCache(session_factory)
+    service = EnrichmentService(fetcher, timeout=5, cache=cache)
+
+    # 23h into a 24h TTL: past the refresh-ahead point, not expired
+    stale_time = datetime.now(pytz.UTC) - timedelta(hours=23)
+    cache.put("B.NS", "corporate_actions", {'Earnings': 'old'}, now=stale_time)
+
+    enrichment = service.fetch("B.NS")
+    assert enrichment.corporate_actions == {'Earnings': 'old'}
+    assert 'corporate_actions' in enrichment.cached
+    assert _wait_for(lambda: cache.get("B.NS", "corporate_actions").value == {'Earnings': '2026-11-01'})
+    assert fetcher.calls.count('calendar') == 1
+
+
+def test_failed_fetches_and_news_are_not_cached(session_factory):
+    cache = EnrichmentCache(session_factory)
+    cache.put("C.NS", "major_holders", None)
+    cache.put("C.NS", "news", ("headline", None))
+    assert cache.get_many(["C.NS"], LOOKUPS) == {}
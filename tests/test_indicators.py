@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+import pytz
+from src.services.indicators import IndicatorService
+from src.models.models import Symbol, OHLCV
+
+
+def _seed_symbol(db_session, ticker, days=60, start_price=100.0):
+    """Stores `days` of synthetic daily bars ending today for ticker."""
+    symbol = Symbol(ticker=ticker, is_active=True)
+    db_session.add(symbol)
+    db_session.flush()
+
+    end = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(days):
+        price = start_price + i + (i % 3)
+        db_session.add(OHLCV(
+            symbol_id=symbol.id,
+            timestamp=end - timedelta(days=days - 1 - i),
+            open=price - 1, high=price + 2, low=price - 2, close=price,
+            volume=1000 + 10 * i
+        ))
+    db_session.commit()
+    return symbol
+
+
+def test_load_data_compact_matches_default(db_session):
+    """Compact frames hold the same values as float32 with an epoch index."""
+    _seed_symbol(db_session, "TEST.NS", days=60)
+    service = IndicatorService(db_session)
+
+    default = service.load_data("TEST.NS")
+    compact = service.load_data("TEST.NS", compact=True)
+
+    assert len(default) == len(compact) == 60
+    assert list(compact.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert all(dtype == np.float32 for dtype in compact.dtypes)
+    assert compact.index.dtype == np.int64
+
+    expected_epoch = pd.to_datetime(default.index, utc=True).as_unit('s').asi8
+    np.testing.assert_array_equal(compact.index.values, expected_epoch)
+    np.testing.assert_allclose(compact['close'].values, default['close'].values, rtol=1e-6)
+
+
+def test_load_data_unknown_ticker_returns_empty(db_session):
+    service = IndicatorService(db_session)
+    assert service.load_data("MISSING.NS", compact=True).empty
+
+
+def test_calculate_indicators_on_compact_frame(db_session):
+    _seed_symbol(db_session, "TEST.NS", days=60)
+    service = IndicatorService(db_session)
+
+    df = service.calculate_indicators(service.load_data("TEST.NS", compact=True))
+
+    assert not pd.isna(df['SMA_20'].iloc[-1])
+    assert df['RSI'].iloc[-1] == pytest.approx(
+        service.calculate_indicators(service.load_data("TEST.NS"))['RSI'].iloc[-1], rel=1e-4
+    )
+
+
+def test_load_data_many_splits_by_symbol(db_session):
+    first = _seed_symbol(db_session, "AAA.NS", days=40, start_price=100)
+    second = _seed_symbol(db_session, "BBB.NS", days=25, start_price=500)
+    service = IndicatorService(db_session)
+
+    frames = service.load_data_many([second.id, first.id, 9999], chunk_size=1)
+
+    assert set(frames) == {first.id, second.id}
+    assert len(frames[first.id]) == 40
+    assert len(frames[second.id]) == 25
+    pd.testing.assert_frame_equal(frames[first.id], service.load_data("AAA.NS"), check_freq=False)
+
+
+def test_load_data_many_last_n_rows(db_session):
+    first = _seed_symbol(db_session, "AAA.NS", days=40)
+    second = _seed_symbol(db_session, "BBB.NS", days=25)
+    service = IndicatorService(db_session)
+
+    frames = service.load_data_many([first.id, second.id], last_n=30, compact=True)
+
+    assert len(frames[first.id]) == 30
+    assert len(frames[second.id]) == 25
+    full = service.load_data("AAA.NS", compact=True)
+    np.testing.assert_array_equal(frames[first.id].index.values, full.index.values[-30:])
+
+
+def test_indicator_cache_hits_and_budget_eviction():
+    from src.services.indicator_cache import IndicatorCache
+
+    frame = pd.DataFrame({'close': np.arange(100, dtype=float)})
+    size = IndicatorCache.frame_size(frame)
+    cache = IndicatorCache(max_bytes=2 * size)
+
+    keys = [IndicatorCache.make_key(symbol_id, frame, "cfg") for symbol_id in (1, 2, 3)]
+    assert cache.get(keys[0]) is None
+    cache.put(keys[0], frame)
+    cache.put(keys[1], frame)
+    assert cache.get(keys[0]) is frame  # keys[0] is now most recently used
+    cache.put(keys[2], frame)           # over budget: evicts keys[1]
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is frame
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 1, "entries": 2, "bytes": 2 * size}
+
+
+def test_calculate_indicators_cached_reuses_frame(db_session):
+    from src.services.indicator_cache import indicator_cache
+
+    symbol = _seed_symbol(db_session, "TEST.NS", days=60)
+    service = IndicatorService(db_session)
+    indicator_cache.clear()
+
+    first = service.calculate_indicators_cached(symbol.id, service.load_data("TEST.NS"))
+    second = service.calculate_indicators_cached(symbol.id, service.load_data("TEST.NS"))
+
+    assert second is first
+    assert 'RSI' in second.columns
+
+
+def test_indicator_cache_misses_when_last_candle_is_rewritten(db_session):
+    from src.services.indicator_cache import indicator_cache
+
+    symbol = _seed_symbol(db_session, "TEST.NS", days=60)
+    service = IndicatorService(db_session)
+    indicator_cache.clear()
+    first = service.calculate_indicators_cached(symbol.id, service.load_data("TEST.NS"))
+
+    # Same timestamp and row count: today's candle updated in place
+    last = db_session.query(OHLCV).filter_by(symbol_id=symbol.id).order_by(OHLCV.timestamp.desc()).first()
+    last.close *= 1.05
+    db_session.commit()
+    second = service.calculate_indicators_cached(symbol.id, service.load_data("TEST.NS"))
+
+    assert second is not first
+    assert second.index[-1] == first.index[-1] and len(second) == len(first)
+    assert second['close'].iloc[-1] == pytest.approx(first['close'].iloc[-1] * 1.05)
+    assert second['SMA_20'].iloc[-1] != first['SMA_20'].iloc[-1]
+
+
+def _random_ohlcv(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.integers(1_000, 100_000, n).astype(float)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume},
+                        index=pd.date_range('2024-01-01', periods=n, freq='D'))
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+def test_kernel_engines_match_pandas(engine):
+    from src.services import indicator_kernels
+
+    if engine == "numba" and not indicator_kernels.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+
+    service = IndicatorService(db=None)
+    expected = service.calculate_indicators(_random_ohlcv(260), engine="pandas")
+    actual = service.calculate_indicators(_random_ohlcv(260), engine=engine)
+
+    assert list(actual.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-7, atol=1e-7)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+def test_kernel_engines_match_pandas_across_nan_gaps(engine):
+    from src.services import indicator_kernels
+
+    if engine == "numba" and not indicator_kernels.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+
+    df = _random_ohlcv(260)
+    df.iloc[100, df.columns.get_loc('close')] = np.nan  # missing close mid-series
+    df.iloc[150] = np.nan                               # missing candle
+    df.iloc[200, df.columns.get_loc('volume')] = np.nan
+    service = IndicatorService(db=None)
+    expected = service.calculate_indicators(df.copy(), engine="pandas")
+    actual = service.calculate_indicators(df.copy(), engine=engine)
+
+    pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-7, atol=1e-7)
+    # A gap only blanks the windows that contain it
+    for name in ('SMA_20', 'RSI', 'ATR', 'Vol_Z'):
+        assert not np.isnan(actual[name].iloc[-1])
+
+
+def test_numpy_panel_matches_single_series():
+    from src.services import indicator_kernels
+
+    frames = {1: _random_ohlcv(250, seed=1), 2: _random_ohlcv(120, seed=2)}
+    symbol_ids, panel, lengths = indicator_kernels.stack_panel(frames)
+    result = indicator_kernels.compute_numpy(*(panel[c] for c in ('open', 'high', 'low', 'close', 'volume')))
+
+    for row, symbol_id in enumerate(symbol_ids):
+        df = frames[symbol_id]
+        single = indicator_kernels.compute_numpy(df['open'], df['high'], df['low'], df['close'], df['volume'])
+        for name in indicator_kernels.INDICATOR_COLUMNS:
+            np.testing.assert_allclose(result[name][row, -lengths[row]:], single[name], rtol=1e-9, equal_nan=True)
+        assert np.isnan(result['RSI'][row, :-lengths[row]]).all()
+
+
+def test_resample_groups_on_exchange_local_dates():
+    from src.services.timeframes import TimeframeService
+
+    # Two Monday-Friday weeks of bars stamped at midnight IST (18:30 UTC the day before)
+    days = pd.bdate_range('2024-01-01', periods=10, tz='Asia/Kolkata').tz_convert('UTC')
+    daily = pd.DataFrame({'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': np.arange(10.0), 'volume': 1.0},
+                         index=days)
+
+    for frame in (daily, daily.set_axis(days.as_unit('s').asi8)):  # and compact epoch seconds
+        weekly = TimeframeService.resample(frame, 'weekly')
+        assert list(weekly['close']) == [4.0, 9.0] and list(weekly['volume']) == [5.0, 5.0]
+        assert len(TimeframeService.resample(frame, 'monthly')) == 1
+
+
+def test_weekly_resample_matches_pandas():
+    from src.services.timeframes import TimeframeService
+
+    daily = _random_ohlcv(60)
+    daily = daily[daily.index.dayofweek < 5]  # trading days only
+    weekly = TimeframeService.resample(daily, 'weekly')
+
+    grouped = daily.groupby(daily.index.to_period('W-SUN'))
+    np.testing.assert_allclose(weekly['open'].values, grouped['open'].first().values)
+    np.testing.assert_allclose(weekly['high'].values, grouped['high'].max().values)
+    np.testing.assert_allclose(weekly['low'].values, grouped['low'].min().values)
+    np.testing.assert_allclose(weekly['close'].values, grouped['close'].last().values)
+    np.testing.assert_allclose(weekly['volume'].values, grouped['volume'].sum().values)
+    # Each weekly bar is stamped with its last trading day
+    assert list(weekly.index) == list(daily.index.to_series().groupby(daily.index.to_period('W-SUN')).max())
+
+
+def test_monthly_compute_many_adds_indicators():
+    from src.services.timeframes import TimeframeService
+
+    frames = {1: _random_ohlcv(400, seed=1), 2: _random_ohlcv(300, seed=2)}
+    result = TimeframeService(db=None).compute_many(frames, 'monthly')
+
+    assert len(result[1]) == len(TimeframeService.resample(frames[1], 'monthly'))
+    assert 'RSI' in result[1].columns and 'HA_Green' in result[2].columns
+    assert not pd.isna(result[1]['RSI'].iloc[-1])
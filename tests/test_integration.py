@@ -2,7 +2,7 @@ import sys
 from unittest.mock import MagicMock
 
 # Mock yfinance before it is imported by the application code
-sys.modules["yfinance"] = MagicMock()
+sys.modules.setdefault("yfinance", MagicMock())
 
 import pytest
 import pandas as pd
@@ -10,6 +10,7 @@ from datetime import datetime
 from src.services.market_data import MarketDataService
 from src.services.indicators import IndicatorService
 from src.services.scoring import ScoringService
+from src.services.data_version import current_version
 from src.models.models import Symbol, OHLCV, TradeSignal
 from unittest.mock import patch
 
@@ -39,6 +40,12 @@ def test_full_flow_integration(db_session):
     assert symbol is not None
     ohlcv_count = db_session.query(OHLCV).filter(OHLCV.symbol_id == symbol.id).count()
     assert ohlcv_count == 60
+    assert current_version(db_session) == 1
+
+    # Re-fetching the same candles stores nothing and keeps the data version
+    with patch('yfinance.download', return_value=mock_data):
+        market_service.fetch_and_store("TEST-TICKER")
+    assert current_version(db_session) == 1
     
     # 2. Test Indicators
     indicator_service = IndicatorService(db_session)
@@ -0,0 +1,125 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock the network and plotting libraries before the application imports them
+sys.modules.setdefault("yfinance", MagicMock())
+sys.modules.setdefault("requests", MagicMock())
+for module in ("matplotlib", "matplotlib.pyplot", "matplotlib.dates"):
+    sys.modules.setdefault(module, MagicMock())
+
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+import pytz
+from src.database.db import db_instance
+from src.models.models import CandlePattern, OHLCV, ScanRun, ScanShard, Symbol, SymbolState, TradeSignal
+import src.main as main
+from src.services.scan_ledger import ScanLedger
+from src.lambda_function import lambda_handler, simulate_fanout
+
+
+@pytest.fixture
+def scan_db(session_factory, monkeypatch):
+    # Plan, shard and reduce invocations each open their own sessions
+    monkeypatch.setattr(db_instance, "engine", session_factory.kw['bind'])
+    monkeypatch.setattr(db_instance, "SessionLocal", session_factory)
+
+    db = session_factory()
+    rng = np.random.default_rng(7)
+    end = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    for k in range(6):
+        symbol = Symbol(ticker=f"FAN{k}.NS", name=f"Fan {k}", is_active=True, market_cap_cr=5000)
+        db.add(symbol)
+        db.flush()
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 250)))
+        db.bulk_insert_mappings(OHLCV, [
+            {'symbol_id': symbol.id, 'timestamp': end - timedelta(days=249 - i), 'open': close[i] * 0.99,
+             'high': close[i] * 1.01, 'low': close[i] * 0.98, 'close': close[i], 'volume': 5000.0}
+            for i in range(250)
+        ])
+    db.commit()
+    db.close()
+    return session_factory
+
+
+def test_simulated_fanout_scans_shards_and_alerts_once_in_reduce(scan_db, monkeypatch):
+    monkeypatch.setenv("SKIP_SYMBOL_SYNC", "true")
+    monkeypatch.setattr(main.MarketDataService, "fetch_and_store", lambda self, ticker, **kwargs: None)
+    monkeypatch.setattr(main.AutoSellService, "check_and_execute_auto_sells", lambda self: None)
+    monkeypatch.setattr("src.services.symbol_filter.SymbolFilterService.get_filtered_symbols",
+                        lambda self, **kwargs: self.db.query(Symbol).order_by(Symbol.id).all())
+    monkeypatch.setattr(main.EnrichmentService, "fetch", lambda self, ticker: main.Enrichment(ticker))
+    monkeypatch.setattr("src.services.plotting.ChartService.generate_chart", lambda self, df, ticker: None)
+
+    # FAN0 is the one symbol that qualifies for an alert
+    score_strategies = main.ScoringService.score_strategies
+
+    def score_one_alert(self, frames, strategies):
+        symbol_ids, scores = score_strategies(self, frames, strategies)
+        scores[self.strategy.name]['confidence'] = np.array(
+            ["High" if symbol_id == 1 else "No Trade" for symbol_id in symbol_ids], dtype=object)
+        return symbol_ids, scores
+
+    monkeypatch.setattr(main.ScoringService, "score_strategies", score_one_alert)
+    sent = []
+    monkeypatch.setattr(main.AlertService, "send_telegram_message",
+                        lambda self, msg, **kwargs: sent.append(msg))
+
+    result = simulate_fanout(workers=3, shard_size=2, timeout_seconds=600)
+
+    assert len(result['plan']['shards']) == 3
+    assert [shard['status'] for shard in result['shards']] == ['done', 'done', 'done']
+    run = result['reduce']['run']
+    assert (run['status'], run['items'], run['finished'], run['signals'], run['alerted']) == ('completed', 6, 6, 1, 1)
+    # Shards stop at score; the alert goes out once, from the reduce step
+    assert [stage['stage'] for stage in result['reduce']['pipeline']] == ['ingest', 'compute', 'score']
+    assert result['reduce']['alerts'][-1]['stage'] == 'notify'
+    assert len([msg for msg in sent if "Trade Signal Detected" in msg]) == 1
+
+    # A retried reduce returns the stored summary and sends nothing again
+    messages = len(sent)
+    again = lambda_handler({'action': 'reduce', 'run_id': run['run_id']}, None)
+    assert again['statusCode'] == 200 and '"completed"' in again['body']
+    assert main.reduce_sharded_scan(run['run_id'])['run'] == run
+    assert len(sent) == messages
+
+    db = scan_db()
+    assert db.query(ScanRun).one().status == 'completed'
+    assert {row.status for row in db.query(ScanShard)} == {'done'}
+    assert db.query(TradeSignal).count() == 6
+    db.close()
+
+    # Replaying a finished shard event skips it; unknown actions are rejected
+    replay = lambda_handler({'action': 'shard', 'run_id': run['run_id'], 'shard': 0}, None)
+    assert replay['statusCode'] == 200 and '"skipped"' in replay['body']
+    assert lambda_handler({'action': 'nope'}, None)['statusCode'] == 400
+
+
+def test_scan_stopped_at_its_budget_keeps_the_symbol_states_it_computed(scan_db, monkeypatch):
+    monkeypatch.setattr(main.MarketDataService, "fetch_and_store", lambda self, ticker, **kwargs: None)
+    monkeypatch.setattr(main.Config, "SCAN_BATCH_SIZE", 2)
+    monkeypatch.setattr(main.Config, "SCAN_BATCH_WAIT_SECONDS", 0.0)
+    monkeypatch.setattr(main.Config, "SCAN_COMPUTE_WORKERS", 1)
+
+    # The budget runs out while the first batch is being computed
+    out_of_time = threading.Event()
+    indicators = main.ScanCompute.indicators
+
+    def indicators_then_stop(self, frames):
+        out_of_time.set()
+        return indicators(self, frames)
+
+    monkeypatch.setattr(main.ScanCompute, "indicators", indicators_then_stop)
+    db = scan_db()
+    symbols = db.query(Symbol).order_by(Symbol.id).all()
+    ledger = ScanLedger()
+    ledger.start([symbol.id for symbol in symbols])
+
+    main.scan_symbols(db, symbols, ledger, lambda: not out_of_time.is_set(), alerts=False, process_workers=1)
+
+    assert not ledger.complete
+    states = db.query(SymbolState).all()
+    assert len(states) == 2
+    assert db.query(CandlePattern.symbol_id).distinct().count() == len(states)
+    db.close()
@@ -0,0 +1,85 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src.models.models import SweepResult
+from src.services.indicators import IndicatorService
+from src.services.optimizer import ParameterSpace, ParameterSweep, evaluate, prepare_features
+from src.services.scoring import ScoringService
+from src.services.strategy import Strategy
+
+
+def _synthetic_frames(n_symbols, n_days, seed=5):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n_days, freq='B', name='timestamp')
+    frames = {}
+    for s in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        open_ = close * (1 + rng.normal(0, 0.005, n_days))
+        frames[s + 1] = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_days)),
+            'low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_days)),
+            'close': close,
+            'volume': rng.integers(1_000, 100_000, n_days).astype(float),
+        }, index=index)
+    return frames
+
+
+def test_parameter_space_grid_and_sample():
+    space = ParameterSpace.from_json('{"RSI_OVERSOLD_THRESHOLD": [30, 35], "HA_CONSECUTIVE_CANDLES": ["NA", 2, 3]}')
+
+    grid = space.grid()
+    assert len(space) == len(grid) == 6
+    assert {'RSI_OVERSOLD_THRESHOLD': 30.0, 'HA_CONSECUTIVE_CANDLES': None} in grid
+
+    sample = space.sample(4, seed=1)
+    assert len(sample) == 4
+    assert len({json.dumps(c, sort_keys=True) for c in sample}) == 4
+    assert all(c in grid for c in sample)
+
+    with pytest.raises(ValueError):
+        ParameterSpace({'NOT_A_PARAMETER': [1]})
+
+
+def test_evaluate_matches_per_symbol_forward_returns():
+    frames = _synthetic_frames(3, 320)
+    strategy = Strategy("probe", rsi_oversold_threshold=40, rsi_overbought_threshold=60, ha_consecutive_candles=1)
+
+    metrics = evaluate(prepare_features(frames, [strategy]), strategy)
+
+    # Same numbers from per-symbol indicator frames and score_frame
+    returns, signals = [], 0
+    indicators, scoring = IndicatorService(db=None), ScoringService(strategy)
+    for df in frames.values():
+        df = indicators.calculate_indicators(df.copy())
+        scores = scoring.score_frame(df)
+        side = scores['direction'].map({"LONG": 1, "SHORT": -1}).fillna(0).to_numpy()
+        eligible = (side != 0) & (np.arange(len(df)) >= 199)
+        signals += int(eligible.sum())
+        forward = (df['close'].shift(-5) / df['close'] - 1).to_numpy() * side
+        returns.extend(forward[eligible & ~np.isnan(forward)])
+
+    assert metrics['signals'] == signals > 0
+    assert metrics['avg_return_5d'] == pytest.approx(np.mean(returns) * 100)
+    assert metrics['win_rate_5d'] == pytest.approx(np.mean(np.array(returns) > 0) * 100)
+
+
+def test_sweep_is_resumable_and_pool_matches_inline(db_session):
+    frames = _synthetic_frames(3, 300)
+    combos = ParameterSpace({'RSI_OVERSOLD_THRESHOLD': [35, 40], 'VOLUME_AVERAGE_PERIOD': [10, 20]}).grid()
+
+    inline = ParameterSweep(db_session, "inline", workers=1, batch_size=2)
+    assert inline.run(frames, combos[:3]) == 3
+    assert inline.run(frames, combos) == 1  # only the missing combination
+    assert db_session.query(SweepResult).filter_by(sweep_name="inline").count() == 4
+
+    pooled = ParameterSweep(db_session, "pooled", workers=2, batch_size=1)
+    assert pooled.run(frames, combos) == 4
+
+    columns = ['RSI_OVERSOLD_THRESHOLD', 'VOLUME_AVERAGE_PERIOD']
+    expected = inline.results(min_signals=0).sort_values(columns).reset_index(drop=True)
+    actual = pooled.results(min_signals=0).sort_values(columns).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected)
+    assert list(inline.results(min_signals=0)['avg_return_10d'].dropna()) == \
+        sorted(inline.results(min_signals=0)['avg_return_10d'].dropna(), reverse=True)
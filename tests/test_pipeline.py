@@ -0,0 +1,85 @@
+import threading
+import time
+from src.services.pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_all_stages_with_batching():
+    batches = []
+
+    def double(x):
+        return [x * 2] if x % 2 else []
+
+    def batch_sum(batch):
+        batches.append(len(batch))
+        return sum(batch)
+
+    pipeline = Pipeline([
+        Stage("double", double, workers=3, many=True),
+        Stage("sum", batch_sum, batch_size=4, batch_wait=1.0),
+    ])
+    results = pipeline.run(range(10))
+
+    assert sum(results) == 50
+    assert sum(batches) == 5 and max(batches) <= 4
+    stats = pipeline.stats
+    assert stats["double"].items_in == 10 and stats["double"].items_out == 5
+    assert stats["sum"].items_in == 5 and stats["sum"].items_out == len(batches)
+
+
+def test_errors_are_counted_and_filtered_items_dropped():
+    def check(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x if x % 2 else None
+
+    pipeline = Pipeline([Stage("check", check, workers=2), Stage("collect", lambda x: (x, x * x))])
+    results = pipeline.run(range(6))
+
+    assert sorted(results) == [(1, 1), (5, 25)]
+    report = {row["stage"]: row for row in pipeline.report()}
+    assert report["check"]["errors"] == 1 and report["check"]["items_in"] == 6
+    assert report["collect"]["items_in"] == 2
+
+
+def test_first_outputs_arrive_while_source_is_still_producing():
+    produced = []
+    delivered = []
+    first_delivery_after = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            time.sleep(0.01)
+            yield i
+
+    def deliver(x):
+        if not delivered:
+            first_delivery_after.append(len(produced))
+        delivered.append(x)
+        return x
+
+    Pipeline([Stage("work", lambda x: x, workers=2), Stage("notify", deliver)]).run(source())
+
+    assert sorted(delivered) == list(range(20))
+    assert first_delivery_after[0] < 20
+
+
+def test_bounded_queue_applies_backpressure():
+    release = threading.Event()
+
+    def slow(x):
+        release.wait(5)
+        return x
+
+    pipeline = Pipeline([Stage("fast", lambda x: x, workers=1, queue_size=2),
+                         Stage("slow", slow, workers=1, queue_size=2)])
+    runner = threading.Thread(target=pipeline.run, args=(range(50),))
+    runner.start()
+    time.sleep(0.2)
+    # One item in the slow worker, two queued for it, one blocked in the fast worker, two queued for that
+    assert pipeline.stats["fast"].items_in <= 4
+    release.set()
+    runner.join(5)
+
+    assert pipeline.stats["slow"].items_in == 50
+    assert pipeline.stats["slow"].max_depth <= 2
@@ -0,0 +1,26 @@
+import pytest
+from src.services.process_pool import SharedProcessPool
+
+
+def test_replaced_pool_keeps_serving_its_borrower_until_returned():
+    shared = SharedProcessPool("test")
+    with shared.borrow(2) as first:
+        with shared.borrow(2) as again:
+            assert again is first
+        pending = first.submit(pow, 2, 10)
+
+        # Another caller switches the worker count while `first` is still borrowed
+        with shared.borrow(1) as second:
+            assert second is not first
+            assert second.submit(pow, 3, 2).result(timeout=60) == 9
+        assert pending.result(timeout=60) == 1024
+        assert first.submit(pow, 2, 3).result(timeout=60) == 8
+
+    # Returned by its last borrower: shut down
+    with pytest.raises(RuntimeError):
+        first.submit(pow, 2, 2)
+    with shared.borrow(1) as current:
+        assert current is second
+    shared.discard(second)
+    with pytest.raises(RuntimeError):
+        second.submit(pow, 2, 2)
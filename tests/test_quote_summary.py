@@ -0,0 +1,59 @@
+import sys
+from unittest.mock import MagicMock, PropertyMock, patch
+
+# Mock yfinance before it is imported by the application code
+sys.modules.setdefault("yfinance", MagicMock())
+
+import datetime
+import pandas as pd
+import pytest
+from src.services.quote_summary import QuoteSummaryFetcher
+
+
+def _ticker():
+    t = MagicMock()
+    t.ticker = "ABC.NS"
+    t.info = {'shortName': 'ABC', 'longName': 'ABC Industries Ltd', 'sector': 'Industrials',
+              'industry': 'Machinery', 'marketCap': 250_000_000_000}
+    t.news = [{'content': {'title': 'ABC wins order',
+                           'canonicalUrl': {'url': 'https://example.com/abc'}}}]
+    t.calendar = {'Ex-Dividend Date': datetime.date(2026, 8, 14),
+                  'Earnings Date': [datetime.date(2026, 11, 2), datetime.date(2026, 11, 6)]}
+    t.major_holders = pd.DataFrame({'Value': [0.61]})
+    t.institutional_holders = pd.DataFrame({'Holder': ['Fund A']})
+    t.insider_transactions = pd.DataFrame({'Insider': ['CEO']})
+    type(t).mutualfund_holders = PropertyMock(side_effect=KeyError('mutualfund'))
+    return t
+
+
+def test_one_ticker_serves_every_part():
+    t = _ticker()
+    with patch("src.services.quote_summary.yf") as yf:
+        yf.Ticker.return_value = t
+        record = QuoteSummaryFetcher().fetch("ABC.NS")
+
+    yf.Ticker.assert_called_once_with("ABC.NS")
+    assert record.errors == {}
+    assert (record.name, record.sector, record.industry) == ('ABC Industries Ltd', 'Industrials', 'Machinery')
+    assert record.market_cap_cr == 25_000
+    assert record.news == ('ABC wins order', 'https://example.com/abc')
+    assert record.corporate_actions == {'Ex-Dividend': datetime.date(2026, 8, 14),
+                                        'Earnings': datetime.date(2026, 11, 2)}
+    assert record.shareholding['institutional_holders']['Holder'].tolist() == ['Fund A']
+    # A missing holders table does not fail the rest of the part
+    assert record.shareholding['mutualfund_holders'] is None
+    assert record.insider_transactions['Insider'].tolist() == ['CEO']
+
+
+def test_failed_parts_are_recorded_and_profile_raises():
+    t = _ticker()
+    type(t).news = PropertyMock(side_effect=ConnectionError("reset by peer"))
+    with patch("src.services.quote_summary.yf") as yf:
+        yf.Ticker.return_value = t
+        record = QuoteSummaryFetcher().fetch("ABC.NS", ('news', 'calendar'))
+        assert record.errors == {'news': 'reset by peer'}
+        assert record.news == (None, None) and record.corporate_actions
+
+        type(t).info = PropertyMock(side_effect=Exception("404 Client Error: Not Found"))
+        with pytest.raises(Exception, match="404"):
+            QuoteSummaryFetcher().profile("ABC.NS")
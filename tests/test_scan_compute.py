@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.config.settings import Config
+from src.services.indicator_cache import indicator_cache
+from src.services.indicators import IndicatorService
+from src.services import scan_compute
+from src.services.process_pool import SharedProcessPool
+from src.services.scan_compute import CHART_CANDLES, ScanCompute, _chart_arrays
+from src.services.scoring import ScoringService
+from src.services.strategy import Strategy
+
+
+def _frames(n_symbols=6, n_days=260, seed=3):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n_days, freq="D", name="timestamp")
+    frames = {}
+    for symbol_id in range(1, n_symbols + 1):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        frames[symbol_id] = pd.DataFrame({
+            'open': close * 0.995, 'high': close * 1.01, 'low': close * 0.985, 'close': close,
+            'volume': rng.integers(1000, 9000, n_days).astype(float),
+        }, index=index)
+    return frames
+
+
+@pytest.fixture
+def shared_pool(monkeypatch):
+    # A pool of the test's own, so worker start-up is not carried over between tests
+    shared = SharedProcessPool("test scan compute")
+    monkeypatch.setattr(scan_compute, "_pool", shared)
+    yield shared
+    if shared._pool is not None:
+        shared.discard(shared._pool)
+
+
+@pytest.mark.parametrize("workers, engine", [(1, "numpy"), (2, "numpy"), (2, "pandas")])
+def test_process_pool_matches_in_process_computation(workers, engine, shared_pool, monkeypatch):
+    monkeypatch.setattr(Config, "INDICATOR_ENGINE", engine)
+    indicator_cache.clear()
+    frames = _frames()
+    # The scorer is pickled once per worker process, not with every batch
+    pickled = []
+    monkeypatch.setattr(ScoringService, "__getstate__", lambda self: pickled.append(1) or self.__dict__, raising=False)
+    scoring_service = ScoringService()
+    strategies = [scoring_service.strategy, Strategy("tight", rsi_oversold_threshold=25)]
+    compute = ScanCompute(workers, scoring_service, strategies)
+
+    computed = compute.indicators(frames)
+    service = IndicatorService(None)
+    for symbol_id, df in frames.items():
+        pd.testing.assert_frame_equal(computed[symbol_id], service.calculate_indicators(df.copy(), engine=engine))
+    # A second pass is served from the scan process's indicator cache
+    hits = indicator_cache.stats()['hits']
+    assert compute.indicators(frames)[1] is computed[1]
+    assert indicator_cache.stats()['hits'] == hits + len(frames)
+
+    ids, scores = compute.score(computed)
+    expected_ids, expected = scoring_service.score_strategies(computed, strategies)
+    assert ids == expected_ids
+    for name, result in expected.items():
+        for key, values in result.items():
+            np.testing.assert_array_equal(scores[name][key], values)
+    started = len(pickled)
+    for _ in range(3):
+        compute.score(computed)
+    # (worker processes are started on demand, up to `workers`)
+    assert (0 < started <= workers if workers > 1 else started == 0) and len(pickled) == started
+
+
+def test_scans_with_the_same_strategies_share_one_pool(shared_pool):
+    frames = {symbol_id: IndicatorService(None).calculate_indicators(df, engine="numpy")
+              for symbol_id, df in _frames(n_symbols=2).items()}
+    pools = []
+    for _ in range(2):
+        # Each scan builds its own scorer and strategy objects
+        compute = ScanCompute(2, ScoringService(), [Strategy(), Strategy("tight", rsi_oversold_threshold=25)])
+        compute.score(frames)
+        pools.append(shared_pool._pool)
+    assert pools[0] is not None and pools[1] is pools[0]
+
+    changed = ScanCompute(2, ScoringService(), [Strategy(), Strategy("tight", rsi_oversold_threshold=20)])
+    changed.score(frames)
+    assert shared_pool._pool is not pools[0]
+
+
+def test_chart_timestamps_are_sent_as_epoch_nanoseconds():
+    df = _frames(n_symbols=1)[1]
+    df.index = df.index.as_unit('s').tz_localize('Asia/Kolkata')
+    index, _ = _chart_arrays(df)
+    assert pd.DatetimeIndex(index).equals(df.index[-CHART_CANDLES:].tz_localize(None).as_unit('ns'))
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+import pytz
+from src.models.models import ScanItem, ScanRun
+from src.services.scan_ledger import ALERTED, COMPLETED, INGESTED, STOPPED, ScanLedger
+
+
+def test_restarted_scan_resumes_only_unfinished_items(session_factory):
+    ledger = ScanLedger(session_factory)
+    assert not ledger.resume()
+    ledger.start([1, 2, 3, 4])
+
+    ledger.mark([1, 2, 3], INGESTED)
+    ledger.mark_scored([(1, 101, False), (2, 102, True)])
+    ledger.mark([2], ALERTED)
+    ledger.mark_scored([(3, 103, True)])
+    # Moving an item backwards is ignored
+    ledger.mark([2], INGESTED)
+    # The process dies here: 3 was scored but not alerted, 4 never got past pending
+
+    resumed = ScanLedger(session_factory)
+    assert resumed.resume()
+    assert resumed.run_id == ledger.run_id and resumed.resumed
+    assert [symbol_id for symbol_id in resumed.symbol_ids if not resumed.state(symbol_id).finished] == [3, 4]
+    assert resumed.state(2).state == ALERTED
+    assert resumed.state(3).qualified and resumed.state(3).signal_id == 103
+    assert resumed.summary() == {'run_id': ledger.run_id, 'resumed': True, 'items': 4,
+                                 'finished': 2, 'signals': 2, 'alerted': 1}
+
+    # Stopping at the time budget keeps the run resumable; completing it does not
+    resumed.finish(STOPPED)
+    again = ScanLedger(session_factory)
+    assert again.resume()
+    again.mark([3], ALERTED)
+    again.mark_scored([(4, 104, False)])
+    assert again.complete
+    again.finish(COMPLETED)
+    assert not ScanLedger(session_factory).resume()
+
+    db = session_factory()
+    run = db.query(ScanRun).one()
+    assert (run.status, run.resumes, run.total_items) == (COMPLETED, 2, 4)
+    assert run.finished_at is not None
+    assert dict(db.query(ScanItem.symbol_id, ScanItem.state)) == {1: 'scored', 2: 'alerted', 3: 'alerted', 4: 'scored'}
+    db.close()
+
+
+def test_runs_outside_the_resume_window_are_not_resumed(session_factory):
+    db = session_factory()
+    db.add(ScanRun(status='running', total_items=0, started_at=datetime.now(pytz.UTC) - timedelta(hours=6)))
+    db.commit()
+    db.close()
+
+    assert not ScanLedger(session_factory).resume(window_hours=3)
+    assert not ScanLedger(session_factory).resume(window_hours=0)
+    assert ScanLedger(session_factory).resume(window_hours=12)
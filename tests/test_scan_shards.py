@@ -0,0 +1,63 @@
+import time
+from src.services.scan_shards import ShardQueue, merge_stage_reports
+
+
+def test_workers_claim_distinct_shards_until_none_is_left(session_factory):
+    queue = ShardQueue(session_factory, lease_seconds=60)
+    assert queue.plan(1, range(1, 26), shard_size=10) == 3
+    # Planning a resumed run keeps its shards
+    assert queue.plan(1, range(1, 26), shard_size=5) == 3
+    assert queue.open_run() == 1
+
+    first = queue.claim(1, "worker-a")
+    second = queue.claim(1, "worker-b")
+    third = queue.claim(1, "worker-a")
+    assert [first.position, second.position, third.position] == [0, 1, 2]
+    assert first.symbol_ids == list(range(1, 11)) and third.symbol_ids == list(range(21, 26))
+    assert queue.claim(1, "worker-b") is None and queue.open_run() is None
+
+    # Only the lease holder can heartbeat or complete a shard
+    assert queue.heartbeat(first.id, "worker-a")
+    assert not queue.heartbeat(first.id, "worker-b")
+    assert not queue.complete(second.id, "worker-a", {'items': 10})
+    for shard, owner in ((first, "worker-a"), (second, "worker-b"), (third, "worker-a")):
+        assert queue.complete(shard.id, owner, {'items': len(shard.symbol_ids)})
+
+    assert queue.progress(1) == {'pending': 0, 'leased': 0, 'done': 3, 'failed': 0, 'open': 0}
+    assert [(row['shard'], row['owner'], row['items']) for row in queue.results(1)] == [
+        (0, "worker-a", 10), (1, "worker-b", 10), (2, "worker-a", 5)
+    ]
+
+
+def test_expired_lease_of_a_crashed_worker_is_reclaimed(session_factory):
+    queue = ShardQueue(session_factory, lease_seconds=0.2, max_attempts=2)
+    queue.plan(7, [1, 2, 3], shard_size=3)
+
+    crashed = queue.claim(7, "worker-a")  # never heartbeats again
+    assert queue.claim(7, "worker-b") is None
+    time.sleep(0.3)
+
+    reclaimed = queue.claim(7, "worker-b")
+    assert reclaimed.id == crashed.id and reclaimed.attempts == 2
+    # The old owner lost its lease: its heartbeat and result are refused
+    assert not queue.heartbeat(crashed.id, "worker-a")
+    assert not queue.complete(crashed.id, "worker-a", {})
+
+    # Out of attempts: an error (or another expiry) gives the shard up until the run is resumed
+    queue.release(reclaimed.id, "worker-b", reclaimed.attempts)
+    assert queue.progress(7)['failed'] == 1 and queue.claim(7, "worker-c") is None
+    queue.plan(7, [1, 2, 3])
+    assert queue.claim(7, "worker-c").attempts == 1
+
+
+def test_stage_reports_are_summed_across_shards():
+    merged = merge_stage_reports([
+        [{'stage': 'ingest', 'items_in': 10, 'items_out': 10, 'errors': 0, 'busy_seconds': 1.25},
+         {'stage': 'score', 'items_in': 4, 'items_out': 1, 'errors': 1, 'busy_seconds': 0.5}],
+        None,
+        [{'stage': 'ingest', 'items_in': 5, 'items_out': 4, 'errors': 1, 'busy_seconds': 0.5}],
+    ])
+    assert merged == [
+        {'stage': 'ingest', 'shards': 2, 'items_in': 15, 'items_out': 14, 'errors': 1, 'busy_seconds': 1.75},
+        {'stage': 'score', 'shards': 1, 'items_in': 4, 'items_out': 1, 'errors': 1, 'busy_seconds': 0.5},
+    ]
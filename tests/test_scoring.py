@@ -1,7 +1,8 @@
+import numpy as np
 import pytest
 import pandas as pd
 from src.services.scoring import ScoringService
-from src.config.settings import Config
+from src.services.strategy import Strategy
 
 @pytest.fixture
 def scoring_service():
@@ -67,3 +68,128 @@ def test_scoring_neutral(scoring_service):
     result = scoring_service.score_signal(row)
     assert result['direction'] == "NEUTRAL"
     assert result['score'] == 0
+
+
+def _random_indicator_frame(n, seed):
+    """Indicator-like frame that regularly hits the oversold/overbought rules."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, n))
+    sma200 = np.where(np.arange(n) < n // 3, np.nan, 100 + rng.normal(0, 8, n))
+    return pd.DataFrame({
+        'RSI': np.clip(50 + np.cumsum(rng.normal(0, 6, n)), 5, 95),
+        'close': close,
+        'SMA_200': sma200,
+        'HA_Green': rng.random(n) < 0.5,
+        'HA_Close': close + rng.normal(0, 1, n),
+        'Vol_Z': rng.normal(0.5, 1, n),
+        'volume': rng.integers(500, 3000, n).astype(float),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='D'))
+
+
+CONFIG_VARIANTS = [
+    {},
+    {'RSI_RISING_CANDLES': None, 'HA_CONSECUTIVE_CANDLES': None},
+    {'HA_CONSECUTIVE_CANDLES': 1, 'VOLUME_MULTIPLIER': None, 'MAX_DISTANCE_BELOW_SMA200_PERCENT': None},
+    {'RSI_OVERSOLD_THRESHOLD': None, 'RSI_OVERBOUGHT_THRESHOLD': None, 'RSI_RISING_CANDLES': 3},
+    {'PRIMARY_WINDOW_CANDLES': None, 'CONFIRMATION_WINDOW_CANDLES': 2},
+]
+
+
+def _variant(overrides):
+    return Strategy("variant", **{key.lower(): value for key, value in overrides.items()})
+
+
+def _truncated_frames():
+    """Frames cut at many points so latest rows cover every outcome and length."""
+    frames = {}
+    for seed in range(6):
+        df = _random_indicator_frame(150, seed)
+        for end in range(2, 151, 3):
+            frames[len(frames)] = df.iloc[:end]
+    return frames
+
+
+@pytest.mark.parametrize("overrides", CONFIG_VARIANTS)
+@pytest.mark.parametrize("n", [40, 150])
+def test_score_frame_matches_score_signal(overrides, n):
+    """Vectorized scoring agrees with the row-by-row scorer on every row."""
+    scoring_service = ScoringService(_variant(overrides))
+
+    for seed in range(8):
+        df = _random_indicator_frame(n, seed)
+        vectorized = scoring_service.score_frame(df)
+
+        for i in range(n):
+            expected = scoring_service.score_signal(df.iloc[i], df)
+            assert vectorized['score'].iloc[i] == expected['score'], (seed, i)
+            assert vectorized['direction'].iloc[i] == expected['direction'], (seed, i)
+            assert vectorized['confidence'].iloc[i] == expected['confidence'], (seed, i)
+
+
+def test_reasons_for_alerted_rows(scoring_service):
+    df = _random_indicator_frame(150, seed=3)
+    scores = scoring_service.score_frame(df)
+    alerted = np.flatnonzero(scores['direction'].values != "NEUTRAL")
+
+    reasons = scoring_service.reasons_for(df, alerted)
+
+    assert set(reasons) == set(alerted.tolist())
+    assert all(reasons[p] for p in reasons)
+
+
+@pytest.mark.parametrize("overrides", CONFIG_VARIANTS)
+def test_score_batch_matches_score_signal(overrides):
+    """Cross-sectional scoring of latest rows agrees with per-symbol score_signal."""
+    scoring_service = ScoringService(_variant(overrides))
+    frames = _truncated_frames()
+
+    symbol_ids, matrix = scoring_service.latest_feature_matrix(frames)
+    batch = scoring_service.score_batch(matrix)
+
+    assert matrix.shape == (len(frames), len(scoring_service.FEATURE_COLUMNS))
+    for row, symbol_id in enumerate(symbol_ids):
+        df = frames[symbol_id]
+        expected = scoring_service.score_signal(df.iloc[-1], df)
+        assert batch['score'][row] == expected['score'], symbol_id
+        assert batch['direction'][row] == expected['direction'], symbol_id
+        assert batch['confidence'][row] == expected['confidence'], symbol_id
+
+
+def test_score_strategies_matches_each_strategy():
+    """K strategies scored over one shared panel match scoring each separately."""
+    strategies = [_variant(overrides) for overrides in CONFIG_VARIANTS]
+    for k, strategy in enumerate(strategies):
+        strategy.name = f"variant{k}"
+    frames = _truncated_frames()
+
+    symbol_ids, results = ScoringService().score_strategies(frames, strategies)
+
+    assert list(results) == [s.name for s in strategies]
+    for strategy in strategies:
+        single = ScoringService(strategy)
+        single_ids, matrix = single.latest_feature_matrix(frames)
+        expected = single.score_batch(matrix)
+        assert single_ids == symbol_ids
+        for key in ("score", "direction", "confidence"):
+            np.testing.assert_array_equal(results[strategy.name][key], expected[key])
+
+
+def test_strategy_profiles_from_environment():
+    environ = {
+        "STRATEGY_AGGRESSIVE_RSI_OVERSOLD_THRESHOLD": "35",
+        "STRATEGY_AGGRESSIVE_HA_CONSECUTIVE_CANDLES": "NA",
+        "STRATEGY_AGGRESSIVE_VOLUME_AVERAGE_PERIOD": "10",
+    }
+    default, aggressive = Strategy.load_profiles(["aggressive", "default"], environ)
+
+    assert default.name == "default" and aggressive.name == "aggressive"
+    assert aggressive.rsi_oversold_threshold == 35.0
+    assert aggressive.ha_consecutive_candles is None and not aggressive.ha_filter
+    assert aggressive.volume_average_key == "vol_avg_10"
+    assert aggressive.rsi_overbought_threshold == default.rsi_overbought_threshold
+    assert aggressive.version != default.version
+
+
+def test_strategy_rejects_unknown_parameter():
+    with pytest.raises(ValueError):
+        Strategy("bad", rsi_threshold=30)
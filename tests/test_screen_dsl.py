@@ -0,0 +1,105 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock yfinance before it is imported by the application code
+sys.modules.setdefault("yfinance", MagicMock())
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.services import indicator_kernels, screen_dsl
+from src.services.data_version import bump_version
+from src.services.screen_dsl import CORE_SCREEN, ScreenError, ScreenQueryService, compile_screen, panel_fields
+from src.services.stock_screener import screen_panel
+from tests.test_stock_screener import _seed
+
+
+FIELDS = {
+    'rsi14': np.array([25.0, 40.0, 30.0, np.nan]),
+    'close': np.array([110.0, 120.0, 90.0, 100.0]),
+    'sma200': np.array([100.0, 100.0, 100.0, np.nan]),
+    'volume': np.array([3000.0, 1000.0, 2000.0, 500.0]),
+    'vol_avg_20': np.array([1000.0, 1000.0, 1000.0, 1000.0]),
+    'ha_green': np.array([True, True, False, True]),
+    'hammer': np.array([False, True, False, False]),
+}
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("rsi14 between 20 and 35 and ha_green and close > sma200", [True, False, False, False]),
+    ("RSI between 20 and 35", [True, False, True, False]),
+    ("ha_green and hammer or rsi14 < 28", [True, True, False, False]),
+    ("ha_green and (hammer or rsi14 < 28)", [True, True, False, False]),
+    ("not ha_green or volume >= 2 * vol_avg_20", [True, False, True, False]),
+    ("(close - sma200) / sma200 * 100 > 5", [True, True, False, False]),
+    ("not close > sma200", [False, False, True, True]),
+    ("-rsi14 < -.5e2 + 20", [False, True, False, False]),
+])
+def test_expressions_compile_to_masks(expression, expected):
+    assert compile_screen(expression).evaluate(FIELDS).tolist() == expected
+
+
+def test_referenced_fields_are_reported():
+    screen = compile_screen("rsi between 20 and 35 and ha_green")
+    assert screen.fields == ['ha_green', 'rsi14']
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("rsi14 between 20 and", "Expected a field"),
+    ("rsi14 > 30 and (ha_green", "Expected )"),
+    ("close >> sma200", "Expected a field"),
+    ("close > sma200 $", "Unexpected character '$'"),
+    ("pe_ratio < 20", "Unknown field 'pe_ratio'"),
+    ("rsi14 and ha_green", "'and' needs a condition, got number field 'rsi14'"),
+    ("ha_green > 1", "'>' needs a number, got bool field 'ha_green'"),
+    ("close + 1", "A screen needs a condition"),
+    ("   ", "Empty screen expression"),
+])
+def test_invalid_expressions_are_rejected(expression, message):
+    with pytest.raises(ScreenError, match=message.replace("(", r"\(").replace(")", r"\)").replace("$", r"\$")):
+        compile_screen(expression)
+
+
+def test_core_screen_matches_screener_core_conditions():
+    rng = np.random.default_rng(3)
+    frames = {}
+    for s in range(40):
+        n = 150 + 10 * s
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        open_ = close * (1 + rng.normal(0, 0.005, n))
+        frames[s] = pd.DataFrame({
+            'open': open_, 'high': np.maximum(open_, close) * 1.01, 'low': np.minimum(open_, close) * 0.99,
+            'close': close, 'volume': rng.integers(1000, 5000, n).astype(float),
+        })
+    _, panel, lengths = indicator_kernels.stack_panel(frames)
+
+    fields = panel_fields(panel, lengths)
+    expected = screen_panel(panel, lengths)
+    assert compile_screen(CORE_SCREEN).evaluate(fields).tolist() == expected['core'].tolist()
+    core = expected['core']
+    assert core.any()
+    assert fields['macd_bullish'][core].tolist() == expected['macd_bullish'][core].tolist()
+    # Same bullish-pattern condition as /screen-stocks (morning star alone does not count)
+    assert fields['bullish_pattern'].tolist() == (fields['hammer'] | fields['bullish_engulfing']).tolist()
+
+
+def test_query_service_rebuilds_universe_on_new_data(db_session, monkeypatch):
+    monkeypatch.setattr(screen_dsl, "_universe", None)
+    dip = _seed(db_session, "DIP.NS", 200000, -0.008)
+    _seed(db_session, "RALLY.NS", 200000, 0.008)
+    _seed(db_session, "SMALL.NS", 5000, -0.008)
+
+    service = ScreenQueryService(db_session)
+    result = service.run(f"{CORE_SCREEN} and market_cap_cr >= 100000")
+    assert result['universe'] == 3 and result['count'] == 1
+    assert result['matches'][0]['ticker'] == dip.ticker
+    assert 20 <= result['matches'][0]['rsi14'] <= 35 and result['matches'][0]['ha_green'] is True
+
+    universe = service.universe()
+    assert service.universe() is universe
+    bump_version(db_session)
+    db_session.commit()
+    assert service.universe() is not universe
+
+    assert service.run("rsi14 > 0", limit=1)['count'] == 3
+    assert len(service.run("rsi14 > 0", limit=1)['matches']) == 1
@@ -0,0 +1,65 @@
+import threading
+import time
+import pytest
+from src.services.data_version import bump_version, current_version
+from src.services.screening_cache import ScreeningCache
+
+
+def test_concurrent_misses_compute_once():
+    cache = ScreeningCache(max_entries=4)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"stocks": ["A"], "complete": True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(("k",), compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["shared"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["computed"] + ["shared"] * 4
+    assert all(payload == {"stocks": ["A"], "complete": True} for payload, _ in results)
+    assert cache.get_or_compute(("k",), compute)[1] == "hit"
+
+
+def test_partial_results_and_errors_are_not_cached():
+    cache = ScreeningCache(max_entries=4)
+
+    payload, source = cache.get_or_compute(("k",), lambda: {"complete": False}, cacheable=lambda p: p["complete"])
+    assert source == "computed" and ("k",) not in cache
+
+    def fail():
+        raise RuntimeError("db down")
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(("e",), fail)
+    assert cache.get_or_compute(("e",), lambda: {"complete": True})[1] == "computed"
+
+
+def test_lru_eviction_and_etag_follows_key():
+    cache = ScreeningCache(max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.get_or_compute((name,), lambda: {"complete": True})
+
+    assert ("a",) not in cache and ("b",) in cache and ("c",) in cache
+    assert cache.etag((100000.0, "1", "2", 3)) == cache.etag((100000.0, "1", "2", 3))
+    assert cache.etag((100000.0, "1", "2", 3)) != cache.etag((100000.0, "1", "2", 4))
+
+
+def test_data_version_bumps_on_commit(db_session):
+    assert current_version(db_session) == 0
+    bump_version(db_session)
+    db_session.commit()
+    bump_version(db_session)
+    db_session.commit()
+    assert current_version(db_session) == 2
+    assert current_version(db_session, "other") == 0
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from src.models.models import OHLCV, SignalOutcome, Symbol, TradeSignal
+from src.services.signal_outcomes import SignalOutcomeService
+
+
+def _add_symbol(db, ticker, closes, start):
+    symbol = Symbol(ticker=ticker)
+    db.add(symbol)
+    db.flush()
+    for day, close in enumerate(closes):
+        db.add(OHLCV(symbol_id=symbol.id, timestamp=start + timedelta(days=day),
+                     open=close, high=close * 1.01, low=close * 0.99, close=close, volume=1000))
+    db.commit()
+    return symbol
+
+
+def _add_signal(db, symbol, generated_at, direction, confidence="High", **levels):
+    signal = TradeSignal(symbol_id=symbol.id, generated_at=generated_at, direction=direction,
+                         score=5, confidence=confidence, **levels)
+    db.add(signal)
+    db.commit()
+    return signal
+
+
+def test_forward_returns_and_hits(db_session):
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=40)
+    closes = 100 * 1.01 ** np.arange(41)  # +1% per day
+    symbol = _add_symbol(db_session, "UP.NS", closes, start)
+
+    # Generated in the evening of day 5: anchored to day 5's close
+    long_signal = _add_signal(db_session, symbol, start + timedelta(days=5, hours=16), "LONG")
+    short_signal = _add_signal(db_session, symbol, start + timedelta(days=5, hours=16), "SHORT", stop_loss=closes[5] * 1.03)
+    _add_signal(db_session, symbol, start + timedelta(days=5, hours=16), "NEUTRAL")
+
+    assert SignalOutcomeService(db_session).update() == 2
+
+    long_outcome = db_session.query(SignalOutcome).filter_by(signal_id=long_signal.id).one()
+    assert long_outcome.entry_price == pytest.approx(closes[5])
+    for horizon in (1, 5, 10, 20):
+        assert long_outcome.__dict__[f'return_{horizon}d'] == pytest.approx((1.01 ** horizon - 1) * 100)
+    assert long_outcome.completed and long_outcome.bars_tracked == 20
+    assert long_outcome.target_hit and not long_outcome.sl_hit
+    assert long_outcome.first_hit == "TARGET"
+    assert long_outcome.mfe_pct == pytest.approx((1.01 ** 20 * 1.01 - 1) * 100)
+    assert long_outcome.mae_pct == pytest.approx((1.01 * 0.99 - 1) * 100)
+
+    short_outcome = db_session.query(SignalOutcome).filter_by(signal_id=short_signal.id).one()
+    assert short_outcome.return_5d == pytest.approx(-(1.01 ** 5 - 1) * 100)
+    assert short_outcome.stop_loss == pytest.approx(closes[5] * 1.03)
+    assert short_outcome.first_hit == "STOPLOSS" and not short_outcome.target_hit
+
+    # Completed outcomes are not reprocessed
+    assert SignalOutcomeService(db_session).update() == 0
+
+
+def test_returns_are_measured_from_the_stored_entry_price(db_session):
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=8)
+    symbol = _add_symbol(db_session, "INTRA.NS", [100.0] * 9, start)
+    # Alerted intraday at 95, below the day's final close of 100
+    signal = _add_signal(db_session, symbol, start + timedelta(days=2, hours=5), "LONG", entry_price=95.0)
+
+    assert SignalOutcomeService(db_session).update() == 1
+    outcome = db_session.query(SignalOutcome).filter_by(signal_id=signal.id).one()
+    assert outcome.entry_price == pytest.approx(95.0)
+    assert outcome.return_5d == pytest.approx((100 / 95 - 1) * 100)
+    assert outcome.target == pytest.approx(95 * 1.10)
+    assert outcome.mfe_pct == pytest.approx((101 / 95 - 1) * 100)
+
+
+def test_incremental_update_only_touches_new_bars(db_session):
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=8)
+    symbol = _add_symbol(db_session, "FLAT.NS", [100.0] * 9, start)
+    signal = _add_signal(db_session, symbol, start + timedelta(days=2, hours=16), "LONG")
+
+    service = SignalOutcomeService(db_session)
+    assert service.update() == 1
+    outcome = db_session.query(SignalOutcome).filter_by(signal_id=signal.id).one()
+    assert outcome.bars_tracked == 6 and not outcome.completed
+    assert outcome.return_5d == pytest.approx(0) and outcome.return_10d is None
+
+    assert service.update() == 0  # no new candles
+
+    db_session.add(OHLCV(symbol_id=symbol.id, timestamp=start + timedelta(days=9),
+                         open=110, high=111, low=109, close=110, volume=1000))
+    db_session.commit()
+    assert service.update() == 1
+    db_session.refresh(outcome)
+    assert outcome.bars_tracked == 7
+    assert outcome.first_hit == "TARGET" and outcome.mfe_pct == pytest.approx(11)
+
+
+def test_performance_groups(db_session):
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
+    up = _add_symbol(db_session, "UP.NS", 100 * 1.01 ** np.arange(31), start)
+    down = _add_symbol(db_session, "DOWN.NS", 100 * 0.99 ** np.arange(31), start)
+    _add_signal(db_session, up, start + timedelta(days=1, hours=16), "LONG", confidence="High")
+    _add_signal(db_session, down, start + timedelta(days=1, hours=16), "LONG", confidence="Low")
+    _add_signal(db_session, down, start + timedelta(days=2, hours=16), "LONG", confidence="Low")
+
+    service = SignalOutcomeService(db_session)
+    service.update()
+    report = service.performance(group_by="confidence")
+
+    assert report["overall"]["signals"] == 3
+    groups = {g["confidence"]: g for g in report["groups"]}
+    assert groups["High"]["win_rate_5d"] == 100
+    assert groups["Low"]["win_rate_5d"] == 0
+    assert groups["Low"]["signals"] == 2 and groups["Low"]["sl_hit_rate"] == 100
+    assert groups["High"]["avg_return_1d"] == pytest.approx(1.0)
+
+    assert service.performance(group_by="symbol")["groups"][0]["symbol"] == "DOWN.NS"
+    with pytest.raises(ValueError):
+        service.performance(group_by="sector")
@@ -0,0 +1,151 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock yfinance before it is imported by the application code
+sys.modules.setdefault("yfinance", MagicMock())
+
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from src.config.settings import Config
+from src.models.models import OHLCV, Symbol, SymbolState
+from src.services import candle_patterns
+from src.services.indicators import IndicatorService
+from src.services.stock_screener import StockScreener
+
+
+def _seed(db_session, ticker, market_cap_cr, daily_change, days=300):
+    """Flat history, then a steady trend and a three-day bounce, ending today."""
+    symbol = Symbol(ticker=ticker, name=ticker, sector="Test", market_cap_cr=market_cap_cr, is_active=True)
+    db_session.add(symbol)
+    db_session.flush()
+
+    changes = np.r_[np.ones(days - 60), np.full(57, 1 + daily_change), [1.01, 1.015, 1.02]]
+    close = 100 * np.cumprod(changes)
+    open_ = np.r_[close[0], close[:-1]]
+    end = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(days):
+        db_session.add(OHLCV(
+            symbol_id=symbol.id, timestamp=end - timedelta(days=days - 1 - i),
+            open=open_[i], high=max(open_[i], close[i]) * 1.005, low=min(open_[i], close[i]) * 0.995,
+            close=close[i], volume=1000 + i
+        ))
+    db_session.commit()
+    return symbol
+
+
+def _assert_same_stocks(actual, expected):
+    """Screening results are equal up to float rounding (the panel path uses the array kernels)."""
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert got.keys() == want.keys()
+        for key, value in want.items():
+            assert got[key] == (pytest.approx(value) if isinstance(value, float) else value)
+
+
+def test_screen_frames_matches_standalone_screening(db_session):
+    oversold = _seed(db_session, "DIP.NS", 200000, -0.008)
+    _seed(db_session, "RALLY.NS", 200000, 0.008)
+    _seed(db_session, "SMALL.NS", 5000, -0.008)
+
+    screener = StockScreener(db_session)
+    standalone = screener.screen_large_cap_stocks(min_market_cap_cr=100000)
+    assert [stock['ticker'] for stock in standalone] == [oversold.ticker]
+
+    # Same result from frames computed once by the caller (as run_scan does)
+    service = IndicatorService(db_session)
+    large_caps = screener.large_cap_symbols(100000)
+    frames = service.load_data_many([symbol.id for symbol in large_caps])
+    indicator_frames = {symbol_id: service.calculate_indicators(df) for symbol_id, df in frames.items()}
+    shared = screener.screen_frames(large_caps, indicator_frames)
+
+    assert shared == standalone
+    assert 20 <= shared[0]['rsi'] <= 35 and shared[0]['ha_color'] == 'Green'
+
+
+def test_parallel_screening_streams_chunks_and_matches_sequential(db_session, monkeypatch):
+    monkeypatch.setattr(Config, "SCREENER_SQL_PREFILTER", False)  # chunk over every large cap
+    for k, days in enumerate((300, 280, 260)):
+        _seed(db_session, f"DIP{k}.NS", 200000, -0.008, days=days)
+    _seed(db_session, "RALLY.NS", 200000, 0.008)
+    _seed(db_session, "SHORT.NS", 200000, -0.008, days=120)
+
+    screener = StockScreener(db_session)
+    expected = screener.screen_large_cap_stocks(min_market_cap_cr=100000)
+    assert len(expected) == 3
+
+    events = list(screener.iter_screen(100000, workers=1, chunk_size=2, deadline_seconds=0))
+    assert [event["type"] for event in events] == ["chunk", "chunk", "chunk", "summary"]
+    assert [event["screened"] for event in events[:-1]] == [2, 4, 5]
+    assert events[-1]["complete"] and events[-1]["total"] == 5
+
+    for workers in (1, 2):
+        result = screener.screen_parallel(100000, workers=workers, chunk_size=2, deadline_seconds=0)
+        assert result["complete"] and result["screened"] == 5
+        _assert_same_stocks(sorted(result["stocks"], key=lambda stock: stock['ticker']),
+                            sorted(expected, key=lambda stock: stock['ticker']))
+
+
+def test_parallel_screening_stops_at_deadline(db_session):
+    _seed(db_session, "DIP.NS", 200000, -0.008)
+
+    result = StockScreener(db_session).screen_parallel(100000, workers=1, deadline_seconds=1e-9)
+
+    assert not result["complete"]
+    assert result["screened"] == 0 and result["total"] == 1 and result["stocks"] == []
+
+
+def test_sql_prefilter_loads_only_candidates(db_session, monkeypatch):
+    dip = _seed(db_session, "DIP.NS", 200000, -0.008)
+    rally = _seed(db_session, "RALLY.NS", 200000, 0.008)
+    _seed(db_session, "SHORT.NS", 200000, -0.008, days=120)
+
+    monkeypatch.setattr(Config, "SCREENER_SQL_PREFILTER", False)
+    expected = StockScreener(db_session).screen_large_cap_stocks(100000)
+    monkeypatch.setattr(Config, "SCREENER_SQL_PREFILTER", True)
+
+    screener = StockScreener(db_session)
+    loaded = []
+    load_data_many = IndicatorService.load_data_many
+    monkeypatch.setattr(IndicatorService, "load_data_many",
+                        lambda self, ids, **kwargs: loaded.append(sorted(ids)) or load_data_many(self, ids, **kwargs))
+
+    # First run builds the missing states, the history load is for the candidate only
+    assert screener.screen_large_cap_stocks(100000) == expected
+    assert db_session.query(SymbolState).count() == 3
+    assert loaded[-1] == [dip.id]
+
+    # Fresh states: no refresh, a single history load
+    loaded.clear()
+    _assert_same_stocks(screener.screen_parallel(100000, workers=1, deadline_seconds=0)["stocks"], expected)
+    assert loaded == [[dip.id]]
+
+    # A newer bar makes that symbol's state stale; it is refreshed before filtering
+    last = db_session.query(OHLCV).filter_by(symbol_id=rally.id).order_by(OHLCV.timestamp.desc()).first()
+    db_session.add(OHLCV(symbol_id=rally.id, timestamp=last.timestamp + timedelta(days=1),
+                         open=last.close, high=last.close, low=last.close, close=last.close, volume=1000))
+    db_session.commit()
+    assert screener.state_service.stale_ids([dip.id, rally.id]) == [rally.id]
+    loaded.clear()
+    screener.candidate_symbols(100000)
+    assert loaded == [[rally.id]]
+    assert screener.state_service.stale_ids([dip.id, rally.id]) == []
+
+    # So does the latest bar being rewritten in place (same timestamp)
+    last = db_session.query(OHLCV).filter_by(symbol_id=dip.id).order_by(OHLCV.timestamp.desc()).first()
+    last.volume += 500
+    db_session.commit()
+    assert screener.state_service.stale_ids([dip.id, rally.id]) == [dip.id]
+
+
+def test_bullish_pattern_condition_is_hammer_or_bullish_engulfing(db_session):
+    screener = StockScreener(db_session)
+    frame = pd.DataFrame({'open': [110, 100.5, 101], 'high': [111, 101.5, 108],
+                          'low': [100, 99.5, 100.8], 'close': [101, 100.8, 107]}, dtype=float)
+    assert candle_patterns.names_of(candle_patterns.compute(*(frame[c] for c in frame))[-1]) == ['morning_star']
+    assert not screener._check_bullish_pattern(frame)
+
+    frame.loc[2] = [100, 100.2, 94, 99.5]  # hammer
+    assert screener._check_bullish_pattern(frame)
@@ -8,7 +8,6 @@ from dotenv import load_dotenv
 from src.database.db import db_instance
 from src.models.models import Symbol
 from src.services.symbol_service import SymbolService
-import yfinance as yf
 
 # Configure logging
 logging.basicConfig(
@@ -44,19 +43,18 @@ def update_missing_symbol_info():
             try:
                 logger.info(f"Updating info for {symbol.ticker}...")
                 
-                # Fetch company info from yfinance
-                ticker_obj = yf.Ticker(symbol.ticker)
-                info = ticker_obj.info
+                # Fetch company profile from yfinance (one request)
+                profile = symbol_service.quote_fetcher.profile(symbol.ticker)
                 
                 # Update fields if they're missing
                 if not symbol.name:
-                    symbol.name = info.get('longName') or info.get('shortName', '')
+                    symbol.name = profile.name
                 
                 if not symbol.sector:
-                    symbol.sector = info.get('sector', '')
+                    symbol.sector = profile.sector
                 
                 if not symbol.industry:
-                    symbol.industry = info.get('industry', '')
+                    symbol.industry = profile.industry
                 
                 db.commit()
                 updated_count += 1